@@ -7,11 +7,10 @@ Local nutrition tracking application optimized for Raspberry Pi Zero 2W
 import hashlib
 import hmac
 import os
-import sqlite3
 import time
 from datetime import datetime, timezone
 
-from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask import Flask, g, jsonify, render_template, request, send_from_directory
 from flask_cors import CORS
 from werkzeug.exceptions import BadRequest
 
@@ -19,6 +18,7 @@ from werkzeug.exceptions import BadRequest
 from routes.auth import auth_bp
 from routes.dishes import dishes_bp
 from routes.fasting import fasting_bp
+from routes.helpers import close_db, get_db
 from routes.log import log_bp
 from routes.metrics import metrics_bp
 from routes.products import products_bp
@@ -30,8 +30,14 @@ from routes.system import system_bp
 from src.advanced_logging import structured_logger
 from src.config import Config
 from src.constants import ERROR_MESSAGES
+from src.migrations import LATEST_VERSION, migrate_database
+from src.monitoring import metrics_collector
+from src.nutrition_calculator import calc_tracer
+from src.query_stats import statement_stats
+from src.request_tracing import TracedJSONProvider, begin_trace, end_trace
 from src.security import SecurityHeaders
 from src.ssl_config import setup_security_middleware
+from src.task_manager import task_manager
 from src.utils import initialize_database, json_response
 
 # Cache for compatibility with tests (actual caching now in stats blueprint)
@@ -49,6 +55,7 @@ def safe_get_json():
 # Initialize Flask app
 app = Flask(__name__, static_folder="static", template_folder="templates")
 app.config.from_object(Config)
+app.json = TracedJSONProvider(app)
 
 # Set TESTING flag when FLASK_ENV is 'test' to disable rate limiting
 if os.environ.get("FLASK_ENV") == "test":
@@ -78,18 +85,84 @@ def add_security_headers(response):
     return SecurityHeaders.add_security_headers(response)
 
 
+# Calculation tracing: sampled into a ring buffer, or per request via header
+calc_tracer.configure(
+    sample_rate=Config.CALC_TRACE_SAMPLE_RATE, capacity=Config.CALC_TRACE_BUFFER_SIZE
+)
+
+
+# Slow SQL statements go to the structured slow-query log
+statement_stats.configure(slow_log=structured_logger.log_slow_query)
+
+
 # Add request logging
 @app.before_request
 def log_request_start():
     request.start_time = time.time()
+    if Config.CALC_TRACE_REQUESTS and request.headers.get("X-Calc-Trace"):
+        g.calc_trace_token = calc_tracer.begin_capture()
+
+
+@app.after_request
+def add_calc_trace_summary(response):
+    token = g.pop("calc_trace_token", None)
+    if token is not None:
+        records = calc_tracer.end_capture(token)
+        response.headers["X-Calc-Trace-Count"] = str(len(records))
+        app.logger.info(f"Calculation trace for {request.path}: {len(records)} calculations")
+    return response
+
+
+@app.teardown_request
+def end_calc_trace(exc):
+    # Requests that failed before after_request still release their trace scope
+    token = g.pop("calc_trace_token", None)
+    if token is not None:
+        calc_tracer.end_capture(token)
+
+
+# Request tracing: SQL, calculation and serialization spans per request
+@app.before_request
+def begin_request_trace():
+    if Config.REQUEST_TRACING:
+        begin_trace()
+        g.request_trace_log = Config.REQUEST_TRACE_REQUESTS and bool(
+            request.headers.get("X-Request-Trace")
+        )
+
+
+@app.after_request
+def finish_request_trace(response):
+    trace = end_trace()
+    if trace is None:
+        return response
+
+    duration = trace.elapsed()
+    metrics_collector.record_request_spans(request.endpoint or "unknown", trace.durations())
+    if Config.SERVER_TIMING:
+        response.headers["Server-Timing"] = trace.server_timing(duration)
+
+    slow = Config.REQUEST_TRACE_SLOW_MS and duration * 1000 >= Config.REQUEST_TRACE_SLOW_MS
+    if g.pop("request_trace_log", False) or slow:
+        # Queued: the background writer does the log and Elasticsearch I/O
+        structured_logger.enqueue_performance_event(
+            f"{request.method} {request.path}",
+            duration,
+            {
+                "endpoint": request.endpoint,
+                "status_code": response.status_code,
+                "trace": trace.to_dict(),
+            },
+        )
+    return response
 
 
 @app.after_request
 def log_request_end(response):
     duration = time.time() - getattr(request, "start_time", time.time())
 
-    # Log access event
-    structured_logger.log_access_event(
+    # Queue the access event; a background thread writes it
+    structured_logger.enqueue_access_event(
         method=request.method,
         path=request.path,
         status_code=response.status_code,
@@ -104,20 +177,8 @@ def log_request_end(response):
 # Database Connection Management
 # ============================================
 
-
-def get_db():
-    """Get database connection with proper configuration"""
-    db = sqlite3.connect(app.config["DATABASE"])
-    db.row_factory = sqlite3.Row
-
-    # Enable WAL mode for better concurrency (only for file databases)
-    if app.config["DATABASE"] != ":memory:":
-        db.execute("PRAGMA journal_mode = WAL")
-        db.execute("PRAGMA synchronous = NORMAL")
-
-    db.execute("PRAGMA foreign_keys = ON")
-
-    return db
+# Return pooled connections that a request did not close itself
+app.teardown_appcontext(close_db)
 
 
 def init_db():
@@ -263,10 +324,29 @@ def initialize_app():
         os.makedirs("logs", exist_ok=True)
         os.makedirs("backups", exist_ok=True)
 
-        # Initialize database if it doesn't exist
+        # Initialize database if it doesn't exist, otherwise apply pending
+        # schema migrations (a current database costs one PRAGMA read)
         if not os.path.exists(Config.DATABASE):
             init_db()
             app.logger.info("Database initialized")
+        elif migrate_database(Config.DATABASE, include_online=False) < LATEST_VERSION:
+            # Index builds marked online finish in the background
+            try:
+                task_manager.apply_online_migrations()
+            except Exception as e:
+                app.logger.warning(f"Could not schedule online migrations: {e}")
+
+        # Refresh stored product fields computed by an older calculator version
+        try:
+            task_manager.recompute_product_fields()
+        except Exception as e:
+            app.logger.warning(f"Could not schedule product recompute: {e}")
+
+        # Snapshot nutrition of log entries written before snapshots existed
+        try:
+            task_manager.snapshot_log_entries()
+        except Exception as e:
+            app.logger.warning(f"Could not schedule log snapshot: {e}")
 
         app.logger.info(f"🥗 Nutrition Tracker v{Config.VERSION} started")
 
@@ -1,5 +1,7 @@
 # Gunicorn configuration for Raspberry Pi 4 Model B 2018 ARM64
+import glob
 import multiprocessing
+import os
 
 # Server socket
 bind = "0.0.0.0:5000"
@@ -22,6 +24,44 @@ errorlog = "-"
 loglevel = "info"
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 
+# Prometheus multiprocess mode: workers write metric values to mmap files in
+# this directory and /metrics aggregates all of them. It must be set before
+# the app (and prometheus_client) is loaded, i.e. here, before preload.
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/nutrition-tracker-metrics"
+)
+if os.environ.get("NUTRITION_TRACKER_METRICS_OWNER") != str(os.getpid()):
+    # First load in this master (the file is re-read on HUP): drop files
+    # left by workers of a previous run. Only prometheus_client's own files:
+    # the directory may be operator-supplied and hold other things.
+    os.environ["NUTRITION_TRACKER_METRICS_OWNER"] = str(os.getpid())
+    for path in glob.glob(os.path.join(prometheus_multiproc_dir, "*.db")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    """Start per-worker background threads
+
+    Nothing may be running in the preloaded master: a fork taken while a
+    thread holds a lock (the sampler's, prometheus_client's) deadlocks the
+    worker.
+    """
+    from src.monitoring import system_monitor
+
+    system_monitor.start()
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of an exited worker; its counters stay in the totals"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid, prometheus_multiproc_dir)
+
+
 # Process naming
 proc_name = "nutrition-tracker"
 
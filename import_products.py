@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Bulk product import script
+
+Usage:
+    python import_products.py foods.csv
+    python import_products.py foods.ndjson --skip-existing
+    cat foods.csv | python import_products.py - --format csv
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from repositories.product_repository import ProductRepository
+from services.product_import_service import (
+    ProductImportService,
+    iter_csv_rows,
+    iter_json_rows,
+    iter_ndjson_rows,
+)
+from src.config import Config
+from src.constants import IMPORT_CHUNK_SIZE, IMPORT_FORMATS
+
+EXTENSION_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json"}
+
+
+def detect_format(path):
+    """Guess the import format from the file extension"""
+    return EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def read_rows(stream, import_format):
+    """Row iterator for the given format"""
+    if import_format == "csv":
+        return iter_csv_rows(stream)
+    if import_format == "ndjson":
+        return iter_ndjson_rows(stream)
+    data = json.load(stream)
+    if isinstance(data, dict):
+        data = data.get("products", [])
+    return iter_json_rows(data)
+
+
+def print_summary(summary, max_errors=20):
+    """Print the import summary and the first row errors"""
+    print(f"📦 Rows read: {summary['total_rows']} in {summary['chunks']} chunk(s)")
+    print(f"✅ Inserted: {summary['inserted']}, updated: {summary['updated']}")
+    if summary["skipped"]:
+        print(f"⏭️ Skipped existing: {summary['skipped']}")
+    print(f"⏱️ {summary['duration_seconds']}s ({summary['rows_per_second']} rows/s)")
+
+    if summary["failed"]:
+        print(f"❌ Failed rows: {summary['failed']}")
+        for error in summary["errors"][:max_errors]:
+            name = f" ({error['name']})" if error["name"] else ""
+            print(f"   row {error['row']}{name}: {'; '.join(error['errors'])}")
+        if summary["failed"] > max_errors:
+            print(f"   ... and {summary['failed'] - max_errors} more")
+    if summary["aborted"]:
+        print(f"❌ {summary['aborted']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import products from CSV, NDJSON or JSON")
+    parser.add_argument("path", help="File to import, or - for standard input")
+    parser.add_argument(
+        "--format", choices=IMPORT_FORMATS, help="Input format (default: by extension)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per transaction"
+    )
+    parser.add_argument(
+        "--skip-existing", action="store_true", help="Do not update products that already exist"
+    )
+    parser.add_argument("--database", default=Config.DATABASE, help="SQLite database file")
+    args = parser.parse_args(argv)
+
+    import_format = args.format or (detect_format(args.path) if args.path != "-" else None)
+    if not import_format:
+        parser.error("cannot detect the format, use --format")
+    if not os.path.exists(args.database):
+        print(f"❌ Database not found: {args.database} (run init_db.py first)")
+        return 1
+
+    print(f"📥 Importing {args.path} ({import_format}) into {args.database}...")
+
+    conn = sqlite3.connect(args.database)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        if args.path == "-":
+            stream = sys.stdin
+        else:
+            stream = open(args.path, encoding="utf-8-sig", newline="")
+        with stream:
+            service = ProductImportService(
+                ProductRepository(conn),
+                chunk_size=args.chunk_size,
+                update_existing=not args.skip_existing,
+            )
+            summary = service.import_rows(read_rows(stream, import_format))
+    finally:
+        conn.close()
+
+    print_summary(summary)
+    return 1 if summary["failed"] or summary["aborted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
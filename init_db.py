@@ -4,68 +4,39 @@
 import sqlite3
 import os
 from src.config import Config
+from src.migrations import BUSY_TIMEOUT, LATEST_VERSION, get_version, migrate
 
 def init_database():
-    """Initialize the database with schema"""
+    """Create the database or apply pending schema migrations"""
     print("🗄️ Checking database...")
     
     # Create data directory if it doesn't exist
     os.makedirs(os.path.dirname(Config.DATABASE), exist_ok=True)
     
-    # Check if database already exists
-    db_exists = os.path.exists(Config.DATABASE)
+    if os.path.exists(Config.DATABASE):
+        print("📊 Database already exists, checking schema version...")
     
-    if db_exists:
-        print("📊 Database already exists, checking schema...")
-        
-        # Connect and check if tables exist
-        conn = sqlite3.connect(Config.DATABASE)
-        try:
-            # Check for essential tables
-            cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='products'")
-            if cursor.fetchone():
-                # Check for fasting tables
-                cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='fasting_sessions'")
-                if cursor.fetchone():
-                    print("✅ Database schema is up to date")
-                    
-                    # Show current data count
-                    cursor = conn.execute("SELECT COUNT(*) FROM products")
-                    count = cursor.fetchone()[0]
-                    print(f"📊 Products in database: {count}")
-                    
-                    cursor = conn.execute("SELECT COUNT(*) FROM log_entries")
-                    log_count = cursor.fetchone()[0]
-                    print(f"📊 Log entries: {log_count}")
-                    
-                    return  # Database is fine, no need to recreate
-                else:
-                    print("⚠️ Database exists but fasting tables are missing, updating schema...")
-            else:
-                print("⚠️ Database exists but schema is missing, recreating...")
-        except Exception as e:
-            print(f"⚠️ Database check failed: {e}, recreating...")
-        finally:
-            conn.close()
-    
-    # Create or recreate database
-    print("🔄 Creating/updating database schema...")
-    conn = sqlite3.connect(Config.DATABASE)
+    conn = sqlite3.connect(Config.DATABASE, timeout=BUSY_TIMEOUT)
     
     try:
-        # Read and execute schema v2
-        with open('schema_v2.sql', 'r') as f:
-            schema = f.read()
-        
-        conn.executescript(schema)
-        conn.commit()
+        version = get_version(conn)
+        if version > LATEST_VERSION:
+            print(f"⚠️ Schema version {version} is newer than this code ({LATEST_VERSION}), leaving it alone")
+        elif version == LATEST_VERSION:
+            print(f"✅ Database schema is up to date (version {version})")
+        else:
+            print(f"🔄 Migrating database schema from version {version} to {LATEST_VERSION}...")
+            version = migrate(conn)
+            print("✅ Database initialized successfully")
         
-        print("✅ Database initialized successfully")
-        
-        # Show sample data count
+        # Show current data count
         cursor = conn.execute("SELECT COUNT(*) FROM products")
         count = cursor.fetchone()[0]
-        print(f"📊 Sample products loaded: {count}")
+        print(f"📊 Products in database: {count}")
+        
+        cursor = conn.execute("SELECT COUNT(*) FROM log_entries")
+        log_count = cursor.fetchone()[0]
+        print(f"📊 Log entries: {log_count}")
         
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
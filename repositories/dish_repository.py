@@ -12,6 +12,10 @@ from src.nutrition_calculator import (
     RecipeIngredient,
     calculate_recipe_nutrition,
 )
+from src.request_tracing import CALC, span
+
+# Product IDs per "WHERE id IN (...)" lookup (below SQLite's parameter limit)
+PRODUCT_LOOKUP_BATCH_SIZE = 500
 
 
 class DishRepository(BaseRepository):
@@ -113,32 +117,106 @@ class DishRepository(BaseRepository):
         """
         Create a new dish with ingredients and calculated nutrition.
 
+        The dish, its ingredients and its nutrition are written in one
+        transaction with a fixed number of statements.
+
         Args:
             data: Dish data with ingredients
 
         Returns:
             Created dish dictionary
         """
-        # Insert dish
-        cursor = self.db.execute(
-            "INSERT INTO dishes (name, description) VALUES (?, ?)",
-            (data["name"], data.get("description", "")),
-        )
-        dish_id = cursor.lastrowid
+        try:
+            cursor = self.db.execute(
+                "INSERT INTO dishes (name, description) VALUES (?, ?)",
+                (data["name"], data.get("description", "")),
+            )
+            dish_id = cursor.lastrowid
+            self._store_ingredients(dish_id, data["name"], data["ingredients"])
+        except Exception:
+            self.db.rollback()
+            raise
+        self.db.commit()
 
-        # Process ingredients and calculate nutrition
-        recipe_ingredients = []
+        # Return created dish
+        return self.find_by_id(dish_id)
+
+    def update(self, dish_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Update existing dish.
+
+        Args:
+            dish_id: Dish ID
+            data: Updated dish data
+
+        Returns:
+            Updated dish dictionary or None if not found
+        """
+        existing = self.db.execute(
+            "SELECT name, description FROM dishes WHERE id = ?", (dish_id,)
+        ).fetchone()
+        if not existing:
+            return None
 
-        for ingredient in data["ingredients"]:
-            # Get product data
-            product_row = self.db.execute(
-                "SELECT * FROM products WHERE id = ?", (ingredient["product_id"],)
-            ).fetchone()
+        name = data.get("name", existing["name"])
+        description = data.get("description") or existing["description"] or ""
+        try:
+            self.db.execute(
+                "UPDATE dishes SET name = ?, description = ? WHERE id = ?",
+                (name, description, dish_id),
+            )
+
+            # Replace ingredients and recalculate nutrition
+            if "ingredients" in data:
+                self.db.execute("DELETE FROM dish_ingredients WHERE dish_id = ?", (dish_id,))
+                self._store_ingredients(dish_id, name, data["ingredients"])
+        except Exception:
+            self.db.rollback()
+            raise
+        self.db.commit()
+
+        return self.find_by_id(dish_id)
+
+    def _load_products(self, product_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch the given products by ID with "WHERE id IN (...)" lookups"""
+        ids = list(dict.fromkeys(product_ids))
+        products = {}
+        for start in range(0, len(ids), PRODUCT_LOOKUP_BATCH_SIZE):
+            batch = ids[start : start + PRODUCT_LOOKUP_BATCH_SIZE]
+            rows = self.db.execute(
+                f"SELECT * FROM products WHERE id IN ({', '.join('?' for _ in batch)})", batch
+            ).fetchall()
+            products.update((row["id"], dict(row)) for row in rows)
+        return products
+
+    def _store_ingredients(
+        self, dish_id: int, name: str, ingredients: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Insert a dish's ingredients and store its calculated nutrition.
 
-            if product_row:
-                product = dict(product_row)
-                # Create RecipeIngredient for calculation
-                recipe_ingredient = RecipeIngredient(
+        Ingredients whose product does not exist are skipped. Runs inside
+        the caller's transaction.
+
+        Args:
+            dish_id: Dish ID
+            name: Dish name (for the recipe calculation)
+            ingredients: Ingredient dictionaries (product_id, quantity_grams,
+                preparation_method, edible_portion)
+        """
+        products = self._load_products([ingredient["product_id"] for ingredient in ingredients])
+
+        recipe_ingredients = []
+        rows = []
+        for ingredient in ingredients:
+            product = products.get(ingredient["product_id"])
+            if not product:
+                continue
+
+            preparation = ingredient.get("preparation_method", "raw")
+            edible_portion = ingredient.get("edible_portion", 1.0)
+            recipe_ingredients.append(
+                RecipeIngredient(
                     name=product["name"],
                     raw_weight=ingredient["quantity_grams"],
                     nutrition_per_100g={
@@ -149,28 +227,30 @@ class DishRepository(BaseRepository):
                         "sugars": product.get("sugars_per_100g", 0),
                     },
                     category=product.get("category", "unknown"),
-                    preparation=ingredient.get("preparation_method", "raw"),
-                    edible_portion=ingredient.get("edible_portion", 1.0),
+                    preparation=preparation,
+                    edible_portion=edible_portion,
                 )
-
-                recipe_ingredients.append(recipe_ingredient)
-
-                # Store ingredient
-                self.db.execute(
-                    """INSERT INTO dish_ingredients
-                       (dish_id, product_id, quantity_grams, preparation_method, edible_portion)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (
-                        dish_id,
-                        ingredient["product_id"],
-                        ingredient["quantity_grams"],
-                        ingredient.get("preparation_method", "raw"),
-                        ingredient.get("edible_portion", 1.0),
-                    ),
+            )
+            rows.append(
+                (
+                    dish_id,
+                    ingredient["product_id"],
+                    ingredient["quantity_grams"],
+                    preparation,
+                    edible_portion,
                 )
+            )
+
+        self.db.executemany(
+            """INSERT INTO dish_ingredients
+               (dish_id, product_id, quantity_grams, preparation_method, edible_portion)
+               VALUES (?, ?, ?, ?, ?)""",
+            rows,
+        )
 
         # Calculate recipe nutrition
-        recipe_result = calculate_recipe_nutrition(recipe_ingredients, data["name"], servings=1)
+        with span(CALC):
+            recipe_result = calculate_recipe_nutrition(recipe_ingredients, name, servings=1)
 
         # Determine keto category
         keto_index = recipe_result.get("keto_index", 0)
@@ -209,124 +289,6 @@ class DishRepository(BaseRepository):
             ),
         )
 
-        self.db.commit()
-
-        # Return created dish
-        return self.find_by_id(dish_id)
-
-    def update(self, dish_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """
-        Update existing dish.
-
-        Args:
-            dish_id: Dish ID
-            data: Updated dish data
-
-        Returns:
-            Updated dish dictionary or None if not found
-        """
-        # Check if dish exists
-        existing = self.find_by_id(dish_id)
-        if not existing:
-            return None
-
-        # Delete existing ingredients if updating ingredients
-        if "ingredients" in data:
-            self.db.execute("DELETE FROM dish_ingredients WHERE dish_id = ?", (dish_id,))
-
-        # Update dish basic info
-        name = data.get("name", existing["name"])
-        description = data.get("description") or existing.get("description") or ""
-        self.db.execute(
-            "UPDATE dishes SET name = ?, description = ? WHERE id = ?",
-            (name, description, dish_id),
-        )
-
-        # If ingredients provided, recalculate nutrition
-        if "ingredients" in data:
-            recipe_ingredients = []
-
-            for ingredient in data["ingredients"]:
-                product_row = self.db.execute(
-                    "SELECT * FROM products WHERE id = ?", (ingredient["product_id"],)
-                ).fetchone()
-
-                if product_row:
-                    product = dict(product_row)
-                    recipe_ingredient = RecipeIngredient(
-                        name=product["name"],
-                        raw_weight=ingredient["quantity_grams"],
-                        nutrition_per_100g={
-                            "protein": product["protein_per_100g"],
-                            "fats": product["fat_per_100g"],
-                            "carbs": product["carbs_per_100g"],
-                            "fiber": product.get("fiber_per_100g", 0),
-                            "sugars": product.get("sugars_per_100g", 0),
-                        },
-                        category=product.get("category", "unknown"),
-                        preparation=ingredient.get("preparation_method", "raw"),
-                        edible_portion=ingredient.get("edible_portion", 1.0),
-                    )
-
-                    recipe_ingredients.append(recipe_ingredient)
-
-                    self.db.execute(
-                        """INSERT INTO dish_ingredients
-                           (dish_id, product_id, quantity_grams, preparation_method, edible_portion)
-                           VALUES (?, ?, ?, ?, ?)""",
-                        (
-                            dish_id,
-                            ingredient["product_id"],
-                            ingredient["quantity_grams"],
-                            ingredient.get("preparation_method", "raw"),
-                            ingredient.get("edible_portion", 1.0),
-                        ),
-                    )
-
-            # Recalculate nutrition
-            recipe_result = calculate_recipe_nutrition(
-                recipe_ingredients, data.get("name", existing["name"]), servings=1
-            )
-
-            keto_index = recipe_result.get("keto_index", 0)
-            keto_category = "Исключить"
-            for (min_val, max_val), category_name in KETO_INDEX_CATEGORIES.items():
-                if min_val <= keto_index <= max_val:
-                    keto_category = category_name
-                    break
-
-            self.db.execute(
-                """UPDATE dishes SET
-                    total_weight_grams = ?,
-                    cooked_weight_grams = ?,
-                    calories_per_100g = ?,
-                    protein_per_100g = ?,
-                    fat_per_100g = ?,
-                    carbs_per_100g = ?,
-                    net_carbs_per_100g = ?,
-                    fiber_per_100g = ?,
-                    keto_index = ?,
-                    keto_category = ?
-                WHERE id = ?""",
-                (
-                    recipe_result["weights"]["total_raw"],
-                    recipe_result["weights"]["total_cooked"],
-                    recipe_result["nutrition_per_100g"]["calories"],
-                    recipe_result["nutrition_per_100g"]["protein"],
-                    recipe_result["nutrition_per_100g"]["fats"],
-                    recipe_result["nutrition_per_100g"]["carbs"],
-                    recipe_result["nutrition_per_100g"]["net_carbs"],
-                    recipe_result["nutrition_per_100g"].get("fiber", 0),
-                    keto_index,
-                    keto_category,
-                    dish_id,
-                ),
-            )
-
-        self.db.commit()
-
-        return self.find_by_id(dish_id)
-
     def delete(self, dish_id: int) -> bool:
         """
         Delete dish and its ingredients.
@@ -376,6 +338,22 @@ class DishRepository(BaseRepository):
         count = row[0] if row else 0
         return (count > 0, count)
 
+    def find_logged_dates(self, dish_id: int) -> List[str]:
+        """
+        Get the distinct dates on which a dish was logged.
+
+        Args:
+            dish_id: Dish ID
+
+        Returns:
+            List of date strings (YYYY-MM-DD)
+        """
+        rows = self.db.execute(
+            "SELECT DISTINCT date FROM log_entries WHERE item_type = 'dish' AND item_id = ?",
+            (dish_id,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
     def verify_products_exist(self, product_ids: List[int]) -> tuple[bool, List[int]]:
         """
         Verify that all product IDs exist.
@@ -5,7 +5,7 @@ Implements Repository Pattern for intermittent fasting operations.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from repositories.base_repository import BaseRepository
 
@@ -18,7 +18,12 @@ class FastingRepository(BaseRepository):
     """
 
     def find_all(
-        self, user_id: int = 1, status: Optional[str] = None, limit: int = 100, offset: int = 0
+        self,
+        user_id: int = 1,
+        status: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        after: Optional[Tuple[str, int]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find all fasting sessions with optional filters.
@@ -28,26 +33,28 @@ class FastingRepository(BaseRepository):
             status: Session status filter ('active', 'completed', 'paused', 'cancelled')
             limit: Maximum number of sessions
             offset: Number of sessions to skip
+            after: Keyset cursor (start_time, id) of the last session of the
+                previous page
 
         Returns:
-            List of fasting session dictionaries
+            List of fasting session dictionaries, newest first
         """
+        conditions = ["user_id = ?"]
+        params = [user_id]
         if status:
-            query = """
-                SELECT * FROM fasting_sessions
-                WHERE user_id = ? AND status = ?
-                ORDER BY start_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (user_id, status, limit, offset)
-        else:
-            query = """
-                SELECT * FROM fasting_sessions
-                WHERE user_id = ?
-                ORDER BY start_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (user_id, limit, offset)
+            conditions.append("status = ?")
+            params.append(status)
+        if after is not None:
+            conditions.append("(start_time, id) < (?, ?)")
+            params.extend(after)
+
+        query = f"""
+            SELECT * FROM fasting_sessions
+            WHERE {' AND '.join(conditions)}
+            ORDER BY start_time DESC, id DESC
+            LIMIT ? OFFSET ?
+        """
+        params.extend((limit, offset))
 
         cursor = self.db.execute(query, params)
         return [dict(row) for row in cursor.fetchall()]
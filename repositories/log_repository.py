@@ -4,10 +4,34 @@ Log Repository - Data access layer for log entries.
 Implements Repository Pattern for daily food log operations.
 """
 
-from typing import Any, Dict, List, Optional
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from repositories.base_repository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BATCH_SIZE = 500
+
+# Log entries carry a nutrition snapshot written by the schema triggers, so
+# reads only join products/dishes for the item name. fiber is not stored:
+# it is carbs - net_carbs.
+ENTRY_SELECT = """
+    SELECT le.*, le.carbs - le.net_carbs AS fiber,
+           CASE le.item_type WHEN 'product' THEN p.name ELSE d.name END AS item_name
+    FROM log_entries le
+    LEFT JOIN products p ON le.item_type = 'product' AND p.id = le.item_id
+    LEFT JOIN dishes d ON le.item_type = 'dish' AND d.id = le.item_id
+"""
+
+# Same computation as the snapshot triggers in schema_v2.sql
+SNAPSHOT_ASSIGNMENT = """
+    (calories, protein, fat, carbs, net_carbs, keto_index) = (
+        SELECT calories, protein, fat, carbs, MAX(carbs - fiber, 0), keto_index
+        FROM log_entry_nutrition n WHERE n.id = log_entries.id
+    )
+"""
+
 
 class LogRepository(BaseRepository):
     """
@@ -17,7 +41,11 @@ class LogRepository(BaseRepository):
     """
 
     def find_all(
-        self, date_filter: Optional[str] = None, limit: int = 100, offset: int = 0
+        self,
+        date_filter: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        after: Optional[Tuple[str, str, int]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find all log entries with optional date filter and pagination.
@@ -26,25 +54,35 @@ class LogRepository(BaseRepository):
             date_filter: Filter by specific date (YYYY-MM-DD)
             limit: Maximum number of entries to return
             offset: Number of entries to skip
+            after: Keyset cursor (date, created_at, id) of the last entry of
+                the previous page
 
         Returns:
-            List of log entry dictionaries with nutrition details
+            List of log entry dictionaries with their nutrition snapshot and
+            item name, newest first
         """
+        conditions = []
+        params = []
         if date_filter:
-            query = """
-                SELECT * FROM log_entries_with_details
-                WHERE date = ?
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (date_filter, limit, offset)
-        else:
-            query = """
-                SELECT * FROM log_entries_with_details
-                ORDER BY date DESC, created_at DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (limit, offset)
+            conditions.append("le.date = ?")
+            params.append(date_filter)
+        if after is not None:
+            if date_filter:
+                # Within one date the (date, created_at) index continues at created_at
+                conditions.append("(le.created_at, le.id) < (?, ?)")
+                params.extend(after[1:])
+            else:
+                conditions.append("(le.date, le.created_at, le.id) < (?, ?, ?)")
+                params.extend(after)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            {ENTRY_SELECT}
+            {where}
+            ORDER BY le.date DESC, le.created_at DESC, le.id DESC
+            LIMIT ? OFFSET ?
+        """
+        params.extend((limit, offset))
 
         cursor = self.db.execute(query, params)
         return [dict(row) for row in cursor.fetchall()]
@@ -59,11 +97,7 @@ class LogRepository(BaseRepository):
         Returns:
             Log entry dictionary or None if not found
         """
-        query = """
-            SELECT * FROM log_entries_with_details
-            WHERE id = ?
-        """
-        cursor = self.db.execute(query, (entry_id,))
+        cursor = self.db.execute(f"{ENTRY_SELECT} WHERE le.id = ?", (entry_id,))
         row = cursor.fetchone()
 
         return dict(row) if row else None
@@ -84,6 +118,8 @@ class LogRepository(BaseRepository):
         """
         Create a new log entry.
 
+        The insert trigger snapshots the item's current nutrition into the row.
+
         Args:
             data: Log entry data (date, item_type, item_id, quantity_grams, meal_time)
 
@@ -177,39 +213,138 @@ class LogRepository(BaseRepository):
         """
         Calculate daily nutrition totals for a specific date.
 
+        Reads the trigger-maintained daily_rollups rows instead of
+        re-aggregating the joined log entries.
+
         Args:
             date: Date string (YYYY-MM-DD)
 
         Returns:
             Dictionary with total calories, protein, fat, carbs, fiber
         """
-        entries = self.find_by_date(date)
-
-        totals = {
-            "calories": 0.0,
-            "protein": 0.0,
-            "fat": 0.0,
-            "carbs": 0.0,
-            "fiber": 0.0,
+        row = self.db.execute(
+            """
+            SELECT SUM(calories) as calories, SUM(protein) as protein, SUM(fat) as fat,
+                   SUM(carbs) as carbs, SUM(fiber) as fiber
+            FROM daily_rollups
+            WHERE date = ?
+            """,
+            (date,),
+        ).fetchone()
+
+        return {
+            key: float(row[key] or 0.0) for key in ("calories", "protein", "fat", "carbs", "fiber")
         }
 
-        for entry in entries:
-            quantity_factor = entry["quantity_grams"] / 100.0
-
-            if entry["item_type"] == "product":
-                totals["calories"] += (entry["calories_per_100g"] or 0) * quantity_factor
-                totals["protein"] += (entry["protein_per_100g"] or 0) * quantity_factor
-                totals["fat"] += (entry["fat_per_100g"] or 0) * quantity_factor
-                totals["carbs"] += (entry["carbs_per_100g"] or 0) * quantity_factor
-                totals["fiber"] += (entry["fiber_per_100g"] or 0) * quantity_factor
-            elif entry["item_type"] == "dish":
-                totals["calories"] += entry["calculated_calories"] or 0
-                totals["protein"] += (entry["dish_protein_per_100g"] or 0) * quantity_factor
-                totals["fat"] += (entry["dish_fat_per_100g"] or 0) * quantity_factor
-                totals["carbs"] += (entry["dish_carbs_per_100g"] or 0) * quantity_factor
-                totals["fiber"] += (entry["dish_fiber_per_100g"] or 0) * quantity_factor
-
-        return totals
+    def get_rollups(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        Get per-day, per-meal nutrition rollups for a date range.
+
+        Args:
+            start_date: First date (YYYY-MM-DD), inclusive
+            end_date: Last date (YYYY-MM-DD), inclusive
+
+        Returns:
+            List of rollup dictionaries ordered by date and meal_time
+        """
+        cursor = self.db.execute(
+            """
+            SELECT * FROM daily_rollups
+            WHERE date >= ? AND date <= ?
+            ORDER BY date, meal_time
+            """,
+            (start_date, end_date),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    def rebuild_rollups(self) -> int:
+        """
+        Recompute all daily rollups from the raw log entries.
+
+        Triggers keep rollups current on every write; this is only needed to
+        repair a database whose rollups were edited or lost out of band.
+
+        Returns:
+            Number of rollup rows written
+        """
+        self.db.execute("DELETE FROM daily_rollups")
+        cursor = self.db.execute(
+            """
+            INSERT INTO daily_rollups
+                (date, meal_time, entries_count, calories, protein, fat, carbs, fiber, net_carbs)
+            SELECT date, COALESCE(meal_time, ''), COUNT(*), TOTAL(calories), TOTAL(protein),
+                   TOTAL(fat), TOTAL(carbs), TOTAL(carbs - net_carbs), TOTAL(net_carbs)
+            FROM log_entries
+            GROUP BY 1, 2
+            """
+        )
+        self.db.commit()
+        return cursor.rowcount
+
+    def count_missing_snapshots(self) -> int:
+        """
+        Count log entries without a nutrition snapshot.
+
+        Returns:
+            Number of entries whose net_carbs was never written
+        """
+        return self.db.execute(
+            "SELECT COUNT(*) FROM log_entries WHERE net_carbs IS NULL"
+        ).fetchone()[0]
+
+    def snapshot_entries(
+        self,
+        only_missing: bool = True,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        (Re)write the nutrition snapshot of log entries from their items.
+
+        Triggers keep snapshots current on every log and product/dish write;
+        this backfills entries written without them and re-snapshots
+        everything after out-of-band item edits. Works in id order, one
+        transaction per batch; the rollup triggers follow each update.
+
+        Args:
+            only_missing: Only snapshot entries that have none yet
+            batch_size: Entries updated per transaction
+            progress: Callback receiving progress percentages (0-100)
+
+        Returns:
+            Number of entries updated
+        """
+        missing = " AND net_carbs IS NULL" if only_missing else ""
+        total = self.db.execute(
+            f"SELECT COUNT(*) FROM log_entries WHERE 1 = 1{missing}"
+        ).fetchone()[0]
+        updated = 0
+        last_id = 0
+        while updated < total:
+            ids = [
+                row[0]
+                for row in self.db.execute(
+                    f"SELECT id FROM log_entries WHERE id > ?{missing} ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            ]
+            if not ids:
+                break
+
+            self.db.execute(
+                f"UPDATE log_entries SET {SNAPSHOT_ASSIGNMENT} WHERE id BETWEEN ? AND ?{missing}",
+                (ids[0], ids[-1]),
+            )
+            self.db.commit()
+
+            last_id = ids[-1]
+            updated += len(ids)
+            if progress:
+                progress(min(100, int(updated * 100 / total)))
+
+        if updated:
+            logger.info("Snapshotted nutrition of %d log entries", updated)
+        return updated
 
     def count(self, date_filter: Optional[str] = None) -> int:
         """
@@ -6,18 +6,171 @@ abstracting data access from business logic.
 """
 
 import logging
-from typing import Any, Dict, List, Optional
+import re
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from repositories.base_repository import BaseRepository
+from src import nutrition_calculator_batch
 from src.nutrition_calculator import (
+    CALC_VERSION,
     calculate_calories_from_macros,
     calculate_keto_index_advanced,
     calculate_net_carbs_advanced,
 )
+from src.request_tracing import CALC, traced
 from src.utils import clean_string, safe_float
 
 logger = logging.getLogger(__name__)
 
+# Columns derived from the nutrition calculator, stored with calc_version
+DERIVED_FIELDS = (
+    "net_carbs_per_100g",
+    "keto_index",
+    "keto_category",
+    "carbs_score",
+    "fat_score",
+    "quality_score",
+    "gi_score",
+    "fiber_estimated",
+    "fiber_deduction_coefficient",
+)
+
+RECOMPUTE_BATCH_SIZE = 500
+
+# Names per "WHERE name IN (...)" lookup (below SQLite's parameter limit)
+NAME_LOOKUP_BATCH_SIZE = 500
+
+# Product search (products_fts, products_trigram and product_usage in schema_v2.sql)
+SEARCH_MAX_TERMS = 8
+# Logging history raises the text rank by up to USAGE_BOOST (x2 at 1.0),
+# half of it once a product was logged USAGE_HALF_SATURATION times
+USAGE_BOOST = 1.0
+USAGE_HALF_SATURATION = 10
+# Typo-tolerant fallback: candidates sharing trigrams with the query, kept
+# when they contain at least FUZZY_MIN_COVERAGE of the query's trigrams
+FUZZY_MIN_LENGTH = 3
+FUZZY_CANDIDATES = 50
+FUZZY_MIN_COVERAGE = 0.5
+
+_SEARCH_WORD_RE = re.compile(r"\w+")
+
+
+def _prefix_match_query(text: str) -> str:
+    """FTS5 query matching every word of text as a prefix"""
+    words = _SEARCH_WORD_RE.findall(text.lower())[:SEARCH_MAX_TERMS]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _trigrams(text: str) -> set:
+    """Trigrams of the words of text, lower-cased and joined by single spaces"""
+    normalized = " ".join(_SEARCH_WORD_RE.findall(text.lower()))
+    return {normalized[i : i + 3] for i in range(len(normalized) - 2)}
+
+
+@traced(CALC)
+def compute_derived_fields(product: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the net carbs and keto index calculations for a product.
+
+    Args:
+        product: Product dictionary with macros and optional fiber, category,
+            region, glycemic_index and processing_level
+
+    Returns:
+        Dictionary of DERIVED_FIELDS values plus calc_version
+    """
+    net_carbs_result = calculate_net_carbs_advanced(
+        product["carbs_per_100g"],
+        product.get("fiber_per_100g"),
+        product.get("category"),
+        product.get("region") or "US",
+    )
+    keto_result = calculate_keto_index_advanced(
+        product["protein_per_100g"],
+        product["fat_per_100g"],
+        product["carbs_per_100g"],
+        product.get("fiber_per_100g"),
+        product.get("category"),
+        product.get("glycemic_index"),
+        product.get("processing_level"),
+    )
+    return {
+        "net_carbs_per_100g": net_carbs_result["net_carbs"],
+        "keto_index": keto_result["keto_index"],
+        "keto_category": keto_result["keto_category"],
+        "carbs_score": keto_result["carbs_score"],
+        "fat_score": keto_result["fat_score"],
+        "quality_score": keto_result["quality_score"],
+        "gi_score": keto_result["gi_score"],
+        "fiber_estimated": net_carbs_result["fiber_estimated"],
+        "fiber_deduction_coefficient": net_carbs_result["fiber_deduction_coefficient"],
+        "calc_version": CALC_VERSION,
+    }
+
+
+@traced(CALC)
+def compute_derived_fields_batch(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Vectorized compute_derived_fields for many products.
+
+    Args:
+        products: Product dictionaries
+
+    Returns:
+        List of DERIVED_FIELDS dictionaries (with calc_version), one per product
+
+    Raises:
+        ImportError: numpy is not installed
+        ValueError: A product has invalid carbs or fiber
+    """
+    result = nutrition_calculator_batch.calculate_keto_index(
+        [p["protein_per_100g"] for p in products],
+        [p["fat_per_100g"] for p in products],
+        [p["carbs_per_100g"] for p in products],
+        [p.get("fiber_per_100g") for p in products],
+        [p.get("category") for p in products],
+        [p.get("glycemic_index") for p in products],
+        [p.get("processing_level") for p in products],
+    )
+    result["net_carbs_per_100g"] = result["net_carbs"]
+    columns = [result[field].tolist() for field in DERIVED_FIELDS]
+    return [
+        {**dict(zip(DERIVED_FIELDS, values)), "calc_version": CALC_VERSION}
+        for values in zip(*columns)
+    ]
+
+
+def compute_derived_fields_many(products: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Derived fields for many products, vectorized when possible.
+
+    Falls back to one product at a time when numpy is missing or a product
+    is invalid.
+
+    Args:
+        products: Product dictionaries
+
+    Returns:
+        compute_derived_fields result per product (None where it failed)
+    """
+    try:
+        return compute_derived_fields_batch(products)
+    except (ImportError, ValueError):
+        pass
+
+    results = []
+    for product in products:
+        try:
+            results.append(compute_derived_fields(product))
+        except Exception:
+            logger.exception(
+                "Failed to calculate nutrition fields for product %s",
+                product.get("id", product.get("name")),
+            )
+            results.append(None)
+    return results
+
 
 class ProductRepository(BaseRepository):
     """Repository for product data access."""
@@ -28,35 +181,152 @@ class ProductRepository(BaseRepository):
         limit: int = 50,
         offset: int = 0,
         include_calculated_fields: bool = True,
+        after: Optional[Tuple[str, int]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find all products with optional search, pagination, and calculated fields.
 
+        Calculated fields are served from the stored columns; only rows stamped
+        with an older calc_version (pending the background recompute) are
+        calculated on the fly.
+
         Args:
             search: Search term for product name
             limit: Maximum number of products to return
             offset: Number of products to skip
             include_calculated_fields: Whether to include net_carbs, keto_index, etc.
+            after: Keyset cursor (name, id) of the last product of the previous page
 
         Returns:
-            List of product dictionaries
+            List of product dictionaries ordered by name, id
         """
         query = """
             SELECT * FROM products
-            WHERE name LIKE ?
-            ORDER BY name COLLATE NOCASE
+            WHERE {condition}
+            ORDER BY name COLLATE NOCASE, id
             LIMIT ? OFFSET ?
         """
+        params = (f"%{search}%", limit, offset)
+        if after is not None:
+            # name is declared COLLATE NOCASE, so the row value compares like the ORDER BY
+            query = query.replace("{condition}", "{condition} AND (name, id) > (?, ?)")
+            params = (f"%{search}%", *after, limit, offset)
+
+        rows = None
+        if len(search) >= FUZZY_MIN_LENGTH:
+            # The trigram index answers LIKE '%term%' without scanning products
+            try:
+                rows = self.db.execute(
+                    query.format(
+                        condition="id IN (SELECT rowid FROM products_trigram WHERE name LIKE ?)"
+                    ),
+                    params,
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.debug("Trigram index unavailable, scanning products: %s", e)
+        if rows is None:
+            rows = self.db.execute(query.format(condition="name LIKE ?"), params).fetchall()
 
         products = []
-        for row in self.db.execute(query, (f"%{search}%", limit, offset)).fetchall():
+        for row in rows:
             product = dict(row)
-
             if include_calculated_fields:
-                product = self._add_calculated_fields(product)
+                product = self._with_calculated_fields(product)
+            products.append(product)
+
+        return products
+
+    def search(self, query: str, limit: int = 20, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """
+        Ranked product search for the search box and autocomplete.
 
+        Every word of the query matches a word prefix of the name through
+        the products_fts index. Results are ordered by bm25, boosted by how
+        often the product was logged. When nothing matches and fuzzy is set,
+        names sharing most of the query's trigrams are returned instead, so
+        typos still find the product.
+
+        Args:
+            query: Search text
+            limit: Maximum number of products to return
+            fuzzy: Fall back to typo-tolerant matching
+
+        Returns:
+            Product dictionaries with calculated fields plus uses (times
+            logged), match ("prefix" or "fuzzy") and score (higher is better)
+        """
+        match_query = _prefix_match_query(query)
+        if not match_query or limit <= 0:
+            return []
+
+        try:
+            rows = self.db.execute(
+                """
+                SELECT p.*, COALESCE(u.uses, 0) AS uses,
+                       bm25(products_fts)
+                       * (1.0 + ? * COALESCE(u.uses, 0) / (COALESCE(u.uses, 0) + ?)) AS score
+                FROM products_fts
+                JOIN products p ON p.id = products_fts.rowid
+                LEFT JOIN product_usage u ON u.product_id = p.id
+                WHERE products_fts MATCH ?
+                ORDER BY score, p.name COLLATE NOCASE
+                LIMIT ?
+                """,
+                (USAGE_BOOST, USAGE_HALF_SATURATION, match_query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            # Database created before the search index: plain substring search
+            logger.warning("Product search index unavailable: %s", e)
+            return self.find_all(search=query.strip(), limit=limit)
+
+        products = []
+        for row in rows:
+            product = self._with_calculated_fields(dict(row))
+            # bm25 is negative, more negative is a better match
+            product["score"] = round(-product["score"], 4)
+            product["match"] = "prefix"
             products.append(product)
 
+        if not products and fuzzy:
+            products = self._fuzzy_search(query, limit)
+        return products
+
+    def _fuzzy_search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Typo-tolerant search over the trigram index"""
+        query_trigrams = _trigrams(query)
+        if len(query.strip()) < FUZZY_MIN_LENGTH or not query_trigrams:
+            return []
+
+        match_query = " OR ".join(f'"{trigram}"' for trigram in sorted(query_trigrams))
+        rows = self.db.execute(
+            """
+            SELECT p.*, COALESCE(u.uses, 0) AS uses
+            FROM products_trigram
+            JOIN products p ON p.id = products_trigram.rowid
+            LEFT JOIN product_usage u ON u.product_id = p.id
+            WHERE products_trigram MATCH ?
+            ORDER BY bm25(products_trigram)
+            LIMIT ?
+            """,
+            (match_query, FUZZY_CANDIDATES),
+        ).fetchall()
+
+        scored = []
+        for row in rows:
+            name_trigrams = _trigrams(row["name"])
+            shared = len(query_trigrams & name_trigrams)
+            coverage = shared / len(query_trigrams)
+            if coverage >= FUZZY_MIN_COVERAGE:
+                similarity = shared / len(query_trigrams | name_trigrams)
+                scored.append((coverage, similarity, row["uses"], dict(row)))
+        scored.sort(key=lambda item: (-item[0], -item[1], -item[2], item[3]["name"].lower()))
+
+        products = []
+        for coverage, similarity, _, product in scored[:limit]:
+            product = self._with_calculated_fields(product)
+            product["score"] = round(coverage * similarity, 4)
+            product["match"] = "fuzzy"
+            products.append(product)
         return products
 
     def find_by_id(self, product_id: int) -> Optional[Dict[str, Any]]:
@@ -126,10 +396,17 @@ class ProductRepository(BaseRepository):
         # Calculate enhanced nutrition values
         calculated_calories = calculate_calories_from_macros(protein, fat, carbs)
 
-        net_carbs_result = calculate_net_carbs_advanced(carbs, fiber_per_100g, category, region)
-
-        keto_result = calculate_keto_index_advanced(
-            protein, fat, carbs, fiber_per_100g, category, glycemic_index, processing_level
+        derived = compute_derived_fields(
+            {
+                "protein_per_100g": protein,
+                "fat_per_100g": fat,
+                "carbs_per_100g": carbs,
+                "fiber_per_100g": fiber_per_100g,
+                "category": category,
+                "region": region,
+                "glycemic_index": glycemic_index,
+                "processing_level": processing_level,
+            }
         )
 
         # Insert product
@@ -139,9 +416,10 @@ class ProductRepository(BaseRepository):
                 name, calories_per_100g, protein_per_100g, fat_per_100g, carbs_per_100g,
                 fiber_per_100g, sugars_per_100g, category, processing_level, glycemic_index,
                 region, net_carbs_per_100g, keto_index, keto_category, carbs_score,
-                fat_score, quality_score, gi_score, fiber_estimated, fiber_deduction_coefficient
+                fat_score, quality_score, gi_score, fiber_estimated,
+                fiber_deduction_coefficient, calc_version
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 name,
@@ -155,15 +433,8 @@ class ProductRepository(BaseRepository):
                 processing_level,
                 glycemic_index,
                 region,
-                net_carbs_result["net_carbs"],
-                keto_result["keto_index"],
-                keto_result["keto_category"],
-                keto_result["carbs_score"],
-                keto_result["fat_score"],
-                keto_result["quality_score"],
-                keto_result["gi_score"],
-                net_carbs_result["fiber_estimated"],
-                net_carbs_result["fiber_deduction_coefficient"],
+                *(derived[field] for field in DERIVED_FIELDS),
+                derived["calc_version"],
             ),
         )
 
@@ -185,7 +456,8 @@ class ProductRepository(BaseRepository):
             Updated product dictionary or None if not found
         """
         # Check if product exists
-        if not self.exists(product_id):
+        existing = self.find_by_id(product_id)
+        if not existing:
             return None
 
         # Extract fields
@@ -199,15 +471,30 @@ class ProductRepository(BaseRepository):
         if calories == 0:
             calories = calculate_calories_from_macros(protein, fat, carbs)
 
+        # Recalculate stored fields from the new macros and the unchanged columns
+        derived = compute_derived_fields(
+            {**existing, "protein_per_100g": protein, "fat_per_100g": fat, "carbs_per_100g": carbs}
+        )
+
         # Update product
         self.db.execute(
-            """
+            f"""
             UPDATE products
             SET name = ?, calories_per_100g = ?, protein_per_100g = ?,
-                fat_per_100g = ?, carbs_per_100g = ?, updated_at = CURRENT_TIMESTAMP
+                fat_per_100g = ?, carbs_per_100g = ?, {self._derived_assignments()},
+                updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
             """,
-            (name, calories, protein, fat, carbs, product_id),
+            (
+                name,
+                calories,
+                protein,
+                fat,
+                carbs,
+                *(derived[field] for field in DERIVED_FIELDS),
+                derived["calc_version"],
+                product_id,
+            ),
         )
 
         self.db.commit()
@@ -251,6 +538,241 @@ class ProductRepository(BaseRepository):
 
         return usage_count > 0, usage_count
 
+    def find_logged_dates(self, product_id: int) -> List[str]:
+        """
+        Get the distinct dates on which a product was logged.
+
+        Args:
+            product_id: Product ID
+
+        Returns:
+            List of date strings (YYYY-MM-DD)
+        """
+        rows = self.db.execute(
+            "SELECT DISTINCT date FROM log_entries WHERE item_type = 'product' AND item_id = ?",
+            (product_id,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def upsert_many(
+        self, products: List[Dict[str, Any]], update_existing: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Insert many validated products in one transaction.
+
+        Calories and derived fields are computed for the whole list at once.
+        Products whose name already exists are updated (or skipped when
+        update_existing is False); a later duplicate within the list counts
+        as an update of the earlier one.
+
+        Args:
+            products: Cleaned product dictionaries (name, macros and optional
+                fiber_per_100g, sugars_per_100g, category, processing_level,
+                glycemic_index, region)
+            update_existing: Update products that already exist
+
+        Returns:
+            Dictionary with inserted, updated and skipped counts and failed,
+            a list of (index, error) for products that could not be stored
+        """
+        result = {"inserted": 0, "updated": 0, "skipped": 0, "failed": []}
+        if not products:
+            return result
+
+        calories = self._calories_many(products)
+        derived_rows = compute_derived_fields_many(products)
+        existing = self._existing_names([p["name"] for p in products])
+
+        rows = []
+        for index, (product, kcal, derived) in enumerate(zip(products, calories, derived_rows)):
+            if derived is None:
+                result["failed"].append((index, "Nutrition calculation failed"))
+                continue
+            key = product["name"].lower()
+            outcome = "updated" if key in existing else "inserted"
+            existing.add(key)
+            if outcome == "updated" and not update_existing:
+                result["skipped"] += 1
+                continue
+            rows.append(
+                (
+                    index,
+                    outcome,
+                    (
+                        product["name"],
+                        kcal,
+                        product["protein_per_100g"],
+                        product["fat_per_100g"],
+                        product["carbs_per_100g"],
+                        product.get("fiber_per_100g"),
+                        product.get("sugars_per_100g"),
+                        product.get("category"),
+                        product.get("processing_level"),
+                        product.get("glycemic_index"),
+                        product.get("region") or "US",
+                        *(derived[field] for field in DERIVED_FIELDS),
+                        derived["calc_version"],
+                    ),
+                )
+            )
+
+        query = self._upsert_query(update_existing)
+        try:
+            self.db.executemany(query, [params for _, _, params in rows])
+            stored = rows
+        except sqlite3.IntegrityError:
+            # Redo the chunk row by row to find the offending rows; a failed
+            # statement only rolls back itself
+            self.db.rollback()
+            stored = []
+            for index, outcome, params in rows:
+                try:
+                    self.db.execute(query, params)
+                    stored.append((index, outcome, params))
+                except sqlite3.IntegrityError as e:
+                    result["failed"].append((index, f"Database constraint violation: {e}"))
+        except Exception:
+            self.db.rollback()
+            raise
+        self.db.commit()
+
+        for _, outcome, _ in stored:
+            result[outcome] += 1
+        result["failed"].sort()
+        return result
+
+    @staticmethod
+    def _upsert_query(update_existing: bool) -> str:
+        columns = (
+            "name",
+            "calories_per_100g",
+            "protein_per_100g",
+            "fat_per_100g",
+            "carbs_per_100g",
+            "fiber_per_100g",
+            "sugars_per_100g",
+            "category",
+            "processing_level",
+            "glycemic_index",
+            "region",
+            *DERIVED_FIELDS,
+            "calc_version",
+        )
+        if update_existing:
+            assignments = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+            conflict = f"DO UPDATE SET {assignments}, updated_at = CURRENT_TIMESTAMP"
+        else:
+            conflict = "DO NOTHING"
+        return f"""
+            INSERT INTO products ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+            ON CONFLICT(name) {conflict}
+        """
+
+    @staticmethod
+    def _calories_many(products: List[Dict[str, Any]]) -> List[float]:
+        """Calories from macros for many products"""
+        macros = [
+            [p["protein_per_100g"] for p in products],
+            [p["fat_per_100g"] for p in products],
+            [p["carbs_per_100g"] for p in products],
+        ]
+        try:
+            return nutrition_calculator_batch.calculate_calories_from_macros(*macros).tolist()
+        except ImportError:
+            return [calculate_calories_from_macros(*values) for values in zip(*macros)]
+
+    def _existing_names(self, names: List[str]) -> set:
+        """Lower-cased names among the given ones that already exist"""
+        found = set()
+        for start in range(0, len(names), NAME_LOOKUP_BATCH_SIZE):
+            batch = names[start : start + NAME_LOOKUP_BATCH_SIZE]
+            rows = self.db.execute(
+                f"SELECT name FROM products WHERE name IN ({', '.join('?' for _ in batch)})",
+                batch,
+            ).fetchall()
+            found.update(row[0].lower() for row in rows)
+        return found
+
+    def count_stale(self) -> int:
+        """
+        Count products whose stored fields predate the current CALC_VERSION.
+
+        Returns:
+            Number of products needing a recompute
+        """
+        return self.db.execute(
+            "SELECT COUNT(*) FROM products WHERE calc_version IS NOT ?", (CALC_VERSION,)
+        ).fetchone()[0]
+
+    def recompute_derived_fields(
+        self,
+        batch_size: int = RECOMPUTE_BATCH_SIZE,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Recalculate stored fields of products stamped with an older calc_version.
+
+        Works through the products in id order, committing one batch at a time
+        so writers are only blocked for a batch. Products whose calculation
+        fails are logged and left for the on-the-fly path in find_all.
+
+        Args:
+            batch_size: Products updated per transaction
+            progress: Callback receiving progress percentages (0-100)
+
+        Returns:
+            Number of products updated
+        """
+        total = self.count_stale()
+        updated = 0
+        last_id = 0
+        while total:
+            rows = self.db.execute(
+                """
+                SELECT * FROM products
+                WHERE id > ? AND calc_version IS NOT ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (last_id, CALC_VERSION, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            params = [
+                (*(derived[field] for field in DERIVED_FIELDS), derived["calc_version"], row["id"])
+                for row, derived in zip(rows, compute_derived_fields_many([dict(r) for r in rows]))
+                if derived is not None
+            ]
+
+            self.db.executemany(
+                f"UPDATE products SET {self._derived_assignments()} WHERE id = ?", params
+            )
+            self.db.commit()
+
+            last_id = rows[-1]["id"]
+            updated += len(params)
+            if progress:
+                progress(min(100, int(updated * 100 / total)))
+
+        if updated:
+            logger.info("Recomputed nutrition fields of %d products (%s)", updated, CALC_VERSION)
+        return updated
+
+    @staticmethod
+    def _derived_assignments() -> str:
+        """SET clause for DERIVED_FIELDS and calc_version"""
+        return ", ".join(f"{field} = ?" for field in (*DERIVED_FIELDS, "calc_version"))
+
+    def _with_calculated_fields(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """Serve stored calculated fields, computing them for stale rows"""
+        if product.get("calc_version") == CALC_VERSION:
+            product["net_carbs"] = product["net_carbs_per_100g"]
+            product["fiber_estimated"] = bool(product["fiber_estimated"])
+            return product
+        return self._add_calculated_fields(product)
+
     def _add_calculated_fields(self, product: Dict[str, Any]) -> Dict[str, Any]:
         """
         Add calculated fields (net_carbs, keto_index, etc.) to product.
@@ -262,35 +784,12 @@ class ProductRepository(BaseRepository):
             Product dictionary with calculated fields added
         """
         try:
-            # Calculate net carbs
-            net_carbs_result = calculate_net_carbs_advanced(
-                product["carbs_per_100g"],
-                product.get("fiber_per_100g"),
-                product.get("category"),
-                product.get("region", "US"),
-            )
-
-            # Calculate keto index
-            keto_result = calculate_keto_index_advanced(
-                product["protein_per_100g"],
-                product["fat_per_100g"],
-                product["carbs_per_100g"],
-                product.get("fiber_per_100g"),
-                product.get("category"),
-                product.get("glycemic_index"),
-                product.get("processing_level"),
-            )
+            derived = compute_derived_fields(product)
 
             # Add calculated fields
-            product["net_carbs"] = net_carbs_result["net_carbs"]
-            product["fiber_estimated"] = net_carbs_result["fiber_estimated"]
-            product["fiber_deduction_coefficient"] = net_carbs_result["fiber_deduction_coefficient"]
-            product["keto_index"] = keto_result["keto_index"]
-            product["keto_category"] = keto_result["keto_category"]
-            product["carbs_score"] = keto_result["carbs_score"]
-            product["fat_score"] = keto_result["fat_score"]
-            product["quality_score"] = keto_result["quality_score"]
-            product["gi_score"] = keto_result["gi_score"]
+            product["net_carbs"] = derived["net_carbs_per_100g"]
+            for field in DERIVED_FIELDS[1:]:
+                product[field] = derived[field]
 
         except Exception:
             # Log the error and add default values if calculation fails
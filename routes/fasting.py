@@ -362,13 +362,22 @@ def get_fasting_sessions():
     db = get_db()
     try:
         limit = request.args.get("limit", 30, type=int)
+        offset = request.args.get("offset", 0, type=int)
         service = _get_fasting_service(db)
-        sessions = service.get_fasting_sessions(limit=limit)
+        try:
+            sessions, next_cursor = service.get_fasting_sessions_page(
+                limit=limit, offset=offset, cursor=request.args.get("cursor")
+            )
+        except ValueError as e:
+            return jsonify(json_response(None, str(e), HTTP_BAD_REQUEST)), HTTP_BAD_REQUEST
 
         return (
             jsonify(
                 json_response(
-                    {"sessions": sessions}, "Fasting sessions retrieved successfully", HTTP_OK
+                    {"sessions": sessions},
+                    "Fasting sessions retrieved successfully",
+                    HTTP_OK,
+                    next_cursor=next_cursor,
                 )
             ),
             HTTP_OK,
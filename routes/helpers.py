@@ -5,9 +5,15 @@ Provides common utilities for database access and request handling.
 
 import sqlite3
 
-from flask import current_app, request
+from flask import current_app, g, has_request_context, request
 from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 
+from src.db_pool import READER, WRITER, configure_connection, get_pool
+from src.request_tracing import TracedConnection
+
+# HTTP methods served from reader connections; everything else gets the writer
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
 
 def safe_get_json():
     """Safely get JSON data from request, handling invalid JSON gracefully
@@ -22,23 +28,54 @@ def safe_get_json():
         return None
 
 
-def get_db():
+def get_db(readonly=None):
     """Get database connection with proper configuration
 
+    File databases are served from the per-process connection pool, so the
+    connect + PRAGMA setup is paid once per worker instead of once per request.
+    Calling ``close()`` on the returned connection hands it back to the pool;
+    anything still checked out is released when the app context tears down.
+
+    Args:
+        readonly: Use a reader connection. Defaults to True for GET/HEAD/OPTIONS
+            requests and False (the single writer connection) otherwise.
+
     Returns:
         sqlite3.Connection: Configured database connection with:
             - Row factory for dict-like access
             - WAL mode for better concurrency (file databases only)
             - Foreign key constraints enabled
     """
-    db = sqlite3.connect(current_app.config["DATABASE"])
-    db.row_factory = sqlite3.Row
+    database = current_app.config["DATABASE"]
 
-    # Enable WAL mode for better concurrency (only for file databases)
-    if current_app.config["DATABASE"] != ":memory:":
-        db.execute("PRAGMA journal_mode = WAL")
-        db.execute("PRAGMA synchronous = NORMAL")
+    # In-memory databases are private to each connection, so they cannot be pooled
+    if database == ":memory:" or not current_app.config.get("DB_POOL_ENABLED", True):
+        return configure_connection(sqlite3.connect(database, factory=TracedConnection), database)
 
-    db.execute("PRAGMA foreign_keys = ON")
+    if readonly is None:
+        readonly = has_request_context() and request.method in READ_ONLY_METHODS
+    role = READER if readonly else WRITER
 
+    pool = get_pool(
+        database,
+        readers=current_app.config.get("DB_POOL_READERS", 4),
+        timeout=current_app.config.get("DB_POOL_TIMEOUT", 5),
+        recycle=current_app.config.get("DB_POOL_RECYCLE", 3600),
+    )
+
+    # Connections checked out by this app context; used both to release them
+    # on teardown and to avoid waiting on a connection we already hold
+    held = g.setdefault("_db_connections", [])
+    reentrant = any(db.role == role and db.checked_out and db.owner is held for db in held)
+
+    db = pool.acquire(role, wait=not reentrant, owner=held)
+    held.append(db)
     return db
+
+
+def close_db(exception=None):
+    """Release pooled connections still checked out by the current app context"""
+    held = g.pop("_db_connections", [])
+    for db in held:
+        if db.checked_out and db.owner is held:
+            db.close()
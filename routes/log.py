@@ -49,11 +49,23 @@ def log_api():
         if request.method == "GET":
             date_filter = request.args.get("date")
             limit = int(request.args.get("limit", 100))
+            offset = int(request.args.get("offset", 0))
+
+            # Get one page of log entries using service
+            try:
+                entries, next_cursor = service.get_log_entries_page(
+                    date_filter=date_filter,
+                    limit=limit,
+                    offset=offset,
+                    cursor=request.args.get("cursor"),
+                )
+            except ValueError as e:
+                return (
+                    jsonify(json_response(None, str(e), status=HTTP_BAD_REQUEST)),
+                    HTTP_BAD_REQUEST,
+                )
 
-            # Get log entries using service
-            entries = service.get_log_entries(date_filter=date_filter, limit=limit)
-
-            return jsonify(json_response(entries))
+            return jsonify(json_response(entries, next_cursor=next_cursor))
 
         else:  # POST
             data = safe_get_json()
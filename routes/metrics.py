@@ -22,7 +22,8 @@ metrics_bp = Blueprint("metrics", __name__)
 def prometheus_metrics():
     """Prometheus metrics endpoint"""
     try:
-        # Update system metrics
+        # System gauges are published by the background sampler; this only
+        # starts it in a worker that has not sampled yet
         system_monitor.update_metrics()
 
         # Get metrics in Prometheus format
@@ -95,6 +96,10 @@ def create_background_task():
         elif task_type == "cleanup":
             days = data.get("days", 30)
             task_id = task_manager.cleanup_old_logs(days)
+        elif task_type == "recompute_products":
+            task_id = task_manager.recompute_product_fields()
+        elif task_type == "snapshot_log":
+            task_id = task_manager.snapshot_log_entries(full=bool(data.get("full", False)))
         else:
             return (
                 jsonify(
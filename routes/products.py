@@ -5,14 +5,28 @@ Handles CRUD operations for products (food items).
 Refactored to use Service Layer pattern for thin controllers.
 """
 
+import io
+
 from flask import Blueprint, jsonify, request
 
 from repositories.product_repository import ProductRepository
 from routes.helpers import get_db, safe_get_json
+from services.product_import_service import (
+    ProductImportService,
+    iter_csv_rows,
+    iter_json_rows,
+    iter_ndjson_rows,
+)
 from services.product_service import ProductService
-from src.constants import HTTP_BAD_REQUEST, HTTP_CREATED, HTTP_NOT_FOUND, SUCCESS_MESSAGES
+from src.constants import (
+    HTTP_BAD_REQUEST,
+    HTTP_CREATED,
+    HTTP_NOT_FOUND,
+    IMPORT_FORMATS,
+    SUCCESS_MESSAGES,
+)
 from src.monitoring import monitor_http_request
-from src.security import rate_limit
+from src.security import rate_limit, require_admin
 from src.utils import json_response
 
 # Create products blueprint
@@ -41,9 +55,17 @@ def products_api():
             offset = int(request.args.get("offset", 0))
 
             # Delegate to service
-            products = service.get_products(search, limit, offset)
+            try:
+                products, next_cursor = service.get_products_page(
+                    search, limit, offset, cursor=request.args.get("cursor")
+                )
+            except ValueError as e:
+                return (
+                    jsonify(json_response(None, str(e), status=HTTP_BAD_REQUEST)),
+                    HTTP_BAD_REQUEST,
+                )
 
-            return jsonify(json_response(products))
+            return jsonify(json_response(products, next_cursor=next_cursor))
 
         else:  # POST
             data = safe_get_json()
@@ -83,6 +105,46 @@ def products_api():
         db.close()
 
 
+@products_bp.route("/search", methods=["GET"])
+@monitor_http_request
+@rate_limit("search")
+def products_search_api():
+    """
+    Ranked product search for the search box and autocomplete.
+
+    Query parameters: q (search text), limit (default 20) and
+    fuzzy (default true; typo-tolerant fallback when nothing matches).
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return (
+            jsonify(json_response(None, "Search query is required", status=HTTP_BAD_REQUEST)),
+            HTTP_BAD_REQUEST,
+        )
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return (
+            jsonify(json_response(None, "limit must be an integer", status=HTTP_BAD_REQUEST)),
+            HTTP_BAD_REQUEST,
+        )
+    fuzzy = request.args.get("fuzzy", "true").lower() not in ("0", "false", "no")
+
+    db = get_db()
+    service = ProductService(ProductRepository(db))
+
+    try:
+        return jsonify(json_response(service.search_products_ranked(query, limit, fuzzy)))
+
+    except Exception as e:
+        from flask import current_app
+
+        current_app.logger.error(f"Unexpected error in product search: {e}")
+        return jsonify(json_response(None, "Internal server error", status=500)), 500
+    finally:
+        db.close()
+
+
 @products_bp.route("/<int:product_id>", methods=["GET", "DELETE", "PUT"])
 @monitor_http_request
 @rate_limit("api")
@@ -153,3 +215,90 @@ def product_detail_api(product_id):
         return jsonify(json_response(None, "Internal server error", status=500)), 500
     finally:
         db.close()
+
+
+_IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "json",
+}
+
+
+@products_bp.route("/bulk", methods=["POST"])
+@monitor_http_request
+@require_admin
+@rate_limit("admin")
+def products_bulk_import_api():
+    """
+    Bulk product import (admin only).
+
+    The body is CSV (with a header row), NDJSON or a JSON array of
+    products, picked by ?format= or the Content-Type. CSV and NDJSON are
+    read as a stream and stored in chunks. Existing products are updated
+    unless ?on_conflict=skip.
+    """
+    import_format = request.args.get("format") or _IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if import_format not in IMPORT_FORMATS:
+        return (
+            jsonify(
+                json_response(
+                    None,
+                    f"Unsupported import format. Use one of: {', '.join(IMPORT_FORMATS)}",
+                    status=HTTP_BAD_REQUEST,
+                )
+            ),
+            HTTP_BAD_REQUEST,
+        )
+
+    on_conflict = request.args.get("on_conflict", "update")
+    if on_conflict not in ("update", "skip"):
+        return (
+            jsonify(
+                json_response(
+                    None, "on_conflict must be 'update' or 'skip'", status=HTTP_BAD_REQUEST
+                )
+            ),
+            HTTP_BAD_REQUEST,
+        )
+
+    if import_format == "json":
+        data = request.get_json(force=True, silent=True)
+        if isinstance(data, dict):
+            data = data.get("products")
+        if not isinstance(data, list):
+            return (
+                jsonify(
+                    json_response(
+                        None,
+                        'Expected a JSON array of products or {"products": [...]}',
+                        status=HTTP_BAD_REQUEST,
+                    )
+                ),
+                HTTP_BAD_REQUEST,
+            )
+        rows = iter_json_rows(data)
+    else:
+        stream = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+        rows = iter_csv_rows(stream) if import_format == "csv" else iter_ndjson_rows(stream)
+
+    db = get_db()
+    service = ProductImportService(ProductRepository(db), update_existing=(on_conflict == "update"))
+
+    try:
+        summary = service.import_rows(rows)
+        if summary["total_rows"] == 0 and not summary["aborted"]:
+            return (
+                jsonify(json_response(None, "No products to import", status=HTTP_BAD_REQUEST)),
+                HTTP_BAD_REQUEST,
+            )
+        message = f"Imported {summary['imported']} of {summary['total_rows']} products"
+        return jsonify(json_response(summary, message))
+
+    except Exception as e:
+        from flask import current_app
+
+        current_app.logger.error(f"Unexpected error in bulk product import: {e}")
+        return jsonify(json_response(None, "Internal server error", status=500)), 500
+    finally:
+        db.close()
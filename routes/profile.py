@@ -8,16 +8,14 @@ from datetime import date, datetime
 from flask import Blueprint, current_app, jsonify, request
 
 from routes.helpers import get_db, safe_get_json
-from src.constants import ERROR_MESSAGES, HTTP_BAD_REQUEST, HTTP_CREATED, HTTP_NOT_FOUND, HTTP_OK
-from src.nutrition_calculator import (
-    calculate_bmr_katch_mcardle,
-    calculate_bmr_mifflin_st_jeor,
-    calculate_gki,
-    calculate_keto_macros_advanced,
-    calculate_lean_body_mass,
-    calculate_target_calories,
-    calculate_tdee,
+from services.profile_targets_service import (
+    ProfileTargetsService,
+    format_personal_macros,
+    invalidate_profile_targets,
 )
+from src.constants import ERROR_MESSAGES, HTTP_BAD_REQUEST, HTTP_CREATED, HTTP_NOT_FOUND, HTTP_OK
+from src.nutrition_calculator import calculate_gki
+from src.request_tracing import CALC, span
 from src.utils import json_response, safe_float
 
 # Create blueprint
@@ -66,7 +64,8 @@ def gki_api():
             )
 
         # Calculate GKI
-        gki_result = calculate_gki(glucose_mgdl, ketones_mgdl)
+        with span(CALC):
+            gki_result = calculate_gki(glucose_mgdl, ketones_mgdl)
 
         return jsonify(json_response(gki_result, "GKI calculated successfully"))
 
@@ -215,6 +214,7 @@ def profile_api():
                 profile_id = cursor.lastrowid
 
             db.commit()
+            invalidate_profile_targets()
 
             # Get updated profile
             updated_profile = db.execute(
@@ -260,12 +260,9 @@ def profile_macros_api():
     try:
         db = get_db()
 
-        # Get current profile
-        profile = db.execute(
-            "SELECT * FROM user_profile ORDER BY updated_at DESC LIMIT 1"
-        ).fetchone()
+        targets = ProfileTargetsService(db).get_targets()
 
-        if not profile:
+        if not targets:
             return (
                 jsonify(
                     json_response(
@@ -277,64 +274,7 @@ def profile_macros_api():
                 HTTP_NOT_FOUND,
             )
 
-        profile_dict = dict(profile)
-
-        # Calculate age
-
-        birth_date = datetime.strptime(profile_dict["birth_date"], "%Y-%m-%d").date()
-        today = date.today()
-        age = (
-            today.year
-            - birth_date.year
-            - ((today.month, today.day) < (birth_date.month, birth_date.day))
-        )
-
-        # Calculate BMR using advanced algorithm
-        # Use Katch-McArdle if LBM is available (more accurate for high body fat)
-        lbm = profile_dict.get("lean_body_mass_kg")
-        if lbm is None and profile_dict.get("body_fat_percentage") is not None:
-            lbm = calculate_lean_body_mass(
-                profile_dict["weight_kg"], profile_dict["body_fat_percentage"]
-            )
-
-        if lbm is not None:
-            bmr = calculate_bmr_katch_mcardle(lbm)
-        else:
-            bmr = calculate_bmr_mifflin_st_jeor(
-                profile_dict["weight_kg"], profile_dict["height_cm"], age, profile_dict["gender"]
-            )
-
-        # Calculate TDEE using advanced algorithm
-        tdee = calculate_tdee(bmr, profile_dict["activity_level"])
-
-        # Calculate target calories using advanced algorithm
-        target_calories = calculate_target_calories(tdee, profile_dict["goal"])
-
-        # Calculate keto macros using advanced algorithm
-        # LBM already calculated above for BMR
-        keto_type = profile_dict.get("keto_type", "standard")
-        macros = calculate_keto_macros_advanced(
-            target_calories, lbm, profile_dict["activity_level"], keto_type, profile_dict["goal"]
-        )
-
-        carbs_grams = macros["carbs"]
-        protein_grams = macros["protein"]
-        fats_grams = macros["fats"]
-        carbs_calories = carbs_grams * 4
-        protein_calories = protein_grams * 4
-        fats_calories = fats_grams * 9
-
-        macros = {
-            "bmr": round(bmr, 0),
-            "tdee": round(tdee, 0),
-            "target_calories": round(target_calories, 0),
-            "carbs": round(carbs_grams, 1),
-            "protein": round(protein_grams, 1),
-            "fats": round(fats_grams, 1),
-            "carbs_percentage": round((carbs_calories / target_calories) * 100, 1),
-            "protein_percentage": round((protein_calories / target_calories) * 100, 1),
-            "fats_percentage": round((fats_calories / target_calories) * 100, 1),
-        }
+        macros = format_personal_macros(targets)
 
         return jsonify(json_response(macros, "Macros calculated successfully"))
 
@@ -6,32 +6,67 @@ Handles system status, backups, restore, maintenance, and data export.
 import glob
 import os
 import shutil
+import sqlite3
+import tempfile
 import time
 from datetime import datetime
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 
+from services.export_service import EXPORT_MIMETYPES, ExportService, gzip_chunks
+from services.profile_targets_service import invalidate_profile_targets
+from src.backup_manager import PRE_RESTORE_PREFIX, create_backup, replace_database
+from src.cache_manager import cache_manager
 from src.config import Config
-from src.constants import ERROR_MESSAGES, HTTP_BAD_REQUEST
+from src.constants import (
+    ERROR_MESSAGES,
+    EXPORT_FORMATS,
+    EXPORT_TABLES,
+    HTTP_ACCEPTED,
+    HTTP_BAD_REQUEST,
+)
+from src.migrations import LATEST_VERSION, get_version, migrate_database
+from src.monitoring import system_monitor
+from src.nutrition_calculator import calc_tracer
+from src.query_stats import SORT_KEYS, statement_stats
+from src.response_cache import stats_cache
 from src.security import rate_limit, require_admin
+from src.task_manager import task_manager
 from src.utils import get_database_stats, json_response
 
 # Create system blueprint
 system_bp = Blueprint("system", __name__, url_prefix="/api")
 
 
+def _backup_schema_version(path):
+    """Schema version of an uploaded backup, or None if it is not a Nutricount database"""
+    conn = sqlite3.connect(path)
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products'"
+        ).fetchone():
+            return None
+        return get_version(conn)
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+
+
+def _to_unit(value, unit):
+    """Convert a byte count to unit, keeping None for unavailable readings"""
+    return round(value / unit, 2) if value is not None else None
+
+
 @system_bp.route("/system/status")
 def system_status_api():
     """System status and statistics"""
     try:
-        import psutil
-
         db_stats = get_database_stats()
 
-        # System metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage("/")
+        # Latest background sample; no psutil calls on the request path
+        system_monitor.start()
+        sample = system_monitor.latest() or {}
 
         system_info = {
             "application": {
@@ -52,11 +87,15 @@ def system_status_api():
                 "log_entries_count": db_stats.get("log_entries", 0),
             },
             "system": {
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "memory_used_mb": round(memory.used / (1024 * 1024), 2),
-                "disk_percent": round((disk.used / disk.total) * 100, 2),
-                "disk_free_gb": round(disk.free / (1024 * 1024 * 1024), 2),
+                "cpu_percent": sample.get("cpu_percent"),
+                "memory_percent": sample.get("memory_percent"),
+                "memory_used_mb": _to_unit(sample.get("memory_bytes"), 1024 * 1024),
+                "disk_percent": sample.get("disk_percent"),
+                "disk_free_gb": _to_unit(sample.get("disk_free_bytes"), 1024 * 1024 * 1024),
+                "process_rss_mb": _to_unit(sample.get("rss_bytes"), 1024 * 1024),
+                "open_fds": sample.get("open_fds"),
+                "wal_size_mb": _to_unit(sample.get("wal_bytes"), 1024 * 1024),
+                "sampled_at": sample.get("timestamp"),
             },
         }
 
@@ -67,34 +106,140 @@ def system_status_api():
         return jsonify(json_response(None, ERROR_MESSAGES["server_error"], 500)), 500
 
 
+@system_bp.route("/system/calc-trace", methods=["GET", "POST"])
+@require_admin
+def system_calc_trace_api():
+    """Inspect or reconfigure calculation tracing in this worker process
+
+    GET returns the newest ``limit`` records of the trace ring buffer; POST
+    with ``sample_rate`` (0.0-1.0) and/or ``capacity`` changes the settings
+    at runtime (sample_rate 0 switches sampling off).
+    """
+    try:
+        if request.method == "POST":
+            data = request.get_json(silent=True) or {}
+            try:
+                sample_rate = data.get("sample_rate")
+                capacity = data.get("capacity")
+                calc_tracer.configure(
+                    sample_rate=None if sample_rate is None else float(sample_rate),
+                    capacity=None if capacity is None else max(int(capacity), 1),
+                )
+            except (TypeError, ValueError):
+                return (
+                    jsonify(
+                        json_response(
+                            None,
+                            ERROR_MESSAGES["validation_error"],
+                            status=HTTP_BAD_REQUEST,
+                            errors=["sample_rate must be a number and capacity an integer"],
+                        )
+                    ),
+                    HTTP_BAD_REQUEST,
+                )
+
+        limit = max(request.args.get("limit", 50, type=int), 0)
+        return jsonify(
+            json_response(
+                {
+                    "enabled": calc_tracer.enabled,
+                    "sample_rate": calc_tracer.sample_rate,
+                    "capacity": calc_tracer.records.maxlen,
+                    "records": calc_tracer.recent(limit),
+                }
+            )
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Calculation trace API error: {e}")
+        return jsonify(json_response(None, ERROR_MESSAGES["server_error"], 500)), 500
+
+
+@system_bp.route("/system/query-stats", methods=["GET", "DELETE"])
+@require_admin
+def system_query_stats_api():
+    """Per-statement SQL statistics and recent slow queries of this worker process
+
+    GET returns the ``limit`` heaviest statements ordered by ``sort`` (total,
+    mean, p95, max, calls or rows) and the newest slow queries with their
+    query plans; DELETE resets the statistics.
+    """
+    try:
+        if request.method == "DELETE":
+            statement_stats.reset()
+            return jsonify(json_response(None, "Query statistics reset"))
+
+        sort = request.args.get("sort", "total")
+        if sort not in SORT_KEYS:
+            return (
+                jsonify(
+                    json_response(
+                        None,
+                        ERROR_MESSAGES["validation_error"],
+                        status=HTTP_BAD_REQUEST,
+                        errors=[f"sort must be one of: {', '.join(SORT_KEYS)}"],
+                    )
+                ),
+                HTTP_BAD_REQUEST,
+            )
+
+        limit = max(request.args.get("limit", 50, type=int), 0)
+        return jsonify(
+            json_response(
+                {
+                    "enabled": statement_stats.enabled,
+                    "slow_ms": statement_stats.slow_ms,
+                    "since": datetime.fromtimestamp(statement_stats.since).isoformat(),
+                    "statements": statement_stats.snapshot(sort, limit),
+                    "slow_queries": statement_stats.slow_queries(limit),
+                    "slow_log": statement_stats.slow_log_stats(),
+                }
+            )
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Query stats API error: {e}")
+        return jsonify(json_response(None, ERROR_MESSAGES["server_error"], 500)), 500
+
+
 @system_bp.route("/system/backup", methods=["POST"])
 @require_admin
 @rate_limit("admin")
 def system_backup_api():
-    """Create a backup of the database"""
-    try:
-        # Create backups directory if it doesn't exist
-        os.makedirs("backups", exist_ok=True)
+    """Create an online backup of the database
 
-        # Generate backup filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"nutrition_backup_{timestamp}.db"
-        backup_path = os.path.join("backups", backup_filename)
+    Pass ``background=true`` (query arg or JSON body) to run the backup as a
+    background task and poll its progress at /api/tasks/<task_id>.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        background = str(request.args.get("background", data.get("background", ""))).lower()
 
-        # Copy database file
-        shutil.copy2(Config.DATABASE, backup_path)
+        if background in ("1", "true", "yes"):
+            task_id = task_manager.backup_database()
+            return (
+                jsonify(
+                    json_response(
+                        {"task_id": task_id, "status_url": f"/api/tasks/{task_id}"},
+                        "Backup started",
+                        HTTP_ACCEPTED,
+                    )
+                ),
+                HTTP_ACCEPTED,
+            )
 
-        # Get backup size
-        backup_size_mb = round(os.path.getsize(backup_path) / (1024 * 1024), 2)
+        backup = create_backup(retention=Config.BACKUP_RETENTION)
 
         return jsonify(
             json_response(
                 {
-                    "backup_id": backup_filename,
-                    "backup_path": backup_path,
-                    "backup_size_mb": backup_size_mb,
-                    "created_at": datetime.now().isoformat(),
-                    "download_url": f"/api/system/backup/{backup_filename}",
+                    "backup_id": backup["backup_id"],
+                    "backup_path": backup["backup_path"],
+                    "backup_size_mb": round(backup["size_bytes"] / (1024 * 1024), 2),
+                    "compression": backup["compression"],
+                    "integrity": backup["integrity"],
+                    "created_at": backup["created_at"],
+                    "download_url": f"/api/system/backup/{backup['backup_id']}",
                 },
                 "Backup created successfully!",
             )
@@ -149,14 +294,54 @@ def system_restore_api():
                 HTTP_BAD_REQUEST,
             )
 
-        # Create backup of current database before restore
-        os.makedirs("backups", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        current_backup = f"backups/pre_restore_backup_{timestamp}.db"
-        shutil.copy2(Config.DATABASE, current_backup)
+        database = current_app.config["DATABASE"]
 
-        # Save uploaded file
-        backup_file.save(Config.DATABASE)
+        # Save the upload next to the database, bring it to the current schema,
+        # then swap it in with a rename
+        fd, upload_path = tempfile.mkstemp(
+            suffix=".db", dir=os.path.dirname(os.path.abspath(database))
+        )
+        os.close(fd)
+        try:
+            backup_file.save(upload_path)
+
+            version = _backup_schema_version(upload_path)
+            if version is None or version > LATEST_VERSION:
+                error = (
+                    "Invalid backup file. Please upload a Nutricount database"
+                    if version is None
+                    else f"Backup schema version {version} is newer than this "
+                    f"application supports ({LATEST_VERSION})"
+                )
+                return (
+                    jsonify(
+                        json_response(
+                            None,
+                            ERROR_MESSAGES["validation_error"],
+                            status=HTTP_BAD_REQUEST,
+                            errors=[error],
+                        )
+                    ),
+                    HTTP_BAD_REQUEST,
+                )
+            migrate_database(upload_path)
+
+            # Create backup of current database before restore
+            current_backup = create_backup(
+                source=database,
+                compression="",
+                retention=Config.BACKUP_RETENTION,
+                prefix=PRE_RESTORE_PREFIX,
+            )["backup_path"]
+
+            replace_database(upload_path, database)
+        finally:
+            if os.path.exists(upload_path):
+                os.remove(upload_path)
+
+        # Everything cached was computed from the old database
+        cache_manager.clear()
+        invalidate_profile_targets()
 
         return jsonify(
             json_response(
@@ -370,6 +555,7 @@ def maintenance_cleanup_test_data_api():
         deleted_products = db.execute("DELETE FROM products WHERE name LIKE 'TEST%'").rowcount
 
         db.commit()
+        stats_cache.invalidate_all()
 
         total_deleted = deleted_products + deleted_dishes + deleted_logs
 
@@ -429,6 +615,7 @@ def maintenance_wipe_database_api():
         db.execute("DELETE FROM sqlite_sequence")
 
         db.commit()
+        stats_cache.invalidate_all()
         db.close()
         db = None
 
@@ -474,52 +661,64 @@ def maintenance_wipe_database_api():
 
 @system_bp.route("/export/all")
 def export_all_api():
-    """Export all data from the application"""
+    """Export all data from the application as a streamed download
+
+    Query args:
+        format: json (default, the full document), ndjson or csv
+        table: Table to export; required for csv
+        compress: gzip to compress the stream
+    """
     # Import get_db from helpers module
     from routes.helpers import get_db
 
+    export_format = request.args.get("format", "json").lower()
+    table = request.args.get("table")
+    compress = request.args.get("compress", "").lower()
+
+    errors = []
+    if export_format not in EXPORT_FORMATS:
+        errors.append(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == "csv" and table not in EXPORT_TABLES:
+        errors.append(f"table must be one of: {', '.join(EXPORT_TABLES)}")
+    if compress not in ("", "gzip"):
+        errors.append("compress must be gzip")
+    if errors:
+        return (
+            jsonify(
+                json_response(
+                    None, ERROR_MESSAGES["validation_error"], HTTP_BAD_REQUEST, errors=errors
+                )
+            ),
+            HTTP_BAD_REQUEST,
+        )
+
     db = None
     try:
         db = get_db()
-
-        # Get all data
-        products = db.execute("SELECT * FROM products ORDER BY name").fetchall()
-        dishes = db.execute("SELECT * FROM dishes ORDER BY name").fetchall()
-        log_entries = db.execute(
-            "SELECT * FROM log_entries_with_details ORDER BY date DESC, created_at DESC"
-        ).fetchall()
-
-        # Get dish ingredients
-        dish_ingredients = {}
-        for dish in dishes:
-            ingredients = db.execute(
-                """
-                SELECT di.*, p.name as product_name
-                FROM dish_ingredients di
-                JOIN products p ON di.product_id = p.id
-                WHERE di.dish_id = ?
-                ORDER BY di.id
-            """,
-                (dish["id"],),
-            ).fetchall()
-            dish_ingredients[dish["id"]] = [dict(ingredient) for ingredient in ingredients]
-
-        # Prepare export data
-        export_data = {
-            "export_info": {
-                "exported_at": datetime.now().isoformat(),
-                "app_version": Config.VERSION,
-                "total_products": len(products),
-                "total_dishes": len(dishes),
-                "total_log_entries": len(log_entries),
-            },
-            "products": [dict(product) for product in products],
-            "dishes": [dict(dish) for dish in dishes],
-            "dish_ingredients": dish_ingredients,
-            "log_entries": [dict(entry) for entry in log_entries],
-        }
-
-        return jsonify(export_data)
+        service = ExportService(db)
+        export_info = service.begin()
+
+        chunks = service.stream(export_format, export_info, table)
+        filename = f"nutrition-export-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if export_format == "csv":
+            filename += f"-{table}"
+        filename += f".{export_format}"
+        mimetype = EXPORT_MIMETYPES[export_format]
+        if compress:
+            chunks = gzip_chunks(chunks)
+            filename += ".gz"
+            mimetype = "application/gzip"
+
+        def generate(stream_db):
+            try:
+                yield from chunks
+            finally:
+                stream_db.close()
+
+        response = Response(stream_with_context(generate(db)), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        db = None  # Closed by the stream once it is fully sent
+        return response
 
     except Exception as e:
         current_app.logger.error(f"Export API error: {e}")
@@ -32,6 +32,7 @@ CREATE TABLE IF NOT EXISTS products (
     gi_score REAL DEFAULT NULL,
     fiber_estimated BOOLEAN DEFAULT FALSE,
     fiber_deduction_coefficient REAL DEFAULT NULL,
+    calc_version TEXT DEFAULT NULL,  -- nutrition_calculator.CALC_VERSION of the fields above
     -- Metadata
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -171,14 +172,35 @@ CREATE TABLE IF NOT EXISTS gki_measurements (
 );
 
 -- Performance indexes
+-- Every hot query is checked against these by tests/unit/test_query_plans.py.
+-- Indexes that duplicated or prefixed the composite ones below
+DROP INDEX IF EXISTS idx_log_date;
+DROP INDEX IF EXISTS idx_log_entries_date;
+DROP INDEX IF EXISTS idx_log_date_meal;
+DROP INDEX IF EXISTS idx_log_entries_date_meal;
+DROP INDEX IF EXISTS idx_log_item;
+DROP INDEX IF EXISTS idx_log_entries_item;
+DROP INDEX IF EXISTS idx_fasting_sessions_user;
+DROP INDEX IF EXISTS idx_fasting_sessions_start;
+DROP INDEX IF EXISTS idx_fasting_sessions_status;
+DROP INDEX IF EXISTS idx_fasting_goals_user;
+DROP INDEX IF EXISTS idx_fasting_settings_user;
+
 CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
 CREATE INDEX IF NOT EXISTS idx_products_keto_index ON products(keto_index);
 CREATE INDEX IF NOT EXISTS idx_dishes_name ON dishes(name);
 CREATE INDEX IF NOT EXISTS idx_dishes_keto_index ON dishes(keto_index);
-CREATE INDEX IF NOT EXISTS idx_log_date ON log_entries(date);
-CREATE INDEX IF NOT EXISTS idx_log_date_meal ON log_entries(date, meal_time);
-CREATE INDEX IF NOT EXISTS idx_log_item ON log_entries(item_type, item_id);
+-- Covering for the (date, meal_time) rollup refresh, which sums the snapshot columns
+CREATE INDEX IF NOT EXISTS idx_log_date_meal_totals ON log_entries(date, meal_time, calories, protein, fat, carbs, net_carbs);
+-- Covering for item lookups: usage counts, logged dates, re-snapshots on item edits
+CREATE INDEX IF NOT EXISTS idx_log_item_date ON log_entries(item_type, item_id, date);
+-- Keyset pagination: every index ends with the implicit rowid, so idx_products_name
+-- (NOCASE, like the column) serves (name, id) and these serve (date, created_at, id)
+-- and (start_time, id)
+CREATE INDEX IF NOT EXISTS idx_log_date_created ON log_entries(date, created_at);
+-- Entries still waiting for a nutrition snapshot; empty once backfilled
+CREATE INDEX IF NOT EXISTS idx_log_missing_snapshot ON log_entries(id) WHERE net_carbs IS NULL;
 CREATE INDEX IF NOT EXISTS idx_dish_ingredients_dish ON dish_ingredients(dish_id);
 CREATE INDEX IF NOT EXISTS idx_dish_ingredients_product ON dish_ingredients(product_id);
 CREATE INDEX IF NOT EXISTS idx_gki_date ON gki_measurements(date);
@@ -301,43 +323,11 @@ BEGIN
     WHERE id = NEW.id AND NEW.calories_per_100g = 0;
 END;
 
--- Trigger to update dish nutrition when ingredients change
-CREATE TRIGGER IF NOT EXISTS update_dish_nutrition 
-AFTER INSERT ON dish_ingredients
-BEGIN
-    UPDATE dishes 
-    SET 
-        total_weight_grams = (
-            SELECT SUM(quantity_grams) 
-            FROM dish_ingredients 
-            WHERE dish_id = NEW.dish_id
-        ),
-        calories_per_100g = (
-            SELECT SUM(p.calories_per_100g * di.quantity_grams / 100.0) * 100.0 / SUM(di.quantity_grams)
-            FROM dish_ingredients di
-            JOIN products p ON di.product_id = p.id
-            WHERE di.dish_id = NEW.dish_id
-        ),
-        protein_per_100g = (
-            SELECT SUM(p.protein_per_100g * di.quantity_grams / 100.0) * 100.0 / SUM(di.quantity_grams)
-            FROM dish_ingredients di
-            JOIN products p ON di.product_id = p.id
-            WHERE di.dish_id = NEW.dish_id
-        ),
-        fat_per_100g = (
-            SELECT SUM(p.fat_per_100g * di.quantity_grams / 100.0) * 100.0 / SUM(di.quantity_grams)
-            FROM dish_ingredients di
-            JOIN products p ON di.product_id = p.id
-            WHERE di.dish_id = NEW.dish_id
-        ),
-        carbs_per_100g = (
-            SELECT SUM(p.carbs_per_100g * di.quantity_grams / 100.0) * 100.0 / SUM(di.quantity_grams)
-            FROM dish_ingredients di
-            JOIN products p ON di.product_id = p.id
-            WHERE di.dish_id = NEW.dish_id
-        )
-    WHERE id = NEW.dish_id;
-END;
+-- Dish nutrition is calculated by DishRepository when the dish is written
+-- (cooking yields, edible portions); the old per-ingredient trigger
+-- re-aggregated the whole dish after every ingredient insert only to be
+-- overwritten.
+DROP TRIGGER IF EXISTS update_dish_nutrition;
 
 -- Sample data with enhanced fields
 INSERT OR IGNORE INTO products (name, calories_per_100g, protein_per_100g, fat_per_100g, carbs_per_100g, fiber_per_100g, category, glycemic_index, processing_level) VALUES
@@ -354,15 +344,254 @@ INSERT OR IGNORE INTO products (name, calories_per_100g, protein_per_100g, fat_p
 INSERT OR IGNORE INTO user_profile (gender, birth_date, height_cm, weight_kg, activity_level, goal, keto_type) VALUES
 ('male', '1993-01-01', 185, 121.8, 'moderate', 'weight_loss', 'standard');
 
--- Performance indexes (only for tables, not views)
-CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
-CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
-CREATE INDEX IF NOT EXISTS idx_log_entries_date ON log_entries(date);
-CREATE INDEX IF NOT EXISTS idx_log_entries_item ON log_entries(item_type, item_id);
-CREATE INDEX IF NOT EXISTS idx_log_entries_date_meal ON log_entries(date, meal_time);
-CREATE INDEX IF NOT EXISTS idx_dish_ingredients_dish ON dish_ingredients(dish_id);
-CREATE INDEX IF NOT EXISTS idx_dish_ingredients_product ON dish_ingredients(product_id);
-CREATE INDEX IF NOT EXISTS idx_dishes_name ON dishes(name);
+-- ============================================
+-- DAILY ROLLUPS
+-- ============================================
+
+-- Per-entry nutrition resolved from the logged product or dish. Only used to
+-- (re)write the snapshot columns of log_entries; reads use the snapshots.
+DROP VIEW IF EXISTS log_entry_nutrition;
+CREATE VIEW log_entry_nutrition AS
+SELECT
+    le.id,
+    le.date,
+    COALESCE(le.meal_time, '') as meal_time,
+    COALESCE(p.calories_per_100g, d.calories_per_100g, 0) * le.quantity_grams / 100.0 as calories,
+    COALESCE(p.protein_per_100g, d.protein_per_100g, 0) * le.quantity_grams / 100.0 as protein,
+    COALESCE(p.fat_per_100g, d.fat_per_100g, 0) * le.quantity_grams / 100.0 as fat,
+    COALESCE(p.carbs_per_100g, d.carbs_per_100g, 0) * le.quantity_grams / 100.0 as carbs,
+    COALESCE(p.fiber_per_100g, d.fiber_per_100g, 0) * le.quantity_grams / 100.0 as fiber,
+    COALESCE(p.keto_index, d.keto_index) as keto_index
+FROM log_entries le
+LEFT JOIN products p ON le.item_type = 'product' AND le.item_id = p.id
+LEFT JOIN dishes d ON le.item_type = 'dish' AND le.item_id = d.id;
+
+-- Nutrition totals per date and meal, maintained by the triggers below
+-- (meal_time '' holds entries logged without a meal)
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    date TEXT NOT NULL,
+    meal_time TEXT NOT NULL DEFAULT '',
+    entries_count INTEGER NOT NULL DEFAULT 0,
+    calories REAL NOT NULL DEFAULT 0,
+    protein REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    fiber REAL NOT NULL DEFAULT 0,
+    net_carbs REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, meal_time)
+) WITHOUT ROWID;
+
+-- Older versions aggregated the joined view and re-rolled whole dates on
+-- product/dish edits; the triggers below replace them
+DROP TRIGGER IF EXISTS rollup_log_insert;
+DROP TRIGGER IF EXISTS rollup_log_delete;
+DROP TRIGGER IF EXISTS rollup_log_update;
+DROP TRIGGER IF EXISTS rollup_product_update;
+DROP TRIGGER IF EXISTS rollup_dish_update;
+
+-- Snapshot the entry's nutrition when it is written. The columns are filled
+-- from the item's current per-100g values (fiber is carbs - net_carbs);
+-- inserts that already carry a snapshot (net_carbs set) keep it.
+CREATE TRIGGER IF NOT EXISTS log_snapshot_insert
+AFTER INSERT ON log_entries
+WHEN NEW.net_carbs IS NULL
+BEGIN
+    UPDATE log_entries SET (calories, protein, fat, carbs, net_carbs, keto_index) = (
+        SELECT calories, protein, fat, carbs, MAX(carbs - fiber, 0), keto_index
+        FROM log_entry_nutrition WHERE id = NEW.id
+    )
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS log_snapshot_update
+AFTER UPDATE OF item_type, item_id, quantity_grams ON log_entries
+BEGIN
+    UPDATE log_entries SET (calories, protein, fat, carbs, net_carbs, keto_index) = (
+        SELECT calories, protein, fat, carbs, MAX(carbs - fiber, 0), keto_index
+        FROM log_entry_nutrition WHERE id = NEW.id
+    )
+    WHERE id = NEW.id;
+END;
+
+-- Product/dish edits that change per-100g values re-snapshot the entries logged with them
+CREATE TRIGGER IF NOT EXISTS log_snapshot_product_update
+AFTER UPDATE OF calories_per_100g, protein_per_100g, fat_per_100g, carbs_per_100g, fiber_per_100g, keto_index ON products
+WHEN OLD.calories_per_100g IS NOT NEW.calories_per_100g
+  OR OLD.protein_per_100g IS NOT NEW.protein_per_100g
+  OR OLD.fat_per_100g IS NOT NEW.fat_per_100g
+  OR OLD.carbs_per_100g IS NOT NEW.carbs_per_100g
+  OR OLD.fiber_per_100g IS NOT NEW.fiber_per_100g
+  OR OLD.keto_index IS NOT NEW.keto_index
+BEGIN
+    UPDATE log_entries SET (calories, protein, fat, carbs, net_carbs, keto_index) = (
+        SELECT calories, protein, fat, carbs, MAX(carbs - fiber, 0), keto_index
+        FROM log_entry_nutrition n WHERE n.id = log_entries.id
+    )
+    WHERE item_type = 'product' AND item_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS log_snapshot_dish_update
+AFTER UPDATE OF calories_per_100g, protein_per_100g, fat_per_100g, carbs_per_100g, fiber_per_100g, keto_index ON dishes
+WHEN OLD.calories_per_100g IS NOT NEW.calories_per_100g
+  OR OLD.protein_per_100g IS NOT NEW.protein_per_100g
+  OR OLD.fat_per_100g IS NOT NEW.fat_per_100g
+  OR OLD.carbs_per_100g IS NOT NEW.carbs_per_100g
+  OR OLD.fiber_per_100g IS NOT NEW.fiber_per_100g
+  OR OLD.keto_index IS NOT NEW.keto_index
+BEGIN
+    UPDATE log_entries SET (calories, protein, fat, carbs, net_carbs, keto_index) = (
+        SELECT calories, protein, fat, carbs, MAX(carbs - fiber, 0), keto_index
+        FROM log_entry_nutrition n WHERE n.id = log_entries.id
+    )
+    WHERE item_type = 'dish' AND item_id = NEW.id;
+END;
+
+-- Refresh the (date, meal) rollup touched by a log write: a plain range SUM
+-- over the snapshot columns, read from idx_log_date_meal_totals. Snapshot
+-- writes are updates, so they reach rollup_log_update.
+CREATE TRIGGER IF NOT EXISTS rollup_log_insert
+AFTER INSERT ON log_entries
+WHEN NEW.net_carbs IS NOT NULL
+BEGIN
+    DELETE FROM daily_rollups
+    WHERE date = NEW.date AND meal_time = COALESCE(NEW.meal_time, '');
+    INSERT INTO daily_rollups (date, meal_time, entries_count, calories, protein, fat, carbs, fiber, net_carbs)
+    SELECT date, COALESCE(meal_time, ''), COUNT(*), TOTAL(calories), TOTAL(protein), TOTAL(fat),
+           TOTAL(carbs), TOTAL(carbs - net_carbs), TOTAL(net_carbs)
+    FROM log_entries
+    WHERE date = NEW.date AND COALESCE(meal_time, '') = COALESCE(NEW.meal_time, '')
+    GROUP BY 1, 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_log_delete
+AFTER DELETE ON log_entries
+BEGIN
+    DELETE FROM daily_rollups
+    WHERE date = OLD.date AND meal_time = COALESCE(OLD.meal_time, '');
+    INSERT INTO daily_rollups (date, meal_time, entries_count, calories, protein, fat, carbs, fiber, net_carbs)
+    SELECT date, COALESCE(meal_time, ''), COUNT(*), TOTAL(calories), TOTAL(protein), TOTAL(fat),
+           TOTAL(carbs), TOTAL(carbs - net_carbs), TOTAL(net_carbs)
+    FROM log_entries
+    WHERE date = OLD.date AND COALESCE(meal_time, '') = COALESCE(OLD.meal_time, '')
+    GROUP BY 1, 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_log_update
+AFTER UPDATE OF date, meal_time, calories, protein, fat, carbs, net_carbs ON log_entries
+BEGIN
+    DELETE FROM daily_rollups
+    WHERE (date = OLD.date AND meal_time = COALESCE(OLD.meal_time, ''))
+       OR (date = NEW.date AND meal_time = COALESCE(NEW.meal_time, ''));
+    INSERT INTO daily_rollups (date, meal_time, entries_count, calories, protein, fat, carbs, fiber, net_carbs)
+    SELECT date, COALESCE(meal_time, ''), COUNT(*), TOTAL(calories), TOTAL(protein), TOTAL(fat),
+           TOTAL(carbs), TOTAL(carbs - net_carbs), TOTAL(net_carbs)
+    FROM log_entries
+    WHERE (date = OLD.date AND COALESCE(meal_time, '') = COALESCE(OLD.meal_time, ''))
+       OR (date = NEW.date AND COALESCE(meal_time, '') = COALESCE(NEW.meal_time, ''))
+    GROUP BY 1, 2;
+END;
+
+-- Snapshot entries written before the snapshot triggers existed
+UPDATE log_entries SET (calories, protein, fat, carbs, net_carbs, keto_index) = (
+    SELECT calories, protein, fat, carbs, MAX(carbs - fiber, 0), keto_index
+    FROM log_entry_nutrition n WHERE n.id = log_entries.id
+)
+WHERE net_carbs IS NULL;
+
+-- Backfill rollups for databases that had log entries before the table existed
+INSERT INTO daily_rollups (date, meal_time, entries_count, calories, protein, fat, carbs, fiber, net_carbs)
+SELECT date, COALESCE(meal_time, ''), COUNT(*), TOTAL(calories), TOTAL(protein), TOTAL(fat),
+       TOTAL(carbs), TOTAL(carbs - net_carbs), TOTAL(net_carbs)
+FROM log_entries
+WHERE NOT EXISTS (SELECT 1 FROM daily_rollups)
+GROUP BY 1, 2;
+
+-- ============================================
+-- PRODUCT SEARCH
+-- ============================================
+
+-- Word index on product names for ranked prefix search (autocomplete).
+-- External content: rows live in products, the triggers below keep the index in sync
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    content='products',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='1 2 3'
+);
+
+-- Trigram index for substring search and typo-tolerant matching
+CREATE VIRTUAL TABLE IF NOT EXISTS products_trigram USING fts5(
+    name,
+    content='products',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+-- How often each product was logged, used to rank search results
+CREATE TABLE IF NOT EXISTS product_usage (
+    product_id INTEGER PRIMARY KEY,
+    uses INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS products_search_insert
+AFTER INSERT ON products
+BEGIN
+    INSERT INTO products_fts (rowid, name) VALUES (NEW.id, NEW.name);
+    INSERT INTO products_trigram (rowid, name) VALUES (NEW.id, NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_search_delete
+AFTER DELETE ON products
+BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    INSERT INTO products_trigram (products_trigram, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    DELETE FROM product_usage WHERE product_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_search_update
+AFTER UPDATE OF name ON products
+BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    INSERT INTO products_trigram (products_trigram, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    INSERT INTO products_fts (rowid, name) VALUES (NEW.id, NEW.name);
+    INSERT INTO products_trigram (rowid, name) VALUES (NEW.id, NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_usage_log_insert
+AFTER INSERT ON log_entries
+WHEN NEW.item_type = 'product'
+BEGIN
+    INSERT INTO product_usage (product_id, uses) VALUES (NEW.item_id, 1)
+    ON CONFLICT (product_id) DO UPDATE SET uses = uses + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_usage_log_delete
+AFTER DELETE ON log_entries
+WHEN OLD.item_type = 'product'
+BEGIN
+    UPDATE product_usage SET uses = MAX(uses - 1, 0) WHERE product_id = OLD.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_usage_log_update
+AFTER UPDATE OF item_type, item_id ON log_entries
+BEGIN
+    UPDATE product_usage SET uses = MAX(uses - 1, 0)
+    WHERE OLD.item_type = 'product' AND product_id = OLD.item_id;
+    INSERT INTO product_usage (product_id, uses)
+    SELECT NEW.item_id, 1 WHERE NEW.item_type = 'product'
+    ON CONFLICT (product_id) DO UPDATE SET uses = uses + 1;
+END;
+
+-- Build the indexes for products that existed before them
+INSERT INTO products_fts (products_fts) VALUES ('rebuild');
+INSERT INTO products_trigram (products_trigram) VALUES ('rebuild');
+
+INSERT INTO product_usage (product_id, uses)
+SELECT item_id, COUNT(*)
+FROM log_entries
+WHERE item_type = 'product' AND NOT EXISTS (SELECT 1 FROM product_usage)
+GROUP BY item_id;
 
 -- ============================================
 -- FASTING TABLES
@@ -414,10 +643,11 @@ GROUP BY DATE(start_time)
 ORDER BY fasting_date DESC;
 
 -- Fasting indexes
-CREATE INDEX IF NOT EXISTS idx_fasting_sessions_user ON fasting_sessions(user_id);
-CREATE INDEX IF NOT EXISTS idx_fasting_sessions_start ON fasting_sessions(start_time);
-CREATE INDEX IF NOT EXISTS idx_fasting_sessions_status ON fasting_sessions(status);
-CREATE INDEX IF NOT EXISTS idx_fasting_goals_user ON fasting_goals(user_id);
+CREATE INDEX IF NOT EXISTS idx_fasting_sessions_user_start ON fasting_sessions(user_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_fasting_sessions_user_status_start ON fasting_sessions(user_id, status, start_time);
+-- Per-day totals (goal progress, fasting_stats) filter and group on DATE(start_time)
+CREATE INDEX IF NOT EXISTS idx_fasting_sessions_status_day ON fasting_sessions(status, DATE(start_time), duration_hours);
+CREATE INDEX IF NOT EXISTS idx_fasting_goals_user_status ON fasting_goals(user_id, status, created_at);
 CREATE INDEX IF NOT EXISTS idx_fasting_goals_period ON fasting_goals(period_start, period_end);
 
 -- Fasting settings table
@@ -437,5 +667,4 @@ CREATE TABLE IF NOT EXISTS fasting_settings (
 );
 
 -- Fasting settings indexes
-CREATE INDEX IF NOT EXISTS idx_fasting_settings_user ON fasting_settings(user_id);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_fasting_settings_user_unique ON fasting_settings(user_id);
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from repositories.dish_repository import DishRepository
 from src.cache_manager import cache_manager
+from src.response_cache import invalidate_stats_dates
 from src.utils import validate_dish_data
 
 
@@ -157,6 +158,7 @@ class DishService:
 
             # Invalidate cache
             cache_manager.delete("dishes:all")
+            invalidate_stats_dates(self.repository.find_logged_dates(dish_id))
 
             return (True, updated_dish, [])
         except Exception as e:
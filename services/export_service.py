@@ -0,0 +1,241 @@
+"""
+Export Service - Streaming data export engine.
+
+Walks products, dishes, dish ingredients and log entries with cursor batches
+inside one read transaction and encodes them incrementally as JSON, NDJSON or
+CSV (optionally gzipped), so memory stays flat however large the database is.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from src.config import Config
+from src.constants import EXPORT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_TABLES
+
+EXPORT_QUERIES = {
+    "products": "SELECT * FROM products ORDER BY name",
+    "dishes": "SELECT * FROM dishes ORDER BY name",
+    "dish_ingredients": """
+        SELECT di.*, p.name as product_name
+        FROM dish_ingredients di
+        JOIN products p ON di.product_id = p.id
+        ORDER BY di.dish_id, di.id
+    """,
+    "log_entries": "SELECT * FROM log_entries_with_details ORDER BY date DESC, created_at DESC",
+}
+
+# One joined pass that also yields dishes without ingredients (as a NULL row)
+DISH_INGREDIENTS_BY_DISH_QUERY = """
+    SELECT d.id as export_dish_id, di.*, p.name as product_name
+    FROM dishes d
+    LEFT JOIN dish_ingredients di ON di.dish_id = d.id
+    LEFT JOIN products p ON di.product_id = p.id
+    ORDER BY d.id, di.id
+"""
+
+EXPORT_MIMETYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Gzip a stream of text chunks incrementally.
+
+    Args:
+        chunks: Text chunks
+
+    Returns:
+        Iterator of gzip-compressed byte chunks
+    """
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ExportService:
+    """
+    Service layer for streaming exports.
+
+    begin() opens a read transaction so the counts and every table come from
+    the same snapshot; the stream generators end it when they finish.
+    """
+
+    def __init__(self, db, batch_size: int = EXPORT_BATCH_SIZE):
+        """
+        Initialize service with a database connection.
+
+        Args:
+            db: Database connection
+            batch_size: Rows fetched per cursor batch
+        """
+        self.db = db
+        self.batch_size = batch_size
+
+    def begin(self) -> Dict[str, Any]:
+        """
+        Start the export snapshot and collect the export header.
+
+        Returns:
+            export_info dictionary with the version and per-table counts
+        """
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN")
+        counts = self.db.execute(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM products) as products,
+                (SELECT COUNT(*) FROM dishes) as dishes,
+                (SELECT COUNT(*) FROM log_entries) as log_entries
+            """
+        ).fetchone()
+        return {
+            "exported_at": datetime.now().isoformat(),
+            "app_version": Config.VERSION,
+            "total_products": counts["products"],
+            "total_dishes": counts["dishes"],
+            "total_log_entries": counts["log_entries"],
+        }
+
+    def end(self):
+        """Release the read snapshot"""
+        if self.db.in_transaction:
+            self.db.rollback()
+
+    def _batches(self, query: str) -> Iterator[list]:
+        """Run a query and yield its rows in fetchmany batches"""
+        cursor = self.db.execute(query)
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def _json_array(self, table: str) -> Iterator[str]:
+        first = True
+        for rows in self._batches(EXPORT_QUERIES[table]):
+            chunk = ",".join(_dumps(dict(row)) for row in rows)
+            yield chunk if first else "," + chunk
+            first = False
+
+    def _json_dish_ingredients(self) -> Iterator[str]:
+        rows = (row for batch in self._batches(DISH_INGREDIENTS_BY_DISH_QUERY) for row in batch)
+        first = True
+        for dish_id, group in groupby(rows, key=lambda row: row["export_dish_id"]):
+            ingredients = []
+            for row in group:
+                if row["id"] is not None:
+                    ingredient = dict(row)
+                    del ingredient["export_dish_id"]
+                    ingredients.append(ingredient)
+            yield ("" if first else ",") + _dumps(str(dish_id)) + ":" + _dumps(ingredients)
+            first = False
+
+    def stream_json(self, export_info: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the export as one JSON document (same shape as the legacy export).
+
+        Args:
+            export_info: Result of begin()
+
+        Returns:
+            Iterator of JSON text chunks
+        """
+        try:
+            yield '{"export_info":' + _dumps(export_info)
+            for table in ("products", "dishes"):
+                yield f',"{table}":['
+                yield from self._json_array(table)
+                yield "]"
+            yield ',"dish_ingredients":{'
+            yield from self._json_dish_ingredients()
+            yield '},"log_entries":['
+            yield from self._json_array("log_entries")
+            yield "]}\n"
+        finally:
+            self.end()
+
+    def stream_ndjson(self, export_info: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the export as newline-delimited JSON records.
+
+        Each line is ``{"type": ..., "data": {...}}``; the first line carries
+        the export_info header and the type of the rest is the table name.
+
+        Args:
+            export_info: Result of begin()
+
+        Returns:
+            Iterator of NDJSON text chunks, one per batch
+        """
+        try:
+            yield _dumps({"type": "export_info", "data": export_info}) + "\n"
+            for table in EXPORT_TABLES:
+                prefix = '{"type":' + _dumps(table) + ',"data":'
+                for rows in self._batches(EXPORT_QUERIES[table]):
+                    yield "".join(prefix + _dumps(dict(row)) + "}\n" for row in rows)
+        finally:
+            self.end()
+
+    def stream_csv(self, table: str) -> Iterator[str]:
+        """
+        Stream one table as CSV with a header row.
+
+        Args:
+            table: One of EXPORT_TABLES
+
+        Returns:
+            Iterator of CSV text chunks, one per batch
+        """
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            cursor = self.db.execute(EXPORT_QUERIES[table])
+            # Header from the cursor so empty tables still get one
+            writer.writerow(column[0] for column in cursor.description)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                writer.writerows(tuple(row) for row in rows)
+                yield buffer.getvalue()
+                if not rows:
+                    break
+                buffer.seek(0)
+                buffer.truncate()
+        finally:
+            self.end()
+
+    def stream(
+        self, export_format: str, export_info: Dict[str, Any], table: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream the export in the requested format.
+
+        Args:
+            export_format: One of EXPORT_FORMATS
+            export_info: Result of begin()
+            table: Table to export (required for CSV)
+
+        Returns:
+            Iterator of text chunks
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        if export_format == "csv":
+            return self.stream_csv(table)
+        if export_format == "ndjson":
+            return self.stream_ndjson(export_info)
+        return self.stream_json(export_info)
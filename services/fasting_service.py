@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from repositories.fasting_repository import FastingRepository
 from src.cache_manager import cache_manager
+from src.pagination import fetch_page
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,45 @@ class FastingService:
 
         return sessions
 
+    def get_fasting_sessions_page(
+        self,
+        user_id: int = 1,
+        status: Optional[str] = None,
+        limit: int = 30,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of fasting sessions, newest first (see pagination.fetch_page).
+
+        Args:
+            user_id: User ID
+            status: Session status filter
+            limit: Maximum sessions (capped at API_MAX_PER_PAGE)
+            offset: Number of sessions to skip (compatibility mode)
+            cursor: next_cursor returned with the previous page
+            use_cache: Whether to use cache
+
+        Returns:
+            Tuple of (fasting sessions, next cursor or None)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        return fetch_page(
+            lambda limit, offset, after: self.repository.find_all(
+                user_id=user_id, status=status, limit=limit, offset=offset, after=after
+            ),
+            "fasting",
+            lambda s: (s["start_time"], s["id"]),
+            limit,
+            offset,
+            cursor,
+            cache=cache_manager if use_cache else None,
+            cache_prefix=f"fasting:sessions:{user_id}:page:{status or 'all'}",
+        )
+
     def get_active_session(self, user_id: int = 1) -> Optional[Dict[str, Any]]:
         """
         Get active fasting session for user.
@@ -325,7 +365,7 @@ class FastingService:
             user_id: User ID
         """
         # Invalidate all fasting cache for this user
-        cache_manager.delete(f"fasting:sessions:{user_id}:*")
+        cache_manager.delete_pattern(f"fasting:sessions:{user_id}:*")
         cache_manager.delete(f"fasting:stats:{user_id}")
 
     # === Advanced Features (Previously delegated to FastingManager) ===
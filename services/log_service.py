@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional, Tuple
 from repositories.log_repository import LogRepository
 from src.cache_manager import cache_manager
 from src.config import Config
+from src.pagination import fetch_page
+from src.response_cache import invalidate_stats_dates, stats_cache
 from src.utils import validate_log_data
 
 logger = logging.getLogger(__name__)
@@ -44,7 +46,7 @@ class LogService:
             use_cache: Whether to use cache
 
         Returns:
-            List of processed log entry dictionaries with calculated nutrition
+            List of log entry dictionaries with their nutrition snapshot
         """
         # Apply business rules
         limit = min(limit, Config.API_MAX_PER_PAGE)
@@ -56,17 +58,52 @@ class LogService:
             if cached_result is not None:
                 return cached_result
 
-        # Get from repository
+        # Entries carry the nutrition snapshot written with them
         entries = self.repository.find_all(date_filter=date_filter, limit=limit)
 
-        # Process entries to calculate actual nutrition values
-        processed_entries = self._process_log_entries(entries)
-
         # Cache result
         if use_cache:
-            cache_manager.set(cache_key, processed_entries, 300)  # 5 minutes
+            cache_manager.set(cache_key, entries, 300)  # 5 minutes
+
+        return entries
+
+    def get_log_entries_page(
+        self,
+        date_filter: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of log entries, newest first (see pagination.fetch_page).
+
+        Args:
+            date_filter: Filter by specific date (YYYY-MM-DD)
+            limit: Maximum number of entries (capped at API_MAX_PER_PAGE)
+            offset: Number of entries to skip (compatibility mode)
+            cursor: next_cursor returned with the previous page
+            use_cache: Whether to use cache
+
+        Returns:
+            Tuple of (log entries, next cursor or None)
 
-        return processed_entries
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        return fetch_page(
+            lambda limit, offset, after: self.repository.find_all(
+                date_filter=date_filter, limit=limit, offset=offset, after=after
+            ),
+            "log",
+            lambda e: (e["date"], e["created_at"], e["id"]),
+            limit,
+            offset,
+            cursor,
+            cache=cache_manager if use_cache else None,
+            # Under log:{date}: so log writes invalidate it
+            cache_prefix=f"log:{date_filter or 'all'}:page",
+        )
 
     def get_log_entry_by_id(self, entry_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -76,15 +113,9 @@ class LogService:
             entry_id: Log entry ID
 
         Returns:
-            Processed log entry dictionary or None if not found
+            Log entry dictionary or None if not found
         """
-        entry = self.repository.find_by_id(entry_id)
-        if not entry:
-            return None
-
-        # Process single entry
-        processed = self._process_log_entries([entry])
-        return processed[0] if processed else None
+        return self.repository.find_by_id(entry_id)
 
     def create_log_entry(
         self, data: Dict[str, Any]
@@ -128,10 +159,7 @@ class LogService:
             # Invalidate cache
             self._invalidate_log_cache(entry["date"])
 
-            # Process entry for response
-            processed = self._process_log_entries([entry])
-
-            return (True, processed[0] if processed else entry, [])
+            return (True, entry, [])
         except Exception as e:
             logger.exception("Error creating log entry")
             return (False, None, [f"Failed to create log entry: {str(e)}"])
@@ -180,10 +208,7 @@ class LogService:
             if "date" in cleaned_data and cleaned_data["date"] != existing["date"]:
                 self._invalidate_log_cache(cleaned_data["date"])
 
-            # Process entry for response
-            processed = self._process_log_entries([updated])
-
-            return (True, processed[0] if processed else updated, [])
+            return (True, updated, [])
         except Exception as e:
             logger.exception(f"Error updating log entry {entry_id}")
             return (False, None, [f"Failed to update log entry: {str(e)}"])
@@ -277,75 +302,6 @@ class LogService:
             },
         }
 
-    def _process_log_entries(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Process log entries to calculate actual nutrition values.
-
-        Args:
-            entries: Raw log entries from database
-
-        Returns:
-            Processed entries with calculated nutrition
-        """
-        processed_entries = []
-
-        for entry in entries:
-            processed_entry = dict(entry)
-            quantity_factor = entry["quantity_grams"] / 100.0
-
-            # Calculate nutrition values based on item type
-            if entry["item_type"] == "product":
-                # For products, use per_100g values
-                processed_entry["calories"] = (
-                    entry["calories_per_100g"] * quantity_factor
-                    if entry.get("calories_per_100g")
-                    else None
-                )
-                processed_entry["protein"] = (
-                    entry["protein_per_100g"] * quantity_factor
-                    if entry.get("protein_per_100g")
-                    else None
-                )
-                processed_entry["fat"] = (
-                    entry["fat_per_100g"] * quantity_factor if entry.get("fat_per_100g") else None
-                )
-                processed_entry["carbs"] = (
-                    entry["carbs_per_100g"] * quantity_factor
-                    if entry.get("carbs_per_100g")
-                    else None
-                )
-                fiber_per_100g = entry.get("fiber_per_100g") or 0
-                processed_entry["fiber"] = fiber_per_100g * quantity_factor
-            elif entry["item_type"] == "dish":
-                # For dishes, use dish_per_100g values
-                processed_entry["calories"] = entry.get("calculated_calories")
-                processed_entry["protein"] = (
-                    entry["dish_protein_per_100g"] * quantity_factor
-                    if entry.get("dish_protein_per_100g")
-                    else None
-                )
-                processed_entry["fat"] = (
-                    entry["dish_fat_per_100g"] * quantity_factor
-                    if entry.get("dish_fat_per_100g")
-                    else None
-                )
-                processed_entry["carbs"] = (
-                    entry["dish_carbs_per_100g"] * quantity_factor
-                    if entry.get("dish_carbs_per_100g")
-                    else None
-                )
-                dish_fiber_per_100g = entry.get("dish_fiber_per_100g") or 0
-                processed_entry["fiber"] = dish_fiber_per_100g * quantity_factor
-
-            # Calculate net carbs
-            carbs = processed_entry.get("carbs") or 0
-            fiber = processed_entry.get("fiber") or 0
-            processed_entry["net_carbs"] = max(0, carbs - fiber)
-
-            processed_entries.append(processed_entry)
-
-        return processed_entries
-
     def _invalidate_log_cache(self, date: Optional[str] = None):
         """
         Invalidate log cache for specific date or all.
@@ -355,8 +311,12 @@ class LogService:
         """
         if date:
             # Invalidate specific date and "all" cache
-            cache_manager.delete(f"log:{date}:*")
-            cache_manager.delete("log:all:*")
+            cache_manager.delete_pattern(f"log:{date}:*")
+            cache_manager.delete_pattern("log:all:*")
+            invalidate_stats_dates([date])
         else:
             # Invalidate all log cache
-            cache_manager.delete("log:*")
+            cache_manager.delete_pattern("log:*")
+            stats_cache.invalidate_all()
+        # Product search ranks by usage, which log writes change
+        cache_manager.delete_pattern("products:search:*")
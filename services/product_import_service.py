@@ -0,0 +1,270 @@
+"""
+Product Import Service - Bulk product loading.
+
+Reads products from CSV, NDJSON or a JSON array as a stream, validates
+them in chunks, and stores each chunk with one upsert transaction, so a
+food database of thousands of rows costs a handful of commits instead of
+one request, INSERT and fsync per product.
+"""
+
+import csv
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from repositories.product_repository import ProductRepository
+from src.cache_manager import cache_manager
+from src.constants import (
+    IMPORT_CHUNK_SIZE,
+    MAX_IMPORT_ERRORS,
+    PROCESSING_LEVELS,
+    PRODUCT_CATEGORIES,
+    PRODUCT_REGIONS,
+)
+from src.response_cache import stats_cache
+from src.utils import clean_string, safe_float, validate_product_data
+
+# Row numbers start at 1 (for CSV: the line of the row, counting the header)
+ImportRow = Tuple[int, Any]
+
+
+def iter_csv_rows(stream: TextIO) -> Iterator[ImportRow]:
+    """
+    Read products from CSV with a header row.
+
+    Args:
+        stream: Text stream
+
+    Returns:
+        Iterator of (line number, row dictionary)
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(stream: TextIO) -> Iterator[ImportRow]:
+    """
+    Read products from newline-delimited JSON, one object per line.
+
+    Lines that are not valid JSON are yielded as ValueError instances so
+    they show up in the error report instead of aborting the import.
+
+    Args:
+        stream: Text stream
+
+    Returns:
+        Iterator of (line number, decoded value or ValueError)
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def iter_json_rows(items: Iterable[Any]) -> Iterator[ImportRow]:
+    """
+    Number the items of an already parsed JSON array.
+
+    Args:
+        items: Product objects
+
+    Returns:
+        Iterator of (position, item)
+    """
+    return enumerate(items, 1)
+
+
+def _optional_number(
+    record: Dict[str, Any], field: str, label: str, upper: float, errors: List[str]
+) -> Optional[float]:
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    number = safe_float(value, None)
+    if number is None:
+        errors.append(f"{label} must be a number")
+    elif not 0 <= number <= upper:
+        errors.append(f"{label} must be between 0 and {upper:g}")
+    return number
+
+
+def _optional_choice(
+    record: Dict[str, Any], field: str, label: str, choices: List[str], errors: List[str]
+) -> Optional[str]:
+    value = clean_string(record.get(field), 50).lower() or None
+    if value is not None and value not in choices:
+        errors.append(f"{label} must be one of: {', '.join(choices)}")
+    return value
+
+
+def validate_import_row(record: Any) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Validate one imported product.
+
+    Runs validate_product_data on the required fields and checks the
+    optional fields the product form does not send (fiber, sugars,
+    category, processing level, glycemic index, region). Missing optional
+    numbers stay None so the calculator estimates them.
+
+    Args:
+        record: Decoded row
+
+    Returns:
+        Tuple of (cleaned product or None, errors)
+    """
+    if isinstance(record, Exception):
+        return None, [str(record)]
+    if not isinstance(record, dict):
+        return None, ["Row must be an object"]
+
+    is_valid, errors, cleaned_data = validate_product_data(record)
+    carbs = cleaned_data.get("carbs_per_100g", 100)
+
+    fiber = _optional_number(record, "fiber_per_100g", "Fiber", 100, errors)
+    sugars = _optional_number(record, "sugars_per_100g", "Sugars", 100, errors)
+    glycemic_index = _optional_number(record, "glycemic_index", "Glycemic index", 100, errors)
+    if fiber is not None and fiber > carbs:
+        errors.append("Fiber cannot exceed carbs")
+    if sugars is not None and sugars > carbs:
+        errors.append("Sugars cannot exceed carbs")
+
+    category = _optional_choice(record, "category", "Category", PRODUCT_CATEGORIES, errors)
+    processing_level = _optional_choice(
+        record, "processing_level", "Processing level", PROCESSING_LEVELS, errors
+    )
+    region = clean_string(record.get("region"), 10).upper() or "US"
+    if region not in PRODUCT_REGIONS:
+        errors.append(f"Region must be one of: {', '.join(PRODUCT_REGIONS)}")
+
+    if errors:
+        return None, errors
+
+    cleaned_data.update(
+        {
+            "fiber_per_100g": fiber,
+            "sugars_per_100g": sugars,
+            "glycemic_index": glycemic_index,
+            "category": category,
+            "processing_level": processing_level,
+            "region": region,
+        }
+    )
+    return cleaned_data, []
+
+
+class ProductImportService:
+    """
+    Service layer for bulk product imports.
+
+    Rows are consumed lazily, so a streamed request body or file is never
+    held in memory as a whole; each chunk is committed before the next one
+    is read.
+    """
+
+    def __init__(
+        self,
+        repository: ProductRepository,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        update_existing: bool = True,
+    ):
+        """
+        Initialize service with repository dependency.
+
+        Args:
+            repository: ProductRepository instance for data access
+            chunk_size: Rows validated and stored per transaction
+            update_existing: Update products whose name exists (else skip them)
+        """
+        self.repository = repository
+        self.chunk_size = max(int(chunk_size), 1)
+        self.update_existing = update_existing
+
+    def import_rows(self, rows: Iterable[ImportRow]) -> Dict[str, Any]:
+        """
+        Validate and store products chunk by chunk.
+
+        Args:
+            rows: (row number, decoded row) pairs, e.g. from iter_csv_rows
+
+        Returns:
+            Summary with total_rows, imported, inserted, updated, skipped,
+            failed, errors (per row: row, name, errors), errors_truncated,
+            chunks, duration_seconds, rows_per_second and aborted (the error
+            that stopped reading the input, if any)
+        """
+        started = time.perf_counter()
+        summary = {
+            "total_rows": 0,
+            "imported": 0,
+            "inserted": 0,
+            "updated": 0,
+            "skipped": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False,
+            "chunks": 0,
+            "aborted": None,
+        }
+
+        chunk = []
+        try:
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk, summary)
+                    chunk = []
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Rows read so far are still imported; the rest of the input is unreadable
+            summary["aborted"] = f"Could not read input after row {summary['total_rows']}: {e}"
+        if chunk:
+            self._import_chunk(chunk, summary)
+
+        if summary["imported"]:
+            cache_manager.delete_pattern("products:*")
+        if summary["updated"]:
+            # Updated products change the totals of every day they were logged on
+            stats_cache.invalidate_all()
+
+        duration = time.perf_counter() - started
+        summary["duration_seconds"] = round(duration, 3)
+        summary["rows_per_second"] = round(summary["total_rows"] / duration, 1) if duration else 0
+        return summary
+
+    def _import_chunk(self, chunk: List[ImportRow], summary: Dict[str, Any]):
+        """Validate one chunk and store its valid products in one transaction"""
+        summary["chunks"] += 1
+        summary["total_rows"] += len(chunk)
+
+        valid = []
+        for row_number, record in chunk:
+            product, errors = validate_import_row(record)
+            if errors:
+                self._add_error(summary, row_number, record, errors)
+            else:
+                valid.append((row_number, product))
+
+        result = self.repository.upsert_many(
+            [product for _, product in valid], update_existing=self.update_existing
+        )
+        for index, error in result["failed"]:
+            row_number, product = valid[index]
+            self._add_error(summary, row_number, product, [error])
+
+        summary["inserted"] += result["inserted"]
+        summary["updated"] += result["updated"]
+        summary["skipped"] += result["skipped"]
+        summary["imported"] += result["inserted"] + result["updated"]
+
+    @staticmethod
+    def _add_error(summary: Dict[str, Any], row_number: int, record: Any, errors: List[str]):
+        summary["failed"] += 1
+        if len(summary["errors"]) >= MAX_IMPORT_ERRORS:
+            summary["errors_truncated"] = True
+            return
+        name = record.get("name") if isinstance(record, dict) else None
+        summary["errors"].append({"row": row_number, "name": name, "errors": errors})
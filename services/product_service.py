@@ -8,11 +8,13 @@ for controllers/routes.
 
 import logging
 import sqlite3
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from repositories.product_repository import ProductRepository
-from src.cache_manager import cache_invalidate, cache_manager
+from src.cache_manager import cache_manager
 from src.config import Config
+from src.pagination import fetch_page
+from src.response_cache import invalidate_stats_dates
 from src.utils import validate_product_data
 
 logger = logging.getLogger(__name__)
@@ -72,6 +74,47 @@ class ProductService:
 
         return products
 
+    def get_products_page(
+        self,
+        search: str = "",
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of products ordered by name (see pagination.fetch_page).
+
+        Args:
+            search: Search term for product name
+            limit: Maximum number of products (capped at API_MAX_PER_PAGE)
+            offset: Number of products to skip (compatibility mode)
+            cursor: next_cursor returned with the previous page
+            use_cache: Whether to use cache
+
+        Returns:
+            Tuple of (products with calculated fields, next cursor or None)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        return fetch_page(
+            lambda limit, offset, after: self.repository.find_all(
+                search=search,
+                limit=limit,
+                offset=offset,
+                include_calculated_fields=True,
+                after=after,
+            ),
+            "products",
+            lambda p: (p["name"], p["id"]),
+            limit,
+            offset,
+            cursor,
+            cache=cache_manager if use_cache else None,
+            cache_prefix=f"products:page:{search}",
+        )
+
     def get_product_by_id(self, product_id: int) -> Optional[Dict[str, Any]]:
         """
         Get single product by ID.
@@ -114,7 +157,7 @@ class ProductService:
             product = self.repository.create(cleaned_data)
 
             # Invalidate cache
-            cache_invalidate("products:*")
+            cache_manager.delete_pattern("products:*")
 
             return True, product, []
         except sqlite3.IntegrityError as e:
@@ -159,7 +202,8 @@ class ProductService:
             product = self.repository.update(product_id, cleaned_data)
 
             # Invalidate cache
-            cache_invalidate("products:*")
+            cache_manager.delete_pattern("products:*")
+            invalidate_stats_dates(self.repository.find_logged_dates(product_id))
 
             return True, product, []
         except sqlite3.IntegrityError as e:
@@ -199,7 +243,7 @@ class ProductService:
 
             if success:
                 # Invalidate cache
-                cache_invalidate("products:*")
+                cache_manager.delete_pattern("products:*")
                 return True, []
             else:
                 return False, ["Failed to delete product"]
@@ -226,6 +270,41 @@ class ProductService:
         """
         return self.get_products(search=query, limit=limit)
 
+    def search_products_ranked(
+        self, query: str, limit: int = 20, fuzzy: bool = True, use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranked full-text product search (prefix matching, typo fallback).
+
+        Args:
+            query: Search query
+            limit: Maximum results (capped at API_MAX_PER_PAGE)
+            fuzzy: Fall back to typo-tolerant matching when nothing matches
+            use_cache: Whether to use cache
+
+        Returns:
+            List of matching products, best match first
+        """
+        query = query.strip()
+        limit = max(0, min(limit, Config.API_MAX_PER_PAGE))
+        if not query or not limit:
+            return []
+
+        # Under the products: prefix so product writes invalidate it; log writes
+        # clear products:search:* too since the ranking uses product_usage
+        cache_key = f"products:search:{query.lower()}:{limit}:{int(fuzzy)}"
+        if use_cache:
+            cached_result = cache_manager.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        products = self.repository.search(query, limit=limit, fuzzy=fuzzy)
+
+        if use_cache:
+            cache_manager.set(cache_key, products, 300)  # 5 minutes
+
+        return products
+
     def get_product_count(self) -> int:
         """
         Get total number of products.
@@ -0,0 +1,191 @@
+"""
+Profile Targets Service - Memoized personal macro targets.
+
+Computes age, LBM, BMR, TDEE, target calories and keto macros once per
+profile version and day, shared by the stats and profile endpoints.
+"""
+
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+from src.cache_manager import cache_manager
+from src.nutrition_calculator import (
+    calculate_bmr_katch_mcardle,
+    calculate_bmr_mifflin_st_jeor,
+    calculate_keto_macros_advanced,
+    calculate_lean_body_mass,
+    calculate_target_calories,
+    calculate_tdee,
+)
+from src.request_tracing import CALC, traced
+from src.response_cache import stats_cache
+
+CACHE_KEY = "profile_targets:current"
+CACHE_TTL = 86400  # Targets only change with the profile or the date
+
+# Last computed targets in this process: {version: targets}
+_memo: Dict[Tuple, Dict[str, Any]] = {}
+_memo_lock = threading.Lock()
+
+
+def calculate_age(birth_date: str, today: date) -> int:
+    """
+    Calculate age in whole years.
+
+    Args:
+        birth_date: Birth date string (YYYY-MM-DD)
+        today: Reference date
+
+    Returns:
+        Age in years
+    """
+    born = datetime.strptime(birth_date, "%Y-%m-%d").date()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+@traced(CALC)
+def compute_targets(profile: Dict[str, Any], today: date) -> Dict[str, Any]:
+    """
+    Run the full BMR -> TDEE -> target calories -> keto macros chain.
+
+    Args:
+        profile: user_profile row as a dictionary
+        today: Reference date for the age calculation
+
+    Returns:
+        Dictionary with unrounded age, lbm, bmr, tdee, target_calories,
+        carbs, protein and fats
+    """
+    age = calculate_age(profile["birth_date"], today)
+
+    # Use Katch-McArdle if LBM is available (more accurate for high body fat)
+    lbm = profile.get("lean_body_mass_kg")
+    if lbm is None and profile.get("body_fat_percentage") is not None:
+        lbm = calculate_lean_body_mass(profile["weight_kg"], profile["body_fat_percentage"])
+
+    if lbm is not None:
+        bmr = calculate_bmr_katch_mcardle(lbm)
+    else:
+        bmr = calculate_bmr_mifflin_st_jeor(
+            profile["weight_kg"], profile["height_cm"], age, profile["gender"]
+        )
+
+    tdee = calculate_tdee(bmr, profile["activity_level"])
+    target_calories = calculate_target_calories(tdee, profile["goal"])
+
+    keto_type = profile.get("keto_type", "standard")
+    macros = calculate_keto_macros_advanced(
+        target_calories, lbm, profile["activity_level"], keto_type, profile["goal"]
+    )
+
+    return {
+        "age": age,
+        "lbm": lbm,
+        "bmr": bmr,
+        "tdee": tdee,
+        "target_calories": target_calories,
+        "carbs": macros["carbs"],
+        "protein": macros["protein"],
+        "fats": macros["fats"],
+    }
+
+
+def format_personal_macros(targets: Dict[str, Any], days: int = 1) -> Dict[str, float]:
+    """
+    Format targets for API responses.
+
+    Args:
+        targets: Result of compute_targets()
+        days: Number of days the absolute targets cover (e.g. 7 for weekly stats)
+
+    Returns:
+        Rounded personal macros dictionary; percentages are per-day splits
+    """
+    target_calories = targets["target_calories"]
+    return {
+        "bmr": round(targets["bmr"] * days, 0),
+        "tdee": round(targets["tdee"] * days, 0),
+        "target_calories": round(target_calories * days, 0),
+        "carbs": round(targets["carbs"] * days, 1),
+        "protein": round(targets["protein"] * days, 1),
+        "fats": round(targets["fats"] * days, 1),
+        "carbs_percentage": round((targets["carbs"] * 4 / target_calories) * 100, 1),
+        "protein_percentage": round((targets["protein"] * 4 / target_calories) * 100, 1),
+        "fats_percentage": round((targets["fats"] * 9 / target_calories) * 100, 1),
+    }
+
+
+def invalidate_profile_targets():
+    """Drop memoized targets (and stats responses embedding them) after the profile changes"""
+    with _memo_lock:
+        _memo.clear()
+    cache_manager.delete(CACHE_KEY)
+    stats_cache.invalidate_all()
+
+
+class ProfileTargetsService:
+    """
+    Service layer for personal macro targets.
+
+    Results are memoized in-process and in cache_manager, keyed by the
+    profile row (including updated_at) and today's date so birthdays still
+    roll the age over.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize service with a database connection.
+
+        Args:
+            db: Database connection
+        """
+        self.db = db
+
+    def get_profile(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the current user profile.
+
+        Returns:
+            Profile dictionary or None if no profile exists
+        """
+        profile = self.db.execute(
+            "SELECT * FROM user_profile ORDER BY updated_at DESC LIMIT 1"
+        ).fetchone()
+        return dict(profile) if profile else None
+
+    def get_targets(self, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get personal targets for the current profile.
+
+        Args:
+            today: Reference date (default: today)
+
+        Returns:
+            Targets dictionary (see compute_targets) or None if no profile exists
+        """
+        profile = self.get_profile()
+        if profile is None:
+            return None
+
+        today = today or date.today()
+        version = [today.isoformat()] + [profile[key] for key in sorted(profile)]
+        memo_key = tuple(version)
+
+        targets = _memo.get(memo_key)
+        if targets is not None:
+            return dict(targets)
+
+        cached = cache_manager.get(CACHE_KEY)
+        if cached is not None and cached.get("version") == version:
+            targets = cached["targets"]
+        else:
+            targets = compute_targets(profile, today)
+            cache_manager.set(CACHE_KEY, {"version": version, "targets": targets}, CACHE_TTL)
+
+        # Only the current profile version is ever worth keeping
+        with _memo_lock:
+            _memo.clear()
+            _memo[memo_key] = targets
+
+        return dict(targets)
@@ -0,0 +1,175 @@
+"""
+Stats Service - Range-based nutrition statistics engine.
+
+Aggregates any date window (day through year) from a single grouped read of
+the daily rollups and folds it into totals, time buckets and meal breakdowns.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from repositories.log_repository import LogRepository
+from src.constants import MAX_STATS_RANGE_DAYS, MEAL_TYPES, STATS_GRANULARITIES
+
+NUTRIENT_FIELDS = ("calories", "protein", "fat", "carbs", "fiber", "net_carbs")
+
+
+def _empty_totals() -> Dict[str, float]:
+    totals = {field: 0.0 for field in NUTRIENT_FIELDS}
+    totals["entries_count"] = 0
+    return totals
+
+
+def _add_row(totals: Dict[str, float], row: Dict[str, Any]):
+    for field in NUTRIENT_FIELDS:
+        totals[field] += row[field] or 0.0
+    totals["entries_count"] += row["entries_count"] or 0
+
+
+def _rounded(totals: Dict[str, float]) -> Dict[str, Any]:
+    result = {field: round(totals[field], 1) for field in NUTRIENT_FIELDS}
+    result["entries_count"] = int(totals["entries_count"])
+    return result
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """
+    Get the first date of the bucket containing a day.
+
+    Args:
+        day: Date to place
+        granularity: 'day', 'week' (Monday-based) or 'month'
+
+    Returns:
+        Bucket start date
+    """
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+class StatsService:
+    """
+    Service layer for nutrition statistics over arbitrary date ranges.
+
+    Delegates data access to LogRepository; all grouping beyond
+    (date, meal_time) happens in Python so any window costs one query.
+    """
+
+    def __init__(self, repository: LogRepository):
+        """
+        Initialize service with repository.
+
+        Args:
+            repository: LogRepository instance
+        """
+        self.repository = repository
+
+    def aggregate(self, start: date, end: date, granularity: str = "day") -> Dict[str, Any]:
+        """
+        Aggregate nutrition for an inclusive date range.
+
+        Args:
+            start: First date of the range
+            end: Last date of the range
+            granularity: Bucket size for the breakdown ('day', 'week' or 'month')
+
+        Returns:
+            Dictionary with raw (unrounded) totals, ordered buckets covering the
+            whole range (empty ones included) and a per-meal breakdown
+        """
+        rows = self.repository.get_rollups(start.isoformat(), end.isoformat())
+
+        totals = _empty_totals()
+        meals = {meal_type: _empty_totals() for meal_type in MEAL_TYPES}
+        buckets = {}
+
+        # Pre-seed every bucket so gaps in the log still show up as zero rows
+        current = bucket_start(start, granularity)
+        while current <= end:
+            buckets[current] = _empty_totals()
+            current = _next_bucket(current, granularity)
+
+        for row in rows:
+            row_date = datetime.strptime(row["date"], "%Y-%m-%d").date()
+            _add_row(totals, row)
+            _add_row(buckets[bucket_start(row_date, granularity)], row)
+            if row["meal_time"] in meals:
+                _add_row(meals[row["meal_time"]], row)
+
+        bucket_list = []
+        for bucket, values in buckets.items():
+            bucket_end = min(_next_bucket(bucket, granularity) - timedelta(days=1), end)
+            bucket_list.append(
+                {
+                    "start": max(bucket, start).isoformat(),
+                    "end": bucket_end.isoformat(),
+                    **values,
+                }
+            )
+
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "granularity": granularity,
+            "days": (end - start).days + 1,
+            "totals": totals,
+            "buckets": bucket_list,
+            "meal_breakdown": meals,
+        }
+
+    def get_range_stats(
+        self, start: Optional[str], end: Optional[str], granularity: Optional[str] = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]], List[str]]:
+        """
+        Validate request parameters and build the range stats payload.
+
+        Args:
+            start: First date (YYYY-MM-DD)
+            end: Last date (YYYY-MM-DD)
+            granularity: 'day', 'week' or 'month' (default: 'day')
+
+        Returns:
+            Tuple of (success, stats, errors) where stats values are rounded
+            and include per-day averages
+        """
+        granularity = granularity or "day"
+        if granularity not in STATS_GRANULARITIES:
+            return False, None, [f"Granularity must be one of: {', '.join(STATS_GRANULARITIES)}"]
+
+        try:
+            start_date = datetime.strptime(start or "", "%Y-%m-%d").date()
+            end_date = datetime.strptime(end or "", "%Y-%m-%d").date()
+        except ValueError:
+            return False, None, ["Invalid date format. Use YYYY-MM-DD for start and end"]
+
+        if end_date < start_date:
+            return False, None, ["End date must not be before start date"]
+        if (end_date - start_date).days + 1 > MAX_STATS_RANGE_DAYS:
+            return False, None, [f"Date range cannot exceed {MAX_STATS_RANGE_DAYS} days"]
+
+        stats = self.aggregate(start_date, end_date, granularity)
+        days = stats["days"]
+
+        stats["averages"] = {
+            field: round(stats["totals"][field] / days, 1) for field in NUTRIENT_FIELDS
+        }
+        stats["totals"] = _rounded(stats["totals"])
+        stats["buckets"] = [
+            {"start": bucket["start"], "end": bucket["end"], **_rounded(bucket)}
+            for bucket in stats["buckets"]
+        ]
+        stats["meal_breakdown"] = {
+            meal_type: _rounded(values) for meal_type, values in stats["meal_breakdown"].items()
+        }
+        return True, stats, []
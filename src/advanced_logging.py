@@ -3,12 +3,17 @@ Advanced Logging Module
 Handles structured logging with ELK Stack integration
 """
 
+import atexit
 import json
 import logging
+import os
 import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Tuple
 
 try:
     from loguru import logger as loguru_logger
@@ -28,11 +33,116 @@ except ImportError:
 
 try:
     from elasticsearch import Elasticsearch
+    from elasticsearch import helpers as es_helpers
 
     ELASTICSEARCH_AVAILABLE = True
 except ImportError:
     ELASTICSEARCH_AVAILABLE = False
     Elasticsearch = None
+    es_helpers = None
+
+from src.config import Config
+
+# (time, method, path, status_code, duration, user_id, ip)
+AccessRecord = Tuple[float, str, str, int, float, Any, Any]
+
+
+class AccessLogPipeline:
+    """Bounded log queue drained by a background thread
+
+    submit() only appends a compact tuple to a deque (atomic in CPython, no
+    lock taken) and never waits: when the queue is full the record is
+    dropped and counted. The drain thread hands up to batch_size records at
+    a time to write_batch every flush_interval seconds and on exit. Used for
+    access records and for any other log write that must stay off the
+    request path (request traces, slow queries).
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[AccessRecord]], None],
+        capacity: int = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        name: str = "access-log",
+    ):
+        self.write_batch = write_batch
+        self.name = name
+        self.capacity = capacity or Config.ACCESS_LOG_QUEUE_SIZE
+        self.batch_size = batch_size or Config.ACCESS_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.ACCESS_LOG_FLUSH_INTERVAL
+        self.queue = deque()
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, record: AccessRecord) -> bool:
+        """Queue a record; returns False if it was dropped because the queue is full"""
+        if self._pid != os.getpid():
+            self.start()
+        if len(self.queue) >= self.capacity:
+            self.dropped += 1
+            return False
+        self.queue.append(record)
+        return True
+
+    def start(self):
+        """Start the drain thread for this process (threads do not survive a fork)"""
+        with self._drain_lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the drain thread after writing what is queued"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def flush(self) -> int:
+        """Write every queued record now; returns the number written"""
+        written = 0
+        with self._drain_lock:
+            while self.queue:
+                batch = []
+                while self.queue and len(batch) < self.batch_size:
+                    batch.append(self.queue.popleft())
+                try:
+                    self.write_batch(batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                    written += len(batch)
+                except Exception as e:
+                    self.errors += 1
+                    # stderr: logging the failure would go through the failing sinks
+                    print(f"{self.name} write failed ({len(batch)} records): {e}", file=sys.stderr)
+        return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue and throughput counters"""
+        return {
+            "queued": len(self.queue),
+            "capacity": self.capacity,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
 
 
 class StructuredLogger:
@@ -58,6 +168,11 @@ class StructuredLogger:
         self._setup_logging()
         self._setup_elasticsearch()
 
+        # Requests enqueue access records; a background thread writes them
+        self.access_log = AccessLogPipeline(self._write_access_batch)
+        # Same for request traces and other events logged from the request path
+        self.event_log = AccessLogPipeline(self._write_event_batch, name="event-log")
+
     def _setup_logging(self):
         """Setup structured logging"""
         if LOGURU_AVAILABLE:
@@ -125,6 +240,17 @@ class StructuredLogger:
                 filter=lambda record: record["extra"].get("log_type") == "audit",
             )
 
+            # File logging - slow SQL statements (query_stats)
+            loguru_logger.add(
+                self.log_dir / "slow_query.log",
+                level="INFO",
+                format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}",
+                rotation="10 MB",
+                retention="30 days",
+                compression="zip",
+                filter=lambda record: record["extra"].get("log_type") == "slow_query",
+            )
+
             self.logger = loguru_logger
         else:
             # Fallback to standard logging
@@ -177,28 +303,53 @@ class StructuredLogger:
         user_id: int = None,
         ip: str = None,
     ):
-        """Log HTTP access event"""
-        extra_data = {
-            "log_type": "access",
-            "method": method,
-            "path": path,
-            "status_code": status_code,
-            "duration": duration,
-            "user_id": user_id,
-            "ip": ip,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
+        """Log HTTP access event synchronously"""
+        self._write_access_batch([(time.time(), method, path, status_code, duration, user_id, ip)])
+
+    def enqueue_access_event(
+        self,
+        method: str,
+        path: str,
+        status_code: int,
+        duration: float,
+        user_id: int = None,
+        ip: str = None,
+    ) -> bool:
+        """Queue an HTTP access event for the background writer (never blocks)"""
+        return self.access_log.submit(
+            (time.time(), method, path, status_code, duration, user_id, ip)
+        )
+
+    def _write_access_batch(self, records: List[AccessRecord]):
+        """Write access records to the log sinks and bulk-index them in Elasticsearch"""
+        documents = []
+        for timestamp, method, path, status_code, duration, user_id, ip in records:
+            extra_data = {
+                "log_type": "access",
+                "method": method,
+                "path": path,
+                "status_code": status_code,
+                "duration": duration,
+                "user_id": user_id,
+                "ip": ip,
+                "timestamp": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+            }
 
-        message = f"{method} {path} {status_code} {duration:.3f}s"
+            message = f"{method} {path} {status_code} {duration:.3f}s"
 
-        if LOGURU_AVAILABLE:
-            self.logger.bind(**extra_data).info(message)
-        else:
-            self.logger.info(f"{message} | {json.dumps(extra_data)}")
+            if LOGURU_AVAILABLE:
+                self.logger.bind(**extra_data).info(message)
+            else:
+                self.logger.info(f"{message} | {json.dumps(extra_data)}")
+
+            documents.append((message, extra_data))
 
         # Send to Elasticsearch if available
         if self.es_client:
-            self._send_to_elasticsearch("access", "INFO", message, extra_data)
+            if len(documents) == 1:
+                self._send_to_elasticsearch("access", "INFO", *documents[0])
+            else:
+                self._bulk_to_elasticsearch("access", "INFO", documents)
 
     def log_security_event(
         self, event_type: str, message: str, user_id: int = None, ip: str = None, **kwargs
@@ -245,6 +396,35 @@ class StructuredLogger:
         if self.es_client:
             self._send_to_elasticsearch("performance", "INFO", message, extra_data)
 
+    def enqueue_performance_event(
+        self, operation: str, duration: float, details: Dict[str, Any] = None
+    ) -> bool:
+        """Queue a performance event for the background writer (never blocks)"""
+        return self.event_log.submit((self.log_performance_event, (operation, duration, details)))
+
+    def _write_event_batch(self, records: List[Tuple[Callable, tuple]]):
+        """Write queued events with their synchronous log_* method"""
+        for log_event, args in records:
+            log_event(*args)
+
+    def log_slow_query(self, record: Dict[str, Any]):
+        """Log a slow SQL statement with its query plan (see query_stats.StatementStats)"""
+        extra_data = {"log_type": "slow_query", **record}
+        message = (
+            f"Slow query {record['query_id']} took {record['duration_ms']}ms: {record['query']}"
+        )
+        if record.get("plan"):
+            message += f" | plan: {'; '.join(record['plan'])}"
+
+        if LOGURU_AVAILABLE:
+            self.logger.bind(**extra_data).warning(message)
+        else:
+            self.logger.warning(f"{message} | {json.dumps(extra_data)}")
+
+        # Send to Elasticsearch if available
+        if self.es_client:
+            self._send_to_elasticsearch("slow_query", "WARNING", message, extra_data)
+
     def log_business_event(self, event_type: str, message: str, user_id: int = None, **kwargs):
         """Log business event"""
         extra_data = {
@@ -290,6 +470,36 @@ class StructuredLogger:
             if self.es_error_count <= 5:  # Only log first 5 errors to avoid spam
                 print(f"Elasticsearch error ({self.es_error_count}): {e}", file=sys.stderr)
 
+    def _bulk_to_elasticsearch(
+        self, log_type: str, level: str, documents: List[Tuple[str, Dict[str, Any]]]
+    ):
+        """Send several logs to Elasticsearch in one bulk request"""
+        if not self.es_client:
+            return
+
+        try:
+            index_name = (
+                f"{self.app_name}-{log_type}-{datetime.now(timezone.utc).strftime('%Y.%m.%d')}"
+            )
+            actions = [
+                {
+                    "_index": index_name,
+                    "_source": {
+                        "@timestamp": data["timestamp"],
+                        "level": level,
+                        "message": message,
+                        "log_type": log_type,
+                        **data,
+                    },
+                }
+                for message, data in documents
+            ]
+            es_helpers.bulk(self.es_client, actions)
+        except Exception as e:
+            self.es_error_count += 1
+            if self.es_error_count <= 5:  # Only log first 5 errors to avoid spam
+                print(f"Elasticsearch error ({self.es_error_count}): {e}", file=sys.stderr)
+
     def get_log_stats(self) -> Dict[str, Any]:
         """Get logging statistics"""
         stats = {
@@ -299,6 +509,8 @@ class StructuredLogger:
             "elasticsearch_error_count": self.es_error_count,
             "log_level": self.log_level,
             "log_directory": str(self.log_dir),
+            "access_log": self.access_log.get_stats(),
+            "event_log": self.event_log.get_stats(),
         }
 
         # Get log file sizes
@@ -0,0 +1,246 @@
+"""
+Backup Manager Module
+Online SQLite backups with incremental page copying, verification,
+compression and retention
+"""
+
+import glob
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+from .config import Config
+from .db_pool import close_all_pools
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "nutrition_backup_"
+PRE_RESTORE_PREFIX = "pre_restore_backup_"
+COMPRESSION_SUFFIXES = {"": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Times the copy may restart (source written by another connection mid-copy)
+# before falling back to a single-step copy
+MAX_BACKUP_RESTARTS = 3
+
+# Share of the reported progress spent copying pages (the rest covers
+# verification and compression)
+COPY_PROGRESS_SHARE = 90
+
+
+class _TooManyRestarts(Exception):
+    """Raised from the progress callback to abort a copy that keeps restarting"""
+
+
+def _copy_pages(
+    source: sqlite3.Connection,
+    target: sqlite3.Connection,
+    pages: int,
+    sleep: float,
+    progress: Optional[Callable[[int], None]],
+):
+    """Copy the source into the target a few pages at a time"""
+    state = {"remaining": None, "restarts": 0}
+
+    def on_step(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > MAX_BACKUP_RESTARTS:
+                raise _TooManyRestarts()
+        state["remaining"] = remaining
+        if progress and total:
+            progress(int((total - remaining) * COPY_PROGRESS_SHARE / total))
+        if remaining and sleep:
+            # Shared lock is released between steps; let writers in
+            time.sleep(sleep)
+
+    try:
+        source.backup(target, pages=pages, progress=on_step)
+    except _TooManyRestarts:
+        logger.warning("Database kept changing during backup, copying in one step")
+        source.backup(target)
+
+
+def _integrity_check(conn: sqlite3.Connection) -> str:
+    """First row of PRAGMA integrity_check ("ok" for a sound database)"""
+    return conn.execute("PRAGMA integrity_check").fetchone()[0]
+
+
+def _compress(path: str, compression: str) -> str:
+    """Compress a finished backup in place and return the new path"""
+    if not compression:
+        return path
+
+    compressed_path = path + COMPRESSION_SUFFIXES[compression]
+    with open(path, "rb") as f_in, open(compressed_path + ".part", "wb") as f_out:
+        if compression == "zstd":
+            zstandard.ZstdCompressor().copy_stream(f_in, f_out)
+        else:
+            with gzip.GzipFile(fileobj=f_out, mode="wb") as gz_out:
+                shutil.copyfileobj(f_in, gz_out, 1024 * 1024)
+    os.replace(compressed_path + ".part", compressed_path)
+    os.remove(path)
+    return compressed_path
+
+
+def apply_retention(directory: str, keep: int, prefix: str = BACKUP_PREFIX) -> List[str]:
+    """
+    Delete all but the newest backups with the given name prefix.
+
+    Args:
+        directory: Backup directory
+        keep: Number of backups to keep
+        prefix: Backup file name prefix
+
+    Returns:
+        Paths of the deleted backups
+    """
+    backups = [
+        path
+        for path in glob.glob(os.path.join(directory, f"{prefix}*"))
+        if not path.endswith(".part")
+    ]
+    backups.sort(key=os.path.getmtime, reverse=True)
+
+    removed = []
+    for path in backups[max(keep, 0) :]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            logger.warning(f"Could not remove old backup {path}: {e}")
+    return removed
+
+
+def create_backup(
+    source: Optional[str] = None,
+    backup_path: Optional[str] = None,
+    compression: Optional[str] = None,
+    verify: bool = True,
+    retention: Optional[int] = None,
+    prefix: str = BACKUP_PREFIX,
+    pages: Optional[int] = None,
+    sleep: Optional[float] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Take a consistent online backup of a live SQLite database.
+
+    Uses the sqlite3 backup API, which includes committed WAL content and never
+    captures a torn state, copying ``pages`` pages per step and sleeping
+    between steps so writers are not starved. The copy is written to a
+    ``.part`` file and only renamed into place once it has been verified.
+
+    Args:
+        source: Database to back up (default: Config.DATABASE)
+        backup_path: Destination file (default: timestamped file in Config.BACKUP_DIR)
+        compression: "", "gzip" or "zstd" (default: Config.BACKUP_COMPRESSION)
+        verify: Run PRAGMA integrity_check on the copy
+        retention: Keep only this many backups with ``prefix`` (None: keep all)
+        prefix: File name prefix for default paths and retention
+        pages: Pages copied per step (default: Config.BACKUP_PAGES_PER_STEP)
+        sleep: Seconds to sleep between steps (default: Config.BACKUP_STEP_SLEEP)
+        progress: Callback receiving progress percentages (0-100)
+
+    Returns:
+        Dictionary with backup_id, backup_path, size_bytes, compression,
+        integrity, duration_seconds, pruned and created_at
+    """
+    source = source or Config.DATABASE
+    compression = Config.BACKUP_COMPRESSION if compression is None else compression.lower()
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported backup compression: {compression}")
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        raise ValueError("zstd compression requires the zstandard package")
+
+    if not backup_path:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = os.path.join(Config.BACKUP_DIR, f"{prefix}{timestamp}.db")
+    directory = os.path.dirname(backup_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    started = time.time()
+    part_path = backup_path + ".part"
+    try:
+        source_conn = sqlite3.connect(source, timeout=30)
+        try:
+            target_conn = sqlite3.connect(part_path)
+            try:
+                _copy_pages(
+                    source_conn,
+                    target_conn,
+                    Config.BACKUP_PAGES_PER_STEP if pages is None else pages,
+                    Config.BACKUP_STEP_SLEEP if sleep is None else sleep,
+                    progress,
+                )
+                # Make the copy a single self-contained file
+                target_conn.execute("PRAGMA journal_mode = DELETE")
+                integrity = "skipped"
+                if verify:
+                    integrity = _integrity_check(target_conn)
+                    if integrity != "ok":
+                        raise RuntimeError(f"Backup integrity check failed: {integrity}")
+            finally:
+                target_conn.close()
+        finally:
+            source_conn.close()
+        os.replace(part_path, backup_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    backup_path = _compress(backup_path, compression)
+    pruned = apply_retention(directory or ".", retention, prefix) if retention else []
+    if progress:
+        progress(100)
+
+    logger.info(f"Database backed up to {backup_path}")
+    return {
+        "backup_id": os.path.basename(backup_path),
+        "backup_path": backup_path,
+        "size_bytes": os.path.getsize(backup_path),
+        "compression": compression or None,
+        "integrity": integrity,
+        "duration_seconds": round(time.time() - started, 3),
+        "pruned": pruned,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+def replace_database(source: str, database: Optional[str] = None) -> None:
+    """
+    Swap the live database file for another one (e.g. an uploaded backup).
+
+    Pooled connections of this process are retired first and the old
+    database's -wal/-shm files removed, so SQLite cannot lay the old WAL
+    over the new file. The new file is renamed into place, giving it a new
+    inode, which makes pools in other workers retire their handles on the
+    next checkout.
+
+    Args:
+        source: File to move into place; must be on the same filesystem
+        database: Database path (default: Config.DATABASE)
+    """
+    database = database or Config.DATABASE
+    close_all_pools()
+    for suffix in ("-wal", "-shm"):
+        try:
+            os.remove(database + suffix)
+        except FileNotFoundError:
+            pass
+    os.replace(source, database)
+    logger.info(f"Replaced database {database}")
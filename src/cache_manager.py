@@ -3,12 +3,20 @@ Cache Manager Module
 Handles Redis caching and performance optimization
 """
 
+import heapq
 import json
 import logging
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from fnmatch import fnmatchcase
 from functools import wraps
 from typing import Any, Optional
 
+from .config import Config
+from .shared_cache import SQLiteCache
+
 try:
     import redis
 
@@ -19,18 +27,182 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Characters that make a key pattern a glob rather than a literal key
+GLOB_CHARS = "*?["
+
+# Batch size for Redis SCAN/UNLINK during pattern deletes
+REDIS_SCAN_COUNT = 500
+
+# INCR that sets the TTL only when it creates the key, in one round trip
+REDIS_INCR_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[2])
+if count == tonumber(ARGV[2]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+def _key_prefixes(key: str):
+    """Yield every ':'-terminated prefix of a key ("a:b:c" -> "a:", "a:b:")"""
+    end = key.find(":")
+    while end != -1:
+        yield key[: end + 1]
+        end = key.find(":", end + 1)
+
+
+class FallbackCache(MutableMapping):
+    """
+    In-memory LRU cache with a TTL heap and a key-prefix index.
+
+    Entries are ``{"value": ..., "expires": ...}`` dicts kept in recency
+    order, so get/set/evict are O(1) (plus O(log n) heap upkeep), expired
+    entries are reclaimed from the heap before live ones are evicted, and
+    ``prefix:*`` pattern deletes touch only the matching keys.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, dict]" = OrderedDict()
+        self._heap = []  # (expires, key); stale items are skipped lazily
+        self._prefixes = {}  # "prefix:" -> set of keys
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key: str) -> dict:
+        return self._data[key]
+
+    def __setitem__(self, key: str, entry: dict):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            else:
+                for prefix in _key_prefixes(key):
+                    self._prefixes.setdefault(prefix, set()).add(key)
+            self._data[key] = entry
+            heapq.heappush(self._heap, (entry["expires"], key))
+            if len(self._heap) > 2 * len(self._data) + 64:
+                self._rebuild_heap()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._data[key]
+            for prefix in _key_prefixes(key):
+                keys = self._prefixes.get(prefix)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._prefixes[prefix]
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def discard(self, key: str) -> bool:
+        """Delete a key; returns True if it existed"""
+        with self._lock:
+            if key not in self._data:
+                return False
+            del self[key]
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._heap.clear()
+            self._prefixes.clear()
+
+    def _rebuild_heap(self):
+        """Drop heap items left behind by overwritten or deleted keys"""
+        self._heap = [(entry["expires"], key) for key, entry in self._data.items()]
+        heapq.heapify(self._heap)
+
+    def lookup(self, key: str) -> Optional[Any]:
+        """Get a live value and mark it most recently used"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry["expires"] <= time.time():
+                del self[key]
+                return None
+            self._data.move_to_end(key)
+            return entry["value"]
+
+    def store(self, key: str, value: Any, expire: int):
+        """Insert a value, reclaiming expired and then least recently used entries"""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self.purge_expired()
+                while len(self._data) >= self.maxsize:
+                    del self[next(iter(self._data))]
+            self[key] = {"value": value, "expires": time.time() + expire}
+
+    def incr(self, key: str, expire: int, amount: int = 1) -> int:
+        """Increment a counter in place; a new counter expires after ``expire`` seconds"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry["expires"] <= time.time():
+                self.store(key, amount, expire)
+                return amount
+            entry["value"] += amount
+            self._data.move_to_end(key)
+            return entry["value"]
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from the head of the TTL heap"""
+        removed = 0
+        now = time.time()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expires, key = heapq.heappop(self._heap)
+                entry = self._data.get(key)
+                if entry is not None and entry["expires"] == expires:
+                    del self[key]
+                    removed += 1
+        return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Delete keys matching a glob pattern"""
+        with self._lock:
+            glob_at = min((pattern.find(c) for c in GLOB_CHARS if c in pattern), default=-1)
+            if glob_at == -1:
+                candidates = [pattern] if pattern in self._data else []
+            else:
+                # Narrow to the longest indexed prefix of the literal part
+                literal = pattern[:glob_at]
+                indexed = literal[: literal.rfind(":") + 1]
+                candidates = list(self._prefixes.get(indexed, ())) if indexed else list(self._data)
+                if pattern != indexed + "*":
+                    candidates = [key for key in candidates if fnmatchcase(key, pattern)]
+
+            for key in candidates:
+                del self[key]
+            return len(candidates)
+
 
 class CacheManager:
-    """Redis-based cache manager with fallback to in-memory cache"""
+    """Redis-based cache manager with fallback to an in-memory or shared SQLite cache"""
 
     def __init__(
-        self, redis_url: str = "redis://localhost:6379/0", fallback_cache_size: int = 1000
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        fallback_cache_size: int = 1000,
+        shared_cache_path: Optional[str] = None,
     ):
         self.redis_client = None
-        self.fallback_cache = {}
-        self.fallback_cache_size = fallback_cache_size
         self.use_redis = False
 
+        # A shared file keeps workers coherent when there is no Redis
+        if shared_cache_path:
+            self.fallback_cache = SQLiteCache(shared_cache_path, fallback_cache_size)
+        else:
+            self.fallback_cache = FallbackCache(fallback_cache_size)
+
         if REDIS_AVAILABLE:
             try:
                 self.redis_client = redis.from_url(redis_url, decode_responses=True)
@@ -44,6 +216,19 @@ class CacheManager:
         else:
             logger.warning("Redis not installed, using fallback cache")
 
+    @property
+    def is_shared(self) -> bool:
+        """True when every worker process sees the same cache contents"""
+        return self.use_redis or isinstance(self.fallback_cache, SQLiteCache)
+
+    @property
+    def fallback_cache_size(self) -> int:
+        return self.fallback_cache.maxsize
+
+    @fallback_cache_size.setter
+    def fallback_cache_size(self, size: int):
+        self.fallback_cache.maxsize = size
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
@@ -53,12 +238,7 @@ class CacheManager:
                     return json.loads(value)
             else:
                 # Fallback to in-memory cache
-                if key in self.fallback_cache:
-                    cached_item = self.fallback_cache[key]
-                    if cached_item["expires"] > time.time():
-                        return cached_item["value"]
-                    else:
-                        del self.fallback_cache[key]
+                return self.fallback_cache.lookup(key)
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
 
@@ -71,14 +251,7 @@ class CacheManager:
                 return self.redis_client.setex(key, expire, json.dumps(value))
             else:
                 # Fallback to in-memory cache
-                if len(self.fallback_cache) >= self.fallback_cache_size:
-                    # Remove oldest item
-                    oldest_key = min(
-                        self.fallback_cache.keys(), key=lambda k: self.fallback_cache[k]["expires"]
-                    )
-                    del self.fallback_cache[oldest_key]
-
-                self.fallback_cache[key] = {"value": value, "expires": time.time() + expire}
+                self.fallback_cache.store(key, value, expire)
                 return True
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {e}")
@@ -90,9 +263,7 @@ class CacheManager:
             if self.use_redis and self.redis_client:
                 return bool(self.redis_client.delete(key))
             else:
-                if key in self.fallback_cache:
-                    del self.fallback_cache[key]
-                    return True
+                return self.fallback_cache.discard(key)
         except Exception as e:
             logger.error(f"Cache delete error for key {key}: {e}")
 
@@ -110,18 +281,28 @@ class CacheManager:
             logger.error(f"Cache clear error: {e}")
             return False
 
+    def incr(self, key: str, expire: int = 300, amount: int = 1) -> Optional[int]:
+        """Atomically add amount (which may be negative) to a counter and return its new value
+
+        The TTL is set when the counter is created and never extended, so
+        repeated increments do not push the expiry back.
+        """
+        try:
+            if self.use_redis and self.redis_client:
+                return int(self.redis_client.eval(REDIS_INCR_SCRIPT, 1, key, expire, amount))
+            else:
+                return self.fallback_cache.incr(key, expire, amount)
+        except Exception as e:
+            logger.error(f"Cache incr error for key {key}: {e}")
+            return None
+
     def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
         try:
             if self.use_redis and self.redis_client:
                 return bool(self.redis_client.exists(key))
             else:
-                if key in self.fallback_cache:
-                    cached_item = self.fallback_cache[key]
-                    if cached_item["expires"] > time.time():
-                        return True
-                    else:
-                        del self.fallback_cache[key]
+                return self.fallback_cache.lookup(key) is not None
         except Exception as e:
             logger.error(f"Cache exists error for key {key}: {e}")
 
@@ -144,7 +325,7 @@ class CacheManager:
                 }
             else:
                 return {
-                    "type": "fallback",
+                    "type": "shared" if self.is_shared else "fallback",
                     "cache_size": len(self.fallback_cache),
                     "max_size": self.fallback_cache_size,
                     "usage_percentage": (len(self.fallback_cache) / self.fallback_cache_size) * 100,
@@ -154,17 +335,25 @@ class CacheManager:
             return {"type": "error", "error": str(e)}
 
     def delete_pattern(self, pattern: str) -> int:
-        """Delete keys matching pattern"""
+        """Delete keys matching a glob pattern
+
+        Redis is walked incrementally with SCAN and keys are dropped with
+        non-blocking UNLINK; the fallback cache uses its prefix index.
+        """
         try:
             if self.use_redis and self.redis_client:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    return self.redis_client.delete(*keys)
-                return 0
+                deleted = 0
+                batch = []
+                for key in self.redis_client.scan_iter(match=pattern, count=REDIS_SCAN_COUNT):
+                    batch.append(key)
+                    if len(batch) >= REDIS_SCAN_COUNT:
+                        deleted += self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    deleted += self.redis_client.unlink(*batch)
+                return deleted
             else:
-                # For fallback cache, we can't pattern match easily
-                # Return 0 as we can't implement pattern matching efficiently
-                return 0
+                return self.fallback_cache.delete_pattern(pattern)
         except Exception as e:
             logger.error(f"Cache delete pattern error for pattern {pattern}: {e}")
             return 0
@@ -189,7 +378,11 @@ class CacheManager:
 
 
 # Global cache instance
-cache_manager = CacheManager()
+cache_manager = CacheManager(
+    Config.REDIS_URL,
+    Config.CACHE_MAX_ENTRIES,
+    Config.SHARED_CACHE_PATH if Config.CACHE_BACKEND == "sqlite" else None,
+)
 
 
 def cached(timeout: int = 300, key_prefix: str = ""):
@@ -230,22 +423,11 @@ def cache_invalidate(pattern: str = None):
             # Execute function first
             result = func(*args, **kwargs)
 
-            # Then invalidate cache
-            try:
-                if cache_manager.use_redis and cache_manager.redis_client:
-                    if pattern:
-                        keys = cache_manager.redis_client.keys(pattern)
-                        if keys:
-                            cache_manager.redis_client.delete(*keys)
-                    else:
-                        cache_manager.redis_client.flushdb()
-                else:
-                    # For fallback cache, we can't pattern match easily
-                    # So we'll clear all if no pattern specified
-                    if not pattern:
-                        cache_manager.fallback_cache.clear()
-            except Exception as e:
-                logger.error(f"Cache invalidation error: {e}")
+            # Then invalidate cache (errors are logged by the cache manager)
+            if pattern:
+                cache_manager.delete_pattern(pattern)
+            else:
+                cache_manager.clear()
 
             return result
 
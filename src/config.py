@@ -18,6 +18,12 @@ class Config:
         "sqlite:///", ""
     )
 
+    # Connection pool (per worker process: one writer plus N readers)
+    DB_POOL_ENABLED = (os.environ.get("DB_POOL_ENABLED") or "true").lower() == "true"
+    DB_POOL_READERS = int(os.environ.get("DB_POOL_READERS") or 4)
+    DB_POOL_TIMEOUT = 5  # seconds to wait for a free connection before overflowing
+    DB_POOL_RECYCLE = 3600  # seconds before a pooled connection is replaced
+
     # Limits (prevent abuse)
     MAX_PRODUCTS = 1000
     MAX_DISHES = 500
@@ -28,6 +34,15 @@ class Config:
     # Cache settings
     CACHE_TIMEOUT = 3600  # 1 hour
     STATIC_CACHE_TIMEOUT = 86400  # 24 hours
+    STATS_CACHE_TTL = 300  # 5 minutes; writes invalidate affected dates sooner
+    STATS_CACHE_MAX_ENTRIES = int(os.environ.get("STATS_CACHE_MAX_ENTRIES", 256))
+    STATS_CACHE_MAX_BYTES = int(os.environ.get("STATS_CACHE_MAX_BYTES", 4 * 1024 * 1024))
+    REDIS_URL = os.environ.get("REDIS_URL") or "redis://localhost:6379/0"
+    # Backend used when Redis is unreachable: "memory" (per process) or "sqlite"
+    # (a file shared by every worker on the host)
+    CACHE_BACKEND = (os.environ.get("CACHE_BACKEND") or "memory").lower()
+    SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH") or "data/cache.sqlite3"
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES") or 1000)
 
     # API settings
     API_PER_PAGE = 50
@@ -37,9 +52,51 @@ class Config:
     MAX_BACKUP_SIZE = 100 * 1024 * 1024  # 100MB
     MAX_LOG_SIZE = 50 * 1024 * 1025  # 50MB
 
+    # Backup settings
+    BACKUP_DIR = os.environ.get("BACKUP_DIR") or "backups"
+    BACKUP_COMPRESSION = (os.environ.get("BACKUP_COMPRESSION") or "").lower()  # gzip or zstd
+    BACKUP_RETENTION = int(os.environ.get("BACKUP_RETENTION") or 10)  # backups kept
+    BACKUP_PAGES_PER_STEP = 256  # pages copied per backup step
+    BACKUP_STEP_SLEEP = 0.005  # seconds yielded to writers between steps
+
+    # Calculation tracing (nutrition_calculator.calc_tracer)
+    CALC_TRACE_SAMPLE_RATE = float(os.environ.get("CALC_TRACE_SAMPLE_RATE") or 0)  # 0.0-1.0
+    CALC_TRACE_BUFFER_SIZE = int(os.environ.get("CALC_TRACE_BUFFER_SIZE") or 200)
+    # Allow tracing single requests with the X-Calc-Trace header (default: development only)
+    CALC_TRACE_REQUESTS = (
+        os.environ.get("CALC_TRACE_REQUESTS") or ("true" if FLASK_ENV == "development" else "")
+    ).lower() in ("1", "true", "yes")
+
+    # Request tracing (request_tracing): SQL / calc / serialize spans per request,
+    # reported as a Server-Timing header and request_span_seconds histograms
+    REQUEST_TRACING = (os.environ.get("REQUEST_TRACING") or "true").lower() in ("1", "true", "yes")
+    SERVER_TIMING = (os.environ.get("SERVER_TIMING") or "true").lower() in ("1", "true", "yes")
+    # Log the full JSON trace of requests sent with X-Request-Trace (default: development only)
+    REQUEST_TRACE_REQUESTS = (
+        os.environ.get("REQUEST_TRACE_REQUESTS") or ("true" if FLASK_ENV == "development" else "")
+    ).lower() in ("1", "true", "yes")
+    # Log the full JSON trace of requests slower than this (0 disables)
+    REQUEST_TRACE_SLOW_MS = float(os.environ.get("REQUEST_TRACE_SLOW_MS") or 1000)
+
+    # Statement statistics and slow-query log (query_stats.statement_stats)
+    QUERY_STATS = (os.environ.get("QUERY_STATS") or "true").lower() in ("1", "true", "yes")
+    QUERY_STATS_MAX_STATEMENTS = int(os.environ.get("QUERY_STATS_MAX_STATEMENTS") or 500)
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS") or 100)  # 0 disables the slow log
+
+    # Access log pipeline (advanced_logging.AccessLogPipeline): requests only
+    # enqueue a record; a background thread writes them in batches
+    ACCESS_LOG_QUEUE_SIZE = int(os.environ.get("ACCESS_LOG_QUEUE_SIZE") or 10000)
+    ACCESS_LOG_BATCH_SIZE = int(os.environ.get("ACCESS_LOG_BATCH_SIZE") or 500)
+    ACCESS_LOG_FLUSH_INTERVAL = float(os.environ.get("ACCESS_LOG_FLUSH_INTERVAL") or 0.5)  # s
+
     # Health check
     HEALTH_CHECK_TIMEOUT = 5  # seconds
 
+    # System sampler (monitoring.system_monitor): /metrics and /api/system/status
+    # read its latest sample instead of querying psutil per request
+    SYSTEM_SAMPLE_INTERVAL = float(os.environ.get("SYSTEM_SAMPLE_INTERVAL") or 15)  # seconds
+    SYSTEM_SAMPLE_HISTORY = int(os.environ.get("SYSTEM_SAMPLE_HISTORY") or 240)  # samples kept
+
     @staticmethod
     def is_development():
         return Config.FLASK_ENV == "development"
@@ -4,6 +4,7 @@
 # HTTP Status Codes
 HTTP_OK = 200
 HTTP_CREATED = 201
+HTTP_ACCEPTED = 202
 HTTP_BAD_REQUEST = 400
 HTTP_NOT_FOUND = 404
 HTTP_INTERNAL_ERROR = 500
@@ -21,6 +22,37 @@ MAX_MACRO = 100
 # Meal Types
 MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
 
+# Stats range buckets and the widest window /api/stats/range will aggregate
+STATS_GRANULARITIES = ["day", "week", "month"]
+MAX_STATS_RANGE_DAYS = 731
+
+# Streaming export formats, tables and rows fetched per cursor batch
+EXPORT_FORMATS = ["json", "ndjson", "csv"]
+EXPORT_TABLES = ["products", "dishes", "dish_ingredients", "log_entries"]
+EXPORT_BATCH_SIZE = 500
+
+# Product classification values accepted by the products table
+PRODUCT_CATEGORIES = [
+    "leafy_vegetables",
+    "cruciferous",
+    "root_vegetables",
+    "nuts_seeds",
+    "berries",
+    "avocado_olives",
+    "processed",
+    "dairy",
+    "meat",
+    "fish",
+    "oil",
+]
+PROCESSING_LEVELS = ["raw", "minimal", "processed", "ultra_processed"]
+PRODUCT_REGIONS = ["US", "EU", "AU", "UK"]
+
+# Bulk product import
+IMPORT_FORMATS = ["csv", "ndjson", "json"]
+IMPORT_CHUNK_SIZE = 500  # rows validated and stored per transaction
+MAX_IMPORT_ERRORS = 1000  # row errors reported in an import summary
+
 # Item Types
 ITEM_TYPES = ["product", "dish"]
 
@@ -0,0 +1,281 @@
+"""
+Database Connection Pool Module
+Keeps warm, pre-configured SQLite connections per worker process
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from .monitoring import metrics_collector
+from .request_tracing import TracedConnection
+
+logger = logging.getLogger(__name__)
+
+READER = "reader"
+WRITER = "writer"
+
+
+class PooledConnection(TracedConnection):
+    """SQLite connection that returns itself to its pool on close()"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.role = None
+        self.owner = None
+        self.generation = 0
+        self.checked_out = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def close(self):
+        """Hand the connection back to the pool (or really close it if unpooled)"""
+        if self.pool is None:
+            self.checked_out = False
+            super().close()
+        elif self.checked_out:
+            self.pool.release(self)
+
+    def dispose(self):
+        """Close the underlying SQLite handle for good"""
+        self.pool = None
+        self.checked_out = False
+        try:
+            super().close()
+        except sqlite3.Error:
+            pass
+
+
+def configure_connection(conn: sqlite3.Connection, database: str) -> sqlite3.Connection:
+    """Apply the standard row factory and PRAGMAs to a new connection"""
+    conn.row_factory = sqlite3.Row
+
+    # Enable WAL mode for better concurrency (only for file databases)
+    if database != ":memory:":
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+class ConnectionPool:
+    """Per-process pool holding one writer and N reader connections to a SQLite file"""
+
+    def __init__(
+        self,
+        database: str,
+        readers: int = 4,
+        timeout: float = 5.0,
+        recycle: float = 3600,
+        health_check_interval: float = 30,
+    ):
+        self.database = database
+        self.timeout = timeout
+        self.recycle = recycle
+        self.health_check_interval = health_check_interval
+        self._capacity = {READER: max(1, readers), WRITER: 1}
+        self._reset_state()
+
+    def _reset_state(self):
+        """(Re)initialize pool bookkeeping for the current process"""
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = {READER: deque(), WRITER: deque()}
+        self._open = {READER: 0, WRITER: 0}
+        self._generation = 0
+        self._file_id = self._stat_database()
+        self.stats = {
+            "checkouts": 0,
+            "created": 0,
+            "overflow": 0,
+            "recycled": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def _stat_database(self) -> Optional[Tuple[int, int]]:
+        """Identify the database file so a replaced file invalidates pooled handles"""
+        try:
+            st = os.stat(self.database)
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return None
+
+    def _check_process(self):
+        """Drop connections inherited across fork(); SQLite handles must not be shared"""
+        if os.getpid() != self._pid:
+            logger.debug("Connection pool for %s reset after fork", self.database)
+            self._reset_state()
+
+    def _check_file(self):
+        """Retire idle connections if the database file was replaced (restore, wipe)"""
+        file_id = self._stat_database()
+        if file_id == self._file_id:
+            return
+
+        with self._cond:
+            self._file_id = file_id
+            self._generation += 1
+            for role, idle in self._idle.items():
+                while idle:
+                    idle.pop().dispose()
+                    self._open[role] -= 1
+                    self.stats["recycled"] += 1
+            self._cond.notify_all()
+
+    def _connect(self, role: str) -> PooledConnection:
+        """Open and configure a new pooled connection"""
+        conn = sqlite3.connect(self.database, factory=PooledConnection, check_same_thread=False)
+        configure_connection(conn, self.database)
+        conn.role = role
+        conn.generation = self._generation
+        self.stats["created"] += 1
+        return conn
+
+    def _is_stale(self, conn: PooledConnection, now: float) -> bool:
+        """Check whether an idle connection should be replaced before reuse"""
+        if conn.generation != self._generation:
+            return True
+        if self.recycle and now - conn.created_at > self.recycle:
+            return True
+        if now - conn.last_used > self.health_check_interval:
+            try:
+                conn.execute("SELECT 1").fetchone()
+            except sqlite3.Error:
+                return True
+        return False
+
+    def acquire(self, role: str = READER, wait: bool = True, owner=None) -> PooledConnection:
+        """
+        Check out a connection for the given role.
+
+        Waits up to ``timeout`` seconds for a free connection; after that (or
+        immediately when ``wait`` is False) an unpooled overflow connection is
+        handed out so a request is never failed just because the pool is busy.
+        """
+        self._check_process()
+        self._check_file()
+
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+        source = "overflow"
+
+        with self._cond:
+            while True:
+                if self._idle[role]:
+                    conn = self._idle[role].pop()
+                    source = "idle"
+                    break
+                if self._open[role] < self._capacity[role]:
+                    self._open[role] += 1
+                    source = "new"
+                    break
+                remaining = deadline - time.monotonic()
+                if not wait or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+        now = time.monotonic()
+        if conn is not None and self._is_stale(conn, now):
+            conn.dispose()
+            self.stats["recycled"] += 1
+            conn = None
+            source = "new"
+
+        if conn is None:
+            try:
+                conn = self._connect(role)
+            except Exception:
+                if source == "new":
+                    with self._cond:
+                        self._open[role] -= 1
+                        self._cond.notify()
+                raise
+
+        if source == "overflow":
+            self.stats["overflow"] += 1
+        else:
+            conn.pool = self
+
+        wait_time = now - start
+        conn.checked_out = True
+        conn.owner = owner
+        self.stats["checkouts"] += 1
+        self.stats["wait_seconds"] += wait_time
+        metrics_collector.record_db_pool_checkout(role, source, wait_time)
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """Return a checked-out connection to the idle set"""
+        conn.checked_out = False
+        conn.owner = None
+        conn.last_used = time.monotonic()
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            logger.warning("Discarding broken pooled connection to %s", self.database)
+            conn.generation = -1
+
+        with self._cond:
+            if os.getpid() != self._pid or conn.generation != self._generation:
+                conn.dispose()
+                self._open[conn.role] = max(0, self._open[conn.role] - 1)
+            else:
+                self._idle[conn.role].append(conn)
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections; checked-out ones close when released"""
+        with self._cond:
+            self._generation += 1
+            for role, idle in self._idle.items():
+                while idle:
+                    idle.pop().dispose()
+                    self._open[role] -= 1
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        with self._cond:
+            return {
+                "database": self.database,
+                "readers": self._capacity[READER],
+                "open": dict(self._open),
+                "idle": {role: len(idle) for role, idle in self._idle.items()},
+                **self.stats,
+            }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database: str, **options) -> ConnectionPool:
+    """Get (or lazily create) the process-wide pool for a database file"""
+    pool = _pools.get(database)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            # Drop pools whose database file has gone away (e.g. temporary test databases)
+            for path in [p for p in _pools if not os.path.exists(p)]:
+                _pools.pop(path).close()
+            pool = _pools[database] = ConnectionPool(database, **options)
+        return pool
+
+
+def close_all_pools():
+    """Close every pool in this process"""
+    with _pools_lock:
+        while _pools:
+            _pools.popitem()[1].close()
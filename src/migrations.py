@@ -0,0 +1,239 @@
+"""
+Schema Migrations Module
+Versioned forward migrations tracked by PRAGMA user_version
+
+schema_v2.sql always describes the current schema and builds a new
+database in one transaction. Existing databases are moved forward by the
+numbered migrations below; each runs in its own transaction together with
+its user_version bump, so a database is always at exactly one known
+version. A database that is already current costs a single PRAGMA read.
+
+Migrations never read schema_v2.sql: migration 1 adopts unversioned
+databases with the frozen snapshot in migrations/0001_baseline.sql, so
+later edits to the schema file only reach existing databases through
+their own migration.
+
+Rules for new migrations:
+- append with the next version number and mirror the change in
+  schema_v2.sql, which fresh databases are built from
+- never edit a migration (or the baseline snapshot) once released
+- use IF NOT EXISTS / add_column so an interrupted run can be retried
+- mark index builds on large tables online=True: startup stops before the
+  first online migration and TaskManager.apply_online_migrations finishes
+  the rest in the background. SQLite holds the write lock while an index
+  is built; under WAL readers carry on and writers wait on busy_timeout.
+"""
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = "schema_v2.sql"
+BASELINE_SCHEMA_FILE = "migrations/0001_baseline.sql"  # schema at version 1, frozen
+BUSY_TIMEOUT = 30  # seconds a migration waits for the write lock
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One numbered schema change"""
+
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    online: bool = False
+
+
+def read_schema(path: str = SCHEMA_FILE) -> Tuple[List[str], List[str]]:
+    """
+    Split a schema file into its PRAGMA and schema statements.
+
+    PRAGMAs such as journal_mode cannot run inside a transaction, so they
+    are returned separately.
+
+    Args:
+        path: Path to the schema file
+
+    Returns:
+        Tuple of (pragma statements, other statements) in file order
+    """
+    pragmas, statements = [], []
+    buffer = ""
+    with open(path, "r") as f:
+        for line in f:
+            buffer += line
+            if not sqlite3.complete_statement(buffer):
+                continue
+            statement = "\n".join(
+                part for part in buffer.strip().splitlines() if not part.startswith("--")
+            ).strip()
+            if statement.upper().startswith("PRAGMA"):
+                pragmas.append(statement)
+            elif statement:
+                statements.append(statement)
+            buffer = ""
+    return pragmas, statements
+
+
+def apply_schema(conn: sqlite3.Connection, path: str = SCHEMA_FILE) -> None:
+    """Run every non-PRAGMA statement of the schema file on conn
+
+    The schema is idempotent, so this also fills in whatever objects an
+    older database is missing.
+    """
+    for statement in read_schema(path)[1]:
+        conn.execute(statement)
+
+
+def add_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> bool:
+    """Add a column unless the table already has it
+
+    Returns:
+        True if the column was added
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column in columns:
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+def _adopt_unversioned(conn: sqlite3.Connection) -> None:
+    # Databases created before versioning were kept current by re-running
+    # schema_v2.sql at boot. Bring them to the schema as it stood at version 1;
+    # columns added by then need an explicit ALTER before the baseline's
+    # indexes and triggers can refer to them.
+    add_column(conn, "products", "calc_version", "TEXT DEFAULT NULL")
+    apply_schema(conn, BASELINE_SCHEMA_FILE)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Adopt databases created before schema versioning", _adopt_unversioned),
+    Migration(
+        2,
+        "Drop the per-ingredient dish nutrition trigger",
+        lambda conn: conn.execute("DROP TRIGGER IF EXISTS update_dish_nutrition"),
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version stored in the database header"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(
+    version: int, include_online: bool = True, migrations: Sequence[Migration] = MIGRATIONS
+) -> List[Migration]:
+    """
+    List migrations newer than version, in order.
+
+    Args:
+        version: Current schema version
+        include_online: Also return online migrations and everything after
+            the first of them
+        migrations: Migration list (defaults to MIGRATIONS)
+
+    Returns:
+        Migrations to apply
+    """
+    pending = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= version:
+            continue
+        if migration.online and not include_online:
+            break
+        pending.append(migration)
+    return pending
+
+
+def _run_in_transaction(conn: sqlite3.Connection, version: int, apply: Callable) -> None:
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        apply(conn)
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    include_online: bool = True,
+    migrations: Sequence[Migration] = MIGRATIONS,
+    schema_path: str = SCHEMA_FILE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Bring a database up to the latest schema version.
+
+    A new database is built from the schema file and stamped with the
+    latest version; an existing one gets each pending migration in its own
+    transaction. A failed migration is rolled back and re-raised, leaving
+    the database at the last version that applied cleanly.
+
+    Args:
+        conn: Database connection
+        include_online: Also apply online (background) migrations
+        migrations: Migration list (defaults to MIGRATIONS)
+        schema_path: Schema file used for new databases
+        progress: Callback receiving progress percentages (0-100)
+
+    Returns:
+        Schema version the database is at afterwards
+    """
+    version = get_version(conn)
+    pending = pending_migrations(version, include_online, migrations)
+    if not pending:
+        return version
+
+    if (
+        version == 0
+        and not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products'"
+        ).fetchone()
+    ):
+        latest = max(m.version for m in migrations)
+        for pragma in read_schema(schema_path)[0]:
+            conn.execute(pragma)
+        _run_in_transaction(conn, latest, lambda c: apply_schema(c, schema_path))
+        logger.info(f"Created database schema at version {latest}")
+        return latest
+
+    for done, migration in enumerate(pending, 1):
+        logger.info(f"Applying schema migration {migration.version}: {migration.description}")
+        _run_in_transaction(conn, migration.version, migration.apply)
+        version = migration.version
+        if progress:
+            progress(int(done * 100 / len(pending)))
+    return version
+
+
+def migrate_database(
+    db_path: str,
+    include_online: bool = True,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Open db_path and migrate it (see migrate).
+
+    Args:
+        db_path: Path to the database file
+        include_online: Also apply online (background) migrations
+        progress: Callback receiving progress percentages (0-100)
+
+    Returns:
+        Schema version the database is at afterwards
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    try:
+        return migrate(conn, include_online=include_online, progress=progress)
+    finally:
+        conn.close()
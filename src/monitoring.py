@@ -3,10 +3,14 @@ Monitoring Module
 Handles metrics collection with Prometheus
 """
 
+import gc
 import logging
+import os
+import threading
 import time
+from collections import deque
 from functools import wraps
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 try:
     from prometheus_client import (
@@ -16,21 +20,37 @@ try:
         Histogram,
         Summary,
         generate_latest,
+        multiprocess,
     )
 
     PROMETHEUS_AVAILABLE = True
 except ImportError:
     PROMETHEUS_AVAILABLE = False
     Counter = Histogram = Gauge = Summary = CollectorRegistry = generate_latest = None
+    multiprocess = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# With several worker processes (gunicorn.conf.py sets this before the app is
+# loaded) every process writes its metric values to mmap files in this
+# directory and /metrics aggregates them; gauges declare how in
+# multiprocess_mode. Unset means single-process mode.
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
 
 class MetricsCollector:
     """Collects application metrics for Prometheus"""
 
     def __init__(self):
         self.registry = CollectorRegistry() if PROMETHEUS_AVAILABLE else None
+        self.multiprocess_dir = MULTIPROCESS_DIR if PROMETHEUS_AVAILABLE else None
         self.metrics = {}
         self._init_metrics()
 
@@ -70,6 +90,22 @@ class MetricsCollector:
             registry=self.registry,
         )
 
+        # Connection pool metrics
+        self.metrics["db_pool_checkouts_total"] = Counter(
+            "db_pool_checkouts_total",
+            "Total pooled database connection checkouts",
+            ["role", "source"],
+            registry=self.registry,
+        )
+
+        self.metrics["db_pool_wait_seconds"] = Histogram(
+            "db_pool_wait_seconds",
+            "Time spent waiting for a pooled database connection in seconds",
+            ["role"],
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+            registry=self.registry,
+        )
+
         # Cache metrics
         self.metrics["cache_operations_total"] = Counter(
             "cache_operations_total",
@@ -79,24 +115,39 @@ class MetricsCollector:
         )
 
         self.metrics["cache_hit_rate"] = Gauge(
-            "cache_hit_rate", "Cache hit rate percentage", registry=self.registry
+            "cache_hit_rate",
+            "Cache hit rate percentage",
+            multiprocess_mode="liveall",
+            registry=self.registry,
         )
 
         # Application metrics
         self.metrics["active_users"] = Gauge(
-            "active_users", "Number of active users", registry=self.registry
+            "active_users",
+            "Number of active users",
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
         )
 
         self.metrics["products_count"] = Gauge(
-            "products_count", "Total number of products", registry=self.registry
+            "products_count",
+            "Total number of products",
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
         )
 
         self.metrics["dishes_count"] = Gauge(
-            "dishes_count", "Total number of dishes", registry=self.registry
+            "dishes_count",
+            "Total number of dishes",
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
         )
 
         self.metrics["log_entries_count"] = Gauge(
-            "log_entries_count", "Total number of log entries", registry=self.registry
+            "log_entries_count",
+            "Total number of log entries",
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
         )
 
         # Fasting metrics
@@ -116,11 +167,87 @@ class MetricsCollector:
 
         # System metrics
         self.metrics["memory_usage_bytes"] = Gauge(
-            "memory_usage_bytes", "Memory usage in bytes", registry=self.registry
+            "memory_usage_bytes",
+            "Memory usage in bytes",
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
         )
 
         self.metrics["cpu_usage_percent"] = Gauge(
-            "cpu_usage_percent", "CPU usage percentage", registry=self.registry
+            "cpu_usage_percent",
+            "CPU usage percentage",
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
+        )
+
+        self.metrics["process_rss_bytes"] = Gauge(
+            "process_rss_bytes",
+            "Resident memory of this process in bytes",
+            multiprocess_mode="livesum",
+            registry=self.registry,
+        )
+
+        self.metrics["process_open_fds"] = Gauge(
+            "process_open_fds",
+            "Open file descriptors of this process",
+            multiprocess_mode="livesum",
+            registry=self.registry,
+        )
+
+        self.metrics["sqlite_file_bytes"] = Gauge(
+            "sqlite_file_bytes",
+            "Size of the SQLite database and WAL files in bytes",
+            ["file"],
+            multiprocess_mode="mostrecent",
+            registry=self.registry,
+        )
+
+        self.metrics["python_gc_objects"] = Gauge(
+            "python_gc_objects",
+            "Objects tracked by the garbage collector per generation",
+            ["generation"],
+            multiprocess_mode="liveall",
+            registry=self.registry,
+        )
+
+        self.metrics["python_gc_collections"] = Gauge(
+            "python_gc_collections",
+            "Garbage collections run per generation",
+            ["generation"],
+            multiprocess_mode="liveall",
+            registry=self.registry,
+        )
+
+        # Request span metrics (request_tracing)
+        self.metrics["request_span_seconds"] = Histogram(
+            "request_span_seconds",
+            "Time spent per request in each traced phase (sql, calc, serialize) in seconds",
+            ["endpoint", "span"],
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+            registry=self.registry,
+        )
+
+        # SQL statement metrics (query_stats), labelled by normalized query id
+        self.metrics["sqlite_statement_duration_seconds"] = Histogram(
+            "sqlite_statement_duration_seconds",
+            "SQLite statement execution time in seconds",
+            ["query_id"],
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+            registry=self.registry,
+        )
+
+        self.metrics["sqlite_statement_rows_total"] = Counter(
+            "sqlite_statement_rows_total",
+            "Rows returned or changed by SQLite statements",
+            ["query_id"],
+            registry=self.registry,
+        )
+
+        self.metrics["sqlite_slow_queries_total"] = Counter(
+            "sqlite_slow_queries_total",
+            "SQLite statements slower than the slow-query threshold",
+            ["query_id"],
+            registry=self.registry,
         )
 
         # Task metrics
@@ -158,6 +285,34 @@ class MetricsCollector:
                 operation=operation, table=table
             ).observe(duration)
 
+    def record_db_pool_checkout(self, role: str, source: str, wait: float):
+        """Record connection pool checkout metrics"""
+        if PROMETHEUS_AVAILABLE and "db_pool_checkouts_total" in self.metrics:
+            self.metrics["db_pool_checkouts_total"].labels(role=role, source=source).inc()
+            self.metrics["db_pool_wait_seconds"].labels(role=role).observe(wait)
+
+    def record_request_spans(self, endpoint: str, durations: Dict[str, float]):
+        """Record the per-span totals of one traced request"""
+        if PROMETHEUS_AVAILABLE and "request_span_seconds" in self.metrics:
+            for span, duration in durations.items():
+                self.metrics["request_span_seconds"].labels(endpoint=endpoint, span=span).observe(
+                    duration
+                )
+
+    def record_statement(
+        self, query_id: str, duration: Optional[float], rows: int = 0, slow: bool = False
+    ):
+        """Record a SQL statement execution (duration None: only add fetched rows)"""
+        if PROMETHEUS_AVAILABLE and "sqlite_statement_duration_seconds" in self.metrics:
+            if duration is not None:
+                self.metrics["sqlite_statement_duration_seconds"].labels(query_id=query_id).observe(
+                    duration
+                )
+            if rows:
+                self.metrics["sqlite_statement_rows_total"].labels(query_id=query_id).inc(rows)
+            if slow:
+                self.metrics["sqlite_slow_queries_total"].labels(query_id=query_id).inc()
+
     def record_cache_operation(self, operation: str, hit: bool):
         """Record cache operation metrics"""
         if PROMETHEUS_AVAILABLE and "cache_operations_total" in self.metrics:
@@ -208,8 +363,29 @@ class MetricsCollector:
             if "cpu_usage_percent" in self.metrics:
                 self.metrics["cpu_usage_percent"].set(cpu_percent)
 
+    def update_system_sample(self, sample: Dict[str, Any]):
+        """Publish a SystemMonitor sample; fields that could not be read are skipped"""
+        if not PROMETHEUS_AVAILABLE or "process_rss_bytes" not in self.metrics:
+            return
+        if sample.get("memory_bytes") is not None and sample.get("cpu_percent") is not None:
+            self.update_system_metrics(sample["memory_bytes"], sample["cpu_percent"])
+        if sample.get("rss_bytes") is not None:
+            self.metrics["process_rss_bytes"].set(sample["rss_bytes"])
+        if sample.get("open_fds") is not None:
+            self.metrics["process_open_fds"].set(sample["open_fds"])
+        self.metrics["sqlite_file_bytes"].labels(file="db").set(sample.get("db_bytes") or 0)
+        self.metrics["sqlite_file_bytes"].labels(file="wal").set(sample.get("wal_bytes") or 0)
+        for generation, count in enumerate(sample.get("gc_objects") or ()):
+            self.metrics["python_gc_objects"].labels(generation=str(generation)).set(count)
+        for generation, count in enumerate(sample.get("gc_collections") or ()):
+            self.metrics["python_gc_collections"].labels(generation=str(generation)).set(count)
+
     def get_metrics(self) -> str:
-        """Get metrics in Prometheus format"""
+        """Get metrics in Prometheus format, aggregated over all workers in multiprocess mode"""
+        if PROMETHEUS_AVAILABLE and self.multiprocess_dir:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=self.multiprocess_dir)
+            return generate_latest(registry).decode("utf-8")
         if PROMETHEUS_AVAILABLE and self.registry:
             return generate_latest(self.registry).decode("utf-8")
         else:
@@ -221,6 +397,8 @@ class MetricsCollector:
             "prometheus_available": PROMETHEUS_AVAILABLE,
             "metrics_count": len(self.metrics) if self.metrics else 0,
             "registry_available": self.registry is not None,
+            # sample_metrics below are this worker's own values
+            "multiprocess": bool(self.multiprocess_dir),
         }
 
         if PROMETHEUS_AVAILABLE and self.metrics:
@@ -339,38 +517,123 @@ def monitor_background_task(task_type: str):
     return decorator
 
 
-class SystemMonitor:
-    """System resource monitoring"""
-
-    def __init__(self):
-        self.last_update = 0
-        self.update_interval = 60  # Update every 60 seconds
-
-    def update_metrics(self):
-        """Update system metrics"""
-        current_time = time.time()
-        if current_time - self.last_update < self.update_interval:
-            return
-
-        try:
-            import psutil
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
 
-            # Get memory usage
-            memory_info = psutil.virtual_memory()
-            memory_bytes = memory_info.used
 
-            # Get CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-
-            # Update metrics
-            metrics_collector.update_system_metrics(memory_bytes, cpu_percent)
+class SystemMonitor:
+    """System resource sampler running in a background daemon thread
+
+    Every update_interval seconds a sample (CPU, memory, process RSS and open
+    FDs, disk, SQLite DB/WAL size, GC stats) is appended to a ring buffer and
+    published to the metrics collector, so /metrics and /api/system/status
+    only read the latest sample. CPU is measured since the previous sample
+    (psutil.cpu_percent(interval=None)) and never blocks.
+    """
+
+    def __init__(self, interval: float = None, history: int = None):
+        self.update_interval = interval or Config.SYSTEM_SAMPLE_INTERVAL
+        self.samples = deque(maxlen=history or Config.SYSTEM_SAMPLE_HISTORY)
+        self.last_update = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._process = None
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one sample, store it and publish it to the metrics collector"""
+        sample = {
+            "timestamp": time.time(),
+            "cpu_percent": None,
+            "memory_bytes": None,
+            "memory_percent": None,
+            "rss_bytes": None,
+            "open_fds": None,
+            "disk_percent": None,
+            "disk_free_bytes": None,
+            "db_bytes": _file_size(Config.DATABASE),
+            "wal_bytes": _file_size(f"{Config.DATABASE}-wal"),
+            "gc_objects": list(gc.get_count()),
+            "gc_collections": [stats["collections"] for stats in gc.get_stats()],
+        }
 
-            self.last_update = current_time
+        if psutil is not None:
+            try:
+                if self._process is None or self._process.pid != os.getpid():
+                    self._process = psutil.Process()
+                memory = psutil.virtual_memory()
+                disk = psutil.disk_usage("/")
+                sample.update(
+                    cpu_percent=psutil.cpu_percent(interval=None),
+                    memory_bytes=memory.used,
+                    memory_percent=memory.percent,
+                    rss_bytes=self._process.memory_info().rss,
+                    disk_percent=round((disk.used / disk.total) * 100, 2),
+                    disk_free_bytes=disk.free,
+                )
+                if hasattr(self._process, "num_fds"):
+                    sample["open_fds"] = self._process.num_fds()
+            except Exception as e:
+                logger.error(f"System monitoring error: {e}")
+
+        with self._lock:
+            self.samples.append(sample)
+            self.last_update = sample["timestamp"]
+        metrics_collector.update_system_sample(sample)
+        return sample
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Most recent sample, or None before the first one"""
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Samples in the ring buffer, oldest first"""
+        with self._lock:
+            return list(self.samples)
+
+    def start(self) -> bool:
+        """Start the sampler thread unless it already runs in this process
+
+        Threads do not survive a fork, so a worker forked from a preloaded
+        master starts its own sampler on first use.
+
+        Returns:
+            True if a new sampler thread was started
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="system-monitor", daemon=True)
+            # Started under the lock so concurrent callers see it alive
+            self._thread.start()
+        # The first sample is taken inline so readers never see an empty buffer
+        # (the thread waits update_interval before its first one)
+        self.sample()
+        return True
+
+    def stop(self):
+        """Stop the sampler thread"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.update_interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"System monitoring error: {e}")
 
-        except ImportError:
-            logger.warning("psutil not available for system monitoring")
-        except Exception as e:
-            logger.error(f"System monitoring error: {e}")
+    def update_metrics(self):
+        """Make sure the sampler is running; published gauges are already current"""
+        self.start()
 
 
 # Global system monitor instance
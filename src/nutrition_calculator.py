@@ -3,10 +3,17 @@ Nutrition Calculator Module v2.0
 Полная реализация всех расчетов нутриентов согласно NUTRIENTS.md
 """
 
+import hashlib
 import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 # Настройка логирования
 logger = logging.getLogger("nutrition_calculator")
@@ -114,6 +121,27 @@ NUTRIENT_RETENTION_FACTORS = {
     "carbs": {"boiled": 0.95, "fried": 0.97, "grilled": 0.96, "steamed": 0.98, "raw": 1.00},
 }
 
+# Ревизия формул кето-индекса и чистых углеводов; увеличивайте при изменении
+# логики расчета (изменения таблиц констант ниже учитываются автоматически)
+CALC_FORMULA_REVISION = 1
+
+
+def _calc_version() -> str:
+    """Version stamp for stored product calculations"""
+    constants = [
+        CALORIES_PER_GRAM,
+        FIBER_RATIOS,
+        FIBER_DEDUCTION_COEFFICIENTS,
+        KETO_INDEX_CATEGORIES,
+    ]
+    # repr of the sorted items: KETO_INDEX_CATEGORIES has tuple keys
+    fingerprint = hashlib.sha1(repr([sorted(c.items()) for c in constants]).encode("utf-8"))
+    return f"{CALC_FORMULA_REVISION}.{fingerprint.hexdigest()[:10]}"
+
+
+# Штамп версии для сохраненных в БД расчетных полей продуктов
+CALC_VERSION = _calc_version()
+
 # ============================================
 # Структуры данных
 # ============================================
@@ -183,6 +211,95 @@ class ValidationResult:
     recommendation: str = ""
 
 
+# ============================================
+# Трассировка расчетов
+# ============================================
+
+# Записи трассировки текущего контекста (запроса), если он трассируется
+_trace_scope: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "calculation_trace", default=None
+)
+
+
+class CalculationTracer:
+    """
+    Трассировка расчетов: выключена по умолчанию и ничего не стоит,
+    пока выключена (вызывающий код проверяет только флаг enabled).
+
+    Включается двумя способами:
+    - sample_rate: доля расчетов, попадающих в кольцевой буфер;
+    - capture(): все расчеты текущего контекста (например, одного запроса).
+    """
+
+    def __init__(self, capacity: int = 200, sample_rate: float = 0.0):
+        self.records = deque(maxlen=capacity)
+        self.sample_rate = sample_rate
+        self.enabled = sample_rate > 0
+        self._scopes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, sample_rate: Optional[float] = None, capacity: Optional[int] = None):
+        """Изменить долю выборки и/или размер буфера во время работы"""
+        with self._lock:
+            if capacity is not None and capacity != self.records.maxlen:
+                self.records = deque(self.records, maxlen=capacity)
+            if sample_rate is not None:
+                self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+            self.enabled = self.sample_rate > 0 or self._scopes > 0
+
+    def begin_capture(self):
+        """Начать трассировку текущего контекста; вернуть токен для end_capture"""
+        with self._lock:
+            self._scopes += 1
+            self.enabled = True
+        return _trace_scope.set([])
+
+    def end_capture(self, token) -> List[Dict[str, Any]]:
+        """Закончить трассировку контекста и вернуть ее записи"""
+        records = _trace_scope.get() or []
+        _trace_scope.reset(token)
+        with self._lock:
+            self._scopes -= 1
+            self.enabled = self.sample_rate > 0 or self._scopes > 0
+        return records
+
+    @contextmanager
+    def capture(self):
+        """Трассировать все расчеты внутри блока; отдает список записей"""
+        token = self.begin_capture()
+        try:
+            yield _trace_scope.get()
+        finally:
+            self.end_capture(token)
+
+    def record(self, function: str, inputs: Dict[str, Any], result: Any) -> None:
+        """
+        Записать расчет (вызывать только при enabled)
+
+        Args:
+            function: имя функции расчета
+            inputs: входные параметры
+            result: результат
+        """
+        scope = _trace_scope.get()
+        if scope is None and random.random() >= self.sample_rate:
+            return
+
+        entry = {"function": function, "inputs": inputs, "result": result, "time": time.time()}
+        if scope is not None:
+            scope.append(entry)
+        self.records.append(entry)
+        logger.debug("%s: inputs=%s -> %s", function, inputs, result)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Последние записи кольцевого буфера (новые в конце)"""
+        records = list(self.records)
+        return records[-limit:] if limit else records
+
+
+calc_tracer = CalculationTracer()
+
+
 # ============================================
 # Валидация данных
 # ============================================
@@ -300,7 +417,7 @@ def calculate_calories_from_macros(protein: float, fats: float, carbs: float) ->
     """
     validation = validate_nutrition_data(protein, fats, carbs, check_total=False)
     if not validation.valid:
-        logger.warning(f"Nutrition data validation issues: {validation.issues}")
+        logger.debug("Nutrition data validation issues: %s", validation.issues)
 
     calories = (
         protein * CALORIES_PER_GRAM["protein"]
@@ -308,9 +425,12 @@ def calculate_calories_from_macros(protein: float, fats: float, carbs: float) ->
         + carbs * CALORIES_PER_GRAM["carbs"]
     )
 
-    logger.info(
-        f"Calories calculation: protein={protein}, fats={fats}, carbs={carbs} -> {calories} kcal"
-    )
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_calories_from_macros",
+            {"protein": protein, "fats": fats, "carbs": carbs},
+            calories,
+        )
     return round(calories, 1)
 
 
@@ -365,10 +485,12 @@ def calculate_net_carbs_advanced(
         estimation_method = "unknown_category_conservative"
         deduction_coeff = 0.0
 
-    logger.info(
-        f"Net carbs calculation: total_carbs={total_carbs}, "
-        f"category={category} -> net_carbs={net_carbs}"
-    )
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_net_carbs_advanced",
+            {"total_carbs": total_carbs, "category": category},
+            net_carbs,
+        )
 
     return {
         "net_carbs": round(max(0, net_carbs), 1),
@@ -409,7 +531,7 @@ def calculate_keto_index_advanced(
     """
     validation = validate_nutrition_data(protein, fats, carbs, fiber, check_total=check_total)
     if not validation.valid:
-        logger.warning(f"Nutrition data validation issues: {validation.issues}")
+        logger.debug("Nutrition data validation issues: %s", validation.issues)
 
     # Расчет чистых углеводов
     net_carbs_result = calculate_net_carbs_advanced(carbs, fiber, category)
@@ -451,10 +573,21 @@ def calculate_keto_index_advanced(
         "fiber_deduction_coefficient": net_carbs_result["fiber_deduction_coefficient"],
     }
 
-    logger.info(
-        f"Advanced keto index calculation: protein={protein}, fats={fats}, "
-        f"carbs={carbs} -> keto_index={keto_index}"
-    )
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_keto_index_advanced",
+            {
+                "protein": protein,
+                "fats": fats,
+                "carbs": carbs,
+                "fiber": fiber,
+                "category": category,
+                "glycemic_index": glycemic_index,
+                "processing_level": processing_level,
+                "validation_issues": validation.issues,
+            },
+            result,
+        )
     return result
 
 
@@ -554,10 +687,12 @@ def calculate_bmr_mifflin_st_jeor(weight: float, height: float, age: int, gender
     else:
         bmr = (10 * weight) + (6.25 * height) - (5 * age) - 161
 
-    logger.info(
-        f"BMR calculation (Mifflin-St Jeor): weight={weight}, "
-        f"height={height}, age={age}, gender={gender} -> {bmr} kcal"
-    )
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_bmr_mifflin_st_jeor",
+            {"weight": weight, "height": height, "age": age, "gender": gender},
+            bmr,
+        )
     return round(bmr, 0)
 
 
@@ -576,7 +711,8 @@ def calculate_bmr_katch_mcardle(lean_body_mass: float) -> float:
         raise ValueError("Безжировая масса должна быть положительной")
 
     bmr = 370 + (21.6 * lean_body_mass)
-    logger.info(f"BMR calculation (Katch-McArdle): LBM={lean_body_mass} -> {bmr} kcal")
+    if calc_tracer.enabled:
+        calc_tracer.record("calculate_bmr_katch_mcardle", {"lean_body_mass": lean_body_mass}, bmr)
     return round(bmr, 0)
 
 
@@ -599,9 +735,12 @@ def calculate_lean_body_mass(weight_kg: float, body_fat_percentage: float) -> fl
 
     lbm = weight_kg * (1 - body_fat_percentage / 100)
 
-    logger.info(
-        f"LBM calculation: weight={weight_kg}, body_fat={body_fat_percentage}% -> LBM={lbm} kg"
-    )
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_lean_body_mass",
+            {"weight_kg": weight_kg, "body_fat_percentage": body_fat_percentage},
+            lbm,
+        )
     return round(lbm, 2)
 
 
@@ -623,7 +762,10 @@ def calculate_tdee(bmr: float, activity_level: Union[str, ActivityLevel]) -> flo
         raise ValueError(f"Неизвестный уровень активности: {activity_level}")
 
     tdee = bmr * ACTIVITY_MULTIPLIERS[activity_level]
-    logger.info(f"TDEE calculation: BMR={bmr}, activity={activity_level} -> {tdee} kcal")
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_tdee", {"bmr": bmr, "activity_level": str(activity_level)}, tdee
+        )
     return round(tdee, 0)
 
 
@@ -645,7 +787,10 @@ def calculate_target_calories(tdee: float, goal: Union[str, Goal]) -> float:
         raise ValueError(f"Неизвестная цель: {goal}")
 
     target_calories = tdee * GOAL_ADJUSTMENTS[goal]
-    logger.info(f"Target calories calculation: TDEE={tdee}, goal={goal} -> {target_calories} kcal")
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_target_calories", {"tdee": tdee, "goal": str(goal)}, target_calories
+        )
     return round(target_calories, 0)
 
 
@@ -719,10 +864,12 @@ def calculate_keto_macros_advanced(
         "lbm_used": lbm is not None,
     }
 
-    logger.info(
-        f"Advanced keto macros calculation: target_calories={target_calories}, "
-        f"keto_type={keto_type} -> {result}"
-    )
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_keto_macros_advanced",
+            {"target_calories": target_calories, "keto_type": str(keto_type)},
+            result,
+        )
     return result
 
 
@@ -763,7 +910,10 @@ def calculate_gki(glucose_mgdl: float, ketones_mgdl: float) -> Dict[str, Union[f
         "ketones_mgdl": ketones_mgdl,
     }
 
-    logger.info(f"GKI calculation: glucose={glucose_mgdl}, ketones={ketones_mgdl} -> GKI={gki}")
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_gki", {"glucose_mgdl": glucose_mgdl, "ketones_mgdl": ketones_mgdl}, result
+        )
     return result
 
 
@@ -917,7 +1067,12 @@ def calculate_recipe_nutrition(
         "keto_category": keto_result["keto_category"],
     }
 
-    logger.info(f"Recipe calculation: {recipe_name} -> {result}")
+    if calc_tracer.enabled:
+        calc_tracer.record(
+            "calculate_recipe_nutrition",
+            {"recipe_name": recipe_name, "ingredients": len(ingredients), "servings": servings},
+            result,
+        )
     return result
 
 
@@ -0,0 +1,420 @@
+"""
+Nutrition Calculator Batch Module
+Векторизованные версии расчетов из nutrition_calculator над массивами NumPy
+
+Каждая функция принимает столбцы (по одному значению на продукт или
+ингредиент) и возвращает массивы; результаты совпадают со скалярными
+функциями с точностью до бита после округления. Отсутствующие значения
+(None) передаются как None или NaN.
+"""
+
+import logging
+from typing import Callable, Dict, Optional, Sequence
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+from .nutrition_calculator import (
+    CALORIES_PER_GRAM,
+    COOKING_YIELD_FACTORS,
+    FIBER_DEDUCTION_COEFFICIENTS,
+    FIBER_RATIOS,
+    KETO_INDEX_CATEGORIES,
+    NUTRIENT_RETENTION_FACTORS,
+    RecipeIngredient,
+    calculate_cooking_fat,
+    calculate_quality_score_advanced,
+)
+
+logger = logging.getLogger("nutrition_calculator")
+
+# Категория по умолчанию в calculate_keto_index_advanced
+DEFAULT_KETO_CATEGORY = "Исключить"
+
+
+# ============================================
+# Вспомогательные функции
+# ============================================
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("Batch nutrition calculations require the numpy package")
+
+
+def _column(values, size: Optional[int] = None) -> "np.ndarray":
+    """Числовой столбец float64; None становится NaN"""
+    if values is None:
+        return np.full(size, np.nan)
+    return np.asarray(values, dtype=float)
+
+
+def _labels(values, size: int) -> "np.ndarray":
+    """Столбец строковых меток (категории, способы обработки) как object"""
+    if values is None:
+        return np.full(size, None, dtype=object)
+    labels = np.empty(size, dtype=object)
+    labels[:] = list(values)
+    return labels
+
+
+def _lookup(labels: "np.ndarray", table: Dict, default: float) -> "np.ndarray":
+    """Значения table[label] для каждой метки (default для неизвестных)"""
+    result = np.full(len(labels), default, dtype=float)
+    for label in set(labels.tolist()):
+        if label in table:
+            result[labels == label] = table[label]
+    return result
+
+
+def _map_unique(func: Callable, *columns: "np.ndarray") -> "np.ndarray":
+    """Вызвать скалярную func один раз для каждой уникальной комбинации меток"""
+    keys = list(zip(*(column.tolist() for column in columns)))
+    cache = {}
+    result = np.empty(len(keys), dtype=float)
+    for i, key in enumerate(keys):
+        if key not in cache:
+            cache[key] = func(*key)
+        result[i] = cache[key]
+    return result
+
+
+def _round(values: "np.ndarray", ndigits: int = 1) -> "np.ndarray":
+    """
+    Округление, совпадающее со встроенным round()
+
+    np.round умножает на 10**ndigits в плавающей точке и может разрешить
+    границу .5 не так, как точный round(); такие значения (их единицы)
+    досчитываются через round().
+    """
+    result = np.round(values, ndigits)
+    scaled = values * 10.0**ndigits
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        index = np.flatnonzero(near_half)
+        result[index] = [round(value, ndigits) for value in values[index].tolist()]
+    return result
+
+
+def _first_invalid(mask: "np.ndarray") -> Optional[int]:
+    index = np.flatnonzero(mask)
+    return int(index[0]) if len(index) else None
+
+
+# ============================================
+# Основные расчеты
+# ============================================
+
+
+def calculate_calories_from_macros(protein, fats, carbs) -> "np.ndarray":
+    """
+    Расчет калорийности из макронутриентов (система Этуотера)
+
+    Args:
+        protein: белки, г на 100г (массив)
+        fats: жиры, г на 100г (массив)
+        carbs: углеводы, г на 100г (массив)
+
+    Returns:
+        массив калорийности в ккал на 100г
+    """
+    _require_numpy()
+    calories = (
+        _column(protein) * CALORIES_PER_GRAM["protein"]
+        + _column(fats) * CALORIES_PER_GRAM["fats"]
+        + _column(carbs) * CALORIES_PER_GRAM["carbs"]
+    )
+    return _round(calories)
+
+
+def calculate_net_carbs(
+    total_carbs, fiber=None, categories: Optional[Sequence] = None
+) -> Dict[str, "np.ndarray"]:
+    """
+    Расчет чистых углеводов (см. calculate_net_carbs_advanced)
+
+    Args:
+        total_carbs: общие углеводы, г на 100г (массив)
+        fiber: клетчатка, г на 100г (массив, None/NaN - нет данных)
+        categories: категории продуктов
+
+    Returns:
+        dict с массивами net_carbs, fiber_estimated, fiber_deduction_coefficient
+
+    Raises:
+        ValueError: отрицательные углеводы или клетчатка больше углеводов
+    """
+    _require_numpy()
+    carbs = _column(total_carbs)
+    size = len(carbs)
+    fiber = _column(fiber, size)
+    labels = _labels(categories, size)
+
+    row = _first_invalid(carbs < 0)
+    if row is not None:
+        raise ValueError(f"Общие углеводы не могут быть отрицательными (строка {row})")
+    row = _first_invalid(fiber > carbs)
+    if row is not None:
+        raise ValueError(f"Клетчатка не может превышать общие углеводы (строка {row})")
+
+    fiber_known = ~np.isnan(fiber)
+    known_category = np.array([label in FIBER_RATIOS for label in labels.tolist()], dtype=bool)
+
+    deduction_coeff = _lookup(labels, FIBER_DEDUCTION_COEFFICIENTS, 0.75)
+    fiber_ratio = _lookup(labels, FIBER_RATIOS, 0.0)
+
+    direct = carbs - (np.where(fiber_known, fiber, 0.0) * deduction_coeff)
+    estimated = carbs - ((carbs * fiber_ratio) * deduction_coeff)
+    net_carbs = np.where(fiber_known, direct, np.where(known_category, estimated, carbs))
+
+    return {
+        "net_carbs": _round(np.maximum(net_carbs, 0)),
+        "fiber_estimated": ~fiber_known,
+        "fiber_deduction_coefficient": np.where(fiber_known | known_category, deduction_coeff, 0.0),
+    }
+
+
+def calculate_carbs_score(net_carbs) -> "np.ndarray":
+    """Оценка углеводов для кето-индекса (50% веса)"""
+    _require_numpy()
+    net_carbs = _column(net_carbs)
+    return np.select(
+        [net_carbs <= 2, net_carbs <= 5, net_carbs <= 10, net_carbs <= 20],
+        [
+            100.0,
+            100 - ((net_carbs - 2) * 5),
+            85 - ((net_carbs - 5) * 5),
+            60 - ((net_carbs - 10) * 6),
+        ],
+        np.maximum(0, 60 - ((net_carbs - 20) * 3)),
+    )
+
+
+def calculate_fat_ratio_score(fats, protein, carbs) -> "np.ndarray":
+    """Оценка жиро-белкового профиля для кето-индекса (25% веса)"""
+    _require_numpy()
+    fats = _column(fats)
+    total_macros = fats + _column(protein) + _column(carbs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fat_percentage = (fats / total_macros) * 100
+    return np.select(
+        [
+            total_macros == 0,
+            fat_percentage >= 75,
+            fat_percentage >= 60,
+            fat_percentage >= 45,
+            fat_percentage >= 30,
+        ],
+        [0.0, 100.0, 80.0, 60.0, 40.0],
+        20.0,
+    )
+
+
+def calculate_quality_score(processing_levels, categories) -> "np.ndarray":
+    """Оценка качества для кето-индекса (15% веса)"""
+    _require_numpy()
+    size = len(processing_levels) if processing_levels is not None else len(categories)
+    return _map_unique(
+        calculate_quality_score_advanced,
+        _labels(processing_levels, size),
+        _labels(categories, size),
+    )
+
+
+def calculate_gi_score(glycemic_index) -> "np.ndarray":
+    """Оценка гликемического индекса для кето-индекса (10% веса)"""
+    _require_numpy()
+    gi = _column(glycemic_index)
+    return np.select(
+        [np.isnan(gi), gi <= 15, gi <= 35, gi <= 55],
+        [50.0, 100.0, 100 - ((gi - 15) * 2), 60 - ((gi - 35) * 1.5)],
+        np.maximum(0, 30 - ((gi - 55) * 0.6)),
+    )
+
+
+def keto_categories(keto_index) -> "np.ndarray":
+    """Категории KETO_INDEX_CATEGORIES для массива кето-индексов"""
+    _require_numpy()
+    keto_index = _column(keto_index)
+    result = np.full(len(keto_index), DEFAULT_KETO_CATEGORY, dtype=object)
+    assigned = np.zeros(len(keto_index), dtype=bool)
+    for (min_val, max_val), category_name in KETO_INDEX_CATEGORIES.items():
+        match = (min_val <= keto_index) & (keto_index <= max_val) & ~assigned
+        result[match] = category_name
+        assigned |= match
+    return result
+
+
+def calculate_keto_index(
+    protein,
+    fats,
+    carbs,
+    fiber=None,
+    categories: Optional[Sequence] = None,
+    glycemic_index=None,
+    processing_levels: Optional[Sequence] = None,
+) -> Dict[str, "np.ndarray"]:
+    """
+    Расчет кето-индекса (см. calculate_keto_index_advanced)
+
+    В отличие от скалярной версии не пишет лог на каждый продукт и не
+    выполняет validate_nutrition_data.
+
+    Args:
+        protein: белки, г на 100г (массив)
+        fats: жиры, г на 100г (массив)
+        carbs: углеводы, г на 100г (массив)
+        fiber: клетчатка, г на 100г (массив, None/NaN - нет данных)
+        categories: категории продуктов
+        glycemic_index: гликемические индексы (None/NaN - нет данных)
+        processing_levels: уровни обработки
+
+    Returns:
+        dict с массивами keto_index, keto_category, carbs_score, fat_score,
+        quality_score, gi_score, net_carbs, fiber_estimated,
+        fiber_deduction_coefficient
+
+    Raises:
+        ValueError: отрицательные углеводы или клетчатка больше углеводов
+    """
+    _require_numpy()
+    carbs = _column(carbs)
+    size = len(carbs)
+    labels = _labels(categories, size)
+
+    net_carbs_result = calculate_net_carbs(carbs, fiber, labels)
+
+    carbs_score = calculate_carbs_score(net_carbs_result["net_carbs"])
+    fat_ratio_score = calculate_fat_ratio_score(fats, protein, carbs)
+    quality_score = calculate_quality_score(_labels(processing_levels, size), labels)
+    gi_score = calculate_gi_score(_column(glycemic_index, size))
+
+    keto_index = (
+        (carbs_score * 0.5) + (fat_ratio_score * 0.25) + (quality_score * 0.15) + (gi_score * 0.10)
+    )
+
+    return {
+        "keto_index": _round(keto_index),
+        "keto_category": keto_categories(keto_index),
+        "carbs_score": _round(carbs_score),
+        "fat_score": _round(fat_ratio_score),
+        "quality_score": _round(quality_score),
+        "gi_score": _round(gi_score),
+        "net_carbs": net_carbs_result["net_carbs"],
+        "fiber_estimated": net_carbs_result["fiber_estimated"],
+        "fiber_deduction_coefficient": net_carbs_result["fiber_deduction_coefficient"],
+    }
+
+
+# ============================================
+# Расчет рецептов и блюд
+# ============================================
+
+
+def _cooking_fat_factor(category: str, preparation: str) -> float:
+    """Доля веса, добавляемая жиром при готовке (calculate_cooking_fat на 1г)"""
+    ingredient = RecipeIngredient("", 1.0, {}, category, preparation)
+    return calculate_cooking_fat(ingredient, preparation)
+
+
+def calculate_recipe_per_100g(
+    recipe_index,
+    raw_weight,
+    protein,
+    fats,
+    carbs,
+    fiber=None,
+    categories: Optional[Sequence] = None,
+    preparations: Optional[Sequence] = None,
+    recipe_count: Optional[int] = None,
+) -> Dict[str, "np.ndarray"]:
+    """
+    Пересчет нутриентов рецептов на 100г готового блюда
+    (см. calculate_recipe_nutrition)
+
+    Ингредиенты всех рецептов передаются одним набором столбцов;
+    recipe_index указывает номер рецепта (0..recipe_count-1) каждого ингредиента.
+
+    Args:
+        recipe_index: номер рецепта для каждого ингредиента
+        raw_weight: вес сырого ингредиента, г
+        protein: белки ингредиента, г на 100г
+        fats: жиры ингредиента, г на 100г
+        carbs: углеводы ингредиента, г на 100г
+        fiber: клетчатка ингредиента, г на 100г (None/NaN - 0)
+        categories: категории ингредиентов
+        preparations: способы приготовления
+        recipe_count: количество рецептов (по умолчанию max(recipe_index) + 1)
+
+    Returns:
+        dict с массивами по рецептам: protein, fats, carbs, calories, net_carbs,
+        fiber (на 100г), total_raw, total_cooked, keto_index, keto_category
+
+    Raises:
+        ValueError: клетчатка блюда больше углеводов
+    """
+    _require_numpy()
+    recipe_index = np.asarray(recipe_index, dtype=np.intp)
+    raw_weight = _column(raw_weight)
+    size = len(raw_weight)
+    if recipe_count is None:
+        recipe_count = int(recipe_index.max()) + 1 if size else 0
+    labels = _labels(categories, size)
+    methods = _labels(preparations, size)
+
+    yield_factor = _map_unique(
+        lambda category, preparation: COOKING_YIELD_FACTORS.get(f"{category}_{preparation}", 1.0),
+        labels,
+        methods,
+    )
+    cooked_weight = raw_weight * yield_factor
+
+    retention = {
+        nutrient: _lookup(methods, NUTRIENT_RETENTION_FACTORS[nutrient], 1.0)
+        for nutrient in ("protein", "fats", "carbs")
+    }
+    protein = _column(protein) * raw_weight / 100 * retention["protein"]
+    fats = _column(fats) * raw_weight / 100 * retention["fats"]
+    carbs = _column(carbs) * raw_weight / 100 * retention["carbs"]
+    fats = fats + raw_weight * _map_unique(_cooking_fat_factor, labels, methods)
+    calories = calculate_calories_from_macros(protein, fats, carbs)
+
+    fiber = np.nan_to_num(_column(fiber, size), nan=0.0)
+
+    # bincount складывает по порядку, как sum() в скалярной версии
+    def total(values):
+        return np.bincount(recipe_index, weights=values, minlength=recipe_count)
+
+    total_cooked = total(cooked_weight)
+    cooked = total_cooked > 0
+    divisor = np.where(cooked, total_cooked, 1.0)
+
+    per_100g = {}
+    for nutrient, values in (
+        ("protein", protein),
+        ("fats", fats),
+        ("carbs", carbs),
+        ("calories", calories),
+    ):
+        per_100g[nutrient] = np.where(cooked, _round(total(values) * 100 / divisor), 0.0)
+
+    fiber_per_100g = np.where(cooked, total(fiber * raw_weight / 100) * 100 / divisor, 0.0)
+
+    keto_result = calculate_keto_index(
+        per_100g["protein"], per_100g["fats"], per_100g["carbs"], fiber=fiber_per_100g
+    )
+
+    return {
+        **per_100g,
+        "net_carbs": _round(per_100g["carbs"] - fiber_per_100g),
+        "fiber": _round(fiber_per_100g),
+        "total_raw": _round(total(raw_weight)),
+        "total_cooked": _round(total_cooked),
+        "keto_index": keto_result["keto_index"],
+        "keto_category": keto_result["keto_category"],
+    }
@@ -0,0 +1,137 @@
+"""
+Pagination Module
+Opaque keyset cursors for list endpoints
+
+A cursor holds the sort key of the last row of a page; the next page is
+read with "WHERE (sort key) > cursor", which an index answers directly, so
+every page costs the same however deep the client has scrolled. OFFSET
+paging stays available for compatibility.
+"""
+
+import base64
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import Config
+
+PAGE_CACHE_TTL = 300  # seconds a cached page is served; writes invalidate sooner
+
+# Cursor kind -> number of sort key values
+CURSOR_KEYS = {
+    "products": 2,  # (name, id)
+    "log": 3,  # (date, created_at, id)
+    "fasting": 2,  # (start_time, id)
+}
+
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    """Encode a sort key as an opaque URL-safe cursor"""
+    payload = json.dumps([kind, *values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: Optional[str]) -> Optional[Tuple[Any, ...]]:
+    """
+    Decode a cursor produced by encode_cursor for the same kind.
+
+    Args:
+        kind: Cursor kind (key of CURSOR_KEYS)
+        cursor: Cursor string, or None/empty for the first page
+
+    Returns:
+        Tuple of sort key values, or None for the first page
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another list
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (
+        not isinstance(payload, list)
+        or len(payload) != CURSOR_KEYS[kind] + 1
+        or payload[0] != kind
+        or not isinstance(payload[-1], int)
+        # Anything else (objects, lists, null) cannot be bound as a query parameter
+        or not all(
+            isinstance(value, (str, int, float)) and not isinstance(value, bool)
+            for value in payload[1:]
+        )
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(payload[1:])
+
+
+def paginate(
+    rows: List[Dict[str, Any]], limit: int, kind: str, key: Callable[[Dict[str, Any]], Sequence]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Trim rows fetched with LIMIT limit + 1 to a page and build its next cursor.
+
+    Args:
+        rows: Rows in sort order, at most limit + 1
+        limit: Page size
+        kind: Cursor kind
+        key: Sort key of a row
+
+    Returns:
+        Tuple of (page rows, next cursor or None on the last page)
+    """
+    if len(rows) <= limit or limit <= 0:
+        return rows[: max(limit, 0)], None
+    page = rows[:limit]
+    return page, encode_cursor(kind, key(page[-1]))
+
+
+def fetch_page(
+    fetch: Callable[[int, int, Optional[Tuple[Any, ...]]], List[Dict[str, Any]]],
+    kind: str,
+    key: Callable[[Dict[str, Any]], Sequence],
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    cache: Any = None,
+    cache_prefix: str = "",
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Read one page of a list endpoint.
+
+    Pages are read by keyset: clients pass the next_cursor of the previous
+    page as cursor. offset is kept for clients that still page by position.
+
+    Args:
+        fetch: Repository read called as fetch(limit, offset, after)
+        kind: Cursor kind
+        key: Sort key of a row
+        limit: Page size (capped at API_MAX_PER_PAGE)
+        offset: Rows to skip (compatibility mode)
+        cursor: next_cursor returned with the previous page
+        cache: cache_manager to serve and store pages with, or None
+        cache_prefix: Cache key prefix; writes invalidate pages through it
+
+    Returns:
+        Tuple of (page rows, next cursor or None on the last page)
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    limit = max(0, min(limit, Config.API_MAX_PER_PAGE))
+    offset = max(0, offset)
+    after = decode_cursor(kind, cursor)
+
+    if cache is not None:
+        cache_key = f"{cache_prefix}:{limit}:{offset}:{cursor or ''}"
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result["items"], cached_result["next_cursor"]
+
+    # One extra row tells whether another page follows
+    rows, next_cursor = paginate(fetch(limit + 1, offset, after), limit, kind, key)
+
+    if cache is not None:
+        cache.set(cache_key, {"items": rows, "next_cursor": next_cursor}, PAGE_CACHE_TTL)
+    return rows, next_cursor
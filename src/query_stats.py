@@ -0,0 +1,327 @@
+"""
+Query Statistics Module
+Per-statement SQL statistics and a slow-query log for the SQLite database
+
+Statements run on get_db() connections (see request_tracing.TracedCursor)
+are normalized, so calls differing only in literals or IN-list length share
+one entry, and accumulated per worker process: calls, total / mean / p95 /
+max time and rows returned or changed. Statements slower than slow_ms are
+written to the slow-query log together with their EXPLAIN QUERY PLAN; the
+plan lookup and the log write happen on a background thread, so the
+request that ran the slow statement only records it in memory.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from .advanced_logging import AccessLogPipeline
+from .config import Config
+from .monitoring import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+OTHER_QUERY_ID = "other"  # bucket for statements beyond max_statements
+SORT_KEYS = ("total", "mean", "p95", "max", "calls", "rows")
+MAX_SLOW_QUERY_LENGTH = 2000  # characters of statement text kept per slow query
+SLOW_LOG_QUEUE_SIZE = 1000  # slow queries waiting for their plan and log write
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_ROW_RE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_ROWS_RE = re.compile(rf"({_ROW_RE})(?:\s*,\s*{_ROW_RE})+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> Tuple[str, str]:
+    """
+    Normalize a statement and derive its query id.
+
+    Comments are dropped, string and number literals become ?, IN lists
+    and multi-row VALUES collapse to one entry and whitespace is squeezed.
+
+    Args:
+        sql: Statement text as executed
+
+    Returns:
+        Tuple of (query id, normalized statement)
+    """
+    normalized = _COMMENT_RE.sub(" ", sql)
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _SPACE_RE.sub(" ", normalized).strip().rstrip(";").strip()
+    normalized = _IN_LIST_RE.sub("IN (...)", normalized)
+    normalized = _ROWS_RE.sub(r"\1, ...", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12], normalized
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters: Sequence = ()) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN detail lines for sql, or None if it cannot be explained"""
+    try:
+        # Called on the class so a traced connection does not record the EXPLAIN itself
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters)
+        return [row[3] for row in rows.fetchall()]
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+def database_file(conn: sqlite3.Connection) -> str:
+    """Path of the main database of conn ('' for in-memory and temporary databases)"""
+    for _, name, path in sqlite3.Connection.execute(conn, "PRAGMA database_list").fetchall():
+        if name == "main":
+            return path or ""
+    return ""
+
+
+class _Entry:
+    __slots__ = ("query", "calls", "total", "max", "rows", "slow_calls", "samples")
+
+    def __init__(self, query: str, samples: int):
+        self.query = query
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow_calls = 0
+        self.samples = deque(maxlen=samples)
+
+    def p95(self) -> float:
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(len(ordered) * 0.95) - 1, 0)] if ordered else 0.0
+
+
+class StatementStats:
+    """Per-process statement statistics (a pg_stat_statements for SQLite)
+
+    record() is called for every statement and takes one short lock; the
+    p95 comes from the newest ``samples`` durations of each statement.
+    Slow-query records are completed with their plan and written by a
+    bounded background pipeline that drops (and counts) overflow.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        slow_ms: float = 100,
+        max_statements: int = 500,
+        samples: int = 200,
+        slow_log_size: int = 100,
+    ):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self.samples = samples
+        self.slow_log: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._slow_queries = deque(maxlen=slow_log_size)
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._slow_writer = AccessLogPipeline(
+            self._write_slow_batch, capacity=SLOW_LOG_QUEUE_SIZE, name="slow-query-log"
+        )
+        self.since = time.time()
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        slow_ms: Optional[float] = None,
+        slow_log: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        """Change settings at runtime; slow_log receives each slow-query record"""
+        if enabled is not None:
+            self.enabled = enabled
+        if slow_ms is not None:
+            self.slow_ms = max(float(slow_ms), 0.0)
+        if slow_log is not None:
+            self.slow_log = slow_log
+
+    def record(self, sql: str, duration: float, rows: int = 0) -> str:
+        """
+        Account one execution of sql.
+
+        Args:
+            sql: Statement text as executed
+            duration: Execution time in seconds
+            rows: Rows changed by the statement (rows fetched are added by add_rows)
+
+        Returns:
+            Query id the execution was accounted to
+        """
+        query_id, query = fingerprint(sql)
+        slow = self.is_slow(duration)
+        with self._lock:
+            entry = self._entries.get(query_id)
+            if entry is None:
+                if len(self._entries) >= self.max_statements:
+                    query_id, query = OTHER_QUERY_ID, "<other statements>"
+                    entry = self._entries.get(query_id)
+                if entry is None:
+                    entry = self._entries[query_id] = _Entry(query, self.samples)
+            entry.calls += 1
+            entry.total += duration
+            entry.rows += rows
+            entry.samples.append(duration)
+            if duration > entry.max:
+                entry.max = duration
+            if slow:
+                entry.slow_calls += 1
+
+        metrics_collector.record_statement(query_id, duration, rows, slow=slow)
+        return query_id
+
+    def add_rows(self, query_id: Optional[str], rows: int):
+        """Add rows fetched from a statement recorded earlier"""
+        if not rows or query_id is None:
+            return
+        with self._lock:
+            entry = self._entries.get(query_id)
+            if entry is not None:
+                entry.rows += rows
+        metrics_collector.record_statement(query_id, None, rows)
+
+    def is_slow(self, duration: float) -> bool:
+        """Whether a duration (seconds) crosses the slow-query threshold"""
+        return bool(self.slow_ms) and duration * 1000 >= self.slow_ms
+
+    def log_slow(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        duration: float,
+        parameters: Optional[Sequence] = None,
+    ) -> Dict[str, Any]:
+        """
+        Record a slow statement and queue it for the slow-query log.
+
+        The record is kept in memory right away; its query plan is looked up
+        on a separate connection and the log written by the background writer.
+
+        Args:
+            conn: Connection the statement ran on (locates the database to explain on)
+            sql: Statement text as executed
+            duration: Execution time in seconds
+            parameters: Parameters of a single execute(); None skips the plan
+
+        Returns:
+            The slow-query record (parameter values are never included); plan
+            and scans are filled in once the writer has processed it
+        """
+        query_id, query = fingerprint(sql)
+        record = {
+            "time": time.time(),
+            "query_id": query_id,
+            "query": query[:MAX_SLOW_QUERY_LENGTH],
+            "duration_ms": round(duration * 1000, 3),
+            "plan": None,
+            "scans": [],
+        }
+        self._slow_queries.append(record)
+
+        database = database_file(conn) if parameters is not None else ""
+        self._slow_writer.submit((record, sql, database, parameters))
+        return record
+
+    def _write_slow_batch(self, batch: List[tuple]):
+        """Look up the plans of queued slow queries and write them to the log"""
+        connections: Dict[str, sqlite3.Connection] = {}
+        try:
+            for record, sql, database, parameters in batch:
+                if database:
+                    try:
+                        if database not in connections:
+                            connections[database] = sqlite3.connect(
+                                f"file:{quote(database)}?mode=ro", uri=True
+                            )
+                        plan = explain(connections[database], sql, parameters)
+                    except sqlite3.Error:
+                        plan = None
+                    record["plan"] = plan
+                    record["scans"] = [line for line in plan or () if line.startswith("SCAN")]
+                self._emit_slow(record)
+        finally:
+            for conn in connections.values():
+                conn.close()
+
+    def _emit_slow(self, record: Dict[str, Any]):
+        if self.slow_log is not None:
+            try:
+                self.slow_log(record)
+            except Exception as e:
+                logger.warning(f"Slow query log failed: {e}")
+        else:
+            logger.warning(
+                f"Slow query {record['query_id']} took {record['duration_ms']}ms: "
+                f"{record['query']}"
+            )
+
+    def flush_slow_log(self) -> int:
+        """Write every queued slow query now; returns the number written"""
+        return self._slow_writer.flush()
+
+    def slow_log_stats(self) -> Dict[str, Any]:
+        """Queue counters of the slow-query writer (queued, dropped, written, ...)"""
+        return self._slow_writer.get_stats()
+
+    def snapshot(self, sort: str = "total", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Statement statistics, heaviest first.
+
+        Args:
+            sort: One of SORT_KEYS
+            limit: Maximum number of statements returned
+
+        Returns:
+            List of dicts with query_id, query, calls, total_ms, mean_ms,
+            p95_ms, max_ms, rows and slow_calls
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+
+        with self._lock:
+            rows = [
+                {
+                    "query_id": query_id,
+                    "query": entry.query,
+                    "calls": entry.calls,
+                    "total_ms": round(entry.total * 1000, 3),
+                    "mean_ms": round(entry.total * 1000 / entry.calls, 3) if entry.calls else 0,
+                    "p95_ms": round(entry.p95() * 1000, 3),
+                    "max_ms": round(entry.max * 1000, 3),
+                    "rows": entry.rows,
+                    "slow_calls": entry.slow_calls,
+                }
+                for query_id, entry in self._entries.items()
+            ]
+
+        key = sort if sort in ("calls", "rows") else f"{sort}_ms"
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest slow-query records (newest last)"""
+        records = list(self._slow_queries)
+        return records[-limit:] if limit else records
+
+    def reset(self):
+        """Forget all statistics and slow queries"""
+        with self._lock:
+            self._entries.clear()
+            self._slow_queries.clear()
+            self.since = time.time()
+
+
+statement_stats = StatementStats(
+    enabled=Config.QUERY_STATS,
+    slow_ms=Config.SLOW_QUERY_MS,
+    max_statements=Config.QUERY_STATS_MAX_STATEMENTS,
+)
@@ -0,0 +1,253 @@
+"""
+Request Tracing Module
+Lightweight per-request span timing (SQL, calculations, serialization)
+
+A RequestTrace lives in flask.g for the duration of a request. Code marks
+phases with span() / @traced; SQL is timed automatically by connections
+created with factory=TracedConnection (pooled connections included), which
+also feed the per-statement statistics in query_stats. The totals per span
+name become a Server-Timing header and span histograms, and the individual
+spans can be logged as a JSON trace.
+
+Outside a traced request spans are a single lookup and a no-op.
+"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from flask import g, has_app_context
+from flask.json.provider import DefaultJSONProvider
+
+from .query_stats import statement_stats
+
+SQL = "sql"
+CALC = "calc"
+SERIALIZE = "serialize"
+
+MAX_SPANS = 1000  # individual spans kept per trace; totals are always exact
+MAX_DETAIL_LENGTH = 200  # characters of SQL kept per span in JSON traces
+
+
+class RequestTrace:
+    """Spans recorded during one request, plus running totals per span name"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans: List[tuple] = []
+        self.totals: Dict[str, List[float]] = {}
+        self.dropped = 0
+        self._active = set()
+
+    def add(self, name: str, start: float, duration: float, detail: Any = None, count: int = 1):
+        """Record a finished span (start and duration from time.perf_counter)"""
+        total = self.totals.get(name)
+        if total is None:
+            self.totals[name] = [duration, count]
+        else:
+            total[0] += duration
+            total[1] += count
+
+        if count:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append((name, start, duration, detail))
+            else:
+                self.dropped += 1
+
+    def elapsed(self) -> float:
+        """Seconds since the trace began"""
+        return time.perf_counter() - self.start
+
+    def durations(self) -> Dict[str, float]:
+        """Total seconds per span name"""
+        return {name: total[0] for name, total in self.totals.items()}
+
+    def server_timing(self, duration: Optional[float] = None) -> str:
+        """
+        Format the totals as a Server-Timing header value.
+
+        Args:
+            duration: Total request duration in seconds (defaults to elapsed())
+
+        Returns:
+            Header value such as 'sql;dur=3.1;desc="4 queries", total;dur=5.0'
+        """
+        entries = []
+        for name, (seconds, count) in self.totals.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if name == SQL:
+                entry += f';desc="{int(count)} queries"'
+            entries.append(entry)
+        total = self.elapsed() if duration is None else duration
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable trace with millisecond offsets from the request start"""
+        spans = []
+        for name, start, duration, detail in self.spans:
+            span_data = {
+                "name": name,
+                "start_ms": round((start - self.start) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+            }
+            if detail is not None:
+                span_data["detail"] = " ".join(str(detail).split())[:MAX_DETAIL_LENGTH]
+            spans.append(span_data)
+
+        return {
+            "started_at": self.started_at,
+            "duration_ms": round(self.elapsed() * 1000, 3),
+            "totals": {
+                name: {"duration_ms": round(seconds * 1000, 3), "count": int(count)}
+                for name, (seconds, count) in self.totals.items()
+            },
+            "spans": spans,
+            "dropped_spans": self.dropped,
+        }
+
+
+def begin_trace() -> RequestTrace:
+    """Start tracing the current request"""
+    g.request_trace = RequestTrace()
+    return g.request_trace
+
+
+def end_trace() -> Optional[RequestTrace]:
+    """Stop tracing the current request and return its trace (if any)"""
+    if not has_app_context():
+        return None
+    return g.pop("request_trace", None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace of the current request, or None outside a traced request"""
+    if not has_app_context():
+        return None
+    return g.get("request_trace")
+
+
+@contextmanager
+def span(name: str, detail: Any = None):
+    """Time the enclosed block as a span of the current request
+
+    Nested spans with the same name are folded into the outer one so their
+    time is not counted twice.
+    """
+    trace = current_trace()
+    if trace is None or name in trace._active:
+        yield
+        return
+
+    trace._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace._active.discard(name)
+        trace.add(name, start, time.perf_counter() - start, detail)
+
+
+def traced(name: str):
+    """Decorator timing each call as a span (see span())"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor timing statements and fetches
+
+    Statements become SQL spans of the current request and are accounted
+    in query_stats.statement_stats (which also logs slow ones).
+    """
+
+    _query_id = None  # statement_stats entry of the last statement, for fetched rows
+
+    def _timed(self, method, sql, args, parameters=None):
+        trace = current_trace()
+        if trace is None and not statement_stats.enabled:
+            return method(sql, *args)
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            duration = time.perf_counter() - start
+            if trace is not None:
+                trace.add(SQL, start, duration, sql)
+            if statement_stats.enabled:
+                self._query_id = statement_stats.record(sql, duration, max(self.rowcount, 0))
+                if statement_stats.is_slow(duration):
+                    statement_stats.log_slow(self.connection, sql, duration, parameters)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, (parameters,), parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, (seq_of_parameters,))
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script, ())
+
+    def _fetch(self, method, *args, single=False):
+        trace = current_trace()
+        if trace is None and not statement_stats.enabled:
+            return method(*args)
+        start = time.perf_counter()
+        result = None
+        try:
+            result = method(*args)
+            return result
+        finally:
+            if trace is not None:
+                # Fetch time is added to the SQL total without counting a query
+                trace.add(SQL, start, time.perf_counter() - start, count=0)
+            if statement_stats.enabled and result is not None:
+                statement_stats.add_rows(self._query_id, 1 if single else len(result))
+
+    def fetchone(self):
+        return self._fetch(super().fetchone, single=True)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+class TracedConnection(sqlite3.Connection):
+    """SQLite connection whose cursors are TracedCursor
+
+    Connection.execute() and friends do not go through cursor(), so they
+    are routed through it explicitly.
+    """
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider timing jsonify() encoding as a serialize span"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with span(SERIALIZE):
+            return super().dumps(obj, **kwargs)
@@ -0,0 +1,249 @@
+"""
+Response Cache Module
+Bounded LRU + TTL cache for rendered API responses with tag-based invalidation
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+from .cache_manager import cache_manager
+from .config import Config
+from .monitoring import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Tag carried by every entry so a single invalidation can drop everything
+ALL_TAGS = "*"
+
+
+class CachedResponse(NamedTuple):
+    """Rendered response body plus the metadata needed to serve and evict it"""
+
+    body: bytes
+    status: int
+    mimetype: str
+    tags: Tuple[str, ...]
+    tokens: Tuple[Optional[str], ...]
+    expires: float
+
+
+class ResponseCache:
+    """
+    Per-process LRU cache of response bodies.
+
+    Each entry carries tags (e.g. the dates a stats response covers) so writes
+    can drop exactly the entries they affect. When cache_manager is shared
+    (Redis or the SQLite backend), invalidations also bump a shared per-tag token so entries cached by
+    other worker processes are treated as stale on their next lookup.
+
+    Callers take version(tags) before computing a response and pass it to
+    set(), so a response computed across an invalidation is never stored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 256,
+        max_bytes: int = 4 * 1024 * 1024,
+        ttl: float = 300,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._tag_index: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}  # local invalidations per tag
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _token_key(self, tag: str) -> str:
+        return f"response_cache:{self.name}:{tag}"
+
+    def _shared_tokens(self, tags: Iterable[str]) -> Tuple[Optional[str], ...]:
+        """Current cross-process invalidation tokens (only meaningful with a shared cache)"""
+        if not cache_manager.is_shared:
+            return ()
+        return tuple(cache_manager.get(self._token_key(tag)) for tag in tags)
+
+    def version(self, tags: Iterable[str]) -> Tuple[Tuple[int, ...], Tuple[Optional[str], ...]]:
+        """
+        Invalidation state of tags, to be taken before computing a response.
+
+        Args:
+            tags: Invalidation tags the response will be stored with
+
+        Returns:
+            Opaque value for set(); it changes whenever any of the tags is invalidated
+        """
+        tags = tuple(tags) + (ALL_TAGS,)
+        with self._lock:
+            generations = tuple(self._generations.get(tag, 0) for tag in tags)
+        return generations, self._shared_tokens(tags)
+
+    def _remove(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+        return entry
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        Look up a fresh entry and mark it most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CachedResponse or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry.expires <= time.time() or entry.tokens != self._shared_tokens(entry.tags)
+            ):
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.stats["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+
+        metrics_collector.record_cache_operation(f"{self.name}_response", entry is not None)
+        return entry
+
+    def set(
+        self,
+        key: Hashable,
+        body: bytes,
+        status: int = 200,
+        mimetype: str = "application/json",
+        tags: Iterable[str] = (),
+        version: Optional[Tuple] = None,
+    ) -> bool:
+        """
+        Store a response body, evicting least recently used entries to fit.
+
+        Args:
+            key: Cache key
+            body: Response body
+            status: HTTP status code
+            mimetype: Response mimetype
+            tags: Invalidation tags for this entry
+            version: version(tags) taken before the body was computed; the
+                body is dropped if any of the tags was invalidated since
+
+        Returns:
+            True if stored, False if the body alone exceeds the memory bound or is stale
+        """
+        if len(body) > self.max_bytes:
+            return False
+
+        tags = tuple(tags) + (ALL_TAGS,)
+        tokens = self._shared_tokens(tags)
+        if version is not None:
+            if tokens != version[1]:
+                return False
+            # Keep the tokens seen before computing, so an invalidation racing
+            # this store still marks the entry stale on its next lookup
+            tokens = version[1]
+        entry = CachedResponse(body, status, mimetype, tags, tokens, time.time() + self.ttl)
+
+        with self._lock:
+            if version is not None and version[0] != tuple(
+                self._generations.get(tag, 0) for tag in tags
+            ):
+                return False
+            self._remove(key)
+            while self._entries and (
+                len(self._entries) >= self.max_entries or self._bytes + len(body) > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """
+        Drop every entry carrying any of the given tags.
+
+        Args:
+            tags: Tags to invalidate (e.g. affected dates)
+
+        Returns:
+            Number of local entries removed
+        """
+        tags = set(tag for tag in tags if tag)
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tag_index.get(tag, ())):
+                    if self._remove(key) is not None:
+                        removed += 1
+            self.stats["invalidations"] += removed
+
+        if cache_manager.is_shared:
+            token = f"{time.time_ns()}"
+            for tag in tags:
+                cache_manager.set(self._token_key(tag), token, int(self.ttl) + 1)
+        return removed
+
+    def invalidate_all(self) -> int:
+        """Drop every entry in this and (with a shared cache) all other processes"""
+        return self.invalidate([ALL_TAGS])
+
+    def clear(self):
+        """Drop all local entries"""
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                **self.stats,
+            }
+
+
+# Global response cache for the stats blueprint, tagged by date
+stats_cache = ResponseCache(
+    "stats",
+    max_entries=Config.STATS_CACHE_MAX_ENTRIES,
+    max_bytes=Config.STATS_CACHE_MAX_BYTES,
+    ttl=Config.STATS_CACHE_TTL,
+)
+
+
+def invalidate_stats_dates(dates: Iterable[str]) -> int:
+    """Invalidate cached stats responses covering any of the given dates"""
+    return stats_cache.invalidate(dates)
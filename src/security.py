@@ -4,11 +4,14 @@ Handles JWT tokens, user authentication, and security
 """
 
 import logging
+import math
 import re
 import secrets
+import time
+import zlib
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from typing import Any, Dict, Optional
+from typing import Any, Dict, NamedTuple, Optional
 
 import bcrypt
 import jwt
@@ -234,8 +237,27 @@ def require_admin(f):
     return decorated_function
 
 
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limit check, as reported in X-RateLimit-* headers"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # seconds until a request is allowed again (window end while allowed)
+
+
 class RateLimiter:
-    """Simple rate limiter using Redis or in-memory storage"""
+    """
+    Sliding-window rate limiter on top of cache_manager.
+
+    Each window has its own counter bumped with an atomic increment (Redis
+    INCR or the fallback cache's in-place increment), so concurrent requests
+    in any worker never lose updates and hits never extend the expiry. The
+    previous window's count is weighted by how much of it still overlaps the
+    sliding window, which smooths out bursts at window boundaries. Denied
+    requests are taken back off the counter, so a client retrying while
+    blocked does not extend its own lockout.
+    """
 
     def __init__(self, cache_manager):
         self.cache = cache_manager
@@ -244,45 +266,104 @@ class RateLimiter:
             "auth": {"requests": 10, "window": 3600},  # 10 auth attempts per hour
             "fasting": {"requests": 50, "window": 3600},  # 50 fasting operations per hour
             "admin": {"requests": 200, "window": 3600},  # 200 admin operations per hour
+            "search": {"requests": 1000, "window": 3600},  # autocomplete: a request per keystroke
         }
 
-    def is_allowed(self, identifier: str, limit_type: str = "api") -> bool:
-        """Check if request is allowed based on rate limits"""
-        try:
-            limits = self.default_limits.get(limit_type, self.default_limits["api"])
-            key = f"rate_limit:{limit_type}:{identifier}"
-
-            # Get current count
-            current_count = self.cache.get(key) or 0
-
-            if current_count >= limits["requests"]:
-                return False
+    def _window(self, identifier: str, limit_type: str, now: float):
+        """Limits, current window key, previous window key and elapsed fraction"""
+        limits = self.default_limits.get(limit_type, self.default_limits["api"])
+        window = limits["window"]
+        index = int(now // window)
+        key = f"rate_limit:{limit_type}:{identifier}"
+        return limits, f"{key}:{index}", f"{key}:{index - 1}", (now - index * window) / window
 
-            # Increment counter
-            if current_count == 0:
-                # First request in window
-                self.cache.set(key, 1, limits["window"])
-            else:
-                # Increment existing counter
-                self.cache.set(key, current_count + 1, limits["window"])
+    @staticmethod
+    def _retry_after(limit: int, window: int, current: int, previous: int, elapsed: float) -> int:
+        """Seconds until a request counted as current would fit within limit"""
+        if current <= limit:
+            # Wait for the previous window's weight to decay far enough
+            needed = 1 - (limit - current) / previous if previous else elapsed
+            seconds = window * max(0.0, needed - elapsed)
+        else:
+            # Not within this window: the admitted requests become next
+            # window's previous count (the denied one was taken back)
+            needed = 1 - (limit - 1) / (current - 1) if current > 1 else 0.0
+            seconds = window * (1 - elapsed + max(0.0, needed))
+        # Rounded first so float noise does not add a second
+        return math.ceil(round(seconds, 6))
+
+    def check(self, identifier: str, limit_type: str = "api") -> RateLimitResult:
+        """Count a request and report whether it is within the limit"""
+        limits = self.default_limits.get(limit_type, self.default_limits["api"])
+        try:
+            now = time.time()
+            limits, current_key, previous_key, elapsed = self._window(identifier, limit_type, now)
+            window = limits["window"]
+
+            # Counters live for two windows so the next one can still weight them
+            current = self.cache.incr(current_key, 2 * window)
+            if current is None:
+                raise RuntimeError("cache increment failed")
+            previous = self.cache.get(previous_key) or 0
+
+            used = current + previous * (1 - elapsed)
+            if used <= limits["requests"]:
+                return RateLimitResult(
+                    allowed=True,
+                    limit=limits["requests"],
+                    remaining=max(0, int(limits["requests"] - used)),
+                    reset=math.ceil(window * (1 - elapsed)),
+                )
 
-            return True
+            # Denied requests do not count against the client
+            self.cache.incr(current_key, 2 * window, -1)
+            return RateLimitResult(
+                allowed=False,
+                limit=limits["requests"],
+                remaining=0,
+                reset=self._retry_after(limits["requests"], window, current, previous, elapsed),
+            )
         except Exception as e:
             logger.error(f"Rate limiting error: {e}")
-            return True  # Allow request if rate limiting fails
+            # Allow request if rate limiting fails
+            return RateLimitResult(True, limits["requests"], limits["requests"], limits["window"])
+
+    def is_allowed(self, identifier: str, limit_type: str = "api") -> bool:
+        """Check if request is allowed based on rate limits"""
+        return self.check(identifier, limit_type).allowed
 
     def get_remaining_requests(self, identifier: str, limit_type: str = "api") -> int:
-        """Get remaining requests for identifier"""
+        """Get remaining requests for identifier without counting a request"""
+        limits = self.default_limits.get(limit_type, self.default_limits["api"])
         try:
-            limits = self.default_limits.get(limit_type, self.default_limits["api"])
-            key = f"rate_limit:{limit_type}:{identifier}"
-            current_count = self.cache.get(key) or 0
-            return max(0, limits["requests"] - current_count)
+            limits, current_key, previous_key, elapsed = self._window(
+                identifier, limit_type, time.time()
+            )
+            current = self.cache.get(current_key) or 0
+            previous = self.cache.get(previous_key) or 0
+            return max(0, int(limits["requests"] - current - previous * (1 - elapsed)))
         except Exception as e:
             logger.error(f"Rate limit check error: {e}")
             return limits["requests"]
 
 
+# Shared limiter used by the rate_limit decorator
+rate_limiter = RateLimiter(cache_manager)
+
+
+def _client_identifier() -> str:
+    """Stable per-client key (crc32, unlike hash(), is the same in every worker)"""
+    user_agent = request.headers.get("User-Agent", "")
+    return f"{request.remote_addr}:{zlib.crc32(user_agent.encode()) % 10000}"
+
+
+def _set_rate_limit_headers(response, result: RateLimitResult):
+    response.headers["X-RateLimit-Limit"] = str(result.limit)
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+    response.headers["X-RateLimit-Reset"] = str(result.reset)
+    return response
+
+
 def rate_limit(limit_type: str = "api"):
     """Decorator for rate limiting"""
 
@@ -295,28 +376,21 @@ def rate_limit(limit_type: str = "api"):
             if current_app.config.get("TESTING", False):
                 return f(*args, **kwargs)
 
-            # Get client identifier
-            client_ip = request.remote_addr
-            user_agent = request.headers.get("User-Agent", "")
-            identifier = f"{client_ip}:{hash(user_agent) % 10000}"
-
-            # Check rate limit
-            rate_limiter = RateLimiter(cache_manager)
-            if not rate_limiter.is_allowed(identifier, limit_type):
-                remaining = rate_limiter.get_remaining_requests(identifier, limit_type)
-                return (
-                    jsonify(
-                        {
-                            "error": "Rate limit exceeded",
-                            "message": "Too many requests. Try again later.",
-                            "retry_after": 3600,  # 1 hour
-                            "remaining_requests": remaining,
-                        }
-                    ),
-                    429,
+            result = rate_limiter.check(_client_identifier(), limit_type)
+            if not result.allowed:
+                response = jsonify(
+                    {
+                        "error": "Rate limit exceeded",
+                        "message": "Too many requests. Try again later.",
+                        "retry_after": result.reset,
+                        "remaining_requests": result.remaining,
+                    }
                 )
+                response.headers["Retry-After"] = str(result.reset)
+                return _set_rate_limit_headers(response, result), 429
 
-            return f(*args, **kwargs)
+            response = current_app.make_response(f(*args, **kwargs))
+            return _set_rate_limit_headers(response, result)
 
         return decorated_function
 
@@ -0,0 +1,136 @@
+"""
+Shared Cache Module
+SQLite-backed cache shared by every worker process on the host
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Writes between sweeps of expired rows and the size bound
+PURGE_INTERVAL = 200
+
+
+class SQLiteCache:
+    """
+    Cross-process cache stored in a WAL-mode SQLite file.
+
+    Provides the same operations as the in-memory FallbackCache (lookup,
+    store, discard, delete_pattern, clear) with Redis-like semantics: values
+    are JSON-serialized and expire after their TTL. Cached data is
+    disposable, so durability is traded for speed (synchronous=OFF).
+    """
+
+    def __init__(self, path: str, maxsize: int = 10000, timeout: float = 5.0):
+        self.path = path
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread, per-process connection (handles must not cross fork())"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __len__(self) -> int:
+        row = (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM cache WHERE expires > ?", (time.time(),))
+            .fetchone()
+        )
+        return row[0]
+
+    def __contains__(self, key) -> bool:
+        return self.lookup(key) is not None
+
+    def lookup(self, key: str) -> Optional[Any]:
+        """Get a live value"""
+        row = (
+            self._connection()
+            .execute("SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time()))
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def store(self, key: str, value: Any, expire: int):
+        """Insert or replace a value"""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + expire),
+        )
+        self._writes += 1
+        if self._writes % PURGE_INTERVAL == 0:
+            self.purge_expired()
+
+    def incr(self, key: str, expire: int, amount: int = 1) -> int:
+        """Atomically add amount to a counter; a new or expired counter restarts at amount"""
+        now = time.time()
+        row = (
+            self._connection()
+            .execute(
+                """
+                INSERT INTO cache (key, value, expires) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = CASE WHEN expires > ? THEN CAST(value AS INTEGER) + ? ELSE ? END,
+                    expires = CASE WHEN expires > ? THEN expires ELSE excluded.expires END
+                RETURNING value
+                """,
+                (key, str(amount), now + expire, now, amount, amount, now),
+            )
+            .fetchone()
+        )
+        return int(row[0])
+
+    def discard(self, key: str) -> bool:
+        """Delete a key; returns True if it existed"""
+        return self._connection().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def purge_expired(self) -> int:
+        """Drop expired rows, then the soonest-expiring rows beyond maxsize"""
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),)).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.maxsize
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY expires LIMIT ?)",
+                (excess,),
+            ).rowcount
+        return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Delete keys matching a glob pattern (SQLite GLOB uses the key index for prefixes)"""
+        return self._connection().execute("DELETE FROM cache WHERE key GLOB ?", (pattern,)).rowcount
+
+    def clear(self):
+        """Delete every key"""
+        self._connection().execute("DELETE FROM cache")
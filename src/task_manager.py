@@ -4,8 +4,11 @@ Handles background tasks with Celery
 """
 
 import logging
+import sqlite3
+import threading
+import uuid
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
 try:
     from celery import Celery
@@ -17,7 +20,14 @@ except ImportError:
     Celery = None
     AsyncResult = None
 
+from repositories.log_repository import LogRepository
+from repositories.product_repository import ProductRepository
+from src.backup_manager import create_backup
+from src.cache_manager import cache_manager
 from src.config import Config
+from src.migrations import migrate_database
+from src.nutrition_calculator import CALC_VERSION
+from src.response_cache import stats_cache
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +54,10 @@ else:
     celery_app = None
 
 
+# How long finished local task states stay queryable
+LOCAL_TASK_TTL = 24 * 3600
+
+
 class TaskManager:
     """Manages background tasks"""
 
@@ -56,8 +70,79 @@ class TaskManager:
             result = backup_database_task.delay(backup_path)
             return result.id
         else:
-            # Fallback to synchronous execution
-            return self._backup_database_sync(backup_path)
+            # Fallback to a background thread in this process
+            return self._run_local_task("backup", self._backup_database_sync, backup_path)
+
+    def _run_local_task(self, kind: str, func: Callable, *args) -> str:
+        """Run func(*args, progress=...) in a daemon thread, tracking state in the cache
+
+        State lives in cache_manager so any worker sharing the cache can
+        answer /api/tasks/<id>.
+        """
+        task_id = f"local_{kind}_{uuid.uuid4().hex}"
+        key = f"task:{task_id}"
+        state = {"id": task_id, "status": "PENDING", "result": None, "error": None, "progress": 0}
+        cache_manager.set(key, state, LOCAL_TASK_TTL)
+
+        def progress(percent: int):
+            if percent != state["progress"]:
+                state.update(status="PROGRESS", progress=percent)
+                cache_manager.set(key, state, LOCAL_TASK_TTL)
+
+        def run():
+            state["status"] = "STARTED"
+            cache_manager.set(key, state, LOCAL_TASK_TTL)
+            try:
+                state.update(status="SUCCESS", result=func(*args, progress=progress), progress=100)
+            except Exception as e:
+                logger.error(f"Local {kind} task {task_id} failed: {e}")
+                state.update(status="FAILED", error=str(e))
+            cache_manager.set(key, state, LOCAL_TASK_TTL)
+
+        threading.Thread(target=run, name=task_id, daemon=True).start()
+        return task_id
+
+    def recompute_product_fields(self) -> Optional[str]:
+        """Recompute stored product keto fields left by an older calculator version
+
+        Always a local task, even with Celery: the stamp must match the
+        calculator loaded by this process, not whatever a worker runs.
+        Returns None when every product is current.
+        """
+        conn = sqlite3.connect(Config.DATABASE)
+        try:
+            stale = ProductRepository(conn).count_stale()
+        finally:
+            conn.close()
+        if not stale:
+            return None
+        logger.info(f"{stale} products need recomputing for calculator {CALC_VERSION}")
+        return self._run_local_task("recompute_products", self._recompute_product_fields_sync)
+
+    def snapshot_log_entries(self, full: bool = False) -> Optional[str]:
+        """Write the nutrition snapshot of log entries that lack one
+
+        With full=True every entry is re-snapshotted from its current
+        product or dish. Returns None when there is nothing to do.
+        """
+        if not full:
+            conn = sqlite3.connect(Config.DATABASE)
+            try:
+                missing = LogRepository(conn).count_missing_snapshots()
+            finally:
+                conn.close()
+            if not missing:
+                return None
+            logger.info(f"{missing} log entries have no nutrition snapshot")
+        return self._run_local_task("snapshot_log", self._snapshot_log_entries_sync, full)
+
+    def apply_online_migrations(self) -> str:
+        """Apply the schema migrations startup deferred (index builds) in the background
+
+        Always a local task: it must run against this process's migration
+        list. Readers keep working under WAL while an index is built.
+        """
+        return self._run_local_task("migrate", self._apply_online_migrations_sync)
 
     def optimize_database(self) -> str:
         """Optimize database task"""
@@ -93,6 +178,10 @@ class TaskManager:
 
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """Get task status"""
+        local_state = cache_manager.get(f"task:{task_id}")
+        if local_state is not None:
+            return local_state
+
         if self.celery_available:
             try:
                 result = AsyncResult(task_id, app=celery_app)
@@ -119,23 +208,42 @@ class TaskManager:
                 "error": "Task not found (Celery unavailable)",
             }
 
-    def _backup_database_sync(self, backup_path: str = None) -> str:
-        """Synchronous database backup"""
+    def _backup_database_sync(self, backup_path: str = None, progress=None) -> Dict[str, Any]:
+        """Synchronous online database backup"""
         try:
-            import shutil
-            from datetime import datetime
-
-            if not backup_path:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_path = f"backups/nutrition_{timestamp}.db"
-
-            shutil.copy2(Config.DATABASE, backup_path)
-            logger.info(f"Database backed up to {backup_path}")
-            return f"sync_backup_{datetime.now().timestamp()}"
+            return create_backup(
+                backup_path=backup_path, retention=Config.BACKUP_RETENTION, progress=progress
+            )
         except Exception as e:
             logger.error(f"Backup error: {e}")
             raise
 
+    def _recompute_product_fields_sync(self, progress=None) -> Dict[str, Any]:
+        """Synchronous product keto field recompute"""
+        conn = sqlite3.connect(Config.DATABASE, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            updated = ProductRepository(conn).recompute_derived_fields(progress=progress)
+        finally:
+            conn.close()
+        return {"updated": updated, "calc_version": CALC_VERSION}
+
+    def _snapshot_log_entries_sync(self, full: bool, progress=None) -> Dict[str, Any]:
+        """Synchronous log entry nutrition snapshot"""
+        conn = sqlite3.connect(Config.DATABASE, timeout=30)
+        try:
+            updated = LogRepository(conn).snapshot_entries(only_missing=not full, progress=progress)
+        finally:
+            conn.close()
+        if updated:
+            stats_cache.invalidate_all()
+            cache_manager.delete_pattern("log:*")
+        return {"updated": updated, "full": full}
+
+    def _apply_online_migrations_sync(self, progress=None) -> Dict[str, Any]:
+        """Synchronous online schema migrations"""
+        return {"version": migrate_database(Config.DATABASE, progress=progress)}
+
     def _optimize_database_sync(self) -> str:
         """Synchronous database optimization"""
         try:
@@ -190,23 +298,14 @@ if CELERY_AVAILABLE and celery_app:
     def backup_database_task(self, backup_path: str = None):
         """Celery task for database backup"""
         try:
-            self.update_state(state="PROGRESS", meta={"progress": 10})
-
-            import shutil
-            from datetime import datetime
-
-            if not backup_path:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_path = f"backups/nutrition_{timestamp}.db"
-
-            self.update_state(state="PROGRESS", meta={"progress": 50})
-
-            shutil.copy2(Config.DATABASE, backup_path)
-
-            self.update_state(state="PROGRESS", meta={"progress": 100})
-            logger.info(f"Database backed up to {backup_path}")
-
-            return {"status": "success", "backup_path": backup_path}
+            result = create_backup(
+                backup_path=backup_path,
+                retention=Config.BACKUP_RETENTION,
+                progress=lambda percent: self.update_state(
+                    state="PROGRESS", meta={"progress": percent}
+                ),
+            )
+            return {"status": "success", **result}
         except Exception as e:
             logger.error(f"Backup task error: {e}")
             self.update_state(state="FAILURE", meta={"error": str(e)})
@@ -7,6 +7,7 @@ from datetime import date, datetime, timezone
 from functools import wraps
 from typing import Any, Dict, Optional
 
+from .migrations import migrate_database
 from .nutrition_calculator import calculate_calories_from_macros
 
 
@@ -424,7 +425,7 @@ def get_database_stats() -> Dict:
 
 def initialize_database(db_path: str, load_sample_data: bool = True) -> None:
     """
-    Initialize database with schema and optionally load sample data.
+    Create or migrate the database schema and optionally load sample data.
 
     Args:
         db_path: Path to the database file
@@ -434,14 +435,11 @@ def initialize_database(db_path: str, load_sample_data: bool = True) -> None:
         Exception: If database initialization fails
     """
     try:
-        # Read schema
-        with open("schema_v2.sql", "r") as f:
-            schema = f.read()
+        # Build a new database or apply pending migrations; a current
+        # database is left untouched
+        migrate_database(db_path)
 
-        # Create connection and execute schema
         conn = sqlite3.connect(db_path)
-        conn.executescript(schema)
-        conn.commit()
 
         print("✅ Database initialized successfully")
 
@@ -374,7 +374,7 @@ class TestFastingRoutes:
     def test_get_fasting_sessions_exception_handling(self, client, isolated_db):
         """Test exception handling in get sessions"""
         with patch('routes.fasting._get_fasting_service') as mock_service:
-            mock_service.return_value.get_fasting_sessions.side_effect = Exception('Database error')
+            mock_service.return_value.get_fasting_sessions_page.side_effect = Exception('Database error')
 
             response = client.get('/api/fasting/sessions')
             assert response.status_code == 500
@@ -538,3 +538,39 @@ class TestFastingRoutes:
             data = json.loads(response.data)
             assert data['status'] == 'error'
             assert 'failed to end' in data['message'].lower()
+
+
+class TestFastingSessionsPagination:
+    """Test cursor pagination of fasting sessions"""
+
+    def test_sessions_cursor_walk(self, client, isolated_db):
+        """Test next_cursor walks all sessions newest first"""
+        import sqlite3
+
+        conn = sqlite3.connect(isolated_db)
+        for day in range(1, 6):
+            conn.execute(
+                """
+                INSERT INTO fasting_sessions (user_id, start_time, end_time, fasting_type, status)
+                VALUES (1, ?, ?, '16:8', 'completed')
+                """,
+                (f'2024-02-0{day} 20:00:00', f'2024-02-0{day + 1} 12:00:00'),
+            )
+        conn.commit()
+        conn.close()
+
+        starts, cursor = [], None
+        for _ in range(5):
+            url = '/api/fasting/sessions?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            body = json.loads(client.get(url).data)
+            starts.extend(s['start_time'] for s in body['data']['sessions'])
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+
+        assert starts == [f'2024-02-0{day} 20:00:00' for day in range(5, 0, -1)]
+
+    def test_sessions_invalid_cursor(self, client, isolated_db):
+        """Test a bad cursor is rejected"""
+        response = client.get('/api/fasting/sessions?cursor=garbage')
+        assert response.status_code == 400
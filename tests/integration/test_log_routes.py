@@ -525,3 +525,44 @@ class TestLogRoutesAdvanced:
             response = client.get(f"/api/log/{log_id}")
             assert response.status_code == 200
             assert response.json["status"] == "success"
+
+
+class TestLogPagination:
+    """Test cursor pagination of the food log"""
+
+    def test_log_cursor_walk(self, client, app):
+        """Test next_cursor walks the whole log newest first"""
+        product = client.post("/api/products", json={
+            "name": "Paged Log Product",
+            "protein_per_100g": 10,
+            "fat_per_100g": 5,
+            "carbs_per_100g": 1,
+        }).json["data"]
+        for day in range(1, 8):
+            response = client.post("/api/log", json={
+                "date": f"2024-03-0{day}",
+                "item_type": "product",
+                "item_id": product["id"],
+                "quantity_grams": 100,
+                "meal_time": "lunch",
+            })
+            assert response.status_code == 201
+
+        dates, cursor = [], None
+        for _ in range(10):
+            url = "/api/log?limit=3" + (f"&cursor={cursor}" if cursor else "")
+            data = client.get(url).json
+            dates.extend(entry["date"] for entry in data["data"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert dates == [f"2024-03-0{day}" for day in range(7, 0, -1)]
+
+    def test_log_invalid_cursor(self, client, app):
+        """Test a cursor from another list is rejected"""
+        from src.pagination import encode_cursor
+
+        cursor = encode_cursor("products", ["Egg", 1])
+        response = client.get(f"/api/log?cursor={cursor}")
+        assert response.status_code == 400
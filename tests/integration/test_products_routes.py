@@ -426,3 +426,186 @@ class TestProductsRoutes:
             assert response.status_code == 500
             data = json.loads(response.data)
             assert data['status'] == 'error'
+
+
+class TestProductsBulkImport:
+    """Test the bulk product import endpoint"""
+
+    def _headers(self):
+        from src.security import security_manager
+
+        token = security_manager.generate_token(1, 'admin')
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_bulk_import_requires_admin(self, client, app):
+        """Test bulk import is admin only"""
+        response = client.post('/api/products/bulk', data='name\n', content_type='text/csv')
+        assert response.status_code == 401
+
+    def test_bulk_import_csv(self, client, app):
+        """Test a CSV body is imported and summarized"""
+        body = ('name,protein_per_100g,fat_per_100g,carbs_per_100g,fiber_per_100g\n'
+                'Bulk Route Egg,13,11,1,\n'
+                'Bulk Route Spinach,3,0.4,3.6,2.2\n'
+                'Bulk Route Bad,50,60,1,\n')
+        response = client.post('/api/products/bulk', data=body, content_type='text/csv',
+                               headers=self._headers())
+
+        assert response.status_code == 200
+        summary = json.loads(response.data)['data']
+        assert summary['total_rows'] == 3
+        assert summary['inserted'] == 2
+        assert summary['failed'] == 1
+        assert summary['errors'][0]['row'] == 4
+
+        products = json.loads(client.get('/api/products?search=Bulk Route').data)['data']
+        assert {p['name'] for p in products} == {'Bulk Route Egg', 'Bulk Route Spinach'}
+
+    def test_bulk_import_ndjson_skip_existing(self, client, app):
+        """Test NDJSON via ?format= and on_conflict=skip"""
+        body = '{"name": "Bulk Route Tofu", "protein_per_100g": 8, "fat_per_100g": 4, "carbs_per_100g": 2}\n'
+        headers = self._headers()
+        client.post('/api/products/bulk?format=ndjson', data=body, headers=headers)
+        response = client.post('/api/products/bulk?format=ndjson&on_conflict=skip', data=body,
+                               headers=headers)
+
+        assert response.status_code == 200
+        summary = json.loads(response.data)['data']
+        assert summary['skipped'] == 1
+        assert summary['imported'] == 0
+
+    def test_bulk_import_json_array(self, client, app):
+        """Test a JSON body wrapped in {"products": [...]}"""
+        products = [{'name': 'Bulk Route Cod', 'protein_per_100g': 18,
+                     'fat_per_100g': 0.7, 'carbs_per_100g': 0, 'category': 'fish'}]
+        response = client.post('/api/products/bulk', json={'products': products},
+                               headers=self._headers())
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['data']['imported'] == 1
+
+    def test_bulk_import_invalid_requests(self, client, app):
+        """Test bad formats, parameters and empty bodies are rejected"""
+        headers = self._headers()
+        response = client.post('/api/products/bulk', data='x', content_type='text/plain',
+                               headers=headers)
+        assert response.status_code == 400
+
+        response = client.post('/api/products/bulk?on_conflict=merge', data='name\n',
+                               content_type='text/csv', headers=headers)
+        assert response.status_code == 400
+
+        response = client.post('/api/products/bulk', data='name\n', content_type='text/csv',
+                               headers=headers)
+        assert response.status_code == 400
+
+        response = client.post('/api/products/bulk', json={'products': 'none'}, headers=headers)
+        assert response.status_code == 400
+
+
+class TestProductsSearch:
+    """Test the ranked product search endpoint"""
+
+    def _create(self, client, name):
+        response = client.post('/api/products', json={
+            'name': name, 'protein_per_100g': 20, 'fat_per_100g': 10, 'carbs_per_100g': 1
+        })
+        assert response.status_code == 201
+        return json.loads(response.data)['data']
+
+    def test_search_prefix_and_usage(self, client, app):
+        """Test prefix matches rank frequently logged products first"""
+        self._create(client, 'Search Salmon Fillet')
+        smoked = self._create(client, 'Search Smoked Salmon')
+        for _ in range(3):
+            response = client.post('/api/log', json={
+                'date': '2024-01-15', 'item_type': 'product', 'item_id': smoked['id'],
+                'quantity_grams': 100, 'meal_time': 'lunch'
+            })
+            assert response.status_code == 201
+
+        response = client.get('/api/products/search?q=search sal')
+
+        assert response.status_code == 200
+        results = json.loads(response.data)['data']
+        assert [p['name'] for p in results] == ['Search Smoked Salmon', 'Search Salmon Fillet']
+        assert results[0]['uses'] == 3
+
+    def test_search_cache_follows_usage(self, client, app):
+        """Test log writes re-rank a cached search"""
+        self._create(client, 'Cached Salmon Fillet')
+        smoked = self._create(client, 'Cached Smoked Salmon')
+        results = json.loads(client.get('/api/products/search?q=cached sal').data)['data']
+        assert [p['name'] for p in results] == ['Cached Salmon Fillet', 'Cached Smoked Salmon']
+
+        response = client.post('/api/log', json={
+            'date': '2024-01-15', 'item_type': 'product', 'item_id': smoked['id'],
+            'quantity_grams': 100, 'meal_time': 'lunch'
+        })
+        assert response.status_code == 201
+
+        results = json.loads(client.get('/api/products/search?q=cached sal').data)['data']
+        assert [p['name'] for p in results] == ['Cached Smoked Salmon', 'Cached Salmon Fillet']
+
+    def test_search_fuzzy(self, client, app):
+        """Test typos are matched unless fuzzy is disabled"""
+        self._create(client, 'Mozzarella')
+
+        results = json.loads(client.get('/api/products/search?q=mozarela').data)['data']
+        assert [p['name'] for p in results] == ['Mozzarella']
+        assert results[0]['match'] == 'fuzzy'
+
+        results = json.loads(client.get('/api/products/search?q=mozarela&fuzzy=false').data)
+        assert results['data'] == []
+
+    def test_search_invalid_params(self, client, app):
+        """Test missing query and bad limit are rejected"""
+        assert client.get('/api/products/search').status_code == 400
+        assert client.get('/api/products/search?q=egg&limit=many').status_code == 400
+
+
+class TestProductsPagination:
+    """Test cursor pagination of the product list"""
+
+    def test_products_cursor_walk(self, client, app):
+        """Test next_cursor walks every product once, in name order"""
+        names = [f'Page Product {i:02d}' for i in range(7)]
+        for name in reversed(names):
+            client.post('/api/products', json={
+                'name': name, 'protein_per_100g': 10, 'fat_per_100g': 5, 'carbs_per_100g': 1
+            })
+
+        seen, cursor = [], None
+        for _ in range(10):
+            url = '/api/products?limit=3' + (f'&cursor={cursor}' if cursor else '')
+            body = json.loads(client.get(url).data)
+            seen.extend(p['name'] for p in body['data'])
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+
+        assert seen == names
+
+    def test_products_offset_still_supported(self, client, app):
+        """Test offset paging keeps working and also returns a cursor"""
+        for i in range(4):
+            client.post('/api/products', json={
+                'name': f'Offset Product {i}', 'protein_per_100g': 10, 'fat_per_100g': 5,
+                'carbs_per_100g': 1
+            })
+
+        body = json.loads(client.get('/api/products?limit=2&offset=2').data)
+        assert [p['name'] for p in body['data']] == ['Offset Product 2', 'Offset Product 3']
+        assert body['next_cursor'] is None
+
+    def test_products_invalid_cursor(self, client, app):
+        """Test a bad cursor is rejected"""
+        response = client.get('/api/products?cursor=garbage')
+        assert response.status_code == 400
+
+    def test_products_crafted_cursor(self, client, app):
+        """Test a well-formed cursor with a non-scalar key is a 400, not a 500"""
+        from src.pagination import encode_cursor
+
+        response = client.get(f"/api/products?cursor={encode_cursor('products', [{}, 1])}")
+        assert response.status_code == 400
@@ -6,7 +6,7 @@ Tests daily and weekly statistics endpoints with various scenarios.
 import json
 from datetime import datetime, timedelta
 
-from routes.stats import _cache
+from src.response_cache import stats_cache
 
 
 class TestDailyStatsRoute:
@@ -97,7 +97,7 @@ class TestDailyStatsRoute:
     def test_daily_stats_cache_functionality(self, client):
         """Test daily stats caching"""
         # Clear cache first
-        _cache.clear()
+        stats_cache.clear()
 
         test_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -106,30 +106,79 @@ class TestDailyStatsRoute:
         assert response1.status_code == 200
 
         # Cache should have one entry
-        assert len(_cache) == 1
+        assert len(stats_cache) == 1
 
         # Second request - should use cache
         response2 = client.get(f"/api/stats/{test_date}")
         assert response2.status_code == 200
 
         # Cache should still have one entry
-        assert len(_cache) == 1
+        assert len(stats_cache) == 1
 
         # Responses should be identical
         assert json.loads(response1.data) == json.loads(response2.data)
 
     def test_daily_stats_cache_cleanup(self, client):
-        """Test cache cleanup when size exceeds limit"""
-        # Clear cache first
-        _cache.clear()
+        """Test cache stays within its entry bound"""
+        stats_cache.clear()
+        max_entries = stats_cache.max_entries
+        stats_cache.max_entries = 50
+        try:
+            for i in range(55):
+                test_date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
+                client.get(f"/api/stats/{test_date}")
+
+            assert len(stats_cache) == 50
+        finally:
+            stats_cache.max_entries = max_entries
+
+    def test_daily_stats_not_cached_across_invalidation(self, client):
+        """Test a response computed while its date was invalidated is not cached"""
+        from unittest.mock import patch
+
+        from src.response_cache import invalidate_stats_dates
+
+        stats_cache.clear()
+        test_date = datetime.now().strftime("%Y-%m-%d")
+        store = stats_cache.set
 
-        # Fill cache with more than 50 entries to trigger cleanup
-        for i in range(55):
-            test_date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            client.get(f"/api/stats/{test_date}")
+        def write_then_store(*args, **kwargs):
+            # A log write for the date commits after the view queried the database
+            invalidate_stats_dates([test_date])
+            return store(*args, **kwargs)
+
+        with patch.object(stats_cache, 'set', side_effect=write_then_store):
+            assert client.get(f"/api/stats/{test_date}").status_code == 200
+        assert len(stats_cache) == 0
+
+        client.get(f"/api/stats/{test_date}")
+        assert len(stats_cache) == 1
+
+    def test_daily_stats_invalidated_by_log_write(self, client):
+        """Test logging food drops the cached stats for that date"""
+        stats_cache.clear()
+        test_date = datetime.now().strftime("%Y-%m-%d")
 
-        # Cache should be limited to 50 entries (with cleanup)
-        assert len(_cache) <= 51  # May be 51 due to timing
+        product = client.post('/api/products', data=json.dumps({
+            'name': 'Cache Test Product', 'calories_per_100g': 100,
+            'protein_per_100g': 10, 'fat_per_100g': 5, 'carbs_per_100g': 2,
+        }), content_type='application/json')
+        product_id = json.loads(product.data)['data']['id']
+
+        before = json.loads(client.get(f"/api/stats/{test_date}").data)['data']
+        assert len(stats_cache) == 1
+
+        response = client.post('/api/log', data=json.dumps({
+            'date': test_date, 'item_type': 'product', 'item_id': product_id,
+            'quantity_grams': 200, 'meal_time': 'lunch',
+        }), content_type='application/json')
+        assert response.status_code == 201
+        assert len(stats_cache) == 0
+
+        after = json.loads(client.get(f"/api/stats/{test_date}").data)['data']
+        assert after['entries_count'] == before['entries_count'] + 1
+        assert after['calories'] > before['calories']
+        assert after['meal_breakdown']['lunch']['entries'] == 1
 
 
 class TestWeeklyStatsRoute:
@@ -354,7 +403,7 @@ class TestStatsRoutesAdvanced:
         def mock_error_lbm(*args, **kwargs):
             raise Exception("LBM calculation error")
 
-        with patch('routes.stats.calculate_lean_body_mass', side_effect=mock_error_lbm):
+        with patch('services.profile_targets_service.calculate_lean_body_mass', side_effect=mock_error_lbm):
             test_date = datetime.now().strftime("%Y-%m-%d")
             response = client.get(f"/api/stats/{test_date}")
 
@@ -440,7 +489,7 @@ class TestStatsRoutesAdvanced:
         def mock_error_lbm(*args, **kwargs):
             raise Exception("LBM calculation error")
 
-        with patch('routes.stats.calculate_lean_body_mass', side_effect=mock_error_lbm):
+        with patch('services.profile_targets_service.calculate_lean_body_mass', side_effect=mock_error_lbm):
             test_date = datetime.now().strftime("%Y-%m-%d")
             response = client.get(f"/api/stats/weekly/{test_date}")
 
@@ -464,3 +513,68 @@ class TestStatsRoutesAdvanced:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert data["status"] == "success"
+
+
+class TestRangeStatsRoute:
+    """Tests for the date range statistics endpoint"""
+
+    def _seed(self, app):
+        """Log one 200g product entry on two days in January and one in February"""
+        import sqlite3
+        conn = sqlite3.connect(app.config['DATABASE'])
+        conn.execute(
+            "INSERT INTO products (id, name, calories_per_100g, protein_per_100g, fat_per_100g, "
+            "carbs_per_100g) VALUES (1, 'Range Test Product', 100, 10, 5, 2)"
+        )
+        conn.executemany(
+            "INSERT INTO log_entries (date, item_type, item_id, quantity_grams, meal_time) "
+            "VALUES (?, 'product', 1, 200, ?)",
+            [('2024-01-01', 'breakfast'), ('2024-01-03', 'dinner'), ('2024-02-05', 'dinner')],
+        )
+        conn.commit()
+        conn.close()
+
+    def test_range_stats_day_buckets(self, app, client):
+        """Test daily buckets cover the whole range including empty days"""
+        self._seed(app)
+        response = client.get('/api/stats/range?start=2024-01-01&end=2024-01-07')
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert data['days'] == 7
+        assert len(data['buckets']) == 7
+        assert data['buckets'][0]['calories'] == 200.0
+        assert data['buckets'][1]['calories'] == 0.0
+        assert data['totals']['calories'] == 400.0
+        assert data['totals']['entries_count'] == 2
+        assert data['meal_breakdown']['dinner']['entries_count'] == 1
+        assert data['averages']['calories'] == round(400 / 7, 1)
+
+    def test_range_stats_month_buckets(self, app, client):
+        """Test monthly buckets are clipped to the requested range"""
+        self._seed(app)
+        response = client.get('/api/stats/range?start=2024-01-02&end=2024-02-10&granularity=month')
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert [(b['start'], b['end']) for b in data['buckets']] == [
+            ('2024-01-02', '2024-01-31'), ('2024-02-01', '2024-02-10')]
+        assert [b['calories'] for b in data['buckets']] == [200.0, 200.0]
+
+    def test_range_stats_week_buckets(self, app, client):
+        """Test weekly buckets start on Monday"""
+        self._seed(app)
+        response = client.get('/api/stats/range?start=2024-01-01&end=2024-01-14&granularity=week')
+        data = json.loads(response.data)['data']
+        assert [b['start'] for b in data['buckets']] == ['2024-01-01', '2024-01-08']
+        assert data['buckets'][0]['entries_count'] == 2
+
+    def test_range_stats_validation(self, client):
+        """Test invalid ranges are rejected"""
+        for query in ('start=2024-01-05&end=2024-01-01',
+                      'start=bad&end=2024-01-01',
+                      'start=2024-01-01&end=2024-01-02&granularity=hour',
+                      'start=2020-01-01&end=2024-01-01'):
+            response = client.get(f'/api/stats/range?{query}')
+            assert response.status_code == 400
+            data = json.loads(response.data)
+            assert data['status'] == 'error'
+            assert data['errors']
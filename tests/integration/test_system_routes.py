@@ -245,6 +245,46 @@ class TestSystemRoutes:
         assert isinstance(data['dish_ingredients'], dict)
         assert isinstance(data['log_entries'], list)
 
+    def test_export_all_streams_attachment(self, client):
+        """Test the export is streamed as a download"""
+        response = client.get('/api/export/all')
+
+        assert response.is_streamed
+        assert 'attachment' in response.headers['Content-Disposition']
+        assert response.headers['Content-Disposition'].endswith('.json')
+
+    def test_export_all_ndjson(self, client):
+        """Test NDJSON export starts with the export_info record"""
+        response = client.get('/api/export/all?format=ndjson')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert records[0]['type'] == 'export_info'
+        products = [r for r in records if r['type'] == 'products']
+        assert len(products) == records[0]['data']['total_products']
+
+    def test_export_all_csv_gzip(self, client):
+        """Test gzipped CSV export of a single table"""
+        import gzip
+
+        response = client.get('/api/export/all?format=csv&table=products&compress=gzip')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/gzip'
+        assert response.headers['Content-Disposition'].endswith('-products.csv.gz')
+        text = gzip.decompress(response.data).decode('utf-8')
+        assert text.splitlines()[0].startswith('id,name')
+
+    def test_export_all_invalid_params(self, client):
+        """Test invalid format, missing CSV table and bad compression are rejected"""
+        for query in ('format=xml', 'format=csv', 'format=csv&table=users', 'compress=zip'):
+            response = client.get(f'/api/export/all?{query}')
+            assert response.status_code == 400
+            data = json.loads(response.data)
+            assert data['status'] == 'error'
+            assert data['errors']
+
     def test_system_restore_missing_file(self, client):
         """Test system restore without file"""
         response = client.post('/api/system/restore')
@@ -333,6 +373,174 @@ class TestSystemRoutes:
                 if os.path.exists(temp_backup.name):
                     os.remove(temp_backup.name)
 
+    def test_system_restore_over_pooled_wal_database(self, client, app, tmp_path):
+        """Test a restore replaces a live pooled WAL database instead of being masked by its WAL"""
+        import sqlite3
+        from unittest.mock import patch
+
+        db_path = app.config['DATABASE']
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO products (name, calories_per_100g, protein_per_100g, fat_per_100g, "
+            "carbs_per_100g, fiber_per_100g, sugars_per_100g) VALUES (?, 100, 10, 5, 2, 1, 1)",
+            [(f'Live Product {i}',) for i in range(9)],
+        )
+        conn.commit()
+
+        # Upload: a copy of the database keeping a single product
+        upload_path = str(tmp_path / 'upload.db')
+        upload = sqlite3.connect(upload_path)
+        conn.backup(upload)
+        conn.close()
+        upload.execute("DELETE FROM products WHERE name != 'Live Product 0'")
+        upload.commit()
+        upload.close()
+        with open(upload_path, 'rb') as f:
+            backup_data = f.read()
+
+        # Warm the pool so it holds connections (and the WAL) open
+        assert len(json.loads(client.get('/api/products').data)['data']) == 9
+        assert os.path.exists(db_path + '-wal')
+
+        with patch('src.config.Config.BACKUP_DIR', str(tmp_path / 'backups')):
+            response = client.post(
+                '/api/system/restore',
+                data={'backup_file': (io.BytesIO(backup_data), 'backup.db')},
+                content_type='multipart/form-data',
+            )
+        assert response.status_code == 200
+
+        products = json.loads(client.get('/api/products').data)['data']
+        assert [p['name'] for p in products] == ['Live Product 0']
+        fresh = sqlite3.connect(db_path)
+        assert fresh.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 1
+        fresh.close()
+
+    def test_system_restore_migrates_pre_versioning_backup(self, client, app, tmp_path):
+        """Test a backup from before schema versioning is migrated before it goes live"""
+        import sqlite3
+        from unittest.mock import patch
+
+        from src.migrations import LATEST_VERSION
+
+        # Upload: the live database stripped back to the pre-versioning schema
+        upload_path = str(tmp_path / 'upload.db')
+        conn = sqlite3.connect(app.config['DATABASE'])
+        upload = sqlite3.connect(upload_path)
+        conn.backup(upload)
+        conn.close()
+        triggers = [row[0] for row in upload.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name GLOB "
+            "'log_snapshot_*' OR name GLOB 'product_usage_*' OR name GLOB 'products_search_*' "
+            "OR name GLOB 'rollup_*'"
+        )]
+        for trigger in triggers:
+            upload.execute(f"DROP TRIGGER {trigger}")
+        upload.execute("DROP VIEW IF EXISTS log_entry_nutrition")
+        for table in ('daily_rollups', 'product_usage', 'products_fts', 'products_trigram'):
+            upload.execute(f"DROP TABLE {table}")
+        upload.execute("ALTER TABLE products DROP COLUMN calc_version")
+        upload.execute("PRAGMA user_version = 0")
+        upload.commit()
+        upload.close()
+        with open(upload_path, 'rb') as f:
+            backup_data = f.read()
+
+        with patch('src.config.Config.BACKUP_DIR', str(tmp_path / 'backups')):
+            response = client.post(
+                '/api/system/restore',
+                data={'backup_file': (io.BytesIO(backup_data), 'backup.db')},
+                content_type='multipart/form-data',
+            )
+        assert response.status_code == 200
+
+        assert client.get('/api/stats/2026-10-01').status_code == 200
+        fresh = sqlite3.connect(app.config['DATABASE'])
+        assert fresh.execute("PRAGMA user_version").fetchone()[0] == LATEST_VERSION
+        fresh.close()
+
+    def test_system_restore_rejects_newer_backup(self, client, app, tmp_path):
+        """Test a backup stamped by a newer schema version is refused"""
+        import sqlite3
+        from unittest.mock import patch
+
+        from src.migrations import LATEST_VERSION
+
+        upload_path = str(tmp_path / 'upload.db')
+        conn = sqlite3.connect(app.config['DATABASE'])
+        upload = sqlite3.connect(upload_path)
+        conn.backup(upload)
+        conn.close()
+        upload.execute(f"PRAGMA user_version = {LATEST_VERSION + 1}")
+        upload.commit()
+        upload.close()
+        with open(upload_path, 'rb') as f:
+            backup_data = f.read()
+
+        with patch('src.config.Config.BACKUP_DIR', str(tmp_path / 'backups')):
+            response = client.post(
+                '/api/system/restore',
+                data={'backup_file': (io.BytesIO(backup_data), 'backup.db')},
+                content_type='multipart/form-data',
+            )
+        assert response.status_code == 400
+        assert 'newer' in json.loads(response.data)['errors'][0]
+        assert not os.path.exists(tmp_path / 'backups')
+
+    def test_system_restore_rejects_non_database(self, client):
+        """Test an upload that is not a SQLite database is refused"""
+        response = client.post(
+            '/api/system/restore',
+            data={'backup_file': (io.BytesIO(b'not a database' * 100), 'backup.db')},
+            content_type='multipart/form-data',
+        )
+        assert response.status_code == 400
+        assert 'Invalid backup file' in json.loads(response.data)['errors'][0]
+
+    def test_system_restore_clears_caches(self, client, app, tmp_path):
+        """Test cached product lists and profile targets are dropped by a restore"""
+        import sqlite3
+        from unittest.mock import patch
+
+        from src.cache_manager import cache_manager
+
+        upload_path = str(tmp_path / 'upload.db')
+        conn = sqlite3.connect(app.config['DATABASE'])
+        upload = sqlite3.connect(upload_path)
+        conn.backup(upload)
+        conn.close()
+        upload.close()
+        with open(upload_path, 'rb') as f:
+            backup_data = f.read()
+
+        cache_manager.set('products::50:0', ['stale'], 300)
+        with patch('src.config.Config.BACKUP_DIR', str(tmp_path / 'backups')), \
+                patch('routes.system.invalidate_profile_targets') as invalidate:
+            response = client.post(
+                '/api/system/restore',
+                data={'backup_file': (io.BytesIO(backup_data), 'backup.db')},
+                content_type='multipart/form-data',
+            )
+        assert response.status_code == 200
+        assert cache_manager.get('products::50:0') is None
+        invalidate.assert_called_once()
+
+    def test_system_status_reads_sampler(self, client, app):
+        """Test system status serves the background sample without calling psutil"""
+        from unittest.mock import patch
+
+        from src.monitoring import system_monitor
+
+        system_monitor.start()
+        with patch('psutil.cpu_percent', side_effect=AssertionError('psutil on request path')):
+            response = client.get('/api/system/status')
+
+        assert response.status_code == 200
+        system_info = json.loads(response.data)['data']['system']
+        assert system_info['sampled_at'] == system_monitor.latest()['timestamp']
+        assert 'process_rss_mb' in system_info
+        assert 'open_fds' in system_info
+
     def test_system_status_exception_handling(self, client, monkeypatch):
         """Test system status endpoint exception handling"""
         from unittest.mock import patch
@@ -358,6 +566,91 @@ class TestSystemRoutes:
             # But let's check if the route exists
             assert response.status_code in [200, 401, 403]
 
+    def test_calc_trace_requires_admin(self, client, app):
+        """Test the calculation trace endpoint is admin only"""
+        response = client.get('/api/system/calc-trace')
+        assert response.status_code == 401
+
+    def test_calc_trace_reconfigure(self, client, app):
+        """Test admins can switch trace sampling at runtime"""
+        from unittest.mock import patch
+
+        from src.nutrition_calculator import CalculationTracer
+        from src.security import security_manager
+
+        token = security_manager.generate_token(1, 'admin')
+        headers = {'Authorization': f'Bearer {token}'}
+        tracer = CalculationTracer()
+        with patch('routes.system.calc_tracer', tracer):
+            response = client.post('/api/system/calc-trace', headers=headers,
+                                   json={'sample_rate': 0.25, 'capacity': 10})
+            assert response.status_code == 200
+            data = json.loads(response.data)['data']
+            assert data['enabled'] is True
+            assert data['sample_rate'] == 0.25
+            assert data['capacity'] == 10
+
+            response = client.post('/api/system/calc-trace', headers=headers,
+                                   json={'sample_rate': 'often'})
+            assert response.status_code == 400
+
+    def test_query_stats_requires_admin(self, client, app):
+        """Test the query statistics endpoint is admin only"""
+        response = client.get('/api/system/query-stats')
+        assert response.status_code == 401
+
+    def test_query_stats(self, client, app):
+        """Test admins can read and reset statement statistics"""
+        from unittest.mock import patch
+
+        from src.query_stats import StatementStats
+        from src.security import security_manager
+
+        token = security_manager.generate_token(1, 'admin')
+        headers = {'Authorization': f'Bearer {token}'}
+        stats = StatementStats(slow_ms=0)
+        with patch('src.request_tracing.statement_stats', stats), \
+                patch('routes.system.statement_stats', stats):
+            client.get('/api/products')
+            response = client.get('/api/system/query-stats?sort=calls&limit=5',
+                                  headers=headers)
+            assert response.status_code == 200
+            data = json.loads(response.data)['data']
+            assert 0 < len(data['statements']) <= 5
+            assert any('FROM products' in row['query'] for row in data['statements'])
+            calls = [row['calls'] for row in data['statements']]
+            assert calls == sorted(calls, reverse=True)
+            assert data['slow_log']['dropped'] == 0
+
+            response = client.get('/api/system/query-stats?sort=bogus', headers=headers)
+            assert response.status_code == 400
+
+            response = client.delete('/api/system/query-stats', headers=headers)
+            assert response.status_code == 200
+            assert stats.snapshot() == []
+
+    def test_calc_trace_request_header(self, client, app):
+        """Test X-Calc-Trace traces the calculations of a single request"""
+        from unittest.mock import patch
+
+        product_data = {
+            'name': 'Traced Product',
+            'protein_per_100g': 20.0,
+            'fat_per_100g': 10.0,
+            'carbs_per_100g': 5.0,
+        }
+        with patch('app.Config.CALC_TRACE_REQUESTS', True):
+            response = client.post('/api/products', json=product_data,
+                                   headers={'X-Calc-Trace': '1'})
+            untraced = client.get('/api/products', headers={'X-Calc-Trace': ''})
+
+        assert response.status_code == 201
+        assert int(response.headers['X-Calc-Trace-Count']) > 0
+        assert 'X-Calc-Trace-Count' not in untraced.headers
+
+        from src.nutrition_calculator import calc_tracer
+        assert not calc_tracer.enabled
+
     def test_system_backup_requires_admin(self, client, app):
         """Test that backup endpoint requires admin authentication"""
         with app.app_context():
@@ -367,6 +660,46 @@ class TestSystemRoutes:
             data = json.loads(response.data)
             assert data['status'] == 'error'
 
+    def test_system_backup_online_copy(self, client, app):
+        """Test an authenticated backup uses the online backup API"""
+        from unittest.mock import patch
+
+        from src.security import security_manager
+
+        token = security_manager.generate_token(1, 'admin')
+        backup = {
+            'backup_id': 'nutrition_backup_1.db', 'backup_path': 'backups/nutrition_backup_1.db',
+            'size_bytes': 2 * 1024 * 1024, 'compression': None, 'integrity': 'ok',
+            'created_at': '2024-01-01T00:00:00',
+        }
+        with patch('routes.system.create_backup', return_value=backup) as mock_backup:
+            response = client.post('/api/system/backup',
+                                   headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert data['backup_id'] == 'nutrition_backup_1.db'
+        assert data['backup_size_mb'] == 2.0
+        assert data['integrity'] == 'ok'
+        mock_backup.assert_called_once()
+
+    def test_system_backup_background(self, client, app):
+        """Test background backups return a task to poll"""
+        from unittest.mock import patch
+
+        from src.security import security_manager
+
+        token = security_manager.generate_token(1, 'admin')
+        with patch('routes.system.task_manager') as mock_manager:
+            mock_manager.backup_database.return_value = 'local_backup_abc'
+            response = client.post('/api/system/backup?background=true',
+                                   headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 202
+        data = json.loads(response.data)['data']
+        assert data['task_id'] == 'local_backup_abc'
+        assert data['status_url'] == '/api/tasks/local_backup_abc'
+
     def test_system_backup_with_mock_auth(self, client, app):
         """Test backup endpoint behavior with mocked authentication"""
         from unittest.mock import patch
@@ -6,9 +6,11 @@ import pytest
 from unittest.mock import patch, Mock, MagicMock, mock_open
 import tempfile
 import os
+import time
 from pathlib import Path
 from datetime import datetime
 from src.advanced_logging import (
+    AccessLogPipeline,
     StructuredLogger,
     LogAnalyzer,
     LOGURU_AVAILABLE,
@@ -567,3 +569,93 @@ class TestElasticsearchErrorTracking:
 
         assert "elasticsearch_error_count" in stats
         assert stats["elasticsearch_error_count"] == 5
+
+
+class TestAccessLogPipeline:
+    """Test the background access-log pipeline"""
+    
+    def _record(self, i=0):
+        return (1700000000.0 + i, "GET", f"/api/{i}", 200, 0.01, None, "127.0.0.1")
+    
+    def test_submit_drops_when_full(self):
+        """Test a full queue drops new records and counts them"""
+        pipeline = AccessLogPipeline(Mock(), capacity=2, flush_interval=60)
+        try:
+            assert pipeline.submit(self._record(1)) is True
+            assert pipeline.submit(self._record(2)) is True
+            assert pipeline.submit(self._record(3)) is False
+            assert pipeline.get_stats()['dropped'] == 1
+            assert pipeline.get_stats()['queued'] == 2
+        finally:
+            pipeline.stop()
+    
+    def test_flush_writes_in_batches(self):
+        """Test queued records are handed over batch_size at a time"""
+        write_batch = Mock()
+        pipeline = AccessLogPipeline(write_batch, batch_size=2, flush_interval=60)
+        for i in range(5):
+            pipeline.queue.append(self._record(i))
+        
+        assert pipeline.flush() == 5
+        assert [len(call.args[0]) for call in write_batch.call_args_list] == [2, 2, 1]
+        assert pipeline.get_stats()['batches'] == 3
+    
+    def test_background_thread_drains(self):
+        """Test the drain thread writes submitted records without a flush call"""
+        write_batch = Mock()
+        pipeline = AccessLogPipeline(write_batch, flush_interval=0.01)
+        try:
+            pipeline.submit(self._record())
+            deadline = time.time() + 5
+            while pipeline.written < 1 and time.time() < deadline:
+                time.sleep(0.01)
+            assert pipeline.written == 1
+        finally:
+            pipeline.stop()
+    
+    def test_write_errors_counted(self):
+        """Test a failing sink does not raise into the caller"""
+        pipeline = AccessLogPipeline(Mock(side_effect=OSError("disk full")), flush_interval=60)
+        pipeline.queue.append(self._record())
+        
+        assert pipeline.flush() == 0
+        assert pipeline.get_stats()['errors'] == 1
+        assert pipeline.get_stats()['queued'] == 0
+    
+    def test_batch_uses_elasticsearch_bulk(self):
+        """Test a batch is indexed with one bulk request"""
+        logger = StructuredLogger("test_app")
+        logger.logger = Mock()
+        logger.es_client = MagicMock()
+        
+        with patch('src.advanced_logging.es_helpers') as mock_helpers:
+            logger._write_access_batch([self._record(i) for i in range(3)])
+        
+        assert logger.logger.bind.call_count == 3
+        actions = mock_helpers.bulk.call_args.args[1]
+        assert [a['_source']['path'] for a in actions] == ['/api/0', '/api/1', '/api/2']
+        logger.es_client.index.assert_not_called()
+    
+    def test_performance_events_written_in_background(self):
+        """Test queued performance events are written by the event pipeline"""
+        logger = StructuredLogger("test_app")
+        with patch.object(logger, 'log_performance_event') as write:
+            assert logger.enqueue_performance_event("GET /api", 1.5, {"trace": {}}) is True
+            write.assert_not_called()
+            assert logger.event_log.flush() == 1
+        
+        write.assert_called_once_with("GET /api", 1.5, {"trace": {}})
+        assert logger.get_log_stats()['event_log']['written'] == 1
+        logger.event_log.stop()
+    
+    def test_requests_enqueue_access_events(self, client):
+        """Test the request path only enqueues the access event"""
+        from src.advanced_logging import structured_logger
+        
+        with patch.object(structured_logger, 'log_access_event') as mock_sync, \
+                patch.object(structured_logger.access_log, 'submit') as mock_submit:
+            client.get('/health')
+        
+        mock_sync.assert_not_called()
+        record = mock_submit.call_args.args[0]
+        assert record[1:4] == ('GET', '/health', 200)
@@ -0,0 +1,161 @@
+"""
+Unit tests for backup_manager.py
+"""
+
+import gzip
+import os
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.backup_manager import apply_retention, create_backup
+
+
+@pytest.fixture
+def source_db(tmp_path):
+    """WAL-mode database with uncheckpointed writes"""
+    path = str(tmp_path / 'source.db')
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA wal_autocheckpoint = 0')
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)')
+    conn.executemany('INSERT INTO items (payload) VALUES (?)', [('x' * 400,)] * 500)
+    conn.commit()
+    yield path
+    conn.close()
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestCreateBackup:
+    """Test online backups"""
+
+    def test_backup_includes_wal_content(self, source_db, tmp_path):
+        """Test committed rows still in the -wal file are in the backup"""
+        assert os.path.getsize(source_db + '-wal') > 0
+        result = create_backup(source_db, str(tmp_path / 'out' / 'b.db'), compression='',
+                               sleep=0)
+
+        assert result['integrity'] == 'ok'
+        assert _count(result['backup_path']) == 500
+        assert not os.path.exists(result['backup_path'] + '-wal')
+        assert not os.path.exists(result['backup_path'] + '.part')
+
+    def test_progress_is_reported_in_steps(self, source_db, tmp_path):
+        """Test small page batches report increasing progress up to 100"""
+        progress = []
+        create_backup(source_db, str(tmp_path / 'b.db'), compression='', pages=4, sleep=0,
+                      progress=progress.append)
+
+        assert len(progress) > 10
+        assert progress == sorted(progress)
+        assert progress[-1] == 100
+
+    def test_sleeps_between_steps(self, source_db, tmp_path):
+        """Test the copy yields between page batches"""
+        with patch('src.backup_manager.time.sleep') as mock_sleep:
+            create_backup(source_db, str(tmp_path / 'b.db'), compression='', pages=10,
+                          sleep=0.01)
+        assert mock_sleep.call_count > 1
+        mock_sleep.assert_called_with(0.01)
+
+    def test_concurrent_writes_do_not_block_backup(self, source_db, tmp_path):
+        """Test a backup completes while another connection keeps writing"""
+        stop = threading.Event()
+
+        def writer():
+            conn = sqlite3.connect(source_db, timeout=5)
+            while not stop.is_set():
+                conn.execute("INSERT INTO items (payload) VALUES ('y')")
+                conn.commit()
+                time.sleep(0.001)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            result = create_backup(source_db, str(tmp_path / 'b.db'), compression='', pages=8,
+                                   sleep=0.001)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert result['integrity'] == 'ok'
+        assert _count(result['backup_path']) >= 500
+
+    def test_gzip_compression(self, source_db, tmp_path):
+        """Test gzip backups decompress to a valid database"""
+        result = create_backup(source_db, str(tmp_path / 'b.db'), compression='gzip', sleep=0)
+
+        assert result['backup_path'].endswith('b.db.gz')
+        assert not os.path.exists(str(tmp_path / 'b.db'))
+        restored = str(tmp_path / 'restored.db')
+        with gzip.open(result['backup_path'], 'rb') as f_in, open(restored, 'wb') as f_out:
+            f_out.write(f_in.read())
+        assert _count(restored) == 500
+
+    def test_invalid_compression(self, source_db, tmp_path):
+        """Test unknown compression is rejected before copying"""
+        with pytest.raises(ValueError):
+            create_backup(source_db, str(tmp_path / 'b.db'), compression='rar')
+        assert not os.path.exists(str(tmp_path / 'b.db.part'))
+
+    @patch('src.backup_manager.ZSTD_AVAILABLE', False)
+    def test_zstd_requires_package(self, source_db, tmp_path):
+        """Test zstd needs the optional zstandard package"""
+        with pytest.raises(ValueError, match='zstandard'):
+            create_backup(source_db, str(tmp_path / 'b.db'), compression='zstd')
+
+    def test_failed_verification_leaves_no_file(self, source_db, tmp_path):
+        """Test a copy failing integrity_check is discarded"""
+        target = str(tmp_path / 'b.db')
+        with patch('src.backup_manager._integrity_check', return_value='page 3 is never used'):
+            with pytest.raises(RuntimeError, match='integrity check failed'):
+                create_backup(source_db, target, compression='', sleep=0)
+
+        assert not os.path.exists(target)
+        assert not os.path.exists(target + '.part')
+
+
+class TestRetention:
+    """Test backup retention"""
+
+    def test_keeps_newest_backups(self, tmp_path):
+        """Test only the newest N backups with the prefix survive"""
+        for i in range(5):
+            path = tmp_path / f'nutrition_backup_{i}.db'
+            path.write_bytes(b'x')
+            os.utime(path, (1000 + i, 1000 + i))
+        (tmp_path / 'pre_restore_backup_0.db').write_bytes(b'x')
+
+        removed = apply_retention(str(tmp_path), keep=2)
+
+        assert sorted(os.path.basename(path) for path in removed) == [
+            'nutrition_backup_0.db', 'nutrition_backup_1.db', 'nutrition_backup_2.db'
+        ]
+        assert sorted(os.listdir(tmp_path)) == [
+            'nutrition_backup_3.db', 'nutrition_backup_4.db', 'pre_restore_backup_0.db'
+        ]
+
+    def test_create_backup_applies_retention(self, source_db, tmp_path):
+        """Test create_backup prunes older backups after a successful copy"""
+        backup_dir = tmp_path / 'backups'
+        backup_dir.mkdir()
+        old = backup_dir / 'nutrition_backup_old.db'
+        old.write_bytes(b'x')
+        os.utime(old, (1000, 1000))
+
+        result = create_backup(source_db, str(backup_dir / 'nutrition_backup_new.db'),
+                               compression='', retention=1, sleep=0)
+
+        assert result['pruned'] == [str(old)]
+        assert os.listdir(backup_dir) == ['nutrition_backup_new.db']
@@ -5,7 +5,7 @@ import pytest
 from unittest.mock import Mock, patch
 import time
 import json
-from src.cache_manager import CacheManager, cached, cache_invalidate, CacheMetrics, cache_metrics
+from src.cache_manager import CacheManager, FallbackCache, cached, cache_invalidate, CacheMetrics, cache_metrics
 
 
 class TestCacheManager:
@@ -368,14 +368,15 @@ class TestCacheManager:
             cache_manager.redis_client = mock_redis
             
             # Mock keys matching pattern
-            mock_redis.keys.return_value = ['products:test:1', 'products:test:2']
-            mock_redis.delete.return_value = 2
+            mock_redis.scan_iter.return_value = iter(['products:test:1', 'products:test:2'])
+            mock_redis.unlink.return_value = 2
             
             result = cache_manager.delete_pattern('products:*')
             
             assert result == 2
-            mock_redis.keys.assert_called_with('products:*')
-            mock_redis.delete.assert_called_with('products:test:1', 'products:test:2')
+            mock_redis.scan_iter.assert_called_with(match='products:*', count=500)
+            mock_redis.unlink.assert_called_with('products:test:1', 'products:test:2')
+            mock_redis.keys.assert_not_called()
     
     def test_cache_delete_pattern_no_keys(self, mock_redis):
         """Test cache delete pattern with no matching keys"""
@@ -384,20 +385,26 @@ class TestCacheManager:
             cache_manager.use_redis = True
             cache_manager.redis_client = mock_redis
             
-            mock_redis.keys.return_value = []
+            mock_redis.scan_iter.return_value = iter([])
             
             result = cache_manager.delete_pattern('products:*')
             
             assert result == 0
+            mock_redis.unlink.assert_not_called()
     
     def test_cache_delete_pattern_fallback(self):
         """Test cache delete pattern with fallback cache"""
         cache_manager = CacheManager()
         cache_manager.use_redis = False
         
+        cache_manager.set('products:a:1', 'x')
+        cache_manager.set('products:b:2', 'x')
+        cache_manager.set('dishes:all', 'x')
+        
         result = cache_manager.delete_pattern('products:*')
         
-        assert result == 0  # Fallback cache doesn't support pattern matching
+        assert result == 2
+        assert list(cache_manager.fallback_cache) == ['dishes:all']
     
     def test_cache_delete_pattern_exception(self, mock_redis):
         """Test cache delete pattern with exception"""
@@ -406,7 +413,7 @@ class TestCacheManager:
             cache_manager.use_redis = True
             cache_manager.redis_client = mock_redis
             
-            mock_redis.keys.side_effect = Exception("Redis error")
+            mock_redis.scan_iter.side_effect = Exception("Redis error")
             
             result = cache_manager.delete_pattern('products:*')
             
@@ -584,7 +591,7 @@ class TestCacheDecorators:
             # Mock Redis connection to work
             mock_redis.ping.return_value = True
             cache_manager.use_redis = True
-            mock_redis.keys.side_effect = Exception("Redis error")
+            mock_redis.scan_iter.side_effect = Exception("Redis error")
             
             @cache_invalidate('test:*')
             def test_function():
@@ -670,3 +677,110 @@ class TestCacheMetrics:
         assert stats['deletes'] == 0
         assert stats['total_requests'] == 0
         assert stats['hit_rate'] == 0
+
+
+class TestFallbackCache:
+    """Test the in-memory LRU/TTL fallback cache"""
+
+    def test_lru_eviction(self):
+        """Test the least recently used key is evicted at capacity"""
+        cache = FallbackCache(maxsize=2)
+        cache.store('a', 1, 300)
+        cache.store('b', 2, 300)
+        cache.lookup('a')
+        cache.store('c', 3, 300)
+        assert 'b' not in cache
+        assert cache.lookup('a') == 1
+        assert cache.lookup('c') == 3
+
+    def test_expired_entries_evicted_before_live_ones(self):
+        """Test expired entries are reclaimed from the TTL heap first"""
+        cache = FallbackCache(maxsize=2)
+        cache.store('old', 1, -1)
+        cache.store('live', 2, 300)
+        cache.lookup('old')  # expired lookup removes it
+        cache.store('stale', 3, 300)
+        cache['stale']['expires'] = time.time() - 1
+        cache._rebuild_heap()
+        cache.store('new', 4, 300)
+        assert 'live' in cache
+        assert 'stale' not in cache
+        assert 'new' in cache
+
+    def test_purge_expired_skips_overwritten_heap_items(self):
+        """Test a key re-set with a longer TTL is not purged by its old heap item"""
+        cache = FallbackCache()
+        cache.store('key', 1, -1)
+        cache.store('key', 2, 300)
+        assert cache.purge_expired() == 0
+        assert cache.lookup('key') == 2
+
+    def test_delete_pattern_uses_prefix_index(self):
+        """Test prefix patterns delete only matching keys"""
+        cache = FallbackCache()
+        for key in ('log:2024-01-01:100', 'log:2024-01-01:50', 'log:2024-01-02:100',
+                    'log:all:100', 'products::100:0'):
+            cache.store(key, 1, 300)
+        assert cache.delete_pattern('log:2024-01-01:*') == 2
+        assert cache.delete_pattern('log:all:*') == 1
+        assert sorted(cache) == ['log:2024-01-02:100', 'products::100:0']
+        assert cache.delete_pattern('products:*') == 1
+        assert cache.delete_pattern('log:*:100') == 1
+        assert len(cache) == 0
+
+    def test_delete_pattern_globs_and_literals(self):
+        """Test non-prefix globs and literal keys"""
+        cache = FallbackCache()
+        cache.store('fasting:stats:1', 1, 300)
+        cache.store('fasting:stats:2', 1, 300)
+        assert cache.delete_pattern('fasting:stats:[1]') == 1
+        assert cache.delete_pattern('fasting:stats:2') == 1
+        assert cache.delete_pattern('missing') == 0
+
+    def test_incr_does_not_extend_expiry(self):
+        """Test counters increment in place and restart once expired"""
+        cache = FallbackCache()
+        assert cache.incr('hits', 300) == 1
+        expires = cache['hits']['expires']
+        assert cache.incr('hits', 600) == 2
+        assert cache['hits']['expires'] == expires
+        cache['hits']['expires'] = time.time() - 1
+        assert cache.incr('hits', 300) == 1
+
+
+class TestCacheManagerIncr:
+    """Test CacheManager.incr"""
+
+    def test_incr_redis_uses_script(self):
+        """Test Redis increments run INCR and EXPIRE in one script call"""
+        mock_redis = Mock()
+        mock_redis.eval.return_value = 3
+        cache_manager = CacheManager()
+        cache_manager.use_redis = True
+        cache_manager.redis_client = mock_redis
+
+        assert cache_manager.incr('rate_limit:api:x:1', 60) == 3
+        args = mock_redis.eval.call_args[0]
+        assert 'INCR' in args[0]
+        assert args[1:] == (1, 'rate_limit:api:x:1', 60, 1)
+
+        cache_manager.incr('rate_limit:api:x:1', 60, -1)
+        assert mock_redis.eval.call_args[0][1:] == (1, 'rate_limit:api:x:1', 60, -1)
+
+    def test_incr_fallback(self):
+        """Test fallback increments"""
+        cache_manager = CacheManager()
+        cache_manager.use_redis = False
+        assert cache_manager.incr('counter', 60) == 1
+        assert cache_manager.incr('counter', 60) == 2
+        assert cache_manager.get('counter') == 2
+        assert cache_manager.incr('counter', 60, -1) == 1
+
+    def test_incr_error_returns_none(self):
+        """Test errors are logged and reported as None"""
+        mock_redis = Mock()
+        mock_redis.eval.side_effect = Exception('Redis error')
+        cache_manager = CacheManager()
+        cache_manager.use_redis = True
+        cache_manager.redis_client = mock_redis
+        assert cache_manager.incr('counter', 60) is None
@@ -0,0 +1,188 @@
+"""
+Unit tests for the SQLite connection pool
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.db_pool import READER, WRITER, ConnectionPool, PooledConnection, get_pool
+
+
+@pytest.fixture
+def db_path():
+    """Temporary database file"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    yield path
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.unlink(path + suffix)
+        except OSError:
+            pass
+
+
+@pytest.fixture
+def pool(db_path):
+    """Connection pool with two readers"""
+    pool = ConnectionPool(db_path, readers=2, timeout=0.05)
+    yield pool
+    pool.close()
+
+
+class TestConnectionPool:
+    """Test ConnectionPool checkout and release"""
+
+    def test_connection_is_configured(self, pool):
+        """Test pooled connections get row factory and PRAGMAs"""
+        db = pool.acquire(READER)
+        assert isinstance(db, sqlite3.Connection)
+        assert db.row_factory == sqlite3.Row
+        assert db.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+        assert db.execute('PRAGMA journal_mode').fetchone()[0].upper() == 'WAL'
+        db.close()
+
+    def test_close_returns_connection_for_reuse(self, pool):
+        """Test close() hands the same warm connection back out"""
+        db = pool.acquire(READER)
+        db.close()
+        again = pool.acquire(READER)
+        assert again is db
+        assert pool.get_stats()['created'] == 1
+        again.close()
+
+    def test_double_close_is_harmless(self, pool):
+        """Test closing twice does not put the connection in the pool twice"""
+        db = pool.acquire(READER)
+        db.close()
+        db.close()
+        assert pool.get_stats()['idle'][READER] == 1
+
+    def test_release_rolls_back_open_transaction(self, pool):
+        """Test uncommitted work is discarded when a connection is returned"""
+        db = pool.acquire(WRITER)
+        db.execute('CREATE TABLE t (x INTEGER)')
+        db.commit()
+        db.execute('INSERT INTO t VALUES (1)')
+        assert db.in_transaction
+        db.close()
+
+        db = pool.acquire(WRITER)
+        assert not db.in_transaction
+        assert db.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+        db.close()
+
+    def test_single_writer_overflows_when_not_waiting(self, pool):
+        """Test a second writer checkout gets an unpooled overflow connection"""
+        writer = pool.acquire(WRITER)
+        overflow = pool.acquire(WRITER, wait=False)
+        assert overflow is not writer
+        assert overflow.pool is None
+        overflow.close()
+        writer.close()
+        stats = pool.get_stats()
+        assert stats['overflow'] == 1
+        assert stats['open'][WRITER] == 1
+
+    def test_waits_for_released_connection(self, pool):
+        """Test a blocked checkout picks up a connection released by another thread"""
+        pool.timeout = 2
+        writer = pool.acquire(WRITER)
+        timer = threading.Timer(0.05, writer.close)
+        timer.start()
+        again = pool.acquire(WRITER)
+        timer.join()
+        assert again is writer
+        assert pool.get_stats()['overflow'] == 0
+        again.close()
+
+    def test_readers_are_bounded(self, pool):
+        """Test reader checkouts beyond capacity overflow after the timeout"""
+        first = pool.acquire(READER)
+        second = pool.acquire(READER)
+        third = pool.acquire(READER)
+        assert third.pool is None
+        for db in (first, second, third):
+            db.close()
+        assert pool.get_stats()['open'][READER] == 2
+
+    def test_recycles_old_connections(self, pool):
+        """Test connections older than recycle are replaced"""
+        db = pool.acquire(READER)
+        db.close()
+        pool.recycle = 1
+        db.created_at -= 10
+        again = pool.acquire(READER)
+        assert again is not db
+        assert pool.get_stats()['recycled'] == 1
+        again.close()
+
+    def test_replaced_database_file_retires_connections(self, pool, db_path):
+        """Test idle connections are dropped when the database file changes"""
+        db = pool.acquire(READER)
+        db.close()
+        with patch.object(pool, '_stat_database', return_value=(0, 0)):
+            again = pool.acquire(READER)
+        assert again is not db
+        again.close()
+
+    def test_fork_resets_pool(self, pool):
+        """Test a pool used in a forked child does not reuse inherited handles"""
+        db = pool.acquire(READER)
+        db.close()
+        with patch('src.db_pool.os.getpid', return_value=-1):
+            again = pool.acquire(READER)
+            assert again is not db
+            again.close()
+
+    def test_records_checkout_metrics(self, pool):
+        """Test checkouts are reported to the metrics collector"""
+        with patch('src.db_pool.metrics_collector') as collector:
+            db = pool.acquire(READER)
+            db.close()
+        collector.record_db_pool_checkout.assert_called_once()
+        role, source, wait = collector.record_db_pool_checkout.call_args[0]
+        assert (role, source) == (READER, 'new')
+        assert wait >= 0
+
+
+class TestPoolRegistry:
+    """Test process-wide pool registry"""
+
+    def test_get_pool_returns_same_instance(self, db_path):
+        """Test get_pool caches one pool per database"""
+        assert get_pool(db_path) is get_pool(db_path)
+
+    def test_unpooled_connection_really_closes(self, db_path):
+        """Test a PooledConnection without a pool closes normally"""
+        db = sqlite3.connect(db_path, factory=PooledConnection)
+        db.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.execute('SELECT 1')
+
+
+class TestGetDbPooling:
+    """Test routes.helpers.get_db integration with the pool"""
+
+    def test_connections_released_on_teardown(self, app):
+        """Test connections left open are returned when the app context ends"""
+        from routes.helpers import get_db
+
+        with app.app_context():
+            db = get_db(readonly=True)
+            assert db.checked_out
+        assert not db.checked_out
+
+    def test_reentrant_writer_does_not_deadlock(self, app):
+        """Test nested writer checkouts in one context get separate connections"""
+        from routes.helpers import get_db
+
+        with app.app_context():
+            first = get_db(readonly=False)
+            second = get_db(readonly=False)
+            assert first is not second
+            first.close()
+            second.close()
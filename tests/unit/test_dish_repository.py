@@ -425,3 +425,67 @@ class TestDishRepositoryHelpers:
 
         assert all_exist is True
         assert missing == []
+
+
+class TestDishRepositoryBatchedWrites:
+    """Test dish writes against the full schema."""
+
+    @pytest.fixture
+    def schema_repo(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        with open('schema_v2.sql', 'r') as f:
+            conn.executescript(f.read())
+        conn.execute("DELETE FROM products")
+        conn.executemany(
+            """INSERT INTO products (id, name, protein_per_100g, fat_per_100g, carbs_per_100g,
+                                     fiber_per_100g, sugars_per_100g)
+               VALUES (?, ?, 10, 5, 2, 1, 0)""",
+            [(i, f"Product {i:02d}") for i in range(1, 31)],
+        )
+        conn.commit()
+        yield DishRepository(conn)
+        conn.close()
+
+    def _statements(self, repo, name, count):
+        statements = []
+        repo.db.set_trace_callback(statements.append)
+        repo.create({
+            "name": name,
+            "ingredients": [{"product_id": i, "quantity_grams": 50.0} for i in range(1, count + 1)],
+        })
+        repo.db.set_trace_callback(None)
+        return statements
+
+    def test_statement_count_independent_of_ingredients(self, schema_repo):
+        """Test a recipe costs the same statements however many ingredients it has."""
+        small = self._statements(schema_repo, "Small", 3)
+        large = self._statements(schema_repo, "Large", 30)
+
+        def other(statements):
+            return [s for s in statements if not s.startswith("INSERT INTO dish_ingredients")]
+
+        assert len(other(small)) == len(other(large))
+        assert sum('FROM products WHERE id IN' in s for s in large) == 1
+        assert sum(s.startswith("INSERT INTO dish_ingredients") for s in large) == 30
+
+    def test_missing_products_skipped(self, schema_repo):
+        """Test ingredients of unknown products are not stored."""
+        dish = schema_repo.create({
+            "name": "Partial",
+            "ingredients": [
+                {"product_id": 1, "quantity_grams": 100.0},
+                {"product_id": 999, "quantity_grams": 100.0},
+            ],
+        })
+        assert [i["product_id"] for i in dish["ingredients"]] == [1]
+        assert dish["total_weight_grams"] == 100.0
+
+    def test_failed_write_rolls_back(self, schema_repo):
+        """Test a failing ingredient insert leaves no half-written dish."""
+        with pytest.raises(sqlite3.IntegrityError):
+            schema_repo.create({
+                "name": "Broken",
+                "ingredients": [{"product_id": 1, "quantity_grams": -5.0}],
+            })
+        assert schema_repo.find_by_name("Broken") is None
@@ -0,0 +1,130 @@
+"""
+Unit tests for the streaming ExportService.
+
+Runs against the real schema so the joined ingredient query and the
+log_entries_with_details view are exercised.
+"""
+
+import csv
+import gzip
+import io
+import json
+import sqlite3
+
+import pytest
+
+from services.export_service import ExportService, gzip_chunks
+
+
+@pytest.fixture
+def db_connection():
+    """Create in-memory database with the full schema and a small data set."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    with open('schema_v2.sql', 'r') as f:
+        conn.executescript(f.read())
+    conn.execute("DELETE FROM log_entries")
+    conn.execute("DELETE FROM dish_ingredients")
+    conn.execute("DELETE FROM dishes")
+    conn.execute("DELETE FROM products")
+    for i in range(1, 26):
+        conn.execute(
+            """
+            INSERT INTO products (id, name, calories_per_100g, protein_per_100g,
+                                  fat_per_100g, carbs_per_100g)
+            VALUES (?, ?, 100, 10, 5, 2)
+            """,
+            (i, f'Product {i:02d}'),
+        )
+    conn.execute("INSERT INTO dishes (id, name) VALUES (1, 'Omelette'), (2, 'Empty Dish')")
+    conn.execute(
+        """
+        INSERT INTO dish_ingredients (dish_id, product_id, quantity_grams)
+        VALUES (1, 1, 100), (1, 2, 50)
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO log_entries (date, item_type, item_id, quantity_grams, meal_time)
+        VALUES ('2024-01-15', 'product', 1, 200, 'breakfast')
+        """
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def service(db_connection):
+    """Create ExportService with a small batch size."""
+    return ExportService(db_connection, batch_size=10)
+
+
+def _collect(service, export_format, table=None):
+    export_info = service.begin()
+    return list(service.stream(export_format, export_info, table))
+
+
+class TestExportService:
+    """Test streaming export formats"""
+
+    def test_begin_counts_tables(self, service):
+        """Test export_info carries per-table counts"""
+        export_info = service.begin()
+        assert export_info['total_products'] == 25
+        assert export_info['total_dishes'] == 2
+        assert export_info['total_log_entries'] == 1
+        assert service.db.in_transaction
+
+    def test_json_matches_legacy_shape(self, service):
+        """Test the streamed document has the legacy export structure"""
+        data = json.loads(''.join(_collect(service, 'json')))
+        assert set(data) == {'export_info', 'products', 'dishes', 'dish_ingredients',
+                             'log_entries'}
+        assert len(data['products']) == 25
+        assert [d['name'] for d in data['dishes']] == ['Empty Dish', 'Omelette']
+        assert data['dish_ingredients']['2'] == []
+        ingredients = data['dish_ingredients']['1']
+        assert [i['product_name'] for i in ingredients] == ['Product 01', 'Product 02']
+        assert 'export_dish_id' not in ingredients[0]
+        assert len(data['log_entries']) == 1
+
+    def test_stream_ends_snapshot(self, service):
+        """Test the read transaction is released once the stream finishes"""
+        _collect(service, 'json')
+        assert not service.db.in_transaction
+
+    def test_ndjson_streams_in_batches(self, service):
+        """Test NDJSON yields one chunk per cursor batch"""
+        chunks = _collect(service, 'ndjson')
+        # header + 3 product batches + 1 dish + 1 ingredient + 1 log batch
+        assert len(chunks) == 7
+        records = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        assert records[0]['type'] == 'export_info'
+        types = [record['type'] for record in records[1:]]
+        assert types.count('products') == 25
+        assert types.count('dish_ingredients') == 2
+
+    def test_csv_single_table(self, service):
+        """Test CSV export of one table with a header row"""
+        rows = list(csv.reader(io.StringIO(''.join(_collect(service, 'csv', 'products')))))
+        assert rows[0][:2] == ['id', 'name']
+        assert len(rows) == 26
+
+    def test_csv_empty_table_has_header(self, service, db_connection):
+        """Test an empty table still exports its header"""
+        db_connection.execute("DELETE FROM log_entries")
+        db_connection.commit()
+        rows = list(csv.reader(io.StringIO(''.join(_collect(service, 'csv', 'log_entries')))))
+        assert len(rows) == 1
+        assert 'date' in rows[0]
+
+    def test_unsupported_format(self, service):
+        """Test unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            service.stream('xml', {})
+
+    def test_gzip_chunks_round_trip(self):
+        """Test incremental gzip output decompresses to the input"""
+        compressed = b''.join(gzip_chunks(['{"a":', '1}\n']))
+        assert gzip.decompress(compressed) == b'{"a":1}\n'
@@ -0,0 +1,237 @@
+"""
+Unit tests for LogRepository nutrition snapshots and daily rollups.
+
+Runs against the real schema so the snapshot and rollup triggers are exercised.
+"""
+
+import sqlite3
+
+import pytest
+
+from repositories.log_repository import ENTRY_SELECT, LogRepository
+
+
+@pytest.fixture
+def db_connection():
+    """Create in-memory database with the full schema and no sample data."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    with open('schema_v2.sql', 'r') as f:
+        conn.executescript(f.read())
+    conn.execute("DELETE FROM log_entries")
+    conn.execute("DELETE FROM dish_ingredients")
+    conn.execute("DELETE FROM dishes")
+    conn.execute("DELETE FROM products")
+    conn.execute(
+        """
+        INSERT INTO products (id, name, calories_per_100g, protein_per_100g,
+                              fat_per_100g, carbs_per_100g, fiber_per_100g)
+        VALUES (1, 'Test Eggs', 150, 12, 10, 2, 1)
+        """
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def repository(db_connection):
+    """Create LogRepository instance."""
+    return LogRepository(db_connection)
+
+
+def _log(repository, date='2024-01-15', meal_time='breakfast', quantity=200):
+    return repository.create({
+        'date': date,
+        'item_type': 'product',
+        'item_id': 1,
+        'quantity_grams': quantity,
+        'meal_time': meal_time,
+    })
+
+
+class TestNutritionSnapshots:
+    """Test nutrition snapshots stored on log entries"""
+
+    def test_create_snapshots_nutrition(self, repository):
+        """Test a new entry carries its computed nutrition and item name"""
+        entry = _log(repository)
+
+        assert entry['item_name'] == 'Test Eggs'
+        assert entry['calories'] == pytest.approx(300)
+        assert entry['protein'] == pytest.approx(24)
+        assert entry['carbs'] == pytest.approx(4)
+        assert entry['net_carbs'] == pytest.approx(2)
+        assert entry['fiber'] == pytest.approx(2)
+        assert 'calories_per_100g' not in entry
+
+    def test_update_resnapshots(self, repository):
+        """Test changing the quantity rewrites the snapshot"""
+        entry = _log(repository)
+        updated = repository.update(entry['id'], {'quantity_grams': 50})
+
+        assert updated['calories'] == pytest.approx(75)
+        assert updated['net_carbs'] == pytest.approx(0.5)
+
+    def test_product_edit_resnapshots(self, repository, db_connection):
+        """Test editing per-100g values rewrites entries logged with the product"""
+        entry = _log(repository)
+        db_connection.execute("UPDATE products SET carbs_per_100g = 5 WHERE id = 1")
+        db_connection.commit()
+
+        entry = repository.find_by_id(entry['id'])
+        assert entry['carbs'] == pytest.approx(10)
+        assert entry['net_carbs'] == pytest.approx(8)
+
+    def test_explicit_snapshot_is_kept(self, repository, db_connection):
+        """Test inserts that bring their own snapshot are not overwritten"""
+        db_connection.execute(
+            """
+            INSERT INTO log_entries (date, item_type, item_id, quantity_grams, meal_time,
+                                     calories, protein, fat, carbs, net_carbs)
+            VALUES ('2024-01-15', 'product', 1, 100, 'lunch', 1, 2, 3, 4, 3)
+            """
+        )
+        db_connection.commit()
+
+        assert repository.find_all()[0]['calories'] == 1
+        assert repository.get_daily_totals('2024-01-15') == {
+            'calories': 1, 'protein': 2, 'fat': 3, 'carbs': 4, 'fiber': 1
+        }
+
+    def test_snapshot_entries_backfills(self, repository, db_connection):
+        """Test the backfill job snapshots entries that have none"""
+        for _ in range(5):
+            _log(repository)
+        db_connection.execute("UPDATE log_entries SET calories = 0, net_carbs = NULL")
+        db_connection.commit()
+        assert repository.count_missing_snapshots() == 5
+
+        progress = []
+        assert repository.snapshot_entries(batch_size=2, progress=progress.append) == 5
+        assert progress == [40, 80, 100]
+        assert repository.count_missing_snapshots() == 0
+        assert repository.get_daily_totals('2024-01-15')['calories'] == pytest.approx(1500)
+        assert repository.snapshot_entries() == 0
+
+    def test_snapshot_entries_full(self, repository, db_connection):
+        """Test a full run re-snapshots entries edited out of band"""
+        _log(repository)
+        db_connection.execute("UPDATE log_entries SET calories = 1")
+        db_connection.commit()
+
+        assert repository.snapshot_entries(only_missing=False) == 1
+        assert repository.find_all()[0]['calories'] == pytest.approx(300)
+
+
+class TestDailyRollups:
+    """Test trigger-maintained daily_rollups table"""
+
+    def test_insert_updates_rollup(self, repository):
+        """Test a new log entry is folded into its day and meal"""
+        _log(repository)
+        _log(repository, meal_time='lunch', quantity=100)
+
+        rollups = repository.get_rollups('2024-01-15', '2024-01-15')
+        assert [row['meal_time'] for row in rollups] == ['breakfast', 'lunch']
+        assert rollups[0]['entries_count'] == 1
+        assert rollups[0]['calories'] == pytest.approx(300)
+        assert rollups[0]['net_carbs'] == pytest.approx(2)
+
+        totals = repository.get_daily_totals('2024-01-15')
+        assert totals['calories'] == pytest.approx(450)
+        assert totals['protein'] == pytest.approx(36)
+
+    def test_update_moves_entry_between_days(self, repository):
+        """Test changing date and quantity recomputes both old and new keys"""
+        entry = _log(repository)
+        repository.update(entry['id'], {'date': '2024-01-16', 'quantity_grams': 100})
+
+        assert repository.get_rollups('2024-01-15', '2024-01-15') == []
+        rollups = repository.get_rollups('2024-01-16', '2024-01-16')
+        assert rollups[0]['calories'] == pytest.approx(150)
+
+    def test_delete_removes_empty_rollup(self, repository):
+        """Test deleting the last entry for a meal drops its rollup row"""
+        entry = _log(repository)
+        repository.delete(entry['id'])
+
+        assert repository.get_rollups('2024-01-15', '2024-01-15') == []
+        assert repository.get_daily_totals('2024-01-15')['calories'] == 0
+
+    def test_product_update_recomputes_logged_days(self, repository, db_connection):
+        """Test editing per-100g values refreshes rollups that use the product"""
+        _log(repository)
+        _log(repository, date='2024-01-10')
+        db_connection.execute("UPDATE products SET calories_per_100g = 200 WHERE id = 1")
+        db_connection.commit()
+
+        rollups = repository.get_rollups('2024-01-01', '2024-01-31')
+        assert [row['calories'] for row in rollups] == [pytest.approx(400), pytest.approx(400)]
+
+    def test_rebuild_rollups(self, repository, db_connection):
+        """Test rollups can be rebuilt from scratch"""
+        _log(repository)
+        _log(repository, meal_time='dinner')
+        db_connection.execute("DELETE FROM daily_rollups")
+        db_connection.commit()
+
+        assert repository.rebuild_rollups() == 2
+        assert repository.get_daily_totals('2024-01-15')['calories'] == pytest.approx(600)
+
+
+class TestKeysetPagination:
+    """Test cursor pagination of log entries"""
+
+    def _entries(self, db_connection, count=7):
+        for i in range(count):
+            db_connection.execute(
+                """
+                INSERT INTO log_entries (date, item_type, item_id, quantity_grams, meal_time,
+                                         created_at)
+                VALUES (?, 'product', 1, 100, 'lunch', ?)
+                """,
+                (f'2024-01-{10 + i % 3:02d}', f'2024-01-20 08:00:0{i % 2}'),
+            )
+        db_connection.commit()
+
+    def test_pages_match_offset_order(self, repository, db_connection):
+        """Test walking by cursor returns every row once in offset order"""
+        self._entries(db_connection)
+        expected = [row['id'] for row in repository.find_all(limit=100)]
+
+        seen, after = [], None
+        while True:
+            page = repository.find_all(limit=3, after=after)
+            if not page:
+                break
+            seen.extend(row['id'] for row in page)
+            last = page[-1]
+            after = (last['date'], last['created_at'], last['id'])
+
+        assert seen == expected
+        assert [row['id'] for row in repository.find_all(limit=3, offset=3)] == expected[3:6]
+
+    def test_pages_within_date(self, repository, db_connection):
+        """Test the cursor continues inside a date filter"""
+        self._entries(db_connection)
+        expected = [row['id'] for row in repository.find_all(date_filter='2024-01-10')]
+        first = repository.find_all(date_filter='2024-01-10', limit=1)
+        last = first[0]
+        rest = repository.find_all(
+            date_filter='2024-01-10', after=(last['date'], last['created_at'], last['id'])
+        )
+        assert [row['id'] for row in first + rest] == expected
+
+    def test_uses_index(self, db_connection):
+        """Test the keyset query seeks the (date, created_at) index"""
+        plan = db_connection.execute(
+            f"""
+            EXPLAIN QUERY PLAN
+            {ENTRY_SELECT}
+            WHERE (le.date, le.created_at, le.id) < ('2024-01-12', '2024-01-20', 5)
+            ORDER BY le.date DESC, le.created_at DESC, le.id DESC LIMIT 3
+            """
+        ).fetchall()
+        assert any('idx_log_date_created' in row[3] for row in plan)
+        assert not any('TEMP B-TREE' in row[3] for row in plan)
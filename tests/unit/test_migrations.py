@@ -0,0 +1,192 @@
+"""
+Unit tests for versioned schema migrations
+"""
+
+import sqlite3
+
+import pytest
+
+from src.migrations import (
+    BASELINE_SCHEMA_FILE,
+    LATEST_VERSION,
+    Migration,
+    add_column,
+    get_version,
+    migrate,
+    migrate_database,
+    pending_migrations,
+    read_schema,
+)
+
+
+def _objects(conn):
+    return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+
+
+def _statements(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    return statements
+
+
+def _legacy_db():
+    """Database built the pre-versioning way, by executing the schema file"""
+    conn = sqlite3.connect(':memory:')
+    with open('schema_v2.sql', 'r') as f:
+        conn.executescript(f.read())
+    return conn
+
+
+def _create_table(version, name, online=False):
+    return Migration(
+        version, f'create {name}',
+        lambda conn: conn.execute(f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER)"),
+        online=online,
+    )
+
+
+class TestReadSchema:
+    """Test splitting the schema file"""
+
+    def test_pragmas_are_separated(self):
+        """Test PRAGMAs are returned apart from the schema statements"""
+        pragmas, statements = read_schema()
+        assert pragmas[0] == 'PRAGMA journal_mode = WAL;'
+        assert not any(s.upper().startswith('PRAGMA') for s in statements)
+        assert any(s.startswith('CREATE TRIGGER') and s.endswith('END;') for s in statements)
+
+
+class TestMigrate:
+    """Test the migration runner"""
+
+    def test_new_database_matches_schema_file(self):
+        """Test a new database gets exactly the schema file and the latest version"""
+        conn = sqlite3.connect(':memory:')
+        assert migrate(conn) == LATEST_VERSION
+        assert get_version(conn) == LATEST_VERSION
+        assert _objects(conn) == _objects(_legacy_db())
+
+    def test_current_database_is_one_pragma_read(self):
+        """Test a current database costs a single PRAGMA and no schema work"""
+        conn = sqlite3.connect(':memory:')
+        migrate(conn)
+        statements = _statements(conn)
+
+        assert migrate(conn) == LATEST_VERSION
+        assert statements == ['PRAGMA user_version']
+
+    def test_unversioned_database_is_adopted(self):
+        """Test databases from before versioning get missing columns and objects"""
+        conn = _legacy_db()
+        conn.execute("ALTER TABLE products DROP COLUMN calc_version")
+        conn.execute("DROP TRIGGER log_snapshot_insert")
+        conn.execute("DROP INDEX idx_log_date_meal_totals")
+        conn.commit()
+
+        assert migrate(conn) == LATEST_VERSION
+        assert [row[:2] for row in _objects(conn)] == [row[:2] for row in _objects(_legacy_db())]
+        assert 'calc_version' in [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+
+    def test_unversioned_database_adopted_from_frozen_baseline(self, tmp_path):
+        """Test adoption replays the frozen baseline rather than the current schema file"""
+        conn = _legacy_db()
+        statements = _statements(conn)
+
+        assert migrate(conn, schema_path=str(tmp_path / 'missing.sql')) == LATEST_VERSION
+        baseline = read_schema(BASELINE_SCHEMA_FILE)[1]
+        assert [s for s in statements if s in baseline] == baseline
+        # The baseline still has the trigger that migration 2 drops
+        assert any('update_dish_nutrition' in s for s in baseline)
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'update_dish_nutrition'"
+        ).fetchone() is None
+
+    def test_dish_nutrition_trigger_dropped(self):
+        """Test version 1 databases lose the per-ingredient dish trigger"""
+        conn = _legacy_db()
+        conn.execute(
+            "CREATE TRIGGER update_dish_nutrition AFTER INSERT ON dish_ingredients "
+            "BEGIN UPDATE dishes SET total_weight_grams = 0 WHERE id = NEW.dish_id; END"
+        )
+        conn.execute("PRAGMA user_version = 1")
+
+        assert migrate(conn) == LATEST_VERSION
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'update_dish_nutrition'"
+        ).fetchone() is None
+
+    def test_pending_migrations_applied_in_order(self):
+        """Test each pending migration runs once and bumps user_version"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE products (id INTEGER)")
+        conn.execute("PRAGMA user_version = 1")
+        migrations = [_create_table(1, 'one'), _create_table(2, 'two'), _create_table(3, 'three')]
+
+        progress = []
+        assert migrate(conn, migrations=migrations, progress=progress.append) == 3
+        assert progress == [50, 100]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert 'one' not in tables
+        assert {'two', 'three'} <= tables
+
+    def test_failed_migration_rolls_back(self):
+        """Test a failing migration leaves neither its changes nor its version"""
+        def broken(conn):
+            conn.execute("CREATE TABLE half_done (id INTEGER)")
+            raise sqlite3.OperationalError('boom')
+
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE products (id INTEGER)")
+        conn.execute("PRAGMA user_version = 1")
+        migrations = [_create_table(1, 'one'), _create_table(2, 'two'),
+                      Migration(3, 'broken', broken)]
+
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(conn, migrations=migrations)
+
+        assert get_version(conn) == 2
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert 'two' in tables
+        assert 'half_done' not in tables
+
+    def test_online_migrations_deferred(self):
+        """Test startup stops before the first online migration"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE products (id INTEGER)")
+        conn.execute("PRAGMA user_version = 1")
+        migrations = [_create_table(1, 'one'), _create_table(2, 'two'),
+                      _create_table(3, 'big_index', online=True), _create_table(4, 'four')]
+
+        assert [m.version for m in pending_migrations(1, False, migrations)] == [2]
+        assert migrate(conn, include_online=False, migrations=migrations) == 2
+        assert migrate(conn, include_online=False, migrations=migrations) == 2
+        assert migrate(conn, migrations=migrations) == 4
+
+    def test_newer_database_left_alone(self):
+        """Test a database stamped by newer code is not touched"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute(f"PRAGMA user_version = {LATEST_VERSION + 5}")
+        assert migrate(conn) == LATEST_VERSION + 5
+
+    def test_migrate_database_file(self, tmp_path):
+        """Test migrating a database file by path"""
+        db_path = str(tmp_path / 'app.db')
+        assert migrate_database(db_path) == LATEST_VERSION
+        assert migrate_database(db_path, include_online=False) == LATEST_VERSION
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        conn.close()
+
+
+class TestAddColumn:
+    """Test the add_column helper"""
+
+    def test_add_column_once(self):
+        """Test the column is added only when missing"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE t (id INTEGER)")
+
+        assert add_column(conn, 't', 'note', 'TEXT DEFAULT NULL') is True
+        assert add_column(conn, 't', 'note', 'TEXT DEFAULT NULL') is False
+        assert [row[1] for row in conn.execute("PRAGMA table_info(t)")] == ['id', 'note']
@@ -290,60 +290,208 @@ class TestMonitorBackgroundTask:
 
 
 class TestSystemMonitor:
-    """Test SystemMonitor class"""
+    """Test SystemMonitor background sampler"""
     
     def test_init(self):
         """Test SystemMonitor initialization"""
-        monitor = SystemMonitor()
+        monitor = SystemMonitor(interval=5, history=3)
         assert monitor.last_update == 0
-        assert monitor.update_interval == 60
+        assert monitor.update_interval == 5
+        assert monitor.latest() is None
     
     @patch('psutil.virtual_memory')
     @patch('psutil.cpu_percent')
     @patch('src.monitoring.metrics_collector')
-    def test_update_metrics(self, mock_metrics_collector, mock_cpu_percent, mock_virtual_memory):
-        """Test updating system metrics"""
-        # Mock psutil values
-        mock_virtual_memory.return_value = Mock(used=1024)
+    def test_sample(self, mock_metrics_collector, mock_cpu_percent, mock_virtual_memory):
+        """Test a sample is stored and published without blocking on CPU"""
+        mock_virtual_memory.return_value = Mock(used=1024, percent=12.5)
         mock_cpu_percent.return_value = 25.5
         
-        monitor = SystemMonitor()
-        monitor.update_metrics()
+        monitor = SystemMonitor(interval=60)
+        sample = monitor.sample()
         
-        mock_metrics_collector.update_system_metrics.assert_called_once_with(1024, 25.5)
+        mock_cpu_percent.assert_called_once_with(interval=None)
+        assert sample['cpu_percent'] == 25.5
+        assert sample['memory_bytes'] == 1024
+        assert sample['rss_bytes'] > 0
+        assert sample['open_fds'] > 0
+        assert len(sample['gc_objects']) == 3
+        assert monitor.latest() is sample
         assert monitor.last_update > 0
+        mock_metrics_collector.update_system_sample.assert_called_once_with(sample)
     
-    @patch('psutil.virtual_memory')
-    @patch('psutil.cpu_percent')
     @patch('src.monitoring.metrics_collector')
-    def test_update_metrics_interval(self, mock_metrics_collector, mock_cpu_percent, mock_virtual_memory):
-        """Test that metrics are not updated too frequently"""
-        monitor = SystemMonitor()
-        monitor.last_update = time.time()  # Set to current time
-        
-        monitor.update_metrics()
+    def test_ring_buffer(self, mock_metrics_collector):
+        """Test only the configured number of samples is kept"""
+        monitor = SystemMonitor(interval=60, history=3)
+        samples = [monitor.sample() for _ in range(5)]
         
-        # Should not call update_system_metrics due to interval
-        mock_metrics_collector.update_system_metrics.assert_not_called()
+        assert monitor.history() == samples[2:]
     
     @patch('src.monitoring.metrics_collector')
-    def test_update_metrics_import_error(self, mock_metrics_collector):
-        """Test handling of psutil import error"""
-        with patch('psutil.virtual_memory', side_effect=ImportError("psutil not available")):
-            monitor = SystemMonitor()
-            monitor.update_metrics()
+    def test_sample_without_psutil(self, mock_metrics_collector):
+        """Test sampling still reports SQLite and GC stats without psutil"""
+        with patch('src.monitoring.psutil', None):
+            sample = SystemMonitor(interval=60).sample()
         
-        # Should not call update_system_metrics due to import error
-        mock_metrics_collector.update_system_metrics.assert_not_called()
+        assert sample['cpu_percent'] is None
+        assert sample['rss_bytes'] is None
+        assert len(sample['gc_collections']) == 3
+        mock_metrics_collector.update_system_sample.assert_called_once()
     
     @patch('psutil.virtual_memory')
     @patch('src.monitoring.metrics_collector')
-    def test_update_metrics_exception(self, mock_metrics_collector, mock_virtual_memory):
-        """Test handling of general exception"""
+    def test_sample_psutil_error(self, mock_metrics_collector, mock_virtual_memory):
+        """Test psutil errors leave the readings empty instead of raising"""
         mock_virtual_memory.side_effect = Exception("System error")
         
-        monitor = SystemMonitor()
+        sample = SystemMonitor(interval=60).sample()
+        
+        assert sample['memory_bytes'] is None
+        assert sample['gc_objects']
+    
+    @patch('src.monitoring.metrics_collector')
+    def test_start_runs_background_thread(self, mock_metrics_collector):
+        """Test the sampler thread keeps sampling until stopped"""
+        monitor = SystemMonitor(interval=0.01)
+        assert monitor.start() is True
+        assert monitor.start() is False
+        try:
+            deadline = time.time() + 5
+            while len(monitor.history()) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            assert len(monitor.history()) >= 3
+        finally:
+            monitor.stop()
+        assert not monitor._thread.is_alive()
+    
+    @patch('src.monitoring.metrics_collector')
+    def test_concurrent_start_runs_one_thread(self, mock_metrics_collector):
+        """Test callers racing on start() get a single sampler thread"""
+        import threading
+
+        monitor = SystemMonitor(interval=60)
+        sample = monitor.sample
+        barrier = threading.Barrier(8)
+        results = []
+        running = set(threading.enumerate())
+
+        def slow_sample():
+            time.sleep(0.05)
+            return sample()
+
+        def call_start():
+            barrier.wait()
+            results.append(monitor.start())
+
+        with patch.object(monitor, 'sample', side_effect=slow_sample):
+            callers = [threading.Thread(target=call_start) for _ in range(8)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+        try:
+            assert sorted(results) == [False] * 7 + [True]
+            samplers = [
+                t for t in threading.enumerate()
+                if t.name == 'system-monitor' and t not in running
+            ]
+            assert samplers == [monitor._thread]
+        finally:
+            monitor.stop()
+
+    @patch('src.monitoring.metrics_collector')
+    def test_update_metrics_is_a_read(self, mock_metrics_collector):
+        """Test a scrape after start does not sample inline"""
+        monitor = SystemMonitor(interval=60)
         monitor.update_metrics()
+        try:
+            calls = mock_metrics_collector.update_system_sample.call_count
+            monitor.update_metrics()
+            assert mock_metrics_collector.update_system_sample.call_count == calls
+        finally:
+            monitor.stop()
+    
+    def test_collector_publishes_sample(self):
+        """Test sample fields end up in the Prometheus output"""
+        collector = MetricsCollector()
+        collector.update_system_sample({
+            'cpu_percent': 10.0, 'memory_bytes': 2048, 'rss_bytes': 4096, 'open_fds': 7,
+            'db_bytes': 100, 'wal_bytes': 50, 'gc_objects': [1, 2, 3],
+            'gc_collections': [4, 5, 6],
+        })
+        
+        output = collector.get_metrics()
+        assert 'process_rss_bytes 4096.0' in output
+        assert 'process_open_fds 7.0' in output
+        assert 'sqlite_file_bytes{file="wal"} 50.0' in output
+        assert 'python_gc_collections{generation="2"} 6.0' in output
+
+
+class TestMultiprocessMetrics:
+    """Test aggregation of metrics written by several worker processes"""
+    
+    def _worker(self, metrics_dir, duration):
+        import os
+        import subprocess
+        import sys
+        script = (
+            "from src.monitoring import metrics_collector\n"
+            f"metrics_collector.record_http_request('GET', 'products', 200, {duration})\n"
+            "metrics_collector.update_counts(5, 2, 9)\n"
+        )
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+        subprocess.run([sys.executable, '-c', script], env=env, check=True)
+    
+    def test_counters_and_histograms_aggregated(self, tmp_path):
+        """Test /metrics output sums every worker's counters and histograms"""
+        self._worker(tmp_path, 0.02)
+        self._worker(tmp_path, 0.2)
         
-        # Should not call update_system_metrics due to exception
-        mock_metrics_collector.update_system_metrics.assert_not_called()
+        collector = MetricsCollector()
+        collector.multiprocess_dir = str(tmp_path)
+        output = collector.get_metrics()
+        
+        assert 'http_requests_total{endpoint="products",method="GET",status="200"} 2.0' in output
+        assert 'http_request_duration_seconds_count{endpoint="products",method="GET"} 2.0' in output
+        assert 'http_request_duration_seconds_sum{endpoint="products",method="GET"} 0.22' in output
+        assert 'products_count 5.0' in output
+    
+    def test_gunicorn_hooks(self, tmp_path, monkeypatch):
+        """Test gunicorn.conf.py clears stale files and drops dead workers' live gauges"""
+        import runpy
+        
+        metrics_dir = tmp_path / 'metrics'
+        metrics_dir.mkdir()
+        (metrics_dir / 'counter_1.db').write_bytes(b'stale')
+        (metrics_dir / 'README').write_text('provisioned by the operator')
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(metrics_dir))
+        monkeypatch.delenv('NUTRITION_TRACKER_METRICS_OWNER', raising=False)
+        
+        config = runpy.run_path('gunicorn.conf.py')
+        assert [path.name for path in metrics_dir.iterdir()] == ['README']
+        
+        self._worker(metrics_dir, 0.01)
+        counter = next(metrics_dir.glob('counter_*.db'))
+        pid = int(counter.stem.rsplit('_', 1)[1])
+        live_gauge = metrics_dir / f'gauge_livesum_{pid}.db'
+        live_gauge.write_bytes(b'')
+        
+        config['child_exit'](None, Mock(pid=pid))
+        assert not live_gauge.exists()
+        assert counter.exists()
+        
+        # Re-reading the config (SIGHUP) keeps the running workers' files
+        runpy.run_path('gunicorn.conf.py')
+        assert counter.exists()
+    
+    def test_post_fork_starts_sampler(self, tmp_path, monkeypatch):
+        """Test the sampler thread is started in each worker, not the preloaded master"""
+        import runpy
+        
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path / 'metrics'))
+        config = runpy.run_path('gunicorn.conf.py')
+        
+        with patch('src.monitoring.system_monitor') as monitor:
+            config['post_fork'](None, Mock())
+        monitor.start.assert_called_once_with()
@@ -12,6 +12,7 @@ from src.nutrition_calculator import (
     UserProfile,
     RecipeIngredient,
     ValidationResult,
+    CalculationTracer,
     validate_nutrition_data,
     validate_user_profile,
     calculate_calories_from_macros,
@@ -793,9 +794,10 @@ class TestValidationAndErrorHandling:
             # Use negative values to trigger validation warning
             result = calculate_calories_from_macros(protein=-10, fats=20, carbs=30)  # Negative protein
             
-            # Should still calculate calories but log warning
+            # Should still calculate calories; issues are logged lazily at debug level
             assert isinstance(result, float)
-            mock_logger.warning.assert_called()
+            mock_logger.debug.assert_called()
+            mock_logger.warning.assert_not_called()
     
     def test_calculate_bmr_mifflin_st_jeor_invalid_profile(self):
         """Test calculate_bmr_mifflin_st_jeor with invalid user profile"""
@@ -1046,3 +1048,71 @@ class TestBoundaryAndEdgeCases:
         assert isinstance(result.valid, bool)
 
 
+class TestCalculationTracer:
+    """Test calculation tracing"""
+
+    def test_disabled_by_default_logs_nothing(self):
+        """Test hot functions do no logging while tracing is off"""
+        tracer = CalculationTracer()
+        with patch('src.nutrition_calculator.calc_tracer', tracer), \
+                patch('src.nutrition_calculator.logger') as mock_logger:
+            calculate_keto_index_advanced(10.0, 20.0, 5.0)
+            calculate_calories_from_macros(10.0, 20.0, 5.0)
+
+        assert not tracer.enabled
+        assert tracer.recent() == []
+        assert mock_logger.method_calls == []
+
+    def test_capture_collects_scope_records(self):
+        """Test capture() traces every calculation inside the block"""
+        tracer = CalculationTracer()
+        with patch('src.nutrition_calculator.calc_tracer', tracer):
+            with tracer.capture() as records:
+                assert tracer.enabled
+                calculate_keto_index_advanced(10.0, 20.0, 5.0, category="dairy")
+            calculate_calories_from_macros(1.0, 1.0, 1.0)
+
+        assert not tracer.enabled
+        functions = [record['function'] for record in records]
+        assert functions == ['calculate_net_carbs_advanced', 'calculate_keto_index_advanced']
+        assert records[1]['inputs']['category'] == 'dairy'
+        assert records[1]['result']['keto_index'] > 0
+        assert len(tracer.recent()) == 2
+
+    def test_sampling_fills_ring_buffer(self):
+        """Test sampled records are kept in a bounded ring buffer"""
+        tracer = CalculationTracer(capacity=3)
+        tracer.configure(sample_rate=1.0)
+        with patch('src.nutrition_calculator.calc_tracer', tracer):
+            for protein in range(5):
+                calculate_calories_from_macros(float(protein), 0.0, 0.0)
+
+        assert [record['inputs']['protein'] for record in tracer.recent()] == [2.0, 3.0, 4.0]
+        assert [record['inputs']['protein'] for record in tracer.recent(1)] == [4.0]
+
+        tracer.configure(sample_rate=0, capacity=2)
+        assert not tracer.enabled
+        assert len(tracer.recent()) == 2
+
+    def test_sample_rate_is_applied(self):
+        """Test only the sampled share of calculations is recorded"""
+        tracer = CalculationTracer(sample_rate=0.5)
+        with patch('src.nutrition_calculator.random.random', side_effect=[0.2, 0.7]):
+            tracer.record('f', {'x': 1}, 1)
+            tracer.record('f', {'x': 2}, 2)
+        assert [record['inputs']['x'] for record in tracer.recent()] == [1]
+
+    def test_capture_is_per_context(self):
+        """Test a capture in one thread does not collect another thread's calculations"""
+        import threading
+
+        tracer = CalculationTracer()
+        with patch('src.nutrition_calculator.calc_tracer', tracer):
+            with tracer.capture() as records:
+                thread = threading.Thread(
+                    target=calculate_calories_from_macros, args=(1.0, 1.0, 1.0)
+                )
+                thread.start()
+                thread.join()
+
+        assert records == []
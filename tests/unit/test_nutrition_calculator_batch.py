@@ -0,0 +1,183 @@
+"""
+Unit tests for nutrition_calculator_batch.py
+
+Every batch function is checked against the scalar function it vectorizes,
+row by row, on randomized inputs.
+"""
+
+import random
+from unittest.mock import patch
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from src import nutrition_calculator as scalar
+from src import nutrition_calculator_batch as batch
+from src.nutrition_calculator import RecipeIngredient
+
+CATEGORIES = list(scalar.FIBER_RATIOS) + ['meat', 'fish', 'dairy', None]
+PROCESSING_LEVELS = ['raw', 'minimal', 'processed', 'ultra_processed', None]
+PREPARATIONS = ['raw', 'boiled', 'fried', 'grilled', 'steamed']
+
+
+def _products(count, seed=42):
+    """Random products; half the values on the 0.05 grid to hit rounding ties"""
+    rng = random.Random(seed)
+
+    def amount(upper):
+        value = rng.uniform(0, upper)
+        return round(value * 20) / 20 if rng.random() < 0.5 else value
+
+    products = []
+    for _ in range(count):
+        carbs = amount(60)
+        products.append({
+            'protein': amount(40),
+            'fats': amount(90),
+            'carbs': carbs,
+            'fiber': rng.choice([None, amount(1) * carbs]),
+            'category': rng.choice(CATEGORIES),
+            'glycemic_index': rng.choice([None, 0, 15, 35, 55, amount(100)]),
+            'processing_level': rng.choice(PROCESSING_LEVELS),
+        })
+    return products
+
+
+def _columns(products):
+    return {key: [p[key] for p in products] for key in products[0]}
+
+
+class TestBatchEquivalence:
+    """Test batch results are identical to the scalar functions"""
+
+    @pytest.fixture
+    def products(self):
+        return _products(2000)
+
+    def test_calories(self, products):
+        """Test calories match calculate_calories_from_macros"""
+        cols = _columns(products)
+        result = batch.calculate_calories_from_macros(cols['protein'], cols['fats'],
+                                                      cols['carbs'])
+        expected = [scalar.calculate_calories_from_macros(p['protein'], p['fats'], p['carbs'])
+                    for p in products]
+        assert result.tolist() == expected
+
+    def test_net_carbs(self, products):
+        """Test net carbs match calculate_net_carbs_advanced"""
+        cols = _columns(products)
+        result = batch.calculate_net_carbs(cols['carbs'], cols['fiber'], cols['category'])
+        for i, p in enumerate(products):
+            expected = scalar.calculate_net_carbs_advanced(p['carbs'], p['fiber'], p['category'])
+            assert result['net_carbs'][i] == expected['net_carbs']
+            assert result['fiber_estimated'][i] == expected['fiber_estimated']
+            assert (result['fiber_deduction_coefficient'][i]
+                    == expected['fiber_deduction_coefficient'])
+
+    def test_keto_index(self, products):
+        """Test every keto index field matches calculate_keto_index_advanced"""
+        cols = _columns(products)
+        result = batch.calculate_keto_index(
+            cols['protein'], cols['fats'], cols['carbs'], cols['fiber'], cols['category'],
+            cols['glycemic_index'], cols['processing_level']
+        )
+        for i, p in enumerate(products):
+            expected = scalar.calculate_keto_index_advanced(
+                p['protein'], p['fats'], p['carbs'], p['fiber'], p['category'],
+                p['glycemic_index'], p['processing_level']
+            )
+            for key, value in expected.items():
+                assert result[key][i] == value, (key, p)
+
+    def test_sub_scores_at_boundaries(self):
+        """Test piecewise scores on their breakpoints"""
+        net_carbs = [0, 2, 2.1, 5, 7.5, 10, 15, 20, 25, 50]
+        assert batch.calculate_carbs_score(net_carbs).tolist() == [
+            scalar.calculate_carbs_score_advanced(n) for n in net_carbs
+        ]
+        gi = [None, 0, 15, 20, 35, 45, 55, 80, 120]
+        assert batch.calculate_gi_score(gi).tolist() == [
+            scalar.calculate_gi_score_advanced(g) for g in gi
+        ]
+        macros = [(0, 0, 0), (75, 25, 0), (60, 40, 0), (45, 55, 0), (30, 70, 0), (10, 90, 0)]
+        fats, protein, carbs = zip(*macros)
+        assert batch.calculate_fat_ratio_score(fats, protein, carbs).tolist() == [
+            scalar.calculate_fat_ratio_score_advanced(*m) for m in macros
+        ]
+
+    def test_keto_categories_gaps(self):
+        """Test values between category ranges fall back like the scalar loop"""
+        assert batch.keto_categories([95, 89.5, 19.5, 0]).tolist() == [
+            'Идеально для кето', 'Исключить', 'Исключить', 'Исключить'
+        ]
+
+    def test_recipe_per_100g(self):
+        """Test the recipe roll-up matches calculate_recipe_nutrition"""
+        rng = random.Random(7)
+        recipes = []
+        for _ in range(50):
+            ingredients = []
+            for j in range(rng.randint(1, 6)):
+                p = _products(1, seed=rng.random())[0]
+                nutrition = {'protein': p['protein'], 'fats': p['fats'], 'carbs': p['carbs']}
+                if p['fiber'] is not None:
+                    nutrition['fiber'] = min(p['fiber'], p['carbs']) * 0.2
+                ingredients.append(RecipeIngredient(
+                    f'ing {j}', rng.choice([50, 100, 125.5, rng.uniform(1, 400)]), nutrition,
+                    rng.choice(['meat', 'fish', 'vegetables', 'vegetable', 'bread', 'dairy']),
+                    rng.choice(PREPARATIONS),
+                ))
+            recipes.append(ingredients)
+
+        rows = [(r, ing) for r, ingredients in enumerate(recipes) for ing in ingredients]
+        result = batch.calculate_recipe_per_100g(
+            [r for r, _ in rows],
+            [ing.raw_weight for _, ing in rows],
+            [ing.nutrition_per_100g['protein'] for _, ing in rows],
+            [ing.nutrition_per_100g['fats'] for _, ing in rows],
+            [ing.nutrition_per_100g['carbs'] for _, ing in rows],
+            [ing.nutrition_per_100g.get('fiber') for _, ing in rows],
+            [ing.category for _, ing in rows],
+            [ing.preparation for _, ing in rows],
+        )
+
+        for r, ingredients in enumerate(recipes):
+            expected = scalar.calculate_recipe_nutrition(ingredients, f'recipe {r}')
+            for key, value in expected['nutrition_per_100g'].items():
+                assert result[key][r] == value, (key, r)
+            assert result['total_raw'][r] == expected['weights']['total_raw']
+            assert result['total_cooked'][r] == expected['weights']['total_cooked']
+            assert result['keto_index'][r] == expected['keto_index']
+            assert result['keto_category'][r] == expected['keto_category']
+
+    def test_round_matches_builtin_on_ties(self):
+        """Test values where np.round and round() disagree"""
+        values = [0.05, 0.15, 0.25, 0.35, 1.45, 2.675, 1.005, 0.285, 1234.55, -0.05]
+        assert batch._round(np.array(values)).tolist() == [round(v, 1) for v in values]
+
+
+class TestBatchErrors:
+    """Test batch validation"""
+
+    def test_fiber_above_carbs(self):
+        """Test invalid rows raise like the scalar function"""
+        with pytest.raises(ValueError, match='строка 1'):
+            batch.calculate_net_carbs([5, 5], [1, 6])
+
+    def test_negative_carbs(self):
+        """Test negative carbs are rejected"""
+        with pytest.raises(ValueError):
+            batch.calculate_keto_index([1], [1], [-1])
+
+    def test_requires_numpy(self):
+        """Test a clear error when numpy is missing"""
+        with patch('src.nutrition_calculator_batch.NUMPY_AVAILABLE', False):
+            with pytest.raises(ImportError, match='numpy'):
+                batch.calculate_calories_from_macros([1], [1], [1])
+
+    def test_empty_input(self):
+        """Test empty columns give empty results"""
+        result = batch.calculate_keto_index([], [], [])
+        assert result['keto_index'].tolist() == []
+        assert batch.calculate_recipe_per_100g([], [], [], [], [])['calories'].tolist() == []
@@ -0,0 +1,119 @@
+"""
+Unit tests for keyset pagination cursors.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.pagination import decode_cursor, encode_cursor, fetch_page, paginate
+
+
+class TestCursors:
+    """Test cursor encoding"""
+
+    def test_round_trip(self):
+        """Test a cursor decodes to the key it was built from"""
+        cursor = encode_cursor('log', ['2024-01-15', '2024-01-15 08:00:00', 42])
+        assert '=' not in cursor
+        assert decode_cursor('log', cursor) == ('2024-01-15', '2024-01-15 08:00:00', 42)
+
+    def test_unicode_values(self):
+        """Test non-ASCII names survive the round trip"""
+        cursor = encode_cursor('products', ['Crème fraîche', 7])
+        assert decode_cursor('products', cursor) == ('Crème fraîche', 7)
+
+    def test_first_page(self):
+        """Test a missing cursor means the first page"""
+        assert decode_cursor('products', None) is None
+        assert decode_cursor('products', '') is None
+
+    def test_malformed(self):
+        """Test garbage is rejected"""
+        for cursor in ['not-a-cursor', '!!!', 'e30']:
+            with pytest.raises(ValueError, match='Invalid cursor'):
+                decode_cursor('products', cursor)
+
+    def test_wrong_kind_or_shape(self):
+        """Test a cursor of another list or with a bad id is rejected"""
+        with pytest.raises(ValueError):
+            decode_cursor('products', encode_cursor('fasting', ['2024-01-15', 1]))
+        with pytest.raises(ValueError):
+            decode_cursor('products', encode_cursor('products', ['Egg', 'one']))
+        with pytest.raises(ValueError):
+            decode_cursor('log', encode_cursor('log', ['2024-01-15', 1]))
+
+    def test_key_values_must_be_scalars(self):
+        """Test every key value is checked, not only the trailing id"""
+        for values in ([{}, 1], [[1], 1], [None, 1], [True, 1]):
+            with pytest.raises(ValueError, match='Invalid cursor'):
+                decode_cursor('products', encode_cursor('products', values))
+        assert decode_cursor('fasting', encode_cursor('fasting', [1.5, 2])) == (1.5, 2)
+
+
+class TestPaginate:
+    """Test page trimming"""
+
+    def test_more_rows(self):
+        """Test the extra row becomes a cursor to the last returned row"""
+        rows = [{'id': i} for i in range(4)]
+        page, cursor = paginate(rows, 3, 'fasting', lambda r: ('t', r['id']))
+        assert page == rows[:3]
+        assert decode_cursor('fasting', cursor) == ('t', 2)
+
+    def test_last_page(self):
+        """Test no cursor when nothing follows"""
+        rows = [{'id': 1}]
+        assert paginate(rows, 3, 'fasting', lambda r: ('t', r['id'])) == (rows, None)
+
+    def test_zero_limit(self):
+        """Test an empty page has no cursor"""
+        assert paginate([{'id': 1}], 0, 'fasting', lambda r: ('t', r['id'])) == ([], None)
+
+
+class TestFetchPage:
+    """Test the shared page read"""
+
+    def fetch(self, rows):
+        return MagicMock(side_effect=lambda limit, offset, after: rows[offset:offset + limit])
+
+    def test_fetches_one_extra_row(self):
+        """Test the repository is asked for limit + 1 rows"""
+        rows = [{'id': i} for i in range(5)]
+        fetch = self.fetch(rows)
+        page, cursor = fetch_page(fetch, 'fasting', lambda r: ('t', r['id']), 2)
+        fetch.assert_called_once_with(3, 0, None)
+        assert page == rows[:2]
+        assert decode_cursor('fasting', cursor) == ('t', 1)
+
+    def test_clamps_and_decodes(self):
+        """Test limit and offset are clamped and the cursor is decoded"""
+        fetch = self.fetch([])
+        cursor = encode_cursor('fasting', ['t', 7])
+        fetch_page(fetch, 'fasting', lambda r: ('t', r['id']), 10_000, -5, cursor)
+        fetch.assert_called_once_with(201, 0, ('t', 7))
+
+    def test_invalid_cursor(self):
+        """Test a cursor of another kind is rejected before fetching"""
+        fetch = self.fetch([])
+        with pytest.raises(ValueError):
+            fetch_page(fetch, 'log', lambda r: r['id'], 5, cursor=encode_cursor('fasting', ['t', 1]))
+        fetch.assert_not_called()
+
+    def test_cache_hit(self):
+        """Test a cached page is served without fetching"""
+        cache = MagicMock()
+        cache.get.return_value = {'items': [{'id': 1}], 'next_cursor': None}
+        fetch = self.fetch([])
+        result = fetch_page(fetch, 'fasting', lambda r: ('t', r['id']), 5, cache=cache, cache_prefix='p')
+        assert result == ([{'id': 1}], None)
+        cache.get.assert_called_once_with('p:5:0:')
+        fetch.assert_not_called()
+
+    def test_cache_miss_stores_page(self):
+        """Test a fetched page is stored under the prefixed key"""
+        cache = MagicMock()
+        cache.get.return_value = None
+        rows = [{'id': 1}]
+        fetch_page(self.fetch(rows), 'fasting', lambda r: ('t', r['id']), 5, 0, None, cache, 'p')
+        cache.set.assert_called_once_with('p:5:0:', {'items': rows, 'next_cursor': None}, 300)
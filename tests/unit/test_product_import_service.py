@@ -0,0 +1,223 @@
+"""
+Unit tests for the bulk ProductImportService.
+
+Runs against the real schema so the ON CONFLICT upsert, the NOCASE name
+index and the CHECK constraints are exercised.
+"""
+
+import io
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from repositories.product_repository import ProductRepository
+from services.product_import_service import (
+    ProductImportService,
+    iter_csv_rows,
+    iter_json_rows,
+    iter_ndjson_rows,
+    validate_import_row,
+)
+
+CSV_HEADER = 'name,protein_per_100g,fat_per_100g,carbs_per_100g,fiber_per_100g,category\n'
+
+
+@pytest.fixture
+def db_connection():
+    """Create in-memory database with the full schema and no products."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    with open('schema_v2.sql', 'r') as f:
+        conn.executescript(f.read())
+    conn.execute("DELETE FROM log_entries")
+    conn.execute("DELETE FROM dish_ingredients")
+    conn.execute("DELETE FROM dishes")
+    conn.execute("DELETE FROM products")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def service(db_connection):
+    return ProductImportService(ProductRepository(db_connection), chunk_size=2)
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+
+class TestRowReaders:
+    """Test the streaming row readers"""
+
+    def test_csv_rows_numbered_by_line(self):
+        """Test CSV rows carry their line number"""
+        stream = io.StringIO(CSV_HEADER + 'Egg,13,11,1,,\nKale,3,1,9,4,leafy_vegetables\n')
+        rows = list(iter_csv_rows(stream))
+        assert [number for number, _ in rows] == [2, 3]
+        assert rows[1][1]['category'] == 'leafy_vegetables'
+
+    def test_ndjson_rows(self):
+        """Test blank lines are skipped and bad JSON becomes an error value"""
+        stream = io.StringIO('{"name": "Egg"}\n\n{broken\n')
+        rows = list(iter_ndjson_rows(stream))
+        assert rows[0] == (1, {'name': 'Egg'})
+        assert rows[1][0] == 3
+        assert isinstance(rows[1][1], ValueError)
+
+    def test_json_rows(self):
+        """Test array items are numbered from 1"""
+        assert list(iter_json_rows([{'a': 1}, {'b': 2}])) == [(1, {'a': 1}), (2, {'b': 2})]
+
+
+class TestValidateImportRow:
+    """Test per-row validation"""
+
+    def test_valid_row_with_optional_fields(self):
+        """Test optional fields are parsed and empty values become None"""
+        product, errors = validate_import_row({
+            'name': 'Kale', 'protein_per_100g': '3', 'fat_per_100g': '1',
+            'carbs_per_100g': '9', 'fiber_per_100g': '4', 'sugars_per_100g': '',
+            'category': 'leafy_vegetables', 'processing_level': 'raw', 'region': 'eu',
+        })
+        assert errors == []
+        assert product['fiber_per_100g'] == 4.0
+        assert product['sugars_per_100g'] is None
+        assert product['glycemic_index'] is None
+        assert product['region'] == 'EU'
+
+    def test_invalid_optional_fields(self):
+        """Test optional values are range checked"""
+        product, errors = validate_import_row({
+            'name': 'Kale', 'protein_per_100g': 3, 'fat_per_100g': 1, 'carbs_per_100g': 9,
+            'fiber_per_100g': 12, 'glycemic_index': 'high', 'processing_level': 'fermented',
+            'category': 'vegetables', 'region': 'mars',
+        })
+        assert product is None
+        assert 'Fiber cannot exceed carbs' in errors
+        assert 'Glycemic index must be a number' in errors
+        assert any(e.startswith('Processing level must be one of') for e in errors)
+        assert any(e.startswith('Category must be one of') for e in errors)
+        assert any(e.startswith('Region must be one of') for e in errors)
+
+    def test_required_fields(self):
+        """Test validate_product_data errors are reported"""
+        product, errors = validate_import_row({'name': 'K'})
+        assert product is None
+        assert 'Product name must be at least 2 characters long' in errors
+
+    def test_non_object_rows(self):
+        """Test rows that are not objects"""
+        assert validate_import_row([1, 2]) == (None, ['Row must be an object'])
+        assert validate_import_row(ValueError('Invalid JSON: x')) == (None, ['Invalid JSON: x'])
+
+
+class TestProductImportService:
+    """Test chunked imports"""
+
+    def test_import_csv(self, service, db_connection):
+        """Test a CSV import in several chunks"""
+        body = CSV_HEADER + ''.join(f'Food {i},10,5,2,,\n' for i in range(5))
+        summary = service.import_rows(iter_csv_rows(io.StringIO(body)))
+
+        assert summary['total_rows'] == 5
+        assert summary['inserted'] == 5
+        assert summary['imported'] == 5
+        assert summary['chunks'] == 3
+        assert summary['failed'] == 0
+        assert summary['rows_per_second'] > 0
+        assert _count(db_connection) == 5
+        row = db_connection.execute("SELECT * FROM products WHERE name = 'Food 0'").fetchone()
+        assert row['calories_per_100g'] == 93.0
+        assert row['keto_index'] is not None
+
+    def test_import_reports_row_errors(self, service, db_connection):
+        """Test invalid rows are reported while the rest is stored"""
+        body = CSV_HEADER + 'Egg,13,11,1,,\nBad,abc,200,1,,\nKale,3,1,9,4,leafy_vegetables\n'
+        summary = service.import_rows(iter_csv_rows(io.StringIO(body)))
+
+        assert summary['inserted'] == 2
+        assert summary['failed'] == 1
+        assert summary['errors'][0]['row'] == 3
+        assert summary['errors'][0]['name'] == 'Bad'
+        assert 'Fat cannot exceed 100g per 100g' in summary['errors'][0]['errors']
+        assert _count(db_connection) == 2
+
+    def test_import_reports_constraint_failures(self, service, db_connection):
+        """Test rows rejected by the database fail alone"""
+        rows = [
+            {'name': 'Egg', 'protein_per_100g': 13, 'fat_per_100g': 11, 'carbs_per_100g': 1},
+            {'name': 'Odd', 'protein_per_100g': 1, 'fat_per_100g': 1, 'carbs_per_100g': 1},
+        ]
+        db_connection.execute(
+            "CREATE TRIGGER reject_odd BEFORE INSERT ON products "
+            "WHEN NEW.name = 'Odd' BEGIN SELECT RAISE(ABORT, 'odd row'); END"
+        )
+        summary = service.import_rows(iter_json_rows(rows))
+
+        assert summary['inserted'] == 1
+        assert summary['errors'] == [
+            {'row': 2, 'name': 'Odd', 'errors': ['Database constraint violation: odd row']}
+        ]
+
+    def test_import_updates_case_insensitive_names(self, service, db_connection):
+        """Test names match existing products regardless of case"""
+        service.import_rows(iter_json_rows([
+            {'name': 'Egg', 'protein_per_100g': 13, 'fat_per_100g': 11, 'carbs_per_100g': 1},
+        ]))
+        summary = service.import_rows(iter_json_rows([
+            {'name': 'EGG', 'protein_per_100g': 12, 'fat_per_100g': 10, 'carbs_per_100g': 1},
+        ]))
+
+        assert summary['updated'] == 1
+        assert _count(db_connection) == 1
+        row = db_connection.execute("SELECT * FROM products").fetchone()
+        assert row['protein_per_100g'] == 12
+
+    def test_import_skip_existing(self, db_connection):
+        """Test update_existing=False keeps existing products"""
+        service = ProductImportService(ProductRepository(db_connection), update_existing=False)
+        rows = [{'name': 'Egg', 'protein_per_100g': 13, 'fat_per_100g': 11, 'carbs_per_100g': 1}]
+        service.import_rows(iter_json_rows(rows))
+        rows[0]['protein_per_100g'] = 1
+        summary = service.import_rows(iter_json_rows(rows))
+
+        assert summary['skipped'] == 1
+        assert summary['imported'] == 0
+        row = db_connection.execute("SELECT protein_per_100g FROM products").fetchone()
+        assert row[0] == 13
+
+    def test_import_invalidates_caches(self, service):
+        """Test product and stats caches are cleared after an update"""
+        rows = [{'name': 'Egg', 'protein_per_100g': 13, 'fat_per_100g': 11, 'carbs_per_100g': 1}]
+        with patch('services.product_import_service.cache_manager') as cache, \
+                patch('services.product_import_service.stats_cache') as stats:
+            service.import_rows(iter_json_rows(rows))
+            cache.delete_pattern.assert_called_once_with('products:*')
+            stats.invalidate_all.assert_not_called()
+
+            service.import_rows(iter_json_rows(rows))
+            stats.invalidate_all.assert_called_once()
+
+    def test_import_aborts_on_unreadable_input(self, service, db_connection):
+        """Test a decoding error keeps the rows read so far"""
+        def rows():
+            yield 1, {'name': 'Egg', 'protein_per_100g': 13, 'fat_per_100g': 11,
+                      'carbs_per_100g': 1}
+            raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+        summary = service.import_rows(rows())
+
+        assert summary['aborted'].startswith('Could not read input after row 0')
+        assert summary['inserted'] == 1
+        assert _count(db_connection) == 1
+
+    def test_error_report_is_capped(self, service):
+        """Test the error list stops growing at MAX_IMPORT_ERRORS"""
+        with patch('services.product_import_service.MAX_IMPORT_ERRORS', 2):
+            summary = service.import_rows(iter_json_rows([{'name': 'x'}] * 5))
+
+        assert summary['failed'] == 5
+        assert len(summary['errors']) == 2
+        assert summary['errors_truncated'] is True
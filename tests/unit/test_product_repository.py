@@ -7,7 +7,10 @@ ensuring proper abstraction of database operations.
 
 import pytest
 import sqlite3
-from repositories.product_repository import ProductRepository
+from unittest.mock import patch
+
+from repositories.product_repository import ProductRepository, compute_derived_fields
+from src.nutrition_calculator import CALC_VERSION
 
 
 @pytest.fixture
@@ -40,6 +43,7 @@ def db_connection():
             gi_score REAL,
             fiber_estimated INTEGER,
             fiber_deduction_coefficient REAL,
+            calc_version TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
@@ -248,6 +252,104 @@ class TestProductRepositoryFind:
         assert len(page1_ids.intersection(page2_ids)) == 0
 
 
+    def test_find_all_serves_stored_fields(self, product_repo):
+        """Test current rows are listed without running the keto calculation."""
+        created = product_repo.create(
+            {"name": "Walnuts", "protein_per_100g": 15.0, "fat_per_100g": 65.0,
+             "carbs_per_100g": 14.0, "fiber_per_100g": 7.0, "category": "nuts_seeds"}
+        )
+        assert created["calc_version"] == CALC_VERSION
+
+        with patch('repositories.product_repository.calculate_keto_index_advanced') as mock_keto:
+            products = product_repo.find_all()
+
+        mock_keto.assert_not_called()
+        assert products[0]["net_carbs"] == created["net_carbs_per_100g"]
+        assert products[0]["keto_index"] == created["keto_index"]
+        assert products[0]["fiber_estimated"] is False
+
+    def test_find_all_calculates_stale_rows(self, product_repo, db_connection):
+        """Test rows from an older calculator version are calculated on the fly."""
+        db_connection.execute(
+            """
+            INSERT INTO products (name, calories_per_100g, protein_per_100g, fat_per_100g,
+                                  carbs_per_100g, keto_index)
+            VALUES ('Legacy Cheese', 400, 25.0, 33.0, 1.3, NULL)
+            """
+        )
+        db_connection.commit()
+
+        product = product_repo.find_all()[0]
+
+        assert product["keto_index"] > 70
+        assert product["net_carbs"] == 1.3
+
+
+class TestProductRepositoryRecompute:
+    """Test the stored field recompute job."""
+
+    def _insert_stale(self, db_connection, count):
+        db_connection.executemany(
+            """
+            INSERT INTO products (name, calories_per_100g, protein_per_100g, fat_per_100g,
+                                  carbs_per_100g, calc_version)
+            VALUES (?, 100, 10.0, 5.0, 2.0, 'old')
+            """,
+            [(f"Stale {i}",) for i in range(count)],
+        )
+        db_connection.commit()
+
+    def test_recompute_updates_stale_rows_in_batches(self, product_repo, db_connection):
+        """Test stale rows are restamped and current rows are left alone."""
+        product_repo.create({"name": "Fresh", "protein_per_100g": 10.0, "fat_per_100g": 5.0,
+                             "carbs_per_100g": 2.0})
+        self._insert_stale(db_connection, 7)
+        on_the_fly = product_repo.find_all(search="Stale 0")[0]
+        progress = []
+
+        assert product_repo.count_stale() == 7
+        assert product_repo.recompute_derived_fields(batch_size=3, progress=progress.append) == 7
+
+        assert product_repo.count_stale() == 0
+        assert progress == [42, 85, 100]
+        stored = product_repo.find_by_name("Stale 0")
+        assert stored["calc_version"] == CALC_VERSION
+        assert stored["keto_index"] == on_the_fly["keto_index"]
+        assert stored["net_carbs_per_100g"] == 2.0
+
+    def test_recompute_matches_scalar_path(self, product_repo, db_connection):
+        """Test the vectorized recompute stores what the scalar calculation gives."""
+        self._insert_stale(db_connection, 3)
+        db_connection.execute(
+            "UPDATE products SET fiber_per_100g = 1.5, category = 'nuts_seeds', glycemic_index = 20"
+        )
+        db_connection.commit()
+
+        with patch('repositories.product_repository.calculate_keto_index_advanced') as mock_keto:
+            product_repo.recompute_derived_fields()
+        mock_keto.assert_not_called()
+
+        stored = product_repo.find_by_name("Stale 1")
+        expected = compute_derived_fields(stored)
+        assert {key: stored[key] for key in expected} == expected
+
+    def test_recompute_skips_invalid_rows(self, product_repo, db_connection):
+        """Test one invalid product does not stop the rest of its batch."""
+        self._insert_stale(db_connection, 3)
+        db_connection.execute("UPDATE products SET fiber_per_100g = 50 WHERE name = 'Stale 1'")
+        db_connection.commit()
+
+        assert product_repo.recompute_derived_fields() == 2
+        assert product_repo.find_by_name("Stale 1")["calc_version"] == 'old'
+        assert product_repo.find_by_name("Stale 2")["calc_version"] == CALC_VERSION
+
+    def test_recompute_nothing_stale(self, product_repo):
+        """Test the job is a no-op when every row is current."""
+        product_repo.create({"name": "Fresh", "protein_per_100g": 10.0, "fat_per_100g": 5.0,
+                             "carbs_per_100g": 2.0})
+        assert product_repo.recompute_derived_fields() == 0
+
+
 class TestProductRepositoryUpdate:
     """Test product updates."""
     
@@ -274,6 +376,24 @@ class TestProductRepositoryUpdate:
         assert updated is not None
         assert updated["name"] == "Tuna (updated)"
         assert updated["protein_per_100g"] == 32.0
+
+    def test_update_product_recalculates_stored_fields(self, product_repo):
+        """Test changed macros refresh the stored keto fields."""
+        created = product_repo.create(
+            {"name": "Yogurt", "protein_per_100g": 10.0, "fat_per_100g": 0.5,
+             "carbs_per_100g": 4.0, "category": "dairy"}
+        )
+
+        updated = product_repo.update(
+            created["id"],
+            {"name": "Yogurt", "protein_per_100g": 5.0, "fat_per_100g": 10.0,
+             "carbs_per_100g": 20.0},
+        )
+
+        assert updated["net_carbs_per_100g"] == 20.0
+        assert updated["keto_index"] < created["keto_index"]
+        assert updated["category"] == "dairy"
+        assert updated["calc_version"] == CALC_VERSION
     
     def test_update_product_nonexistent(self, product_repo):
         """Test updating non-existent product."""
@@ -397,3 +517,113 @@ class TestProductRepositoryHelpers:
         
         assert is_used is True
         assert count == 2
+
+
+class TestProductRepositoryUpsertMany:
+    """Test bulk upsert of products"""
+
+    def _product(self, name, protein=10.0, fat=5.0, carbs=2.0, **extra):
+        product = {
+            'name': name,
+            'protein_per_100g': protein,
+            'fat_per_100g': fat,
+            'carbs_per_100g': carbs,
+        }
+        product.update(extra)
+        return product
+
+    def test_upsert_many_inserts_with_derived_fields(self, product_repo):
+        """Test new products are inserted with calories and stored keto fields"""
+        result = product_repo.upsert_many([
+            self._product('Bulk Egg', 13, 11, 1),
+            self._product('Bulk Kale', 3, 1, 9, fiber_per_100g=4, category='vegetables'),
+        ])
+
+        assert result == {'inserted': 2, 'updated': 0, 'skipped': 0, 'failed': []}
+        kale = product_repo.db.execute(
+            "SELECT * FROM products WHERE name = 'Bulk Kale'"
+        ).fetchone()
+        expected = compute_derived_fields(dict(kale))
+        assert kale['calories_per_100g'] == 57.0
+        assert kale['keto_index'] == expected['keto_index']
+        assert kale['net_carbs_per_100g'] == expected['net_carbs_per_100g']
+        assert kale['calc_version'] == CALC_VERSION
+
+    def test_upsert_many_updates_existing(self, product_repo):
+        """Test an existing name is updated in place"""
+        product_id = product_repo.create(self._product('Bulk Cheese', 25, 33, 1))['id']
+
+        result = product_repo.upsert_many([self._product('Bulk Cheese', 20, 30, 2)])
+
+        assert result['updated'] == 1
+        assert result['inserted'] == 0
+        product = product_repo.find_by_id(product_id)
+        assert product['protein_per_100g'] == 20
+        assert product['calories_per_100g'] == 358.0
+
+    def test_upsert_many_skip_existing(self, product_repo):
+        """Test update_existing=False leaves existing products untouched"""
+        product_id = product_repo.create(self._product('Bulk Butter', 1, 81, 0))['id']
+
+        result = product_repo.upsert_many(
+            [self._product('Bulk Butter', 5, 50, 5), self._product('Bulk Ghee', 0, 99, 0)],
+            update_existing=False,
+        )
+
+        assert result['skipped'] == 1
+        assert result['inserted'] == 1
+        assert product_repo.find_by_id(product_id)['fat_per_100g'] == 81
+
+    def test_upsert_many_duplicate_in_list(self, product_repo):
+        """Test a repeated name counts as one insert and one update"""
+        result = product_repo.upsert_many([
+            self._product('Bulk Tofu', 8, 4, 2),
+            self._product('Bulk Tofu', 9, 5, 2),
+        ])
+
+        assert result['inserted'] == 1
+        assert result['updated'] == 1
+        assert product_repo.count() == 1
+
+    def test_upsert_many_isolates_failing_rows(self, product_repo):
+        """Test a constraint violation fails only its own row"""
+        product_repo.db.execute(
+            "CREATE TRIGGER reject_bad BEFORE INSERT ON products "
+            "WHEN NEW.name = 'Bulk Bad' BEGIN SELECT RAISE(ABORT, 'bad row'); END"
+        )
+        result = product_repo.upsert_many([
+            self._product('Bulk Good'),
+            self._product('Bulk Bad'),
+            self._product('Bulk Fine'),
+        ])
+
+        assert result['inserted'] == 2
+        assert [index for index, _ in result['failed']] == [1]
+        assert product_repo.find_by_name('Bulk Good') is not None
+        assert product_repo.find_by_name('Bulk Bad') is None
+
+    def test_upsert_many_empty(self, product_repo):
+        """Test an empty list is a no-op"""
+        assert product_repo.upsert_many([]) == {
+            'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': []
+        }
+
+
+class TestProductRepositoryKeyset:
+    """Test cursor pagination of products"""
+
+    def test_find_all_after_cursor(self, product_repo):
+        """Test pages continue after the (name, id) of the previous page"""
+        for name in ['Apple', 'Banana', 'Cherry', 'Date', 'Elderberry']:
+            product_repo.create({'name': name, 'protein_per_100g': 1.0,
+                                 'fat_per_100g': 0.5, 'carbs_per_100g': 10.0})
+
+        first = product_repo.find_all(limit=2)
+        last = first[-1]
+        second = product_repo.find_all(limit=2, after=(last['name'], last['id']))
+
+        assert [p['name'] for p in first] == ['Apple', 'Banana']
+        assert [p['name'] for p in second] == ['Cherry', 'Date']
+        assert [p['name'] for p in product_repo.find_all(search='e', after=('Cherry', 3))] == [
+            'Date', 'Elderberry'
+        ]
@@ -0,0 +1,182 @@
+"""
+Unit tests for the product search index.
+
+Runs against the real schema so the FTS5 tables and the triggers that keep
+them and product_usage in sync are exercised.
+"""
+
+import sqlite3
+
+import pytest
+
+from repositories.product_repository import (
+    ProductRepository,
+    _prefix_match_query,
+    _trigrams,
+)
+
+
+@pytest.fixture
+def db_connection():
+    """Create in-memory database with the full schema and a few products."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    with open('schema_v2.sql', 'r') as f:
+        conn.executescript(f.read())
+    conn.execute("DELETE FROM log_entries")
+    conn.execute("DELETE FROM dish_ingredients")
+    conn.execute("DELETE FROM dishes")
+    conn.execute("DELETE FROM products")
+    names = ['Chicken Breast', 'Chicken Thigh', 'Chickpeas', 'Broccoli', 'Cheddar Cheese',
+             'Crème fraîche', 'Peanut Butter']
+    for i, name in enumerate(names, 1):
+        conn.execute(
+            """
+            INSERT INTO products (id, name, calories_per_100g, protein_per_100g,
+                                  fat_per_100g, carbs_per_100g)
+            VALUES (?, ?, 100, 10, 5, 2)
+            """,
+            (i, name),
+        )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def repo(db_connection):
+    return ProductRepository(db_connection)
+
+
+def _log(conn, product_id, times=1):
+    for _ in range(times):
+        conn.execute(
+            "INSERT INTO log_entries (date, item_type, item_id, quantity_grams, meal_time) "
+            "VALUES ('2024-01-15', 'product', ?, 100, 'lunch')",
+            (product_id,),
+        )
+
+
+def _names(products):
+    return [p['name'] for p in products]
+
+
+class TestSearchHelpers:
+    """Test query building"""
+
+    def test_prefix_match_query(self):
+        """Test words become quoted prefix terms and operators are dropped"""
+        assert _prefix_match_query('Chick bre') == '"chick"* "bre"*'
+        assert _prefix_match_query('peanut "OR" -butter*') == '"peanut"* "or"* "butter"*'
+        assert _prefix_match_query('  ') == ''
+
+    def test_trigrams(self):
+        """Test trigrams ignore case and punctuation"""
+        assert _trigrams('Egg!') == {'egg'}
+        assert _trigrams('ab') == set()
+
+
+class TestProductSearch:
+    """Test ranked search"""
+
+    def test_prefix_autocomplete(self, repo):
+        """Test every word matches as a prefix"""
+        assert set(_names(repo.search('chick'))) == {
+            'Chicken Breast', 'Chicken Thigh', 'Chickpeas'
+        }
+        assert _names(repo.search('chi bre')) == ['Chicken Breast']
+        assert _names(repo.search('butter')) == ['Peanut Butter']
+
+    def test_diacritics_ignored(self, repo):
+        """Test accents do not need to be typed"""
+        assert _names(repo.search('creme fra')) == ['Crème fraîche']
+
+    def test_usage_boosts_rank(self, repo, db_connection):
+        """Test frequently logged products rank first"""
+        _log(db_connection, 2, times=20)
+        results = repo.search('chicken')
+        assert results[0]['name'] == 'Chicken Thigh'
+        assert results[0]['uses'] == 20
+        assert results[0]['match'] == 'prefix'
+        assert results[0]['score'] > results[1]['score']
+
+    def test_results_have_calculated_fields(self, repo):
+        """Test search results carry the same fields as find_all"""
+        product = repo.search('broccoli')[0]
+        assert 'net_carbs' in product
+        assert 'keto_index' in product
+
+    def test_fuzzy_fallback(self, repo):
+        """Test typos fall back to trigram matching"""
+        results = repo.search('brocoli')
+        assert _names(results) == ['Broccoli']
+        assert results[0]['match'] == 'fuzzy'
+        assert repo.search('brocoli', fuzzy=False) == []
+
+    def test_fuzzy_requires_similarity(self, repo):
+        """Test unrelated names are not returned"""
+        assert repo.search('xylophone') == []
+        assert repo.search('zz') == []
+
+    def test_limit(self, repo):
+        """Test the limit applies"""
+        assert len(repo.search('ch', limit=2)) == 2
+        assert repo.search('ch', limit=0) == []
+
+    def test_falls_back_without_index(self):
+        """Test databases without the index use substring search"""
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.execute(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, protein_per_100g REAL, "
+            "fat_per_100g REAL, carbs_per_100g REAL, calc_version TEXT)"
+        )
+        conn.execute("INSERT INTO products VALUES (1, 'Broccoli', 3, 0.4, 7, NULL)")
+        assert _names(ProductRepository(conn).search('rocc')) == ['Broccoli']
+
+
+class TestSearchIndexSync:
+    """Test the triggers keep the index in sync"""
+
+    def test_insert_update_delete(self, repo, db_connection):
+        """Test product writes reach both indexes"""
+        created = repo.create({'name': 'Zucchini', 'protein_per_100g': 1.2,
+                               'fat_per_100g': 0.3, 'carbs_per_100g': 3.1})
+        assert _names(repo.search('zucc')) == ['Zucchini']
+
+        repo.update(created['id'], {'name': 'Courgette', 'protein_per_100g': 1.2,
+                                    'fat_per_100g': 0.3, 'carbs_per_100g': 3.1})
+        assert repo.search('zucc', fuzzy=False) == []
+        assert _names(repo.search('courg')) == ['Courgette']
+        assert _names(repo.find_all(search='urget')) == ['Courgette']
+
+        repo.delete(created['id'])
+        assert repo.search('courg') == []
+        assert repo.find_all(search='urget') == []
+
+    def test_usage_counts_follow_log(self, db_connection):
+        """Test product_usage tracks log inserts, moves and deletes"""
+        _log(db_connection, 1, times=3)
+
+        def uses(product_id):
+            row = db_connection.execute(
+                "SELECT uses FROM product_usage WHERE product_id = ?", (product_id,)
+            ).fetchone()
+            return row[0] if row else 0
+
+        assert uses(1) == 3
+        entry_id = db_connection.execute("SELECT MIN(id) FROM log_entries").fetchone()[0]
+        db_connection.execute("UPDATE log_entries SET item_id = 4 WHERE id = ?", (entry_id,))
+        assert (uses(1), uses(4)) == (2, 1)
+        db_connection.execute("DELETE FROM log_entries WHERE item_id = 1")
+        assert uses(1) == 0
+
+    def test_find_all_substring_uses_trigram_index(self, repo, db_connection):
+        """Test find_all keeps LIKE semantics through the trigram index"""
+        assert _names(repo.find_all(search='HICK')) == [
+            'Chicken Breast', 'Chicken Thigh', 'Chickpeas'
+        ]
+        plan = db_connection.execute(
+            "EXPLAIN QUERY PLAN SELECT rowid FROM products_trigram WHERE name LIKE '%hick%'"
+        ).fetchall()
+        assert any('VIRTUAL TABLE INDEX' in row[3] for row in plan)
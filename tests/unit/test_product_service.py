@@ -136,12 +136,12 @@ class TestProductServiceGetProductById:
 class TestProductServiceCreateProduct:
     """Test creating products."""
     
-    @patch('services.product_service.cache_invalidate')
+    @patch('services.product_service.cache_manager')
     @patch('services.product_service.validate_product_data')
     def test_create_product_success(
         self,
         mock_validate,
-        mock_invalidate,
+        mock_cache,
         product_service,
         mock_repository
     ):
@@ -168,7 +168,7 @@ class TestProductServiceCreateProduct:
         assert product == created_product
         assert errors == []
         mock_repository.create.assert_called_once_with(cleaned_data)
-        mock_invalidate.assert_called_once_with("products:*")
+        mock_cache.delete_pattern.assert_called_once_with("products:*")
     
     @patch('services.product_service.validate_product_data')
     def test_create_product_validation_fails(
@@ -220,12 +220,12 @@ class TestProductServiceCreateProduct:
 class TestProductServiceUpdateProduct:
     """Test updating products."""
     
-    @patch('services.product_service.cache_invalidate')
+    @patch('services.product_service.cache_manager')
     @patch('services.product_service.validate_product_data')
     def test_update_product_success(
         self,
         mock_validate,
-        mock_invalidate,
+        mock_cache,
         product_service,
         mock_repository
     ):
@@ -253,7 +253,7 @@ class TestProductServiceUpdateProduct:
         assert product == updated_product
         assert errors == []
         mock_repository.update.assert_called_once_with(1, cleaned_data)
-        mock_invalidate.assert_called_once_with("products:*")
+        mock_cache.delete_pattern.assert_called_once_with("products:*")
     
     @patch('services.product_service.validate_product_data')
     def test_update_product_not_found(
@@ -306,10 +306,10 @@ class TestProductServiceUpdateProduct:
 class TestProductServiceDeleteProduct:
     """Test deleting products."""
     
-    @patch('services.product_service.cache_invalidate')
+    @patch('services.product_service.cache_manager')
     def test_delete_product_success(
         self,
-        mock_invalidate,
+        mock_cache,
         product_service,
         mock_repository
     ):
@@ -326,7 +326,7 @@ class TestProductServiceDeleteProduct:
         assert success is True
         assert errors == []
         mock_repository.delete.assert_called_once_with(1)
-        mock_invalidate.assert_called_once_with("products:*")
+        mock_cache.delete_pattern.assert_called_once_with("products:*")
     
     def test_delete_product_not_found(self, product_service, mock_repository):
         """Test deleting non-existent product."""
@@ -380,3 +380,87 @@ class TestProductServiceHelperMethods:
         
         assert count == 42
         mock_repository.count.assert_called_once()
+
+
+class TestProductServiceRankedSearch:
+    """Test ranked full-text search."""
+
+    @patch('services.product_service.cache_manager')
+    def test_search_ranked_caches_results(self, mock_cache, product_service, mock_repository):
+        """Test results are fetched once and cached under the products: prefix."""
+        mock_cache.get.return_value = None
+        mock_repository.search.return_value = [{"id": 1, "name": "Chicken"}]
+
+        result = product_service.search_products_ranked("  Chick ", limit=5)
+
+        assert result == [{"id": 1, "name": "Chicken"}]
+        mock_repository.search.assert_called_once_with("Chick", limit=5, fuzzy=True)
+        cache_key = mock_cache.set.call_args[0][0]
+        assert cache_key == "products:search:chick:5:1"
+
+    @patch('services.product_service.cache_manager')
+    def test_search_ranked_cache_hit(self, mock_cache, product_service, mock_repository):
+        """Test cached results skip the repository."""
+        mock_cache.get.return_value = [{"id": 2}]
+
+        assert product_service.search_products_ranked("egg") == [{"id": 2}]
+        mock_repository.search.assert_not_called()
+
+    def test_search_ranked_empty_query(self, product_service, mock_repository):
+        """Test blank queries and zero limits return nothing."""
+        assert product_service.search_products_ranked("   ") == []
+        assert product_service.search_products_ranked("egg", limit=0) == []
+        mock_repository.search.assert_not_called()
+
+    @patch('services.product_service.cache_manager')
+    def test_search_ranked_caps_limit(self, mock_cache, product_service, mock_repository):
+        """Test limit is capped at API_MAX_PER_PAGE."""
+        mock_cache.get.return_value = None
+        mock_repository.search.return_value = []
+
+        product_service.search_products_ranked("egg", limit=10000)
+
+        assert mock_repository.search.call_args[1]['limit'] == 200
+
+
+class TestProductServicePages:
+    """Test keyset pages."""
+
+    @patch('services.product_service.cache_manager')
+    def test_get_products_page_builds_cursor(self, mock_cache, product_service, mock_repository):
+        """Test an extra row is requested and turned into next_cursor."""
+        from src.pagination import decode_cursor
+
+        mock_cache.get.return_value = None
+        mock_repository.find_all.return_value = [
+            {"id": 1, "name": "Apple"}, {"id": 2, "name": "Banana"}, {"id": 3, "name": "Cherry"}
+        ]
+
+        products, cursor = product_service.get_products_page(limit=2)
+
+        assert [p["name"] for p in products] == ["Apple", "Banana"]
+        assert decode_cursor("products", cursor) == ("Banana", 2)
+        call_args = mock_repository.find_all.call_args[1]
+        assert call_args['limit'] == 3
+        assert call_args['after'] is None
+
+    @patch('services.product_service.cache_manager')
+    def test_get_products_page_passes_cursor(self, mock_cache, product_service, mock_repository):
+        """Test a cursor is decoded into the repository keyset."""
+        from src.pagination import encode_cursor
+
+        mock_cache.get.return_value = None
+        mock_repository.find_all.return_value = []
+
+        products, cursor = product_service.get_products_page(
+            cursor=encode_cursor("products", ["Banana", 2])
+        )
+
+        assert (products, cursor) == ([], None)
+        assert mock_repository.find_all.call_args[1]['after'] == ("Banana", 2)
+
+    def test_get_products_page_invalid_cursor(self, product_service, mock_repository):
+        """Test invalid cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            product_service.get_products_page(cursor="garbage")
+        mock_repository.find_all.assert_not_called()
@@ -0,0 +1,119 @@
+"""
+Unit tests for the memoized profile targets service.
+"""
+
+import sqlite3
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from services import profile_targets_service
+from services.profile_targets_service import (
+    ProfileTargetsService,
+    calculate_age,
+    compute_targets,
+    format_personal_macros,
+    invalidate_profile_targets,
+)
+from src.cache_manager import cache_manager
+
+
+@pytest.fixture
+def db_connection():
+    """Create in-memory database with a single profile"""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE user_profile (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            gender TEXT, birth_date DATE, height_cm INTEGER, weight_kg REAL,
+            activity_level TEXT, goal TEXT, body_fat_percentage REAL,
+            lean_body_mass_kg REAL, keto_type TEXT DEFAULT 'standard',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "INSERT INTO user_profile (gender, birth_date, height_cm, weight_kg, activity_level, goal) "
+        "VALUES ('male', '1990-06-15', 180, 80, 'moderate', 'maintenance')"
+    )
+    conn.commit()
+    # Other tests may leave the global cache pointed at a mock Redis client
+    with patch.object(cache_manager, 'use_redis', False):
+        invalidate_profile_targets()
+        yield conn
+        invalidate_profile_targets()
+    conn.close()
+
+
+class TestProfileTargetHelpers:
+    """Test pure helper functions"""
+
+    def test_calculate_age_rolls_over_on_birthday(self):
+        """Test age increments exactly on the birthday"""
+        assert calculate_age('1990-06-15', date(2024, 6, 14)) == 33
+        assert calculate_age('1990-06-15', date(2024, 6, 15)) == 34
+
+    def test_format_personal_macros_scales_by_days(self):
+        """Test weekly formatting scales absolute targets but not percentages"""
+        targets = {'bmr': 1800, 'tdee': 2500, 'target_calories': 2000,
+                   'carbs': 25, 'protein': 100, 'fats': 160}
+        daily = format_personal_macros(targets)
+        weekly = format_personal_macros(targets, days=7)
+        assert daily['target_calories'] == 2000
+        assert weekly['target_calories'] == 14000
+        assert weekly['protein'] == 700
+        assert weekly['fats_percentage'] == daily['fats_percentage'] == 72.0
+
+
+class TestProfileTargetsService:
+    """Test memoization and invalidation"""
+
+    def test_no_profile_returns_none(self, db_connection):
+        """Test None is returned without a profile"""
+        db_connection.execute('DELETE FROM user_profile')
+        assert ProfileTargetsService(db_connection).get_targets() is None
+
+    def test_targets_are_memoized(self, db_connection):
+        """Test the calculation chain runs once per profile version and day"""
+        service = ProfileTargetsService(db_connection)
+        today = date(2024, 1, 1)
+        with patch.object(profile_targets_service, 'compute_targets',
+                          wraps=compute_targets) as compute:
+            first = service.get_targets(today)
+            second = service.get_targets(today)
+        assert first == second
+        assert compute.call_count == 1
+        assert first['age'] == 33
+
+    def test_shared_cache_used_when_memo_empty(self, db_connection):
+        """Test another worker's result is picked up from cache_manager"""
+        service = ProfileTargetsService(db_connection)
+        today = date(2024, 1, 1)
+        service.get_targets(today)
+        profile_targets_service._memo.clear()
+        with patch.object(profile_targets_service, 'compute_targets') as compute:
+            service.get_targets(today)
+        compute.assert_not_called()
+
+    def test_new_date_recomputes(self, db_connection):
+        """Test a new day produces a new version so age rollovers apply"""
+        service = ProfileTargetsService(db_connection)
+        assert service.get_targets(date(2024, 6, 14))['age'] == 33
+        assert service.get_targets(date(2024, 6, 15))['age'] == 34
+
+    def test_profile_change_recomputes(self, db_connection):
+        """Test a profile edit is reflected even within the same second"""
+        service = ProfileTargetsService(db_connection)
+        today = date(2024, 1, 1)
+        before = service.get_targets(today)
+        db_connection.execute('UPDATE user_profile SET weight_kg = 100')
+        after = service.get_targets(today)
+        assert after['bmr'] > before['bmr']
+
+    def test_invalidate_clears_memo_and_cache(self, db_connection):
+        """Test invalidation drops both cache layers"""
+        ProfileTargetsService(db_connection).get_targets(date(2024, 1, 1))
+        invalidate_profile_targets()
+        assert profile_targets_service._memo == {}
+        assert cache_manager.get(profile_targets_service.CACHE_KEY) is None
@@ -0,0 +1,300 @@
+"""
+Query plan regression tests.
+
+Runs every repository method against the real schema, captures the SQL it
+executes and checks EXPLAIN QUERY PLAN for full table scans. Scans that are
+expected are listed in ALLOWED_SCANS; any other scan fails, so a query or
+schema change that stops using an index is caught before it ships.
+"""
+
+import re
+import sqlite3
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from repositories.dish_repository import DishRepository
+from repositories.fasting_repository import FastingRepository
+from repositories.log_repository import LogRepository
+from repositories.product_repository import ProductRepository
+from src.fasting_manager import FastingManager
+
+# Plan lines reading a whole table, view or CTE without an index (subquery
+# results, shown as "(subquery-N)", are not tables)
+BARE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+# Scans that are intended: method or trigger -> tables, aliases or CTEs it may scan
+ALLOWED_SCANS = {
+    # Lists every dish
+    'DishRepository.find_all': {'d'},
+    # Whole-table jobs run in the background at startup
+    'ProductRepository.count_stale': {'products'},
+    'ProductRepository.recompute_derived_fields': {'products'},
+    # Calendar and streak CTEs built from an index search
+    'FastingRepository.get_stats_with_streak': {
+        'dates', 'd', 'daily_sessions', 'streak_groups'
+    },
+    'FastingManager.get_fasting_stats': {'fasting_days'},
+    'FastingManager.get_fasting_progress': {'fasting_days'},
+}
+
+# Repository-like classes whose public methods must all be covered below
+CHECKED_CLASSES = (
+    ProductRepository, DishRepository, LogRepository, FastingRepository, FastingManager
+)
+
+PRODUCT = {'name': 'Plan Egg', 'protein_per_100g': 13, 'fat_per_100g': 11, 'carbs_per_100g': 1}
+
+
+@pytest.fixture
+def db_connection():
+    """Create in-memory database with the full schema and sample data."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    with open('schema_v2.sql', 'r') as f:
+        conn.executescript(f.read())
+    product_id = conn.execute("SELECT MIN(id) FROM products").fetchone()[0]
+    dish_id = DishRepository(conn).create({
+        'name': 'Plan Omelette',
+        'ingredients': [{'product_id': product_id, 'quantity_grams': 100}],
+    })['id']
+    for day in range(1, 4):
+        for item_type, item_id in (('product', product_id), ('dish', dish_id)):
+            conn.execute(
+                "INSERT INTO log_entries (date, item_type, item_id, quantity_grams, meal_time) "
+                "VALUES (?, ?, ?, 100, 'lunch')",
+                (f'2024-01-0{day}', item_type, item_id),
+            )
+        conn.execute(
+            "INSERT INTO fasting_sessions (user_id, start_time, end_time, duration_hours, status) "
+            "VALUES (1, ?, ?, 16, 'completed')",
+            (f'2024-01-0{day}T20:00:00', f'2024-01-0{day + 1}T12:00:00'),
+        )
+    conn.execute(
+        "INSERT INTO fasting_goals (user_id, goal_type, target_value, period_start, period_end) "
+        "VALUES (1, 'weekly_sessions', 5, '2024-01-01', '2024-01-07')"
+    )
+    # No ANALYZE: without statistics the planner assumes large tables, as in
+    # production, instead of scanning these few rows
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _repository_calls(conn):
+    """(name, call) for every public repository method, with realistic arguments"""
+    products = ProductRepository(conn)
+    dishes = DishRepository(conn)
+    logs = LogRepository(conn)
+    fasting = FastingRepository(conn)
+    manager = FastingManager(':memory:')
+    product_id = conn.execute("SELECT MIN(id) FROM products").fetchone()[0]
+    dish_id = conn.execute("SELECT MIN(id) FROM dishes").fetchone()[0]
+    entry_id = conn.execute("SELECT MIN(id) FROM log_entries").fetchone()[0]
+    session_id = conn.execute("SELECT MIN(id) FROM fasting_sessions").fetchone()[0]
+    goal_id = conn.execute("SELECT MIN(id) FROM fasting_goals").fetchone()[0]
+
+    return [
+        ('ProductRepository.find_all', lambda: products.find_all()),
+        ('ProductRepository.find_all', lambda: products.find_all(search='egg')),
+        ('ProductRepository.find_all', lambda: products.find_all(search='eg')),
+        ('ProductRepository.find_all', lambda: products.find_all(after=('egg', product_id))),
+        ('ProductRepository.search', lambda: products.search('chick')),
+        ('ProductRepository.search', lambda: products.search('chikcen')),
+        ('ProductRepository.find_by_id', lambda: products.find_by_id(product_id)),
+        ('ProductRepository.find_by_name', lambda: products.find_by_name('Plan Egg')),
+        ('ProductRepository.create', lambda: products.create(dict(PRODUCT))),
+        ('ProductRepository.update', lambda: products.update(product_id, dict(
+            PRODUCT, name='Plan Egg 2', fat_per_100g=12))),
+        ('ProductRepository.is_used_in_logs', lambda: products.is_used_in_logs(product_id)),
+        ('ProductRepository.find_logged_dates', lambda: products.find_logged_dates(product_id)),
+        ('ProductRepository.upsert_many', lambda: products.upsert_many([dict(PRODUCT)])),
+        ('ProductRepository.count_stale', lambda: products.count_stale()),
+        ('ProductRepository.recompute_derived_fields',
+         lambda: products.recompute_derived_fields()),
+        ('ProductRepository.exists', lambda: products.exists(product_id)),
+        ('ProductRepository.count', lambda: products.count()),
+        ('ProductRepository.delete', lambda: products.delete(products.create(dict(
+            PRODUCT, name='Plan Spare'))['id'])),
+
+        ('DishRepository.find_all', lambda: dishes.find_all()),
+        ('DishRepository.find_by_id', lambda: dishes.find_by_id(dish_id)),
+        ('DishRepository.find_by_name', lambda: dishes.find_by_name('Plan Omelette')),
+        ('DishRepository.create', lambda: dishes.create({
+            'name': 'Plan Scramble',
+            'ingredients': [{'product_id': product_id, 'quantity_grams': 50}],
+        })),
+        ('DishRepository.update', lambda: dishes.update(dish_id, {
+            'name': 'Plan Omelette',
+            'ingredients': [{'product_id': product_id, 'quantity_grams': 120}],
+        })),
+        ('DishRepository.exists', lambda: dishes.exists(dish_id)),
+        ('DishRepository.count', lambda: dishes.count()),
+        ('DishRepository.is_used_in_logs', lambda: dishes.is_used_in_logs(dish_id)),
+        ('DishRepository.find_logged_dates', lambda: dishes.find_logged_dates(dish_id)),
+        ('DishRepository.verify_products_exist', lambda: dishes.verify_products_exist(
+            [product_id])),
+        ('DishRepository.delete', lambda: dishes.delete(dishes.create({
+            'name': 'Plan Spare Dish',
+            'ingredients': [{'product_id': product_id, 'quantity_grams': 50}],
+        })['id'])),
+
+        ('LogRepository.find_all', lambda: logs.find_all()),
+        ('LogRepository.find_all', lambda: logs.find_all(date_filter='2024-01-02')),
+        ('LogRepository.find_all', lambda: logs.find_all(
+            after=('2024-01-02', '2024-01-02 00:00:00', entry_id))),
+        ('LogRepository.find_all', lambda: logs.find_all(
+            date_filter='2024-01-02', after=('2024-01-02', '2024-01-02 00:00:00', entry_id))),
+        ('LogRepository.find_by_id', lambda: logs.find_by_id(entry_id)),
+        ('LogRepository.find_by_date', lambda: logs.find_by_date('2024-01-02')),
+        ('LogRepository.create', lambda: logs.create({
+            'date': '2024-01-02', 'item_type': 'product', 'item_id': product_id,
+            'quantity_grams': 50, 'meal_time': 'snack',
+        })),
+        ('LogRepository.update', lambda: logs.update(entry_id, {
+            'date': '2024-01-03', 'quantity_grams': 150,
+        })),
+        ('LogRepository.get_daily_totals', lambda: logs.get_daily_totals('2024-01-02')),
+        ('LogRepository.get_rollups', lambda: logs.get_rollups('2024-01-01', '2024-01-31')),
+        ('LogRepository.rebuild_rollups', lambda: logs.rebuild_rollups()),
+        ('LogRepository.count_missing_snapshots', lambda: logs.count_missing_snapshots()),
+        ('LogRepository.snapshot_entries', lambda: logs.snapshot_entries(only_missing=False)),
+        ('LogRepository.count', lambda: logs.count()),
+        ('LogRepository.count', lambda: logs.count(date_filter='2024-01-02')),
+        ('LogRepository.verify_item_exists', lambda: logs.verify_item_exists('dish', dish_id)),
+        ('LogRepository.exists', lambda: logs.exists(entry_id)),
+        ('LogRepository.delete', lambda: logs.delete(entry_id)),
+
+        ('FastingRepository.find_all', lambda: fasting.find_all()),
+        ('FastingRepository.find_all', lambda: fasting.find_all(status='completed')),
+        ('FastingRepository.find_all', lambda: fasting.find_all(
+            after=('2024-01-02T20:00:00', session_id))),
+        ('FastingRepository.find_by_id', lambda: fasting.find_by_id(session_id)),
+        ('FastingRepository.get_active_session', lambda: fasting.get_active_session()),
+        ('FastingRepository.create', lambda: fasting.create({
+            'start_time': '2024-01-05T20:00:00',
+        })),
+        ('FastingRepository.update', lambda: fasting.update(session_id, {'notes': 'ok'})),
+        ('FastingRepository.get_statistics', lambda: fasting.get_statistics()),
+        ('FastingRepository.count', lambda: fasting.count()),
+        ('FastingRepository.count', lambda: fasting.count(status='completed')),
+        ('FastingRepository.find_goals', lambda: fasting.find_goals()),
+        ('FastingRepository.find_goals', lambda: fasting.find_goals(status='active')),
+        ('FastingRepository.create_goal', lambda: fasting.create_goal({
+            'goal_type': 'monthly_hours', 'target_value': 100,
+            'period_start': '2024-01-01', 'period_end': '2024-01-31',
+        })),
+        ('FastingRepository.update_goal', lambda: fasting.update_goal(goal_id, {
+            'current_value': 2,
+        })),
+        ('FastingRepository.find_settings', lambda: fasting.find_settings()),
+        ('FastingRepository.create_settings', lambda: fasting.create_settings({'user_id': 2})),
+        ('FastingRepository.update_settings', lambda: fasting.update_settings(2, {
+            'fasting_goal': '18:6',
+        })),
+        ('FastingRepository.get_stats_with_streak', lambda: fasting.get_stats_with_streak()),
+        ('FastingRepository.exists', lambda: fasting.exists(session_id)),
+        ('FastingRepository.delete', lambda: fasting.delete(session_id)),
+    ] + [(name, _on_connection(conn, call)) for name, call in [
+        ('FastingManager.start_fasting_session', lambda: manager.start_fasting_session()),
+        ('FastingManager.pause_fasting_session',
+         lambda: manager.pause_fasting_session(session_id + 1)),
+        ('FastingManager.resume_fasting_session',
+         lambda: manager.resume_fasting_session(session_id + 1)),
+        ('FastingManager.end_fasting_session',
+         lambda: manager.end_fasting_session(session_id + 1)),
+        ('FastingManager.cancel_fasting_session',
+         lambda: manager.cancel_fasting_session(session_id + 2)),
+        ('FastingManager.get_active_session', lambda: manager.get_active_session()),
+        ('FastingManager.get_fasting_sessions', lambda: manager.get_fasting_sessions()),
+        ('FastingManager.get_fasting_stats', lambda: manager.get_fasting_stats()),
+        ('FastingManager.create_fasting_goal', lambda: manager.create_fasting_goal(
+            'daily_hours', 16, date(2024, 1, 1), date(2024, 1, 7))),
+        ('FastingManager.update_goal_progress', lambda: manager.update_goal_progress(goal_id)),
+        ('FastingManager.get_fasting_goals', lambda: manager.get_fasting_goals()),
+        ('FastingManager.get_fasting_progress', lambda: manager.get_fasting_progress()),
+        ('FastingManager.get_fasting_settings', lambda: manager.get_fasting_settings()),
+        ('FastingManager.create_fasting_settings', lambda: manager.create_fasting_settings({
+            'user_id': 3, 'fasting_goal': '16:8', 'preferred_start_time': None,
+            'enable_reminders': 0, 'enable_notifications': 0, 'default_notes': '',
+        })),
+        ('FastingManager.update_fasting_settings', lambda: manager.update_fasting_settings(3, {
+            'fasting_goal': '20:4', 'preferred_start_time': None,
+            'enable_reminders': 1, 'enable_notifications': 0, 'default_notes': '',
+        })),
+    ]]
+
+
+def _on_connection(conn, call):
+    """Run a FastingManager call on conn instead of the connections it opens"""
+    def run():
+        with patch('src.fasting_manager.sqlite3.connect', return_value=conn):
+            return call()
+    return run
+
+
+def _capture(conn, call):
+    """SQL statements executed by call, with bound values inlined"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    return [
+        sql for sql in statements
+        if sql.split(None, 1)[0].upper() in ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+    ]
+
+
+def _bare_scans(conn, sql):
+    """Names of tables (or aliases) the statement reads without an index"""
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return {match.group(1) for row in plan for match in [BARE_SCAN.match(row[3])] if match}
+
+
+def _trigger_statements(conn):
+    """(trigger, statement) for every statement in a trigger body, NEW/OLD values as ?"""
+    statements = []
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"):
+        body = re.split(r'\bBEGIN\b', sql, maxsplit=1, flags=re.IGNORECASE)[1]
+        body = re.sub(r'\bEND\s*$', '', body.strip(), flags=re.IGNORECASE)
+        for statement in body.split(';'):
+            if statement.strip():
+                statements.append((name, re.sub(r'\b(NEW|OLD)\.\w+', '?', statement)))
+    return statements
+
+
+class TestRepositoryQueryPlans:
+    """Test repository queries are answered from indexes"""
+
+    def test_every_public_method_is_covered(self, db_connection):
+        """Test new repository methods are added to this suite"""
+        covered = {name for name, _ in _repository_calls(db_connection)}
+        for checked in CHECKED_CLASSES:
+            for attribute in dir(checked):
+                if not attribute.startswith('_') and callable(getattr(checked, attribute)):
+                    assert f'{checked.__name__}.{attribute}' in covered
+
+    def test_no_unexpected_table_scans(self, db_connection):
+        """Test no repository query scans a table it should seek"""
+        unexpected = []
+        for name, call in _repository_calls(db_connection):
+            for sql in _capture(db_connection, call):
+                for table in _bare_scans(db_connection, sql) - ALLOWED_SCANS.get(name, set()):
+                    unexpected.append(f"{name}: SCAN {table}\n    {' '.join(sql.split())}")
+        assert not unexpected, 'Unexpected full table scans:\n' + '\n'.join(unexpected)
+
+    def test_no_unexpected_trigger_scans(self, db_connection):
+        """Test trigger bodies, run on every write, seek their rows"""
+        unexpected = []
+        for trigger, sql in _trigger_statements(db_connection):
+            plan = db_connection.execute(
+                f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count('?')
+            ).fetchall()
+            for row in plan:
+                match = BARE_SCAN.match(row[3])
+                if match and match.group(1) not in ALLOWED_SCANS.get(trigger, set()):
+                    unexpected.append(f"{trigger}: SCAN {match.group(1)}")
+        assert not unexpected, 'Unexpected full table scans:\n' + '\n'.join(unexpected)
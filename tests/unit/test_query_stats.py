@@ -0,0 +1,216 @@
+"""
+Unit tests for SQL statement statistics and the slow-query log
+"""
+
+import sqlite3
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.query_stats import OTHER_QUERY_ID, StatementStats, database_file, explain, fingerprint
+from src.request_tracing import TracedConnection
+
+
+@pytest.fixture
+def stats():
+    stats = StatementStats(slow_ms=0)
+    with patch('src.request_tracing.statement_stats', stats):
+        yield stats
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'stats.db'), factory=TracedConnection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f'row {i}') for i in range(5)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+class TestFingerprint:
+    """Test statement normalization"""
+
+    def test_literals_and_whitespace(self):
+        """Test literals become placeholders and layout is ignored"""
+        query_id, query = fingerprint(
+            "SELECT *\n  FROM t -- newest first\n WHERE name = 'it''s' AND id > 42 LIMIT 10;"
+        )
+        assert query == "SELECT * FROM t WHERE name = ? AND id > ? LIMIT ?"
+        assert fingerprint("SELECT * FROM t WHERE name = 'x' AND id > 1 LIMIT 5")[0] == query_id
+
+    def test_lists_collapse(self):
+        """Test IN lists and multi-row VALUES share one entry whatever their length"""
+        assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?)")[1] == (
+            "SELECT * FROM t WHERE id IN (...)"
+        )
+        assert fingerprint("SELECT * FROM t WHERE id IN (?)")[1] == (
+            "SELECT * FROM t WHERE id IN (...)"
+        )
+        assert fingerprint("INSERT INTO t VALUES (?, ?), (?, ?), (?, ?)")[1] == (
+            "INSERT INTO t VALUES (?, ?), ..."
+        )
+
+    def test_identifiers_kept(self):
+        """Test digits inside identifiers are not treated as literals"""
+        assert fingerprint("SELECT fiber_per_100g FROM t1")[1] == "SELECT fiber_per_100g FROM t1"
+
+
+class TestStatementStats:
+    """Test statistics accounting"""
+
+    def test_record_and_snapshot(self):
+        """Test calls, timings and rows are aggregated per normalized statement"""
+        stats = StatementStats(slow_ms=0)
+        for i in range(1, 21):
+            stats.record(f"SELECT * FROM t WHERE id = {i}", i / 1000)
+        stats.record("UPDATE t SET name = ?", 0.05, rows=3)
+
+        by_calls = stats.snapshot(sort='calls')
+        assert [row['calls'] for row in by_calls] == [20, 1]
+        select = by_calls[0]
+        assert select['query'] == "SELECT * FROM t WHERE id = ?"
+        assert select['total_ms'] == pytest.approx(210)
+        assert select['mean_ms'] == pytest.approx(10.5)
+        assert select['p95_ms'] == pytest.approx(19)
+        assert select['max_ms'] == pytest.approx(20)
+
+        assert stats.snapshot(sort='mean', limit=1)[0]['rows'] == 3
+        with pytest.raises(ValueError):
+            stats.snapshot(sort='bogus')
+
+    def test_statement_limit(self):
+        """Test statements beyond max_statements are pooled into one entry"""
+        stats = StatementStats(max_statements=2)
+        for table in ('a', 'b', 'c', 'd'):
+            stats.record(f"SELECT * FROM {table}", 0.001)
+
+        rows = {row['query_id']: row for row in stats.snapshot()}
+        assert len(rows) == 3
+        assert rows[OTHER_QUERY_ID]['calls'] == 2
+
+    def test_reset(self):
+        """Test reset forgets statements and slow queries"""
+        stats = StatementStats(slow_ms=1)
+        stats.record("SELECT 1", 0.5)
+        stats.log_slow(sqlite3.connect(':memory:'), "SELECT 1", 0.5, ())
+        stats.reset()
+        assert stats.snapshot() == []
+        assert stats.slow_queries() == []
+
+    def test_metrics_published(self):
+        """Test executions and slow calls feed the Prometheus collector"""
+        stats = StatementStats(slow_ms=10)
+        with patch('src.query_stats.metrics_collector') as collector:
+            query_id = stats.record("SELECT 1", 0.02, rows=2)
+            stats.add_rows(query_id, 4)
+
+        collector.record_statement.assert_any_call(query_id, 0.02, 2, slow=True)
+        collector.record_statement.assert_any_call(query_id, None, 4)
+
+
+class TestSlowQueryLog:
+    """Test slow statements are logged with their plans"""
+
+    def test_plan_included(self, conn):
+        """Test the slow-query record carries the plan and full scans once written"""
+        stats = StatementStats(slow_ms=1)
+        slow_log = Mock()
+        stats.configure(slow_log=slow_log)
+
+        record = stats.log_slow(conn, "SELECT * FROM t WHERE name = ?", 0.25, ('row 1',))
+        assert record['duration_ms'] == 250
+        assert stats.slow_queries() == [record]
+        assert stats.flush_slow_log() == 1
+        assert record['plan'] == ['SCAN t']
+        assert record['scans'] == ['SCAN t']
+        slow_log.assert_called_once_with(record)
+
+        record = stats.log_slow(conn, "SELECT * FROM t WHERE id = ?", 0.25, (1,))
+        stats.flush_slow_log()
+        assert record['scans'] == []
+        assert 'SEARCH t' in record['plan'][0]
+
+    def test_request_path_only_queues(self, conn):
+        """Test log_slow neither explains nor writes on the calling thread"""
+        stats = StatementStats(slow_ms=1)
+        stats._slow_writer.flush_interval = 60
+        slow_log = Mock()
+        stats.configure(slow_log=slow_log)
+
+        with patch('src.query_stats.explain') as explain_plan:
+            record = stats.log_slow(conn, "SELECT * FROM t WHERE name = ?", 0.25, ('row 1',))
+            explain_plan.assert_not_called()
+        slow_log.assert_not_called()
+        assert record['plan'] is None
+        assert stats.slow_log_stats()['queued'] == 1
+
+    def test_full_queue_drops_are_counted(self, conn):
+        """Test slow queries beyond the queue capacity are dropped and counted"""
+        stats = StatementStats(slow_ms=1)
+        stats._slow_writer.capacity = 1
+        stats._slow_writer.flush_interval = 60
+        stats.log_slow(conn, "SELECT * FROM t", 0.25, ())
+        stats.log_slow(conn, "SELECT * FROM t", 0.25, ())
+        assert stats.slow_log_stats()['dropped'] == 1
+        assert len(stats.slow_queries()) == 2
+
+    def test_database_file(self, conn):
+        """Test the database path is found for file connections only"""
+        assert database_file(conn).endswith('stats.db')
+        assert database_file(sqlite3.connect(':memory:')) == ''
+
+    def test_plan_skipped_without_parameters(self, conn):
+        """Test statements run by executemany are logged without a plan"""
+        stats = StatementStats()
+        record = stats.log_slow(conn, "UPDATE t SET name = ?", 0.25)
+        stats.flush_slow_log()
+        assert record['plan'] is None
+
+    def test_explain_failure(self, conn):
+        """Test statements that cannot be explained yield no plan"""
+        assert explain(conn, "SELECT * FROM missing") is None
+        assert explain(conn, "SELECT * FROM t WHERE id = ?", ()) is None
+
+    def test_slow_log_errors_are_swallowed(self, conn):
+        """Test a failing slow-query sink does not break the statement"""
+        stats = StatementStats(slow_ms=1)
+        stats.configure(slow_log=Mock(side_effect=OSError('disk full')))
+        assert stats.log_slow(conn, "SELECT 1", 0.25, ())['query'] == 'SELECT ?'
+        assert stats.flush_slow_log() == 1
+
+
+class TestTracedCursorStats:
+    """Test get_db connections feed the statistics"""
+
+    def test_statements_and_rows(self, stats, conn):
+        """Test statements are counted with rows fetched or changed"""
+        conn.execute("SELECT * FROM t WHERE id < ?", (3,)).fetchall()
+        conn.execute("SELECT * FROM t WHERE id < ?", (5,)).fetchone()
+        conn.execute("UPDATE t SET name = 'x' WHERE id < 2")
+
+        rows = {row['query']: row for row in stats.snapshot()}
+        select = rows["SELECT * FROM t WHERE id < ?"]
+        assert select['calls'] == 2
+        assert select['rows'] == 4
+        assert rows["UPDATE t SET name = ? WHERE id < ?"]['rows'] == 2
+
+    def test_slow_statements_logged(self, stats, conn):
+        """Test statements over the threshold are logged with their plan"""
+        stats.configure(slow_ms=0.000001)
+        conn.execute("SELECT * FROM t WHERE name = ?", ('row 1',)).fetchall()
+        stats.flush_slow_log()
+
+        slow = stats.slow_queries()
+        assert slow[-1]['query'] == "SELECT * FROM t WHERE name = ?"
+        assert slow[-1]['scans'] == ['SCAN t']
+        # The EXPLAIN itself is not accounted
+        assert not any('EXPLAIN' in row['query'] for row in stats.snapshot())
+
+    def test_disabled(self, stats, conn):
+        """Test nothing is recorded while statistics are off"""
+        stats.configure(enabled=False)
+        stats.reset()
+        conn.execute("SELECT * FROM t").fetchall()
+        assert stats.snapshot() == []
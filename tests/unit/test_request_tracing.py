@@ -0,0 +1,211 @@
+"""
+Unit tests for per-request span tracing
+"""
+
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, jsonify
+
+from src.request_tracing import (
+    CALC,
+    MAX_SPANS,
+    SERIALIZE,
+    SQL,
+    RequestTrace,
+    TracedConnection,
+    TracedJSONProvider,
+    begin_trace,
+    current_trace,
+    end_trace,
+    span,
+    traced,
+)
+
+
+@pytest.fixture
+def flask_app():
+    app = Flask(__name__)
+    app.json = TracedJSONProvider(app)
+    return app
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', factory=TracedConnection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f'row {i}') for i in range(5)])
+    yield conn
+    conn.close()
+
+
+class TestRequestTrace:
+    """Test span bookkeeping and output formats"""
+
+    def test_totals_and_server_timing(self):
+        """Test totals per name and the Server-Timing header value"""
+        trace = RequestTrace()
+        trace.add(SQL, trace.start, 0.002, 'SELECT 1')
+        trace.add(SQL, trace.start, 0.001, 'SELECT 2')
+        trace.add(SQL, trace.start, 0.0005, count=0)
+        trace.add(CALC, trace.start, 0.004)
+
+        assert trace.durations() == {SQL: pytest.approx(0.0035), CALC: pytest.approx(0.004)}
+        assert trace.server_timing(0.01) == (
+            'sql;dur=3.5;desc="2 queries", calc;dur=4.0, total;dur=10.0'
+        )
+        assert len(trace.spans) == 3
+
+    def test_to_dict(self):
+        """Test the JSON trace lists spans with collapsed SQL text"""
+        trace = RequestTrace()
+        trace.add(SQL, trace.start + 0.001, 0.002, 'SELECT *\n    FROM t')
+
+        data = trace.to_dict()
+        assert data['totals'] == {SQL: {'duration_ms': 2.0, 'count': 1}}
+        assert data['spans'] == [
+            {'name': SQL, 'start_ms': 1.0, 'duration_ms': 2.0, 'detail': 'SELECT * FROM t'}
+        ]
+
+    def test_span_list_is_bounded(self):
+        """Test spans beyond MAX_SPANS are dropped but still counted in totals"""
+        trace = RequestTrace()
+        for _ in range(MAX_SPANS + 3):
+            trace.add(SQL, trace.start, 0.001)
+
+        assert len(trace.spans) == MAX_SPANS
+        assert trace.dropped == 3
+        assert trace.totals[SQL][1] == MAX_SPANS + 3
+
+
+class TestSpans:
+    """Test span() and @traced against the trace in flask.g"""
+
+    def test_noop_outside_trace(self, flask_app):
+        """Test spans do nothing without an app context or an active trace"""
+        with span(CALC):
+            pass
+        assert current_trace() is None
+        with flask_app.app_context():
+            with span(CALC):
+                pass
+            assert current_trace() is None
+            assert end_trace() is None
+
+    def test_nested_spans_counted_once(self, flask_app):
+        """Test a span nested in one of the same name is folded into it"""
+        @traced(CALC)
+        def inner():
+            return 42
+
+        with flask_app.app_context():
+            trace = begin_trace()
+            with span(CALC):
+                assert inner() == 42
+            with span(SERIALIZE):
+                pass
+
+            assert end_trace() is trace
+            assert current_trace() is None
+        assert trace.totals[CALC][1] == 1
+        assert [s[0] for s in trace.spans] == [CALC, SERIALIZE]
+
+    def test_span_recorded_on_error(self, flask_app):
+        """Test a span is closed when the block raises"""
+        with flask_app.app_context():
+            trace = begin_trace()
+            with pytest.raises(ValueError):
+                with span(CALC):
+                    raise ValueError('boom')
+            with span(CALC):
+                pass
+        assert trace.totals[CALC][1] == 2
+
+
+class TestTracedConnection:
+    """Test automatic SQL spans"""
+
+    def test_statements_and_fetches_timed(self, flask_app, conn):
+        """Test connection and cursor statements count as queries, fetches add time only"""
+        with flask_app.app_context():
+            trace = begin_trace()
+            rows = conn.execute("SELECT * FROM t WHERE id < ?", (3,)).fetchall()
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM t")
+            cursor.fetchone()
+            cursor.fetchmany(2)
+            conn.executemany("UPDATE t SET name = ? WHERE id = ?", [('x', 1), ('y', 2)])
+
+        assert [row['id'] for row in rows] == [0, 1, 2]
+        assert trace.totals[SQL][1] == 3
+        assert [s[3] for s in trace.spans] == [
+            "SELECT * FROM t WHERE id < ?",
+            "SELECT name FROM t",
+            "UPDATE t SET name = ? WHERE id = ?",
+        ]
+
+    def test_failed_statement_recorded(self, flask_app, conn):
+        """Test a failing statement is still timed"""
+        with flask_app.app_context():
+            trace = begin_trace()
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("SELECT * FROM missing")
+        assert trace.totals[SQL][1] == 1
+
+    def test_untraced_connection_behaves_normally(self, conn):
+        """Test a traced connection works outside any request"""
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 5
+
+
+class TestTracedJSONProvider:
+    """Test serialization spans"""
+
+    def test_jsonify_recorded(self, flask_app):
+        """Test jsonify() encoding is timed as a serialize span"""
+        with flask_app.app_context():
+            trace = begin_trace()
+            response = jsonify({'a': 1})
+
+        assert response.get_json() == {'a': 1}
+        assert trace.totals[SERIALIZE][1] == 1
+
+
+class TestServerTimingHook:
+    """Test the app hooks emitting Server-Timing and span metrics"""
+
+    def test_server_timing_header(self, client):
+        """Test API responses carry SQL and serialization timings"""
+        with patch('app.metrics_collector.record_request_spans') as record:
+            response = client.get('/api/products')
+
+        assert response.status_code == 200
+        timing = response.headers['Server-Timing']
+        assert timing.startswith('sql;dur=')
+        assert 'serialize;dur=' in timing
+        assert 'total;dur=' in timing
+        endpoint, durations = record.call_args[0]
+        assert endpoint == 'products.products_api'
+        assert set(durations) == {SQL, SERIALIZE}
+
+    def test_tracing_disabled(self, client):
+        """Test no header when tracing is off"""
+        with patch('app.Config.REQUEST_TRACING', False):
+            response = client.get('/api/products')
+        assert 'Server-Timing' not in response.headers
+
+    def test_trace_logged_on_request(self, client):
+        """Test X-Request-Trace queues the full JSON trace for the background writer"""
+        with patch('app.Config.REQUEST_TRACE_REQUESTS', True), \
+                patch('app.structured_logger.log_performance_event') as write, \
+                patch('app.structured_logger.enqueue_performance_event') as log:
+            client.get('/api/products')
+            assert not log.called
+            client.get('/api/products', headers={'X-Request-Trace': '1'})
+
+        write.assert_not_called()
+        operation, duration, details = log.call_args[0]
+        assert operation == 'GET /api/products'
+        assert details['status_code'] == 200
+        assert SERIALIZE in details['trace']['totals']
@@ -0,0 +1,125 @@
+"""
+Unit tests for the bounded LRU + TTL response cache
+"""
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    """Small response cache"""
+    with patch('src.response_cache.cache_manager') as manager:
+        manager.is_shared = False
+        yield ResponseCache('test', max_entries=3, max_bytes=100, ttl=60)
+
+
+class TestResponseCache:
+    """Test ResponseCache eviction, expiry and invalidation"""
+
+    def test_get_returns_stored_entry(self, cache):
+        """Test a stored body is served back with its status"""
+        cache.set('a', b'{"x": 1}', 200, tags=['2024-01-01'])
+        entry = cache.get('a')
+        assert entry.body == b'{"x": 1}'
+        assert entry.status == 200
+        assert cache.get_stats()['hits'] == 1
+
+    def test_lru_eviction_by_entries(self, cache):
+        """Test the least recently used entry is evicted first"""
+        for key in 'abc':
+            cache.set(key, b'x')
+        cache.get('a')
+        cache.set('d', b'x')
+        assert 'b' not in cache
+        assert 'a' in cache and 'd' in cache
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_eviction_by_bytes(self, cache):
+        """Test entries are evicted to respect the memory bound"""
+        cache.set('a', b'x' * 60)
+        cache.set('b', b'x' * 60)
+        assert 'a' not in cache
+        assert cache.get_stats()['bytes'] == 60
+        assert cache.set('huge', b'x' * 101) is False
+
+    def test_ttl_expiry(self, cache):
+        """Test expired entries are treated as misses"""
+        cache.set('a', b'x')
+        with patch('src.response_cache.time.time', return_value=time.time() + 61):
+            assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_invalidate_by_tag(self, cache):
+        """Test invalidation drops exactly the tagged entries"""
+        cache.set('day1', b'x', tags=['2024-01-01'])
+        cache.set('week', b'x', tags=['2024-01-01', '2024-01-02'])
+        cache.set('day2', b'x', tags=['2024-01-02'])
+        assert cache.invalidate(['2024-01-01']) == 2
+        assert list(cache._entries) == ['day2']
+
+    def test_invalidate_all(self, cache):
+        """Test invalidate_all drops every entry"""
+        cache.set('a', b'x', tags=['2024-01-01'])
+        cache.set('b', b'x')
+        assert cache.invalidate_all() == 2
+        assert len(cache) == 0
+
+    def test_invalidation_during_compute_drops_entry(self, cache):
+        """Test a body computed across an invalidation of its tags is not stored"""
+        version = cache.version(['2024-01-01'])
+        cache.invalidate(['2024-01-01'])
+        assert cache.set('day1', b'stale', tags=['2024-01-01'], version=version) is False
+        assert cache.get('day1') is None
+
+        version = cache.version(['2024-01-01'])
+        cache.invalidate(['2024-01-02'])
+        assert cache.set('day1', b'fresh', tags=['2024-01-01'], version=version) is True
+
+    def test_invalidate_all_during_compute_drops_entry(self, cache):
+        """Test invalidate_all also discards responses being computed"""
+        version = cache.version(['2024-01-01'])
+        cache.invalidate_all()
+        assert cache.set('day1', b'stale', tags=['2024-01-01'], version=version) is False
+
+    def test_records_cache_metrics(self, cache):
+        """Test hits and misses are exported to the metrics collector"""
+        with patch('src.response_cache.metrics_collector') as collector:
+            cache.get('missing')
+            cache.set('a', b'x')
+            cache.get('a')
+        calls = collector.record_cache_operation.call_args_list
+        assert [c.args for c in calls] == [('test_response', False), ('test_response', True)]
+
+
+class TestSharedInvalidation:
+    """Test cross-process invalidation tokens"""
+
+    def test_token_change_marks_entry_stale(self):
+        """Test an entry is dropped once another process bumps its tag token"""
+        tokens = {}
+        with patch('src.response_cache.cache_manager') as manager:
+            manager.is_shared = True
+            manager.get.side_effect = tokens.get
+            cache = ResponseCache('test', ttl=60)
+            cache.set('a', b'x', tags=['2024-01-01'])
+            assert cache.get('a') is not None
+
+            tokens['response_cache:test:2024-01-01'] = 'other-worker'
+            assert cache.get('a') is None
+
+    def test_token_change_during_compute_drops_entry(self):
+        """Test a body computed while another process invalidated its tags is not stored"""
+        tokens = {}
+        with patch('src.response_cache.cache_manager') as manager:
+            manager.is_shared = True
+            manager.get.side_effect = tokens.get
+            cache = ResponseCache('test', ttl=60)
+            version = cache.version(['2024-01-01'])
+
+            tokens['response_cache:test:2024-01-01'] = 'other-worker'
+            assert cache.set('a', b'stale', tags=['2024-01-01'], version=version) is False
+            assert cache.get('a') is None
@@ -2,15 +2,19 @@
 Unit tests for security.py
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
+from src.cache_manager import CacheManager
 from src.security import (
     AuditLogger,
     InputValidator,
     RateLimiter,
+    RateLimitResult,
     SecurityHeaders,
     SecurityManager,
     rate_limit,
@@ -155,7 +159,8 @@ class TestRateLimiter:
     def test_is_allowed_new_key(self):
         """Test rate limiting with new key"""
         mock_cache = Mock()
-        mock_cache.get.return_value = 0
+        mock_cache.incr.return_value = 1
+        mock_cache.get.return_value = None
         limiter = RateLimiter(mock_cache)
 
         identifier = "test_key"
@@ -167,7 +172,8 @@ class TestRateLimiter:
     def test_is_allowed_within_limit(self):
         """Test rate limiting within limit"""
         mock_cache = Mock()
-        mock_cache.get.return_value = 5
+        mock_cache.incr.return_value = 6
+        mock_cache.get.return_value = None
         limiter = RateLimiter(mock_cache)
 
         identifier = "test_key"
@@ -179,19 +185,20 @@ class TestRateLimiter:
     def test_is_allowed_exceed_limit(self):
         """Test rate limiting when limit is exceeded"""
         mock_cache = Mock()
-        mock_cache.get.return_value = 100  # At the limit
+        mock_cache.incr.return_value = 101  # Past the limit
+        mock_cache.get.return_value = None
         limiter = RateLimiter(mock_cache)
 
         identifier = "test_key"
         limit_type = "api"
 
-        # Request at limit should be denied
+        # Request past the limit should be denied
         assert limiter.is_allowed(identifier, limit_type) is False
 
     def test_get_remaining_requests(self):
         """Test getting remaining requests"""
         mock_cache = Mock()
-        mock_cache.get.return_value = 3
+        mock_cache.get.side_effect = [3, None]  # current window, previous window
         limiter = RateLimiter(mock_cache)
 
         identifier = "test_key"
@@ -200,6 +207,99 @@ class TestRateLimiter:
         remaining = limiter.get_remaining_requests(identifier, limit_type)
 
         assert remaining == 97  # 100 - 3 = 97
+        mock_cache.incr.assert_not_called()
+
+    def test_previous_window_is_weighted(self):
+        """Test the previous window counts in proportion to its overlap"""
+        mock_cache = Mock()
+        mock_cache.incr.return_value = 10
+        mock_cache.get.return_value = 100
+        limiter = RateLimiter(mock_cache)
+
+        # Halfway through the window: 10 + 100 * 0.5 = 60 used
+        with patch("src.security.time.time", return_value=3600 * 1000 + 1800):
+            result = limiter.check("test_key", "api")
+
+        assert result.allowed is True
+        assert result.remaining == 40
+        assert result.reset == 1800
+        mock_cache.incr.assert_called_once_with("rate_limit:api:test_key:1000", 7200)
+        mock_cache.get.assert_called_once_with("rate_limit:api:test_key:999")
+
+    def test_retry_after_accounts_for_previous_window(self):
+        """Test a denied client is allowed again exactly when Retry-After says"""
+        cache = CacheManager(fallback_cache_size=100)
+        cache.use_redis = False
+        limiter = RateLimiter(cache)
+        start = 3600 * 1000  # first second of window 1000
+
+        # 150 hits last window keep the client blocked for a third of this one
+        cache.set("rate_limit:api:client:999", 150, 7200)
+        with patch("src.security.time.time", return_value=start):
+            result = limiter.check("client")
+        assert result.allowed is False
+        assert result.reset == 1224  # 1 + 150 * (1 - elapsed) <= 100 from 34% on
+
+        with patch("src.security.time.time", return_value=start + result.reset - 60):
+            assert limiter.check("client").allowed is False
+        with patch("src.security.time.time", return_value=start + result.reset):
+            assert limiter.check("client").allowed is True
+
+    def test_denied_requests_are_not_counted(self):
+        """Test retrying while blocked does not extend the lockout"""
+        cache = CacheManager(fallback_cache_size=100)
+        cache.use_redis = False
+        limiter = RateLimiter(cache)
+        limiter.default_limits["api"] = {"requests": 10, "window": 3600}
+        start = 3600 * 1000
+
+        with patch("src.security.time.time", return_value=start):
+            assert [limiter.check("client").allowed for _ in range(10)] == [True] * 10
+            denied = [limiter.check("client") for _ in range(50)]
+            assert cache.get("rate_limit:api:client:1000") == 10
+        assert not any(result.allowed for result in denied)
+        # Next window: 1 + 10 * (1 - elapsed) <= 10 once 10% of it has passed
+        assert denied[-1].reset == 3600 + 360
+
+        with patch("src.security.time.time", return_value=start + denied[-1].reset):
+            assert limiter.check("client").allowed is True
+
+    def test_check_fails_open_when_increment_fails(self):
+        """Test a failed increment allows the request"""
+        mock_cache = Mock()
+        mock_cache.incr.return_value = None
+        limiter = RateLimiter(mock_cache)
+
+        assert limiter.check("test_key", "auth") == RateLimitResult(True, 10, 10, 3600)
+
+    def test_concurrent_requests_are_all_counted(self):
+        """Test the atomic increment loses no hits across threads"""
+        cache = CacheManager(fallback_cache_size=100)
+        cache.use_redis = False
+        limiter = RateLimiter(cache)
+        limiter.default_limits["api"] = {"requests": 100, "window": 3600}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: limiter.is_allowed("client"), range(150)))
+
+        assert results.count(True) <= 100
+        assert limiter.get_remaining_requests("client") == 0
+
+    def test_check_overhead_is_bounded(self):
+        """Microbenchmark: per-request limiter overhead on the fallback cache"""
+        cache = CacheManager(fallback_cache_size=1000)
+        cache.use_redis = False
+        limiter = RateLimiter(cache)
+        limiter.default_limits["api"] = {"requests": 10 ** 9, "window": 3600}
+
+        iterations = 5000
+        start = time.perf_counter()
+        for i in range(iterations):
+            limiter.check(f"client-{i % 50}")
+        per_call = (time.perf_counter() - start) / iterations
+
+        # Typically a few microseconds; generous bound for slow CI hosts
+        assert per_call < 0.001
 
 
 class TestSecurityHeaders:
@@ -621,18 +721,16 @@ class TestRateLimitDecorator:
         with app.test_request_context(
             headers={"User-Agent": "TestAgent"}, environ_base={"REMOTE_ADDR": "127.0.0.1"}
         ):
-            with patch("src.security.RateLimiter") as mock_rate_limiter_class:
-                # Mock RateLimiter instance
-                mock_limiter_instance = MagicMock()
-                mock_limiter_instance.is_allowed.return_value = False
-                mock_limiter_instance.get_remaining_requests.return_value = 0
-                mock_rate_limiter_class.return_value = mock_limiter_instance
+            with patch("src.security.rate_limiter") as mock_limiter:
+                mock_limiter.check.return_value = RateLimitResult(False, 100, 0, 120)
 
                 response, status_code = dummy_function()
                 assert status_code == 429
                 assert response.json["error"] == "Rate limit exceeded"
-                assert "retry_after" in response.json
+                assert response.json["retry_after"] == 120
                 assert response.json["remaining_requests"] == 0
+                assert response.headers["Retry-After"] == "120"
+                assert response.headers["X-RateLimit-Remaining"] == "0"
 
         # Restore TESTING mode
         app.config["TESTING"] = True
@@ -650,14 +748,14 @@ class TestRateLimitDecorator:
         with app.test_request_context(
             headers={"User-Agent": "TestAgent"}, environ_base={"REMOTE_ADDR": "127.0.0.1"}
         ):
-            with patch("src.security.RateLimiter") as mock_rate_limiter_class:
-                # Mock RateLimiter instance
-                mock_limiter_instance = MagicMock()
-                mock_limiter_instance.is_allowed.return_value = True
-                mock_rate_limiter_class.return_value = mock_limiter_instance
-
-                result = dummy_function()
-                assert result == "success"
+            with patch("src.security.rate_limiter") as mock_limiter:
+                mock_limiter.check.return_value = RateLimitResult(True, 100, 42, 600)
+
+                response = dummy_function()
+                assert response.get_data(as_text=True) == "success"
+                assert response.headers["X-RateLimit-Limit"] == "100"
+                assert response.headers["X-RateLimit-Remaining"] == "42"
+                assert response.headers["X-RateLimit-Reset"] == "600"
 
         # Restore TESTING mode
         app.config["TESTING"] = True
@@ -0,0 +1,145 @@
+"""
+Unit tests for the SQLite-backed shared cache
+"""
+import multiprocessing
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.cache_manager import CacheManager
+from src.shared_cache import SQLiteCache
+
+
+def _store_in_child(path):
+    """Write a key from a separate process"""
+    SQLiteCache(path).store('child:key', {'from': 'child'}, 60)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Path to a fresh shared cache file"""
+    return str(tmp_path / 'cache' / 'cache.sqlite3')
+
+
+class TestSQLiteCache:
+    """Test get/set/delete/TTL semantics of SQLiteCache"""
+
+    def test_store_and_lookup_round_trip_json(self, cache_path):
+        """Test values come back as JSON-decoded copies"""
+        cache = SQLiteCache(cache_path)
+        cache.store('a', {'x': [1, 2]}, 60)
+        assert cache.lookup('a') == {'x': [1, 2]}
+        assert 'a' in cache
+        assert len(cache) == 1
+
+    def test_lookup_missing(self, cache_path):
+        """Test a missing key returns None"""
+        assert SQLiteCache(cache_path).lookup('missing') is None
+
+    def test_expired_entry_is_not_returned(self, cache_path):
+        """Test TTL expiry"""
+        cache = SQLiteCache(cache_path)
+        cache.store('a', 1, 60)
+        with patch('src.shared_cache.time.time', return_value=time.time() + 61):
+            assert cache.lookup('a') is None
+            assert len(cache) == 0
+
+    def test_incr_keeps_original_expiry(self, cache_path):
+        """Test counters increment atomically without extending their TTL"""
+        cache = SQLiteCache(cache_path)
+        assert [cache.incr('hits', 60) for _ in range(3)] == [1, 2, 3]
+        assert cache.incr('hits', 60, -1) == 2
+        assert cache.lookup('hits') == 2
+        with patch('src.shared_cache.time.time', return_value=time.time() + 61):
+            assert cache.incr('hits', 60) == 1
+
+    def test_discard(self, cache_path):
+        """Test discard reports whether the key existed"""
+        cache = SQLiteCache(cache_path)
+        cache.store('a', 1, 60)
+        assert cache.discard('a') is True
+        assert cache.discard('a') is False
+
+    def test_delete_pattern(self, cache_path):
+        """Test glob deletes only touch matching keys"""
+        cache = SQLiteCache(cache_path)
+        for key in ('products:1', 'products:2', 'logs:1'):
+            cache.store(key, 1, 60)
+        assert cache.delete_pattern('products:*') == 2
+        assert cache.lookup('logs:1') == 1
+
+    def test_purge_enforces_maxsize(self, cache_path):
+        """Test the periodic purge drops the soonest-expiring entries beyond maxsize"""
+        cache = SQLiteCache(cache_path, maxsize=2)
+        cache.store('short', 1, 10)
+        cache.store('long', 1, 100)
+        cache.store('longer', 1, 1000)
+        assert cache.purge_expired() == 1
+        assert cache.lookup('short') is None
+        assert cache.lookup('longer') == 1
+
+    def test_clear(self, cache_path):
+        """Test clear removes everything"""
+        cache = SQLiteCache(cache_path)
+        cache.store('a', 1, 60)
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_visible_across_instances(self, cache_path):
+        """Test two handles on the same file (as two workers) share entries"""
+        first = SQLiteCache(cache_path)
+        second = SQLiteCache(cache_path)
+        first.store('shared', 'value', 60)
+        assert second.lookup('shared') == 'value'
+        second.discard('shared')
+        assert first.lookup('shared') is None
+
+    def test_visible_across_processes(self, cache_path):
+        """Test a value written by another process is seen here"""
+        cache = SQLiteCache(cache_path)
+        process = multiprocessing.get_context('spawn').Process(
+            target=_store_in_child, args=(cache_path,)
+        )
+        process.start()
+        process.join(30)
+        assert process.exitcode == 0
+        assert cache.lookup('child:key') == {'from': 'child'}
+
+
+class TestCacheManagerSharedBackend:
+    """Test CacheManager with the shared SQLite backend"""
+
+    @pytest.fixture
+    def manager(self, cache_path):
+        with patch('src.cache_manager.REDIS_AVAILABLE', False):
+            yield CacheManager(fallback_cache_size=100, shared_cache_path=cache_path)
+
+    def test_uses_shared_backend(self, manager):
+        """Test the shared backend is selected and reported"""
+        assert isinstance(manager.fallback_cache, SQLiteCache)
+        assert manager.is_shared is True
+        assert manager.get_stats()['type'] == 'shared'
+
+    def test_memory_backend_is_not_shared(self):
+        """Test the default in-memory fallback is per process"""
+        with patch('src.cache_manager.REDIS_AVAILABLE', False):
+            assert CacheManager().is_shared is False
+
+    def test_get_set_delete(self, manager):
+        """Test the same semantics as the Redis path"""
+        assert manager.set('k', {'a': 1}, 60) is True
+        assert manager.get('k') == {'a': 1}
+        assert manager.exists('k') is True
+        assert manager.delete('k') is True
+        assert manager.delete('k') is False
+        assert manager.get('k') is None
+
+    def test_delete_pattern_and_clear(self, manager):
+        """Test pattern deletes and clear"""
+        manager.set('fasting:sessions:1:a', 1)
+        manager.set('fasting:sessions:1:b', 1)
+        manager.set('other', 1)
+        assert manager.delete_pattern('fasting:sessions:1:*') == 2
+        assert manager.clear() is True
+        assert manager.get('other') is None
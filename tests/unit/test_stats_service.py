@@ -0,0 +1,94 @@
+"""
+Unit tests for StatsService range aggregation.
+"""
+
+from datetime import date
+from unittest.mock import Mock
+
+import pytest
+
+from services.stats_service import StatsService, bucket_start
+
+
+def _row(day, meal_time, calories, entries=1):
+    return {
+        'date': day, 'meal_time': meal_time, 'entries_count': entries,
+        'calories': calories, 'protein': 10.0, 'fat': 5.0, 'carbs': 2.0,
+        'fiber': 1.0, 'net_carbs': 1.0,
+    }
+
+
+@pytest.fixture
+def repository():
+    """Mock LogRepository returning a few rollup rows"""
+    repo = Mock()
+    repo.get_rollups.return_value = [
+        _row('2024-03-01', 'breakfast', 300.0),
+        _row('2024-03-01', 'lunch', 500.0, entries=2),
+        _row('2024-03-04', 'dinner', 700.0),
+    ]
+    return repo
+
+
+class TestBucketStart:
+    """Test bucket boundaries"""
+
+    def test_bucket_start(self):
+        """Test day, week and month bucket starts"""
+        day = date(2024, 3, 6)  # Wednesday
+        assert bucket_start(day, 'day') == day
+        assert bucket_start(day, 'week') == date(2024, 3, 4)
+        assert bucket_start(day, 'month') == date(2024, 3, 1)
+
+
+class TestStatsService:
+    """Test StatsService aggregation and validation"""
+
+    def test_aggregate_single_query(self, repository):
+        """Test a range is aggregated from one repository call"""
+        stats = StatsService(repository).aggregate(date(2024, 3, 1), date(2024, 3, 7))
+        repository.get_rollups.assert_called_once_with('2024-03-01', '2024-03-07')
+        assert stats['totals']['calories'] == 1500.0
+        assert stats['totals']['entries_count'] == 4
+        assert len(stats['buckets']) == 7
+        assert stats['buckets'][0]['calories'] == 800.0
+        assert stats['meal_breakdown']['lunch']['entries_count'] == 2
+        assert stats['meal_breakdown']['snack']['calories'] == 0.0
+
+    def test_aggregate_week_buckets(self, repository):
+        """Test weekly buckets fold days into Monday-based weeks"""
+        stats = StatsService(repository).aggregate(date(2024, 3, 1), date(2024, 3, 10), 'week')
+        assert [(b['start'], b['end']) for b in stats['buckets']] == [
+            ('2024-03-01', '2024-03-03'), ('2024-03-04', '2024-03-10')]
+        assert [b['calories'] for b in stats['buckets']] == [800.0, 700.0]
+
+    def test_aggregate_month_buckets_across_year(self):
+        """Test monthly buckets roll over December correctly"""
+        repo = Mock()
+        repo.get_rollups.return_value = []
+        stats = StatsService(repo).aggregate(date(2023, 11, 15), date(2024, 2, 1), 'month')
+        assert [b['start'] for b in stats['buckets']] == [
+            '2023-11-15', '2023-12-01', '2024-01-01', '2024-02-01']
+
+    def test_get_range_stats_rounds_and_averages(self, repository):
+        """Test the public payload is rounded and includes daily averages"""
+        success, stats, errors = StatsService(repository).get_range_stats(
+            '2024-03-01', '2024-03-04')
+        assert success and errors == []
+        assert stats['averages']['calories'] == 375.0
+        assert stats['totals']['entries_count'] == 4
+
+    @pytest.mark.parametrize('start,end,granularity', [
+        ('2024-03-05', '2024-03-01', None),
+        ('not-a-date', '2024-03-01', None),
+        (None, None, None),
+        ('2024-03-01', '2024-03-05', 'year'),
+        ('2020-01-01', '2024-01-01', 'month'),
+    ])
+    def test_get_range_stats_validation(self, repository, start, end, granularity):
+        """Test invalid parameters are rejected without querying"""
+        success, stats, errors = StatsService(repository).get_range_stats(start, end, granularity)
+        assert not success
+        assert stats is None
+        assert errors
+        repository.get_rollups.assert_not_called()
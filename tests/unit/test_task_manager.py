@@ -37,23 +37,142 @@ class TestTaskManager:
         mock_task.delay.assert_called_once_with('/path/to/backup')
     
     @patch('src.task_manager.CELERY_AVAILABLE', False)
-    def test_backup_database_sync(self):
-        """Test synchronous database backup"""
+    def test_backup_database_runs_in_background(self, tmp_path):
+        """Test backups without Celery run as a local task with progress"""
+        import sqlite3
+        source = str(tmp_path / 'source.db')
+        conn = sqlite3.connect(source)
+        conn.execute('CREATE TABLE t (x TEXT)')
+        conn.executemany('INSERT INTO t VALUES (?)', [('x' * 500,)] * 200)
+        conn.commit()
+        conn.close()
+
         manager = TaskManager()
-        # Use a temporary file path that exists
-        import tempfile
-        with tempfile.NamedTemporaryFile() as temp_file:
-            task_id = manager.backup_database(temp_file.name)
-            assert task_id.startswith('sync_backup_')
-    
+        with patch('src.task_manager.cache_manager.use_redis', False), \
+                patch('src.task_manager.Config.DATABASE', source):
+            task_id = manager.backup_database(str(tmp_path / 'backups' / 'backup.db'))
+            assert task_id.startswith('local_backup_')
+
+            deadline = time.time() + 10
+            status = manager.get_task_status(task_id)
+            while status['status'] not in ('SUCCESS', 'FAILED') and time.time() < deadline:
+                time.sleep(0.01)
+                status = manager.get_task_status(task_id)
+
+        assert status['status'] == 'SUCCESS'
+        assert status['progress'] == 100
+        assert status['result']['integrity'] == 'ok'
+        assert status['result']['backup_path'].endswith('backup.db')
+
     @patch('src.task_manager.CELERY_AVAILABLE', False)
-    def test_backup_database_sync_default_path(self):
-        """Test synchronous database backup with default path"""
+    def test_backup_database_background_failure(self):
+        """Test a failing local backup is reported as FAILED"""
         manager = TaskManager()
-        task_id = manager.backup_database()
-        
-        assert task_id.startswith('sync_backup_')
+        with patch('src.task_manager.cache_manager.use_redis', False), \
+                patch('src.task_manager.create_backup', side_effect=Exception('disk full')):
+            task_id = manager.backup_database()
+            deadline = time.time() + 10
+            status = manager.get_task_status(task_id)
+            while status['status'] != 'FAILED' and time.time() < deadline:
+                time.sleep(0.01)
+                status = manager.get_task_status(task_id)
+
+        assert status['status'] == 'FAILED'
+        assert status['error'] == 'disk full'
     
+    @patch('src.task_manager.CELERY_AVAILABLE', True)
+    def test_recompute_product_fields_runs_locally(self, tmp_path):
+        """Test stale products are recomputed in a local task even with Celery"""
+        import sqlite3
+        from src.nutrition_calculator import CALC_VERSION
+        db_path = str(tmp_path / 'products.db')
+        conn = sqlite3.connect(db_path)
+        with open('schema_v2.sql', 'r') as f:
+            conn.executescript(f.read())
+        conn.execute('DELETE FROM products')
+        conn.executemany(
+            'INSERT INTO products (name, protein_per_100g, fat_per_100g, carbs_per_100g) '
+            'VALUES (?, 20, 10, 5)',
+            [(f'Product {i}',) for i in range(5)]
+        )
+        conn.commit()
+        conn.close()
+
+        manager = TaskManager()
+        with patch('src.task_manager.cache_manager.use_redis', False), \
+                patch('src.task_manager.Config.DATABASE', db_path):
+            task_id = manager.recompute_product_fields()
+            assert task_id.startswith('local_recompute_products_')
+
+            deadline = time.time() + 10
+            status = manager.get_task_status(task_id)
+            while status['status'] not in ('SUCCESS', 'FAILED') and time.time() < deadline:
+                time.sleep(0.01)
+                status = manager.get_task_status(task_id)
+
+            assert status['status'] == 'SUCCESS'
+            assert status['result'] == {'updated': 5, 'calc_version': CALC_VERSION}
+            # Nothing left to do on the next start
+            assert manager.recompute_product_fields() is None
+
+    def test_snapshot_log_entries_runs_locally(self, tmp_path):
+        """Test log entries without a nutrition snapshot are backfilled in a local task"""
+        import sqlite3
+        db_path = str(tmp_path / 'log.db')
+        conn = sqlite3.connect(db_path)
+        with open('schema_v2.sql', 'r') as f:
+            conn.executescript(f.read())
+        product_id = conn.execute('SELECT MIN(id) FROM products').fetchone()[0]
+        conn.executemany(
+            "INSERT INTO log_entries (date, item_type, item_id, quantity_grams) "
+            "VALUES ('2024-01-15', 'product', ?, 100)",
+            [(product_id,)] * 3
+        )
+        conn.execute('UPDATE log_entries SET net_carbs = NULL')
+        conn.commit()
+        conn.close()
+
+        manager = TaskManager()
+        with patch('src.task_manager.cache_manager.use_redis', False), \
+                patch('src.task_manager.Config.DATABASE', db_path):
+            task_id = manager.snapshot_log_entries()
+            assert task_id.startswith('local_snapshot_log_')
+
+            deadline = time.time() + 10
+            status = manager.get_task_status(task_id)
+            while status['status'] not in ('SUCCESS', 'FAILED') and time.time() < deadline:
+                time.sleep(0.01)
+                status = manager.get_task_status(task_id)
+
+            assert status['status'] == 'SUCCESS'
+            assert status['result'] == {'updated': 3, 'full': False}
+            assert manager.snapshot_log_entries() is None
+
+    def test_apply_online_migrations_runs_locally(self, tmp_path):
+        """Test deferred schema migrations finish in a local task"""
+        import sqlite3
+        from src.migrations import LATEST_VERSION
+        db_path = str(tmp_path / 'migrate.db')
+        conn = sqlite3.connect(db_path)
+        with open('schema_v2.sql', 'r') as f:
+            conn.executescript(f.read())
+        conn.close()
+
+        manager = TaskManager()
+        with patch('src.task_manager.cache_manager.use_redis', False), \
+                patch('src.task_manager.Config.DATABASE', db_path):
+            task_id = manager.apply_online_migrations()
+            assert task_id.startswith('local_migrate_')
+
+            deadline = time.time() + 10
+            status = manager.get_task_status(task_id)
+            while status['status'] not in ('SUCCESS', 'FAILED') and time.time() < deadline:
+                time.sleep(0.01)
+                status = manager.get_task_status(task_id)
+
+            assert status['status'] == 'SUCCESS'
+            assert status['result'] == {'version': LATEST_VERSION}
+
     @patch('src.task_manager.CELERY_AVAILABLE', True)
     @patch('src.task_manager.optimize_database_task')
     def test_optimize_database_with_celery(self, mock_task):
@@ -210,10 +329,10 @@ class TestTaskManager:
         assert 'Celery unavailable' in status['error']
     
     @patch('src.task_manager.CELERY_AVAILABLE', False)
-    @patch('shutil.copy2')
-    def test_backup_database_sync_with_exception(self, mock_copy2):
+    @patch('src.task_manager.create_backup')
+    def test_backup_database_sync_with_exception(self, mock_create_backup):
         """Test synchronous database backup with exception"""
-        mock_copy2.side_effect = Exception("Permission denied")
+        mock_create_backup.side_effect = Exception("Permission denied")
         
         manager = TaskManager()
         
@@ -290,38 +409,40 @@ class TestCeleryTasks:
         assert callable(send_notification_task)
     
     @pytest.mark.skipif(not CELERY_AVAILABLE, reason="Celery not available")
-    @patch('src.task_manager.Config.DATABASE', '/test/db.sqlite')
-    @patch('shutil.copy2')
-    @patch('src.task_manager.logger')
-    def test_backup_database_task_success(self, mock_logger, mock_copy2):
+    @patch('src.task_manager.create_backup')
+    def test_backup_database_task_success(self, mock_create_backup):
         """Test backup_database_task success"""
         from src.task_manager import backup_database_task
-        
+
+        def fake_backup(backup_path=None, retention=None, progress=None):
+            progress(50)
+            return {'backup_path': backup_path, 'integrity': 'ok'}
+
+        mock_create_backup.side_effect = fake_backup
+
         # Mock the task's self object
         with patch.object(backup_database_task, 'update_state') as mock_update_state:
             result = backup_database_task('/test/backup.db')
-            
+
             assert result['status'] == 'success'
             assert result['backup_path'] == '/test/backup.db'
-            mock_copy2.assert_called_once_with('/test/db.sqlite', '/test/backup.db')
-            mock_logger.info.assert_called()
-    
+            mock_update_state.assert_called_with(state='PROGRESS', meta={'progress': 50})
+
     @pytest.mark.skipif(not CELERY_AVAILABLE, reason="Celery not available")
-    @patch('src.task_manager.Config.DATABASE', '/test/db.sqlite')
-    @patch('shutil.copy2')
-    @patch('src.task_manager.logger')
-    def test_backup_database_task_default_path(self, mock_logger, mock_copy2):
+    @patch('src.task_manager.create_backup')
+    def test_backup_database_task_default_path(self, mock_create_backup):
         """Test backup_database_task with default path"""
         from src.task_manager import backup_database_task
-        
+
+        mock_create_backup.return_value = {'backup_path': 'backups/nutrition_backup_x.db'}
+
         # Mock the task's self object
         with patch.object(backup_database_task, 'update_state') as mock_update_state:
             result = backup_database_task()
-            
+
             assert result['status'] == 'success'
             assert 'backup_path' in result
-            mock_copy2.assert_called_once()
-            mock_logger.info.assert_called()
+            assert mock_create_backup.call_args.kwargs['backup_path'] is None
     
     @pytest.mark.skipif(not CELERY_AVAILABLE, reason="Celery not available")
     @patch('src.task_manager.Config.DATABASE', '/test/db.sqlite')
@@ -409,14 +530,13 @@ class TestCeleryTasks:
             mock_logger.info.assert_called()
     
     @pytest.mark.skipif(not CELERY_AVAILABLE, reason="Celery not available")
-    @patch('src.task_manager.Config.DATABASE', '/test/db.sqlite')
-    @patch('shutil.copy2')
+    @patch('src.task_manager.create_backup')
     @patch('src.task_manager.logger')
-    def test_backup_database_task_exception(self, mock_logger, mock_copy2):
+    def test_backup_database_task_exception(self, mock_logger, mock_create_backup):
         """Test backup_database_task with exception"""
         from src.task_manager import backup_database_task
-        
-        mock_copy2.side_effect = Exception("Permission denied")
+
+        mock_create_backup.side_effect = Exception("Permission denied")
         
         # Mock the task's self object
         with patch.object(backup_database_task, 'update_state') as mock_update_state: